@@ -25,4 +25,7 @@ DEFAULT_MODULE = "The_Thornwood_Watch"
 # --- Web Interface Configuration ---
 # The port is read from the PORT environment variable, which is standard for most hosting providers.
 # It defaults to 8357 for local development.
-WEB_PORT = int(os.environ.get('PORT', 8357))
\ No newline at end of file
+WEB_PORT = int(os.environ.get('PORT', 8357))
+
+# Multi-session hosting (one game per browser session) is switched on by the deployment.
+ENABLE_MULTI_SESSION_WEB = os.environ.get('ENABLE_MULTI_SESSION_WEB', str(ENABLE_MULTI_SESSION_WEB)).lower() == 'true'
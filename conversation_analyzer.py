@@ -18,6 +18,8 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 
+from utils.file_operations import safe_read_json
+
 
 class ConversationAnalyzer:
     """Analyzes conversation structure and calculates compression requirements"""
@@ -37,8 +39,7 @@ class ConversationAnalyzer:
                 print(f"Conversation file not found: {self.conversation_file_path}")
                 return False
                 
-            with open(self.conversation_file_path, 'r', encoding='utf-8') as f:
-                self.conversation_data = json.load(f)
+            self.conversation_data = safe_read_json(self.conversation_file_path) or []
                 
             print(f"Loaded conversation with {len(self.conversation_data)} messages")
             return True
@@ -66,13 +66,13 @@ from core.managers.status_manager import (
     status_transitioning_location, status_updating_character, status_updating_party,
     status_updating_plot, status_advancing_time, status_processing_levelup
 )
-from utils.location_path_finder import LocationGraph
+from utils.location_path_finder import LocationGraph, get_location_graph
 from core.ai.conversation_utils import handle_module_conversation_segmentation
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Import token tracking
 try:
-    from utils.gemini_usage_tracker import track_response
+    from utils.usage_tracker import track_response
     USAGE_TRACKING_AVAILABLE = True
 except:
     USAGE_TRACKING_AVAILABLE = False
@@ -701,11 +701,9 @@ def process_action(action, party_tracker_data, location_data, conversation_histo
         current_area_name = party_tracker_data["worldConditions"]["currentArea"]
         current_area_id = party_tracker_data["worldConditions"]["currentAreaId"]
         
-        # Initialize location graph for validation
-        print("DEBUG: [LocationGraph] WARNING - Creating NEW LocationGraph instance in action_handler (not using global)")
-        location_graph = LocationGraph()
-        location_graph.load_module_data()
-        print(f"DEBUG: [LocationGraph] action_handler local graph loaded with {len(location_graph.nodes)} nodes")
+        # Shared location graph, rebuilt only if area files changed
+        location_graph = get_location_graph()
+        print(f"DEBUG: [LocationGraph] action_handler using shared graph with {len(location_graph.nodes)} nodes")
         
         # MAP: Convert area ID to entry location ID if needed (TW001 -> TW01)
         if not location_graph.validate_location_id_format(new_location_name_or_id):
@@ -973,8 +971,8 @@ Please use a valid location that exists in the current area ({current_area_id})
             def module_progress_callback(progress_data):
                 """Send module creation progress to web interface"""
                 try:
-                    from web.web_interface import socketio
-                    socketio.emit('module_creation_progress', progress_data)
+                    from utils.event_bus import publish_state_change
+                    publish_state_change('module_creation_progress', progress_data)
                     debug(f"MODULE_PROGRESS: Stage {progress_data.get('stage')}/{progress_data.get('total_stages')} - {progress_data.get('message')}", category="module_management")
                 except Exception as e:
                     debug(f"Could not emit progress update: {e}", category="module_management")
@@ -26,7 +26,7 @@ from core.ai.gemini_wrapper import OpenAI
 
 # Import OpenAI usage tracking (safe - won't break if fails)
 try:
-    from utils.gemini_usage_tracker import track_response
+    from utils.usage_tracker import track_response
     USAGE_TRACKING_AVAILABLE = True
 except:
     USAGE_TRACKING_AVAILABLE = False
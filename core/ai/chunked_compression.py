@@ -21,6 +21,7 @@ from ..generators.location_summarizer import LocationSummarizer
 from datetime import datetime
 from .chunked_compression_config import COMPRESSION_TRIGGER, CHUNK_SIZE
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.file_operations import safe_read_json
 
 # Set script name for logging
 set_script_name("chunked_compression")
@@ -99,22 +100,15 @@ def find_compression_range(conversation_data, summaries_after_chronicle, last_ch
     
     return first_summary_idx, last_summary_idx, summaries_to_compress
 
-def chunked_compression(conversation_file="modules/conversation_history/conversation_history.json"):
-    """Perform chunked compression - 8 transitions at a time
-    
-    Args:
-        conversation_file: Path to the conversation history file to compress
+def build_chunk_compression(conversation_data):
     """
+    Generate the next AI chronicle for a conversation without writing files.
     
-    info("STATE_CHANGE: Starting Chunked Conversation Compression", category="compression")
-    info("=" * 40, category="compression")
-    
-    # Load original conversation
-    with open(conversation_file, 'r', encoding='utf-8') as f:
-        conversation_data = json.load(f)
-    
-    info(f"Total messages: {len(conversation_data)}", category="compression")
-    
+    Returns:
+        dict with insert_position / last_msg_idx (the inclusive message range
+        the chronicle replaces), chronicle_message, result and the compressed
+        summaries, or None if no compression is due. Summarizer errors propagate.
+    """
     # Count summaries after last chronicle
     count, summaries_after_chronicle, last_chronicle_idx = count_summaries_after_last_chronicle(conversation_data)
     
@@ -126,7 +120,7 @@ def chunked_compression(conversation_file="modules/conversation_history/conversa
     
     if count < COMPRESSION_TRIGGER:
         info(f"COMPRESSION: No compression needed ({count} < {COMPRESSION_TRIGGER})", category="compression")
-        return False
+        return None
     
     info(f"COMPRESSION_TRIGGER: Compression triggered! Will compress oldest {CHUNK_SIZE} transitions.", category="compression")
     
@@ -137,7 +131,7 @@ def chunked_compression(conversation_file="modules/conversation_history/conversa
     
     if first_msg_idx is None:
         error("FAILURE: Failed to determine compression range", category="compression")
-        return False
+        return None
     
     info("COMPRESSION_DETAILS: Compression range:", category="compression")
     debug(f"  Messages to compress: {first_msg_idx} to {last_msg_idx}", category="compression")
@@ -152,56 +146,80 @@ def chunked_compression(conversation_file="modules/conversation_history/conversa
     # Initialize AI summarizer
     summarizer = LocationSummarizer()
     
+    # Generate AI chronicle for the 8 transitions
+    result = summarizer.summarize_transition_group(
+        start_location=summaries_to_compress[0]['location'],
+        end_location=summaries_to_compress[-1]['location'],
+        messages=messages_to_compress,
+        intermediate_locations=[s['location'] for s in summaries_to_compress[1:-1]]
+    )
+    
+    info("SUCCESS: AI Chronicle Generated!", category="compression")
+    debug(f"COMPRESSION_STATS: Original tokens: {result['original_tokens']:,}", category="compression")
+    debug(f"COMPRESSION_STATS: Summary tokens: {result['summary_tokens']:,}", category="compression")
+    debug(f"COMPRESSION_STATS: Compression ratio: {result['compression_ratio']:.1%}", category="compression")
+    debug(f"COMPRESSION_STATS: Events preserved: {result['events_preserved']}", category="compression")
+    
+    # Create AI chronicle message
+    ai_chronicle_message = {
+        "role": "assistant",
+        "content": f"=== LOCATION SUMMARY ===\n\n{result['summary']}"
+    }
+    
+    # Find where to insert the chronicle
+    # We want to preserve the location transition before our compression range
+    insert_position = first_msg_idx
+    
+    # Look backwards for a location transition message
+    for i in range(first_msg_idx - 1, max(0, first_msg_idx - 5), -1):
+        if conversation_data[i].get('role') == 'user' and 'Location transition:' in conversation_data[i].get('content', ''):
+            # Insert after this transition
+            insert_position = i + 1
+            break
+    
+    return {
+        "first_msg_idx": first_msg_idx,
+        "insert_position": insert_position,
+        "last_msg_idx": last_msg_idx,
+        "chronicle_message": ai_chronicle_message,
+        "result": result,
+        "count": count,
+        "summaries_to_compress": summaries_to_compress,
+        "messages_to_compress": messages_to_compress,
+    }
+
+def chunked_compression(conversation_file="modules/conversation_history/conversation_history.json"):
+    """Perform chunked compression - 8 transitions at a time
+    
+    Args:
+        conversation_file: Path to the conversation history file to compress
+    """
+    
+    info("STATE_CHANGE: Starting Chunked Conversation Compression", category="compression")
+    info("=" * 40, category="compression")
+    
+    # Load original conversation
+    # Read through file_operations so journaled (not yet compacted) messages are included
+    conversation_data = safe_read_json(conversation_file) or []
+    
+    info(f"Total messages: {len(conversation_data)}", category="compression")
+    
     try:
-        # Generate AI chronicle for the 8 transitions
-        result = summarizer.summarize_transition_group(
-            start_location=summaries_to_compress[0]['location'],
-            end_location=summaries_to_compress[-1]['location'],
-            messages=messages_to_compress,
-            intermediate_locations=[s['location'] for s in summaries_to_compress[1:-1]]
-        )
+        plan = build_chunk_compression(conversation_data)
+        if plan is None:
+            return False
         
-        info("SUCCESS: AI Chronicle Generated!", category="compression")
-        debug(f"COMPRESSION_STATS: Original tokens: {result['original_tokens']:,}", category="compression")
-        debug(f"COMPRESSION_STATS: Summary tokens: {result['summary_tokens']:,}", category="compression")
-        debug(f"COMPRESSION_STATS: Compression ratio: {result['compression_ratio']:.1%}", category="compression")
-        debug(f"COMPRESSION_STATS: Events preserved: {result['events_preserved']}", category="compression")
+        insert_position = plan["insert_position"]
+        last_msg_idx = plan["last_msg_idx"]
+        result = plan["result"]
+        count = plan["count"]
+        summaries_to_compress = plan["summaries_to_compress"]
+        messages_to_compress = plan["messages_to_compress"]
+        first_msg_idx = plan["first_msg_idx"]
         
         # Create the compressed conversation
         compressed_conversation = conversation_data.copy()
-        
-        # Create AI chronicle message
-        ai_chronicle_message = {
-            "role": "assistant",
-            "content": f"=== LOCATION SUMMARY ===\n\n{result['summary']}"
-        }
-        
-        # Find where to insert the chronicle
-        # We want to preserve the location transition before our compression range
-        insert_position = first_msg_idx
-        
-        # Look backwards for a location transition message
-        for i in range(first_msg_idx - 1, max(0, first_msg_idx - 5), -1):
-            if compressed_conversation[i].get('role') == 'user' and 'Location transition:' in compressed_conversation[i].get('content', ''):
-                # Insert after this transition
-                insert_position = i + 1
-                break
-        
-        # Replace the range with the chronicle
-        # But preserve any location transition at the end
-        end_transition_idx = None
-        for i in range(last_msg_idx + 1, min(len(compressed_conversation), last_msg_idx + 3)):
-            if compressed_conversation[i].get('role') == 'user' and 'Location transition:' in compressed_conversation[i].get('content', ''):
-                end_transition_idx = i
-                break
-        
-        # Perform the replacement
-        if end_transition_idx:
-            # Keep the transition after our range
-            compressed_conversation[insert_position:last_msg_idx + 1] = [ai_chronicle_message]
-        else:
-            # No transition to preserve
-            compressed_conversation[insert_position:last_msg_idx + 1] = [ai_chronicle_message]
+        compressed_conversation[insert_position:last_msg_idx + 1] = [plan["chronicle_message"]]
         
         # Save files
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
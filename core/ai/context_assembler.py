@@ -0,0 +1,289 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# CONTEXT_ASSEMBLER.PY - TOKEN-BUDGETED DM CONTEXT
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Prompt Size Control
+#
+# update_conversation_history() and update_character_data() re-inject the
+# location, plot, map, module, campaign and character blocks every turn and
+# the rolling history grows with the campaign. This module builds the list
+# of messages actually sent to the DM model from that history, keeping each
+# section inside a token budget.
+#
+# SECTIONS (classified by the same markers conversation_utils injects):
+# - system:        the primary system prompt (never trimmed)
+# - world_state:   location, world state, plot, module and map blocks
+# - characters:    player and NPC character data
+# - summaries:     campaign chronicles, location and module summaries
+# - recent_turns:  everything else - the rolling conversation
+#
+# TRIMMING ORDER:
+# Within a section the lowest-priority messages go first (map before plot
+# before location; NPC sheets before player sheets; oldest summaries and
+# turns first). The latest user message is always kept. Budget left unused
+# by the fixed sections flows to recent_turns, so the total is bounded.
+#
+# STABILITY:
+# Recent turns are cut in steps (down to RECENT_TRIM_TARGET of the budget)
+# and the cut point is reused until the budget is exceeded again, so the
+# sent prefix - and the converted-message memo - stays stable between turns.
+#
+# The persisted conversation history is never modified.
+# ============================================================================
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.token_estimator import TokenEstimator
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name(__name__)
+
+SECTIONS = ("system", "world_state", "characters", "summaries", "recent_turns")
+
+DEFAULT_CONTEXT_BUDGET = {
+    "total": 120000,
+    "system": 40000,
+    "world_state": 12000,
+    "characters": 16000,
+    "summaries": 12000,
+}
+
+# Fraction of the recent_turns budget kept after a trim (hysteresis)
+RECENT_TRIM_TARGET = 0.8
+
+# (marker, section, priority) - lower priority is dropped first
+SYSTEM_MARKERS = [
+    ("Here's the updated character data for", "characters", 2),
+    ("Here's the NPC data for", "characters", 1),
+    ("Current Location:", "world_state", 5),
+    ("No active location data available", "world_state", 5),
+    ("WORLD STATE CONTEXT:", "world_state", 4),
+    ("=== ADVENTURE PLOT STATUS ===", "world_state", 3),
+    ("Here's the current plot data:", "world_state", 3),
+    ("Here's the module data:", "world_state", 2),
+    ("Here's the current map data:", "world_state", 1),
+    ("=== CAMPAIGN CONTEXT ===", "summaries", 1),
+    ("=== LOCATION SUMMARY ===", "summaries", 2),
+    ("Module summary:", "summaries", 2),
+]
+
+
+def _config_budget() -> Dict[str, int]:
+    try:
+        import config
+        budget = dict(DEFAULT_CONTEXT_BUDGET)
+        budget.update(getattr(config, "DM_CONTEXT_BUDGET", {}))
+        return budget
+    except ImportError:
+        return dict(DEFAULT_CONTEXT_BUDGET)
+
+
+def classify_message(message: Dict, index: int) -> Tuple[str, int]:
+    """Return (section, priority) for a message"""
+    role = message.get("role")
+    content = message.get("content", "") or ""
+    if role == "system":
+        if index == 0:
+            return "system", 10
+        for marker, section, priority in SYSTEM_MARKERS:
+            if marker in content:
+                return section, priority
+    elif role == "user" and content.startswith("Module summary:"):
+        return "summaries", 2
+    return "recent_turns", 0
+
+
+class ContextAssembler:
+    """Builds the budgeted DM context and keeps estimator calibration"""
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, budget: Optional[Dict[str, int]] = None):
+        self.budget = budget or _config_budget()
+        self.estimator = TokenEstimator()
+        # Measured prompt tokens / estimated tokens, updated from real usage
+        self.calibration = 1.0
+        self._token_cache: "OrderedDict[str, int]" = OrderedDict()
+        self._recent_cut: Optional[Tuple[str, str]] = None
+        self._lock = threading.Lock()
+        self.last_breakdown: Dict = {}
+
+    # ------------------------------------------------------------------
+    # Estimation
+    # ------------------------------------------------------------------
+
+    def _raw_tokens(self, content: str) -> int:
+        cached = self._token_cache.get(content)
+        if cached is not None:
+            self._token_cache.move_to_end(content)
+            return cached
+        tokens = TokenEstimator.estimate_tokens_from_text(content) if content else 0
+        self._token_cache[content] = tokens
+        if len(self._token_cache) > self.CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return tokens
+
+    def estimate(self, message: Dict) -> int:
+        """Calibrated token estimate for one message"""
+        return int(self._raw_tokens(message.get("content", "") or "") * self.calibration) + 4
+
+    def calibrate(self, estimated_tokens: int, actual_prompt_tokens: int):
+        """Fold a measured prompt size into the calibration factor (EMA)"""
+        if estimated_tokens <= 0 or actual_prompt_tokens <= 0:
+            return
+        with self._lock:
+            raw_estimate = estimated_tokens / self.calibration
+            self.estimator.calibrate_estimates(actual_prompt_tokens, estimated_tokens, context="dm_context")
+            ratio = actual_prompt_tokens / raw_estimate
+            self.calibration = 0.7 * self.calibration + 0.3 * ratio
+            debug(f"STATE_CHANGE: Context estimator calibration {self.calibration:.3f} "
+                  f"(estimated {estimated_tokens}, actual {actual_prompt_tokens})", category="conversation_management")
+
+    # ------------------------------------------------------------------
+    # Assembly
+    # ------------------------------------------------------------------
+
+    def _trim_section(self, items: List[Tuple[int, int, int]], budget: int) -> Tuple[set, int]:
+        """items: (index, priority, tokens). Drop lowest priority, then oldest. Returns (dropped, kept_tokens)."""
+        total = sum(tokens for _, _, tokens in items)
+        dropped = set()
+        for index, _, tokens in sorted(items, key=lambda item: (item[1], item[0])):
+            if total <= budget:
+                break
+            dropped.add(index)
+            total -= tokens
+        return dropped, total
+
+    def _trim_recent(self, messages: List[Dict], items: List[Tuple[int, int, int]], budget: int) -> Tuple[set, int]:
+        """Keep the newest turns; reuse the previous cut point while it still fits"""
+        if not items:
+            return set(), 0
+        total = sum(tokens for _, _, tokens in items)
+        if total <= budget:
+            self._recent_cut = None
+            return set(), total
+
+        # Suffix sums: tokens kept if the context starts at position i
+        suffix = [0] * (len(items) + 1)
+        for position in range(len(items) - 1, -1, -1):
+            suffix[position] = suffix[position + 1] + items[position][2]
+
+        start = None
+        if self._recent_cut is not None:
+            for position, (index, _, _) in enumerate(items):
+                message = messages[index]
+                if (message.get("role"), message.get("content", "")) == self._recent_cut:
+                    if suffix[position] <= budget:
+                        start = position
+                    break
+        if start is None:
+            target = budget * RECENT_TRIM_TARGET
+            start = len(items) - 1  # Always keep the latest message
+            while start > 0 and suffix[start - 1] <= target:
+                start -= 1
+            first_kept = messages[items[start][0]]
+            self._recent_cut = (first_kept.get("role"), first_kept.get("content", ""))
+
+        dropped = {index for index, _, _ in items[:start]}
+        return dropped, suffix[start]
+
+    def assemble(self, conversation_history: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Build the budgeted message list for the DM call.
+
+        Returns:
+            (messages, breakdown) where breakdown maps each section to
+            {"tokens", "budget", "messages", "dropped"} plus totals
+        """
+        with self._lock:
+            sections: Dict[str, List[Tuple[int, int, int]]] = {name: [] for name in SECTIONS}
+            for index, message in enumerate(conversation_history):
+                section, priority = classify_message(message, index)
+                sections[section].append((index, priority, self.estimate(message)))
+
+            breakdown = {}
+            dropped = set()
+            used = 0
+            for name in ("system", "world_state", "characters", "summaries"):
+                items = sections[name]
+                if name == "system":
+                    section_dropped, tokens = set(), sum(item[2] for item in items)
+                else:
+                    section_dropped, tokens = self._trim_section(items, self.budget[name])
+                dropped |= section_dropped
+                used += tokens
+                breakdown[name] = {"tokens": tokens, "budget": self.budget.get(name, 0),
+                                   "messages": len(items) - len(section_dropped), "dropped": len(section_dropped)}
+
+            recent_budget = max(0, self.budget["total"] - used)
+            recent_dropped, recent_tokens = self._trim_recent(conversation_history, sections["recent_turns"], recent_budget)
+            dropped |= recent_dropped
+            breakdown["recent_turns"] = {"tokens": recent_tokens, "budget": recent_budget,
+                                         "messages": len(sections["recent_turns"]) - len(recent_dropped),
+                                         "dropped": len(recent_dropped)}
+
+            messages = [message for index, message in enumerate(conversation_history) if index not in dropped]
+            breakdown["total"] = {"tokens": used + recent_tokens, "budget": self.budget["total"],
+                                  "messages": len(messages), "dropped": len(dropped)}
+            breakdown["calibration"] = round(self.calibration, 3)
+            self.last_breakdown = breakdown
+            return messages, breakdown
+
+
+def format_breakdown(breakdown: Dict) -> str:
+    parts = []
+    for name in SECTIONS + ("total",):
+        section = breakdown.get(name)
+        if not section:
+            continue
+        dropped = f", -{section['dropped']}" if section["dropped"] else ""
+        parts.append(f"{name} {section['tokens'] / 1000:.1f}k/{section['budget'] / 1000:.0f}k{dropped}")
+    return " | ".join(parts)
+
+
+_assembler = None
+_assembler_lock = threading.Lock()
+
+
+def get_context_assembler() -> ContextAssembler:
+    """Return the process-wide DM context assembler"""
+    global _assembler
+    with _assembler_lock:
+        if _assembler is None:
+            _assembler = ContextAssembler()
+        return _assembler
+
+
+def assemble_dm_context(conversation_history: List[Dict]) -> Tuple[List[Dict], Dict]:
+    """Budget the DM context and log the per-section breakdown"""
+    messages, breakdown = get_context_assembler().assemble(conversation_history)
+    print(f"DEBUG: CONTEXT BUDGET - {format_breakdown(breakdown)}")
+    debug(f"STATE_CHANGE: DM context {format_breakdown(breakdown)}", category="conversation_management")
+    return messages, breakdown
+
+
+if __name__ == "__main__":
+    # Prompt size stays bounded as a synthetic campaign grows
+    assembler = ContextAssembler()
+    history = [{"role": "system", "content": "You are the Dungeon Master. " * 3700}]
+    history.append({"role": "system", "content": "Current Location:\n" + "stone hall " * 300})
+    history.append({"role": "system", "content": "Here's the current map data:\n" + "room " * 4000})
+    history.append({"role": "system", "content": "Here's the updated character data for Thane:\n" + "stat " * 2000})
+    for turn in range(1, 3001):
+        history.append({"role": "user", "content": f"Turn {turn}: I search the room carefully for traps."})
+        history.append({"role": "assistant", "content": "The dust settles as you search. " * 40})
+        if turn % 500 == 0:
+            history.append({"role": "system", "content": "=== CAMPAIGN CONTEXT ===\n" + "chronicle " * 3000})
+            messages, breakdown = assembler.assemble(history)
+            raw = sum(assembler.estimate(m) for m in history)
+            print(f"turn {turn:5d}: history {raw / 1000:7.1f}k tokens -> sent {breakdown['total']['tokens'] / 1000:6.1f}k "
+                  f"({len(messages)} of {len(history)} messages)")
+    print(format_breakdown(breakdown))
@@ -82,6 +82,7 @@ import re
 from utils.module_path_manager import ModulePathManager
 from utils.encoding_utils import safe_json_load
 from utils.plot_formatting import format_plot_for_ai
+from utils.character_render_cache import character_render_cache
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -573,94 +574,68 @@ def update_conversation_history(conversation_history, party_tracker_data, plot_d
 
     return new_history
 
-def update_character_data(conversation_history, party_tracker_data):
-    updated_history = conversation_history.copy()
+def render_player_sheet(member_data, name):
+    """
+    Format a party member's sheet as the "Here's the updated character data"
+    system message. Returns None if the file did not contain a dictionary.
+    Used through character_render_cache, so it only runs when the file changes.
+    """
+    # Validate that member_data is a dictionary
+    if not isinstance(member_data, dict):
+        return None
 
-    # Remove old character data
-    updated_history = [
-        entry
-        for entry in updated_history
-        if not (
-            entry["role"] == "system"
-            and ("Here's the updated character data for" in entry["content"]
-                 or "Here's the NPC data for" in entry["content"])
-        )
-    ]
+    # Format equipment list with quantities
+    equipment_list = []
+    for item in member_data['equipment']:
+        item_description = f"{item['item_name']} ({item['item_type']})"
+        if item['quantity'] > 1:
+            item_description = f"{item_description} x{item['quantity']}"
+        equipment_list.append(item_description)
+
+    equipment_str = ", ".join(equipment_list)
+
+    # Handle backgroundFeature which might be None or bool
+    bg_feature = member_data.get('backgroundFeature')
+    bg_feature_name = 'None'
+    if isinstance(bg_feature, dict) and 'name' in bg_feature:
+        bg_feature_name = bg_feature['name']
+
+
+    # Calculate skill modifiers for display
+    skills_display = ""
+    if isinstance(member_data['skills'], dict):
+        # Legacy format - use pre-calculated values
+        skills_display = ', '.join(f"{skill} +{bonus}" if bonus >= 0 else f"{skill} {bonus}" 
+                                 for skill, bonus in member_data['skills'].items())
+    else:
+        # Array format - calculate modifiers for proficient skills
+        skill_abilities = {
+            'Acrobatics': 'dexterity', 'Animal Handling': 'wisdom', 
+            'Arcana': 'intelligence', 'Athletics': 'strength',
+            'Deception': 'charisma', 'History': 'intelligence',
+            'Insight': 'wisdom', 'Intimidation': 'charisma',
+            'Investigation': 'intelligence', 'Medicine': 'wisdom',
+            'Nature': 'intelligence', 'Perception': 'wisdom',
+            'Performance': 'charisma', 'Persuasion': 'charisma',
+            'Religion': 'intelligence', 'Sleight of Hand': 'dexterity',
+            'Stealth': 'dexterity', 'Survival': 'wisdom'
+        }
+
+        skill_displays = []
+        for skill in member_data.get('skills', []):
+            if skill in skill_abilities:
+                ability_name = skill_abilities[skill]
+                ability_score = member_data['abilities'].get(ability_name, 10)
+                ability_mod = (ability_score - 10) // 2
+                modifier = ability_mod + member_data['proficiencyBonus']
+                if modifier >= 0:
+                    skill_displays.append(f"{skill} +{modifier}")
+                else:
+                    skill_displays.append(f"{skill} {modifier}")
+        skills_display = ', '.join(skill_displays) if skill_displays else 'none'
 
-    if party_tracker_data:
-        character_data = []
-        # Get current module from party tracker for consistent path resolution
-        current_module = party_tracker_data.get("module", "").replace(" ", "_")
-        path_manager = ModulePathManager(current_module)
-        
-        # Process player characters
-        for member in party_tracker_data["partyMembers"]:
-            # Normalize name for file access
-            from updates.update_character_info import normalize_character_name
-            normalized_member = normalize_character_name(member)
-            name = member.lower()
-            member_file = path_manager.get_character_path(normalized_member)
-            try:
-                with open(member_file, "r", encoding="utf-8") as file:
-                    member_data = json.load(file)
-                    
-                    # Validate that member_data is a dictionary
-                    if not isinstance(member_data, dict):
-                        print(f"Warning: {member_file} contains corrupted data (not a dictionary). Skipping.")
-                        continue
-                    
-                    # Format equipment list with quantities
-                    equipment_list = []
-                    for item in member_data['equipment']:
-                        item_description = f"{item['item_name']} ({item['item_type']})"
-                        if item['quantity'] > 1:
-                            item_description = f"{item_description} x{item['quantity']}"
-                        equipment_list.append(item_description)
-                    
-                    equipment_str = ", ".join(equipment_list)
-
-                    # Handle backgroundFeature which might be None or bool
-                    bg_feature = member_data.get('backgroundFeature')
-                    bg_feature_name = 'None'
-                    if isinstance(bg_feature, dict) and 'name' in bg_feature:
-                        bg_feature_name = bg_feature['name']
-                    
-                    
-                    # Calculate skill modifiers for display
-                    skills_display = ""
-                    if isinstance(member_data['skills'], dict):
-                        # Legacy format - use pre-calculated values
-                        skills_display = ', '.join(f"{skill} +{bonus}" if bonus >= 0 else f"{skill} {bonus}" 
-                                                 for skill, bonus in member_data['skills'].items())
-                    else:
-                        # Array format - calculate modifiers for proficient skills
-                        skill_abilities = {
-                            'Acrobatics': 'dexterity', 'Animal Handling': 'wisdom', 
-                            'Arcana': 'intelligence', 'Athletics': 'strength',
-                            'Deception': 'charisma', 'History': 'intelligence',
-                            'Insight': 'wisdom', 'Intimidation': 'charisma',
-                            'Investigation': 'intelligence', 'Medicine': 'wisdom',
-                            'Nature': 'intelligence', 'Perception': 'wisdom',
-                            'Performance': 'charisma', 'Persuasion': 'charisma',
-                            'Religion': 'intelligence', 'Sleight of Hand': 'dexterity',
-                            'Stealth': 'dexterity', 'Survival': 'wisdom'
-                        }
-                        
-                        skill_displays = []
-                        for skill in member_data.get('skills', []):
-                            if skill in skill_abilities:
-                                ability_name = skill_abilities[skill]
-                                ability_score = member_data['abilities'].get(ability_name, 10)
-                                ability_mod = (ability_score - 10) // 2
-                                modifier = ability_mod + member_data['proficiencyBonus']
-                                if modifier >= 0:
-                                    skill_displays.append(f"{skill} +{modifier}")
-                                else:
-                                    skill_displays.append(f"{skill} {modifier}")
-                        skills_display = ', '.join(skill_displays) if skill_displays else 'none'
-                    
-                    # Format character data
-                    formatted_data = f"""
+    # Format character data
+    formatted_data = f"""
 CHAR: {member_data['name']}
 TYPE: {member_data['character_type'].capitalize()} | LVL: {member_data['level']} | RACE: {member_data['race']} | CLASS: {member_data['class']} | ALIGN: {member_data['alignment'][:2].upper()} | BG: {member_data['background']}
 AC: {member_data['armorClass']} | SPD: {member_data['speed']}
@@ -693,81 +668,69 @@ IDEALS: {member_data['ideals']}
 BONDS: {member_data['bonds']}
 FLAWS: {member_data['flaws']}
 """
-                    character_message = f"Here's the updated character data for {name}:\n{formatted_data}\n"
-                    character_data.append({"role": "system", "content": character_message})
-            except FileNotFoundError:
-                print(f"{member_file} not found. Skipping JSON data for {name}.")
-            except json.JSONDecodeError:
-                print(f"{member_file} has an invalid JSON format. Skipping JSON data for {name}.")
-        
-        # Process NPCs
-        for npc in party_tracker_data.get("partyNPCs", []):
-            npc_name = npc['name']
-            npc_file = path_manager.get_character_path(npc_name)
-            try:
-                with open(npc_file, "r", encoding="utf-8") as file:
-                    npc_data = json.load(file)
-                    
-                    # Validate that npc_data is a dictionary
-                    if not isinstance(npc_data, dict):
-                        print(f"Warning: {npc_file} contains corrupted data (not a dictionary). Skipping.")
-                        continue
-                    
-                    # Format equipment list with quantities
-                    equipment_list = []
-                    for item in npc_data['equipment']:
-                        item_description = f"{item['item_name']} ({item['item_type']})"
-                        if item['quantity'] > 1:
-                            item_description = f"{item_description} x{item['quantity']}"
-                        equipment_list.append(item_description)
-                    
-                    equipment_str = ", ".join(equipment_list)
-                    
-                    # Handle backgroundFeature which might be None or bool
-                    bg_feature = npc_data.get('backgroundFeature')
-                    bg_feature_name = 'None'
-                    if isinstance(bg_feature, dict) and 'name' in bg_feature:
-                        bg_feature_name = bg_feature['name']
-
-                    # Calculate skill modifiers for NPC display
-                    npc_skills_display = ""
-                    if isinstance(npc_data.get('skills', {}), dict):
-                        # NPCs typically use dict format with pre-calculated values
-                        npc_skills_display = ', '.join(f"{skill} +{bonus}" if bonus >= 0 else f"{skill} {bonus}" 
-                                                     for skill, bonus in npc_data['skills'].items())
-                    elif isinstance(npc_data.get('skills', []), list):
-                        # In case NPCs use array format, calculate modifiers
-                        skill_abilities = {
-                            'Acrobatics': 'dexterity', 'Animal Handling': 'wisdom', 
-                            'Arcana': 'intelligence', 'Athletics': 'strength',
-                            'Deception': 'charisma', 'History': 'intelligence',
-                            'Insight': 'wisdom', 'Intimidation': 'charisma',
-                            'Investigation': 'intelligence', 'Medicine': 'wisdom',
-                            'Nature': 'intelligence', 'Perception': 'wisdom',
-                            'Performance': 'charisma', 'Persuasion': 'charisma',
-                            'Religion': 'intelligence', 'Sleight of Hand': 'dexterity',
-                            'Stealth': 'dexterity', 'Survival': 'wisdom'
-                        }
-                        
-                        skill_displays = []
-                        for skill in npc_data.get('skills', []):
-                            if skill in skill_abilities:
-                                ability_name = skill_abilities[skill]
-                                ability_score = npc_data['abilities'].get(ability_name, 10)
-                                ability_mod = (ability_score - 10) // 2
-                                modifier = ability_mod + npc_data.get('proficiencyBonus', 2)
-                                if modifier >= 0:
-                                    skill_displays.append(f"{skill} +{modifier}")
-                                else:
-                                    skill_displays.append(f"{skill} {modifier}")
-                        npc_skills_display = ', '.join(skill_displays) if skill_displays else 'none'
-                    else:
-                        npc_skills_display = 'none'
-
-                    # Format NPC data (using same schema as players)
-                    formatted_data = f"""
+    return f"Here's the updated character data for {name}:\n{formatted_data}\n"
+
+def render_npc_sheet(npc_data, role):
+    """Format a party NPC's sheet as the "Here's the NPC data" system message (None if not a dictionary)"""
+    # Validate that npc_data is a dictionary
+    if not isinstance(npc_data, dict):
+        return None
+
+    # Format equipment list with quantities
+    equipment_list = []
+    for item in npc_data['equipment']:
+        item_description = f"{item['item_name']} ({item['item_type']})"
+        if item['quantity'] > 1:
+            item_description = f"{item_description} x{item['quantity']}"
+        equipment_list.append(item_description)
+
+    equipment_str = ", ".join(equipment_list)
+
+    # Handle backgroundFeature which might be None or bool
+    bg_feature = npc_data.get('backgroundFeature')
+    bg_feature_name = 'None'
+    if isinstance(bg_feature, dict) and 'name' in bg_feature:
+        bg_feature_name = bg_feature['name']
+
+    # Calculate skill modifiers for NPC display
+    npc_skills_display = ""
+    if isinstance(npc_data.get('skills', {}), dict):
+        # NPCs typically use dict format with pre-calculated values
+        npc_skills_display = ', '.join(f"{skill} +{bonus}" if bonus >= 0 else f"{skill} {bonus}" 
+                                     for skill, bonus in npc_data['skills'].items())
+    elif isinstance(npc_data.get('skills', []), list):
+        # In case NPCs use array format, calculate modifiers
+        skill_abilities = {
+            'Acrobatics': 'dexterity', 'Animal Handling': 'wisdom', 
+            'Arcana': 'intelligence', 'Athletics': 'strength',
+            'Deception': 'charisma', 'History': 'intelligence',
+            'Insight': 'wisdom', 'Intimidation': 'charisma',
+            'Investigation': 'intelligence', 'Medicine': 'wisdom',
+            'Nature': 'intelligence', 'Perception': 'wisdom',
+            'Performance': 'charisma', 'Persuasion': 'charisma',
+            'Religion': 'intelligence', 'Sleight of Hand': 'dexterity',
+            'Stealth': 'dexterity', 'Survival': 'wisdom'
+        }
+
+        skill_displays = []
+        for skill in npc_data.get('skills', []):
+            if skill in skill_abilities:
+                ability_name = skill_abilities[skill]
+                ability_score = npc_data['abilities'].get(ability_name, 10)
+                ability_mod = (ability_score - 10) // 2
+                modifier = ability_mod + npc_data.get('proficiencyBonus', 2)
+                if modifier >= 0:
+                    skill_displays.append(f"{skill} +{modifier}")
+                else:
+                    skill_displays.append(f"{skill} {modifier}")
+        npc_skills_display = ', '.join(skill_displays) if skill_displays else 'none'
+    else:
+        npc_skills_display = 'none'
+
+    # Format NPC data (using same schema as players)
+    formatted_data = f"""
 NPC: {npc_data['name']}
-ROLE: {npc['role']} | TYPE: {npc_data['character_type'].capitalize()} | LVL: {npc_data['level']} | RACE: {npc_data['race']} | CLASS: {npc_data['class']} | ALIGN: {npc_data['alignment'][:2].upper()} | BG: {npc_data['background']}
+ROLE: {role} | TYPE: {npc_data['character_type'].capitalize()} | LVL: {npc_data['level']} | RACE: {npc_data['race']} | CLASS: {npc_data['class']} | ALIGN: {npc_data['alignment'][:2].upper()} | BG: {npc_data['background']}
 AC: {npc_data['armorClass']} | SPD: {npc_data['speed']}
 STATUS: {npc_data['status']} | CONDITION: {npc_data['condition']} | AFFECTED: {', '.join(npc_data['condition_affected'])}
 STATS: STR {npc_data['abilities']['strength']}, DEX {npc_data['abilities']['dexterity']}, CON {npc_data['abilities']['constitution']}, INT {npc_data['abilities']['intelligence']}, WIS {npc_data['abilities']['wisdom']}, CHA {npc_data['abilities']['charisma']}
@@ -798,8 +761,56 @@ IDEALS: {npc_data['ideals']}
 BONDS: {npc_data['bonds']}
 FLAWS: {npc_data['flaws']}
 """
-                    npc_message = f"Here's the NPC data for {npc_data['name']}:\n{formatted_data}\n"
-                    character_data.append({"role": "system", "content": npc_message})
+    return f"Here's the NPC data for {npc_data['name']}:\n{formatted_data}\n"
+
+def update_character_data(conversation_history, party_tracker_data):
+    updated_history = conversation_history.copy()
+
+    # Remove old character data
+    updated_history = [
+        entry
+        for entry in updated_history
+        if not (
+            entry["role"] == "system"
+            and ("Here's the updated character data for" in entry["content"]
+                 or "Here's the NPC data for" in entry["content"])
+        )
+    ]
+
+    if party_tracker_data:
+        character_data = []
+        # Get current module from party tracker for consistent path resolution
+        current_module = party_tracker_data.get("module", "").replace(" ", "_")
+        path_manager = ModulePathManager(current_module)
+        
+        # Process player characters
+        for member in party_tracker_data["partyMembers"]:
+            # Normalize name for file access
+            from updates.update_character_info import normalize_character_name
+            normalized_member = normalize_character_name(member)
+            name = member.lower()
+            member_file = path_manager.get_character_path(normalized_member)
+            try:
+                character_message = character_render_cache.render_file(member_file, render_player_sheet, name)
+                if character_message is None:
+                    print(f"Warning: {member_file} contains corrupted data (not a dictionary). Skipping.")
+                    continue
+                character_data.append({"role": "system", "content": character_message})
+            except FileNotFoundError:
+                print(f"{member_file} not found. Skipping JSON data for {name}.")
+            except json.JSONDecodeError:
+                print(f"{member_file} has an invalid JSON format. Skipping JSON data for {name}.")
+        
+        # Process NPCs
+        for npc in party_tracker_data.get("partyNPCs", []):
+            npc_name = npc['name']
+            npc_file = path_manager.get_character_path(npc_name)
+            try:
+                npc_message = character_render_cache.render_file(npc_file, render_npc_sheet, npc['role'])
+                if npc_message is None:
+                    print(f"Warning: {npc_file} contains corrupted data (not a dictionary). Skipping.")
+                    continue
+                character_data.append({"role": "system", "content": npc_message})
             except FileNotFoundError:
                 print(f"{npc_file} not found. Skipping JSON data for NPC {npc['name']}.")
             except json.JSONDecodeError:
@@ -56,7 +56,7 @@ from core.ai.gemini_wrapper import OpenAI
 
 # Import OpenAI usage tracking (safe - won't break if fails)
 try:
-    from utils.gemini_usage_tracker import track_response
+    from utils.usage_tracker import track_response
     USAGE_TRACKING_AVAILABLE = True
 except:
     USAGE_TRACKING_AVAILABLE = False
@@ -360,20 +360,13 @@ def clean_old_summaries_from_conversation(conversation_history):
     
     return cleaned_history
 
-def compress_conversation_history_on_transition(conversation_history, leaving_location_name):
+def find_location_compression_range(conversation_history):
     """
-    Compress conversation history when transitioning out of a location.
-    Creates a summary of the location being left and removes those messages.
-    Uses location transition messages as markers.
-    Returns the compressed conversation history.
+    Locate the messages to fold into a location summary.
+    Returns (previous_marker_index, transition_index), or None if the history
+    has no location transition. Messages strictly between the two indices are
+    the ones being summarized.
     """
-    status_compressing_history()
-    debug_print(f"Compressing conversation history when leaving {leaving_location_name}")
-    debug_print(f"Total messages in history: {len(conversation_history)}")
-    
-    # First clean old summaries
-    conversation_history = clean_old_summaries_from_conversation(conversation_history)
-    
     # Find the most recent location transition message
     transition_index = None
     for i in range(len(conversation_history) - 1, -1, -1):
@@ -384,8 +377,7 @@ def compress_conversation_history_on_transition(conversation_history, leaving_lo
             break
     
     if transition_index is None:
-        debug_print("No location transition found in conversation history")
-        return conversation_history
+        return None
     
     # Find the previous marker (transition, adventure history, or last system message)
     previous_marker_index = None
@@ -417,9 +409,10 @@ def compress_conversation_history_on_transition(conversation_history, leaving_lo
     if previous_marker_index is None:
         previous_marker_index = -1
     
-    debug_print(f"Collecting messages from index {previous_marker_index + 1} to {transition_index - 1}")
-    
-    # Collect messages to summarize (between markers, excluding the markers themselves)
+    return previous_marker_index, transition_index
+
+def select_messages_to_summarize(conversation_history, previous_marker_index, transition_index):
+    """Messages between the markers, excluding system messages and error notes"""
     messages_to_summarize = []
     for i in range(previous_marker_index + 1, transition_index):
         msg = conversation_history[i]
@@ -429,6 +422,39 @@ def compress_conversation_history_on_transition(conversation_history, leaving_lo
         if msg.get("role") == "user" and msg.get("content", "").startswith("Error Note:"):
             continue
         messages_to_summarize.append(msg)
+    return messages_to_summarize
+
+def build_location_summary_message(leaving_location_name, summary):
+    """The assistant message that replaces a location's conversation"""
+    return {
+        "role": "assistant",
+        "content": f"=== LOCATION SUMMARY ===\n\n{leaving_location_name}:\n{'-' * len(leaving_location_name + ':')}\n{summary}"
+    }
+
+def compress_conversation_history_on_transition(conversation_history, leaving_location_name):
+    """
+    Compress conversation history when transitioning out of a location.
+    Creates a summary of the location being left and removes those messages.
+    Uses location transition messages as markers.
+    Returns the compressed conversation history.
+    """
+    status_compressing_history()
+    debug_print(f"Compressing conversation history when leaving {leaving_location_name}")
+    debug_print(f"Total messages in history: {len(conversation_history)}")
+    
+    # First clean old summaries
+    conversation_history = clean_old_summaries_from_conversation(conversation_history)
+    
+    compression_range = find_location_compression_range(conversation_history)
+    if compression_range is None:
+        debug_print("No location transition found in conversation history")
+        return conversation_history
+    previous_marker_index, transition_index = compression_range
+    
+    debug_print(f"Collecting messages from index {previous_marker_index + 1} to {transition_index - 1}")
+    
+    # Collect messages to summarize (between markers, excluding the markers themselves)
+    messages_to_summarize = select_messages_to_summarize(conversation_history, previous_marker_index, transition_index)
     
     debug_print(f"Found {len(messages_to_summarize)} messages to summarize")
     
@@ -445,11 +471,7 @@ def compress_conversation_history_on_transition(conversation_history, leaving_lo
                 new_history.append(conversation_history[i])
             
             # 2. Insert the summary as an assistant message
-            summary_message = {
-                "role": "assistant",
-                "content": f"=== LOCATION SUMMARY ===\n\n{leaving_location_name}:\n{'-' * len(leaving_location_name + ':')}\n{summary}"
-            }
-            new_history.append(summary_message)
+            new_history.append(build_location_summary_message(leaving_location_name, summary))
             
             # 3. Add everything from the transition onwards (including the transition itself)
             for i in range(transition_index, len(conversation_history)):
@@ -26,6 +26,34 @@
 # - Converts Gemini responses to OpenAI-compatible format
 # - Supports temperature, max_tokens, and other parameters
 # - Maintains conversation history format compatibility
+# - stream=True returns an iterator of chat.completion.chunk objects
+#
+# CLIENT REGISTRY:
+# - OpenAI(api_key) returns one shared client per API key
+# - genai.configure() runs once per key; re-running it discards the SDK's
+#   cached transport, so every module-level client used to reset keep-alive
+# - GenerativeModel objects are cached per (model, generation config,
+#   system instruction), least recently used evicted
+# - Reuse counters and setup time saved are available from client_registry.stats()
+#
+# USAGE ACCOUNTING:
+# - Token counts come from the SDK's usage_metadata (prompt, candidates, cached)
+# - Every completed call is recorded in utils.usage_tracker, attributed to the
+#   call_site= argument or to the calling module
+#
+# REQUEST SHAPE:
+# - Messages map to system_instruction + multi-turn contents
+#   (core.ai.message_conversion), memoized across calls
+#
+# PROMPT CACHING:
+# - Leading system messages large enough to cache are served from a Gemini
+#   CachedContent (core.ai.prompt_cache); only the remainder is sent
+# - Disabled with ENABLE_PROMPT_CACHING = False or cache_prompt=False per call
+# 
+# CONCURRENCY:
+# - Each request holds a core.ai.llm_scheduler slot while in flight (streams
+#   until fully consumed), bounding concurrent calls across the process or,
+#   in a multi-session web server, across all sessions
 # 
 # ARCHITECTURAL INTEGRATION:
 # - Drop-in replacement for OpenAI client instances
@@ -36,9 +64,16 @@
 
 import google.generativeai as genai
 import json
+import threading
 import time
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Iterator
+from dataclasses import dataclass, field
+
+from utils.usage_tracker import record_usage
+from core.ai.prompt_cache import get_prompt_cache
+from core.ai.message_conversion import convert_messages, ConvertedRequest
+from core.ai.llm_scheduler import acquire_slot, release_slot, llm_slot
 
 
 @dataclass
@@ -47,6 +82,8 @@ class GeminiUsage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    cached_tokens: int = 0
+    estimated: bool = False  # True when the SDK returned no usage_metadata
 
 
 class GeminiMessage:
@@ -85,11 +122,224 @@ class GeminiResponse:
             self.created = int(time.time())
 
 
+@dataclass
+class GeminiDelta:
+    """Mimics OpenAI streaming delta structure for compatibility"""
+    role: Optional[str] = None
+    content: Optional[str] = None
+
+
+@dataclass
+class GeminiStreamChoice:
+    """Mimics OpenAI streaming choice structure for compatibility"""
+    index: int = 0
+    delta: GeminiDelta = field(default_factory=GeminiDelta)
+    finish_reason: Optional[str] = None
+
+
+@dataclass
+class GeminiStreamChunk:
+    """Mimics OpenAI chat.completion.chunk structure for compatibility"""
+    id: str = ""
+    object: str = "chat.completion.chunk"
+    created: int = 0
+    model: str = ""
+    choices: List[GeminiStreamChoice] = None
+
+    def __post_init__(self):
+        if self.choices is None:
+            self.choices = [GeminiStreamChoice()]
+        if self.created == 0:
+            self.created = int(time.time())
+
+
+class GeminiStream:
+    """
+    OpenAI-compatible streaming iterator over a Gemini generate_content stream.
+    
+    Yields GeminiStreamChunk objects whose choices[0].delta.content holds the
+    new text. After iteration, `response` holds the complete GeminiResponse
+    (cleaned content plus usage) so callers can track usage and parse JSON
+    exactly as they would for a non-streaming call.
+    """
+
+    def __init__(self, completions, gemini_stream, model: str, error: Optional[Exception] = None,
+                 prompt_source=None, call_site: Optional[str] = None, holds_slot: bool = False):
+        self._completions = completions
+        self._holds_slot = holds_slot
+        self._error = error
+        self._prompt_source = prompt_source
+        self._call_site = call_site
+        self._usage_metadata = None
+        self._start_time = time.perf_counter()
+        self._gemini_stream = gemini_stream
+        self.model = model
+        self.id = f"gemini-{int(time.time())}"
+        self.response: Optional[GeminiResponse] = None
+        self._parts: List[str] = []
+
+    def __iter__(self) -> Iterator[GeminiStreamChunk]:
+        first = True
+        if self._error is not None:
+            self._parts.append(f"Error: {str(self._error)}")
+        try:
+            for gemini_chunk in self._gemini_stream:
+                text = self._chunk_text(gemini_chunk)
+                if getattr(gemini_chunk, "usage_metadata", None) is not None:
+                    # The final chunk carries the totals for the whole response
+                    self._usage_metadata = gemini_chunk.usage_metadata
+                if not text:
+                    continue
+                self._parts.append(text)
+                yield GeminiStreamChunk(
+                    id=self.id, model=self.model,
+                    choices=[GeminiStreamChoice(delta=GeminiDelta(role="assistant" if first else None, content=text))]
+                )
+                first = False
+        except Exception as e:
+            # Surface the error the same way create() does for blocking calls
+            self._parts.append(f"Error: {str(e)}")
+        finally:
+            # Also runs when the caller stops iterating early
+            self._release_slot()
+        self.response = self._completions._build_response(
+            "".join(self._parts), self.model, self._usage_metadata, self._prompt_source
+        )
+        if self._error is None:
+            record_usage(self.response, self._call_site, self.model,
+                         (time.perf_counter() - self._start_time) * 1000)
+        yield GeminiStreamChunk(id=self.id, model=self.model,
+                                choices=[GeminiStreamChoice(finish_reason="stop")])
+
+    def _release_slot(self):
+        if self._holds_slot:
+            self._holds_slot = False
+            release_slot()
+
+    def __del__(self):
+        # A stream that is dropped without being iterated must not keep its slot
+        self._release_slot()
+
+    @staticmethod
+    def _chunk_text(gemini_chunk) -> str:
+        try:
+            return gemini_chunk.text or ""
+        except Exception:
+            # Chunks without text parts (e.g. safety or usage-only) raise on .text
+            return ""
+
+    @property
+    def text(self) -> str:
+        """Raw text received so far"""
+        return "".join(self._parts)
+
+
+class ClientRegistry:
+    """
+    Process-wide cache of Gemini clients and GenerativeModel objects.
+    
+    Thread-safe: the web server's game thread, the speculative routing pool
+    and background jobs all resolve clients and models through here.
+    """
+    
+    MAX_MODELS = 32
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, "GeminiClient"] = {}
+        self._models: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._configured_key: Optional[str] = None
+        self._counters = {
+            "clients_created": 0,
+            "clients_reused": 0,
+            "models_created": 0,
+            "models_reused": 0,
+            "client_setup_seconds": 0.0,
+            "model_setup_seconds": 0.0,
+        }
+    
+    def _configure(self, api_key: str):
+        # Caller holds the lock. genai keeps one global configuration.
+        if self._configured_key != api_key:
+            genai.configure(api_key=api_key)
+            self._configured_key = api_key
+            # Models built under another key must not be reused
+            self._models.clear()
+    
+    def get_client(self, api_key: str) -> "GeminiClient":
+        """Return the shared client for api_key, creating it on first use"""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is not None:
+                self._counters["clients_reused"] += 1
+                return client
+            start_time = time.perf_counter()
+            self._configure(api_key)
+            client = GeminiClient(api_key)
+            self._clients[api_key] = client
+            self._counters["clients_created"] += 1
+            self._counters["client_setup_seconds"] += time.perf_counter() - start_time
+            return client
+    
+    def get_model(self, api_key: str, model: str, temperature: float, max_output_tokens: int,
+                  system_instruction: Optional[str] = None):
+        """Return a cached GenerativeModel for (model, generation config, system instruction)"""
+        # The instruction string itself is the key; its hash is computed once per string object
+        key = (model, temperature, max_output_tokens, system_instruction)
+        with self._lock:
+            self._configure(api_key)
+            gemini_model = self._models.get(key)
+            if gemini_model is not None:
+                self._models.move_to_end(key)
+                self._counters["models_reused"] += 1
+                return gemini_model
+            start_time = time.perf_counter()
+            generation_config = genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+            gemini_model = genai.GenerativeModel(model, generation_config=generation_config,
+                                                 system_instruction=system_instruction)
+            self._models[key] = gemini_model
+            while len(self._models) > self.MAX_MODELS:
+                self._models.popitem(last=False)
+            self._counters["models_created"] += 1
+            self._counters["model_setup_seconds"] += time.perf_counter() - start_time
+            return gemini_model
+    
+    def stats(self) -> Dict[str, Any]:
+        """Reuse counters plus estimated setup time saved by caching"""
+        with self._lock:
+            stats = dict(self._counters)
+        saved = 0.0
+        if stats["clients_created"]:
+            saved += stats["clients_reused"] * stats["client_setup_seconds"] / stats["clients_created"]
+        if stats["models_created"]:
+            saved += stats["models_reused"] * stats["model_setup_seconds"] / stats["models_created"]
+        stats["setup_seconds_saved"] = saved
+        return stats
+    
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return (f"clients {stats['clients_created']} created / {stats['clients_reused']} reused, "
+                f"models {stats['models_created']} created / {stats['models_reused']} reused, "
+                f"~{stats['setup_seconds_saved'] * 1000:.1f} ms setup saved")
+    
+    def clear(self):
+        """Drop cached models (e.g. after changing the API key)"""
+        with self._lock:
+            self._models.clear()
+
+
+# Shared by every OpenAI(...) caller in the process
+client_registry = ClientRegistry()
+
+
 class GeminiChatCompletions:
     """Mimics OpenAI chat.completions interface"""
     
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
+        self.api_key = api_key
         
     def create(self, model: str, messages: List[Dict], temperature: float = 0.7, 
                max_tokens: Optional[int] = None, **kwargs) -> GeminiResponse:
@@ -101,36 +351,69 @@ class GeminiChatCompletions:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Sampling temperature (0.0 to 1.0)
             max_tokens: Maximum tokens to generate
-            **kwargs: Additional parameters (ignored for compatibility)
+            **kwargs: Additional parameters; stream=True returns a GeminiStream,
+                call_site="..." labels the call in usage metrics,
+                cache_prompt=False bypasses the prompt prefix cache
             
         Returns:
-            GeminiResponse object compatible with OpenAI response format
+            GeminiResponse object compatible with OpenAI response format,
+            or a GeminiStream iterator of chunks when stream=True
         """
+        stream = kwargs.get("stream", False)
+        call_site = kwargs.get("call_site")
         try:
-            # Initialize Gemini model
-            gemini_model = genai.GenerativeModel(model)
-            
-            # Convert OpenAI messages to Gemini format
-            gemini_prompt = self._convert_messages_to_prompt(messages)
+            max_output_tokens = max_tokens if max_tokens else 8192
+            prepared = None
+            if kwargs.get("cache_prompt", True) and self._prompt_caching_enabled():
+                # Stable system prefix served from a provider-side cache
+                prepared = get_prompt_cache().prepare(
+                    model, messages, {"temperature": temperature, "max_output_tokens": max_output_tokens}
+                )
+            if prepared:
+                # The cached context already carries the system instruction
+                gemini_model, remaining = prepared
+                request = convert_messages(remaining, system_as_instruction=False)
+            else:
+                # Convert OpenAI messages to system_instruction + contents
+                request = convert_messages(messages)
+                # Reuse the model object for this (model, generation config, instruction)
+                gemini_model = client_registry.get_model(
+                    self.api_key, model, temperature, max_output_tokens, request.system_instruction
+                )
+            gemini_contents = request.contents
             
-            # Configure generation parameters
-            generation_config = genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens if max_tokens else 8192,
-            )
+            if stream:
+                print("[AI_WRAPPER] Calling Gemini API (streaming)...")
+                # The slot is held until the stream has been consumed
+                acquire_slot()
+                try:
+                    gemini_stream = gemini_model.generate_content(
+                        gemini_contents,
+                        stream=True
+                    )
+                except Exception:
+                    release_slot()
+                    raise
+                return GeminiStream(self, gemini_stream, model,
+                                    prompt_source=request, call_site=call_site, holds_slot=True)
             
             print("[AI_WRAPPER] Calling Gemini API...")
-            # Generate response
-            response = gemini_model.generate_content(
-                gemini_prompt,
-                generation_config=generation_config
-            )
+            with llm_slot():
+                start_time = time.perf_counter()
+                # Generate response
+                response = gemini_model.generate_content(gemini_contents)
+            latency_ms = (time.perf_counter() - start_time) * 1000
             print("[AI_WRAPPER] Received response from Gemini API.")
             
             # Convert Gemini response to OpenAI format
-            return self._convert_response_to_openai_format(response, model)
+            openai_response = self._convert_response_to_openai_format(response, model, request)
+            record_usage(openai_response, call_site, model, latency_ms)
+            return openai_response
             
         except Exception as e:
+            if stream:
+                # Callers iterate; hand back a one-shot stream carrying the error
+                return GeminiStream(self, iter(()), model, error=e)
             # Return error response in OpenAI format
             error_response = GeminiResponse(
                 model=model,
@@ -139,24 +422,13 @@ class GeminiChatCompletions:
             )
             return error_response
     
-    def _convert_messages_to_prompt(self, messages: List[Dict]) -> str:
-        """Convert OpenAI message format to Gemini prompt format"""
-        prompt_parts = []
-        
-        for message in messages:
-            role = message.get("role", "")
-            content = message.get("content", "")
-            
-            if role == "system":
-                prompt_parts.append(f"System: {content}")
-            elif role == "user":
-                prompt_parts.append(f"User: {content}")
-            elif role == "assistant":
-                prompt_parts.append(f"Assistant: {content}")
-            else:
-                prompt_parts.append(content)
-        
-        return "\n\n".join(prompt_parts)
+    @staticmethod
+    def _prompt_caching_enabled() -> bool:
+        try:
+            import config
+            return getattr(config, "ENABLE_PROMPT_CACHING", False)
+        except ImportError:
+            return False
     
     def _clean_json_response(self, content: str) -> str:
         """Clean Gemini response to remove markdown code blocks"""
@@ -167,18 +439,26 @@ class GeminiChatCompletions:
         content = content.strip()
         return content
     
-    def _convert_response_to_openai_format(self, gemini_response, model: str) -> GeminiResponse:
+    def _convert_response_to_openai_format(self, gemini_response, model: str, prompt_source=None) -> GeminiResponse:
         """Convert Gemini response to OpenAI-compatible format"""
         try:
             raw_content = gemini_response.text if hasattr(gemini_response, 'text') else ""
+            usage_metadata = getattr(gemini_response, 'usage_metadata', None)
+            return self._build_response(raw_content, model, usage_metadata, prompt_source)
+        except Exception as e:
+            return GeminiResponse(
+                model=model,
+                choices=[GeminiChoice(message=GeminiMessage(role="assistant", content=f"Response conversion error: {str(e)}"))],
+                usage=GeminiUsage()
+            )
+    
+    def _build_response(self, raw_content: str, model: str, usage_metadata=None,
+                        prompt_source=None) -> GeminiResponse:
+        """Build an OpenAI-compatible response from raw Gemini text and usage metadata"""
+        try:
             # Clean JSON response to remove markdown code blocks
             content = self._clean_json_response(raw_content)
             
-            # Estimate token usage (Gemini doesn't provide exact counts like OpenAI)
-            prompt_tokens = len(content.split()) * 1.3  # Rough estimation
-            completion_tokens = len(content.split())
-            total_tokens = int(prompt_tokens + completion_tokens)
-            
             return GeminiResponse(
                 id=f"gemini-{int(time.time())}",
                 model=model,
@@ -186,11 +466,7 @@ class GeminiChatCompletions:
                     message=GeminiMessage(role="assistant", content=content),
                     finish_reason="stop"
                 )],
-                usage=GeminiUsage(
-                    prompt_tokens=int(prompt_tokens),
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens
-                )
+                usage=self._build_usage(usage_metadata, prompt_source, raw_content)
             )
             
         except Exception as e:
@@ -199,6 +475,30 @@ class GeminiChatCompletions:
                 choices=[GeminiChoice(message=GeminiMessage(role="assistant", content=f"Response conversion error: {str(e)}"))],
                 usage=GeminiUsage()
             )
+    
+    @staticmethod
+    def _build_usage(usage_metadata, prompt_source, completion_text: str) -> GeminiUsage:
+        """Use the SDK's token counts; estimate from the actual texts only if they are missing"""
+        prompt_tokens = getattr(usage_metadata, 'prompt_token_count', None) if usage_metadata is not None else None
+        if prompt_tokens is not None:
+            completion_tokens = getattr(usage_metadata, 'candidates_token_count', 0) or 0
+            return GeminiUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=getattr(usage_metadata, 'total_token_count', 0) or (prompt_tokens + completion_tokens),
+                cached_tokens=getattr(usage_metadata, 'cached_content_token_count', 0) or 0,
+            )
+        
+        from utils.token_estimator import TokenEstimator
+        prompt_text = prompt_source.estimate_text() if isinstance(prompt_source, ConvertedRequest) else (prompt_source or "")
+        prompt_tokens = TokenEstimator.estimate_tokens_from_text(prompt_text) if prompt_text else 0
+        completion_tokens = TokenEstimator.estimate_tokens_from_text(completion_text) if completion_text else 0
+        return GeminiUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            estimated=True,
+        )
 
 
 class GeminiChat:
@@ -243,6 +543,6 @@ def OpenAI(api_key: str) -> GeminiClient:
         api_key: Gemini API key
         
     Returns:
-        GeminiClient instance with OpenAI-compatible interface
+        Shared GeminiClient instance with OpenAI-compatible interface
     """
-    return GeminiClient(api_key)
+    return client_registry.get_client(api_key)
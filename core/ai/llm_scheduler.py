@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# LLM_SCHEDULER.PY - BOUNDED CONCURRENT MODEL CALLS
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Request Admission Control
+#
+# Every model call made through gemini_wrapper holds one slot for as long as
+# the request is in flight (for streams: until the stream is consumed).
+# At most LLM_MAX_CONCURRENT_CALLS slots exist, so a busy server queues calls
+# instead of bursting past provider rate limits.
+#
+# SLOT PROVIDERS:
+# - Local (default): a bounded semaphore shared by all threads of this
+#   process - the console game, background summaries, module building
+# - Remote: a multi-session web server runs each table's engine in a
+#   session worker process; the worker installs a provider that asks the
+#   server for slots, so one limit covers every session on the server
+#
+# Waiting time and peak concurrency are kept for diagnostics (stats()).
+# ============================================================================
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+def _max_concurrent_calls() -> int:
+    try:
+        import config
+        return max(1, int(getattr(config, "LLM_MAX_CONCURRENT_CALLS", 4)))
+    except (ImportError, ValueError, TypeError):
+        return 4
+
+
+class LLMScheduler:
+    """Bounded pool of in-flight model call slots"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+
+    def acquire(self):
+        start = time.perf_counter()
+        if not self._semaphore.acquire(blocking=False):
+            self._semaphore.acquire()
+            waited = time.perf_counter() - start
+            with self._lock:
+                self.waited_calls += 1
+                self.total_wait += waited
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "peak": self.peak,
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "total_wait_seconds": round(self.total_wait, 3),
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+_slot_provider = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler (limit from LLM_MAX_CONCURRENT_CALLS)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(_max_concurrent_calls())
+        return _scheduler
+
+
+def set_slot_provider(provider):
+    """Take slots from provider (an object with acquire()/release()) instead of the local scheduler"""
+    global _slot_provider
+    _slot_provider = provider
+
+
+def acquire_slot():
+    """Block until a model call may start; pair with release_slot()"""
+    (_slot_provider or get_llm_scheduler()).acquire()
+
+
+def release_slot():
+    (_slot_provider or get_llm_scheduler()).release()
+
+
+@contextmanager
+def llm_slot():
+    """Hold one model call slot for the duration of the block"""
+    acquire_slot()
+    try:
+        yield
+    finally:
+        release_slot()
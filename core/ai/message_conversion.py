@@ -0,0 +1,235 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# MESSAGE_CONVERSION.PY - OPENAI MESSAGES TO GEMINI CONTENTS
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Request Construction
+#
+# Converts OpenAI-style message lists into Gemini's native request shape:
+# leading system messages become the system_instruction and the rest become
+# multi-turn `contents` with "user" / "model" roles. Replaces the old
+# "System:/User:/Assistant:" string flattening, which rebuilt a string the
+# size of the whole history on every call and discarded role structure.
+#
+# CONVERSION RULES:
+# - Leading system messages -> system_instruction (joined with blank lines)
+# - Later system messages -> user turns prefixed "System: " (as before)
+# - Consecutive same-role turns are merged into one content with several
+#   parts, so roles always alternate
+# - A request with no user/assistant messages sends its system text as the
+#   user turn, since Gemini requires at least one content
+#
+# MEMOIZATION:
+# The converted form of recent conversations is kept. On the next call the
+# unchanged message prefix (same role and content) reuses the converted
+# contents and only the new tail is converted - no O(history) string join.
+# ============================================================================
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+ROLE_MAP = {"user": "user", "assistant": "model", "model": "model"}
+MAX_MEMO_ENTRIES = 8
+
+
+class ConvertedRequest:
+    """Gemini request parts: system_instruction (or None) and contents"""
+
+    __slots__ = ("system_instruction", "contents")
+
+    def __init__(self, system_instruction: Optional[str], contents: List[Dict]):
+        self.system_instruction = system_instruction
+        self.contents = contents
+
+    def estimate_text(self) -> str:
+        """Flattened text, only for token estimation when usage metadata is missing"""
+        parts = [self.system_instruction or ""]
+        for content in self.contents:
+            parts.extend(content["parts"])
+        return "\n\n".join(parts)
+
+
+class _MemoEntry:
+    """Converted state of one conversation, extendable message by message"""
+
+    __slots__ = ("leading_system", "system_instruction", "keys", "contents", "boundaries")
+
+    def __init__(self, leading_system: Tuple[str, ...], system_instruction: Optional[str]):
+        self.leading_system = leading_system
+        self.system_instruction = system_instruction
+        self.keys: List[Tuple[str, str]] = []       # (role, content) per converted message
+        self.contents: List[Dict] = []
+        self.boundaries: List[Tuple[int, int]] = []  # (len(contents), parts in last) after each message
+
+    def truncate(self, length: int):
+        """Keep the first `length` converted messages"""
+        if length == len(self.keys):
+            return
+        del self.keys[length:]
+        del self.boundaries[length:]
+        if length == 0:
+            self.contents = []
+            return
+        content_count, part_count = self.boundaries[length - 1]
+        # Copy the boundary content: earlier requests may still reference it
+        self.contents = self.contents[:content_count]
+        last = self.contents[-1]
+        self.contents[-1] = {"role": last["role"], "parts": last["parts"][:part_count]}
+
+    def append(self, role: str, text: str):
+        gemini_role = ROLE_MAP.get(role, "user")
+        if role == "system":
+            text = f"System: {text}"
+        if self.contents and self.contents[-1]["role"] == gemini_role:
+            # Copy-on-write so contents handed to an earlier request stay intact
+            last = self.contents[-1]
+            self.contents[-1] = {"role": gemini_role, "parts": last["parts"] + [text]}
+        else:
+            self.contents.append({"role": gemini_role, "parts": [text]})
+        self.boundaries.append((len(self.contents), len(self.contents[-1]["parts"])))
+
+
+class MessageConverter:
+    """Thread-safe, memoizing OpenAI -> Gemini message converter"""
+
+    def __init__(self, max_entries: int = MAX_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: List[_MemoEntry] = []
+        self._lock = threading.Lock()
+        self.reused_messages = 0
+        self.converted_messages = 0
+
+    @staticmethod
+    def _split(messages: List[Dict], system_as_instruction: bool):
+        leading = []
+        if system_as_instruction:
+            for message in messages:
+                if message.get("role") != "system":
+                    break
+                leading.append(message.get("content", "") or "")
+        rest = messages[len(leading):]
+        if leading and not rest:
+            # Gemini needs at least one content turn
+            return (), [{"role": "user", "content": "\n\n".join(leading)}]
+        return tuple(leading), rest
+
+    @staticmethod
+    def _common_prefix(entry: _MemoEntry, rest: List[Dict]) -> int:
+        length = 0
+        for key, message in zip(entry.keys, rest):
+            if key[0] != message.get("role") or key[1] != (message.get("content", "") or ""):
+                break
+            length += 1
+        return length
+
+    def convert(self, messages: List[Dict], system_as_instruction: bool = True) -> ConvertedRequest:
+        """
+        Convert messages to a ConvertedRequest.
+
+        Args:
+            messages: OpenAI-style [{"role", "content"}, ...]
+            system_as_instruction: False when the system prefix is already
+                provided elsewhere (e.g. a cached context)
+        """
+        leading, rest = self._split(messages, system_as_instruction)
+        with self._lock:
+            best, best_length = None, -1
+            for entry in self._entries:
+                if entry.leading_system != leading:
+                    continue
+                length = self._common_prefix(entry, rest)
+                if length > best_length:
+                    best, best_length = entry, length
+
+            if best is None:
+                best = _MemoEntry(leading, "\n\n".join(leading) if leading else None)
+                best_length = 0
+                self._entries.append(best)
+                if len(self._entries) > self.max_entries:
+                    self._entries.pop(0)
+            else:
+                # Most recently used last
+                self._entries.remove(best)
+                self._entries.append(best)
+
+            best.truncate(best_length)
+            for message in rest[best_length:]:
+                role = message.get("role", "user")
+                text = message.get("content", "") or ""
+                best.keys.append((role, text))
+                best.append(role, text)
+
+            self.reused_messages += best_length
+            self.converted_messages += len(rest) - best_length
+            # Shallow copy: later appends must not change this request
+            return ConvertedRequest(best.system_instruction, list(best.contents))
+
+
+_converter = MessageConverter()
+
+
+def convert_messages(messages: List[Dict], system_as_instruction: bool = True) -> ConvertedRequest:
+    """Convert with the process-wide memoizing converter"""
+    return _converter.convert(messages, system_as_instruction)
+
+
+def flatten_messages(messages: List[Dict]) -> str:
+    """The legacy single-string format (kept for comparison and debugging)"""
+    prompt_parts = []
+    for message in messages:
+        role = message.get("role", "")
+        content = message.get("content", "")
+        if role == "system":
+            prompt_parts.append(f"System: {content}")
+        elif role == "user":
+            prompt_parts.append(f"User: {content}")
+        elif role == "assistant":
+            prompt_parts.append(f"Assistant: {content}")
+        else:
+            prompt_parts.append(content)
+    return "\n\n".join(prompt_parts)
+
+
+if __name__ == "__main__":
+    # Benchmark: 2,000-message conversation, converting once per turn as the
+    # game does (history grows by a user/assistant pair each turn).
+    import time
+
+    system_prompt = "You are the Dungeon Master. " * 3700  # ~100 KB
+    history = [{"role": "system", "content": system_prompt}]
+    for i in range(1999):
+        role = ("user", "assistant", "system")[i % 3] if i % 10 else "system"
+        history.append({"role": role, "content": f"Turn {i}: " + "The party presses onward. " * 12})
+
+    def _time(func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - start) / repeat * 1000, result
+
+    turns = 50
+    flat_ms, _ = _time(lambda: flatten_messages(history), turns)
+
+    converter = MessageConverter()
+    cold_ms, cold = _time(lambda: MessageConverter().convert(history), 5)
+    converter.convert(history)
+    grown = list(history)
+    start = time.perf_counter()
+    for turn in range(turns):
+        grown = grown + [{"role": "user", "content": f"Player turn {turn}"},
+                         {"role": "assistant", "content": f"Narration {turn}"}]
+        # Fresh dicts each turn, as when history is reloaded from disk
+        request = converter.convert([dict(m) for m in grown])
+    warm_total = (time.perf_counter() - start) * 1000
+    copy_ms, _ = _time(lambda: [dict(m) for m in grown], turns)
+    warm_ms = warm_total / turns - copy_ms
+
+    print(f"Conversation: {len(history)} messages, {sum(len(m['content']) for m in history) / 1024:.0f} KB")
+    print(f"Legacy string flattening per call:   {flat_ms:8.2f} ms")
+    print(f"Structured conversion, cold:          {cold_ms:8.2f} ms  ({len(cold.contents)} contents)")
+    print(f"Structured conversion, memoized turn: {warm_ms:8.2f} ms  ({len(request.contents)} contents)")
+    print(f"Messages reused / converted: {converter.reused_messages} / {converter.converted_messages}")
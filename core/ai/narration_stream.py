@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# NARRATION_STREAM.PY - INCREMENTAL NARRATION EXTRACTION
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Streaming Response Parsing
+#
+# DM responses are JSON objects ({"narration": "...", "actions": [...]}), so a
+# streamed response cannot be parsed until it completes. This module pulls the
+# narration string out of the partial JSON as chunks arrive so the UI can show
+# the story immediately; actions are still parsed once, from the full text.
+#
+# KEY RESPONSIBILITIES:
+# - Locate the "narration" value in a partial JSON document
+# - Decode JSON string escapes incrementally, never splitting an escape
+# - Report only newly decoded text on each feed
+# ============================================================================
+
+import json
+import re
+
+_NARRATION_KEY_RE = re.compile(r'"narration"\s*:\s*"')
+
+
+class NarrationStreamExtractor:
+    """
+    Extract the "narration" string from a streamed JSON response.
+
+    Usage:
+        extractor = NarrationStreamExtractor()
+        for piece in chunks:
+            new_text = extractor.feed(piece)
+    """
+
+    def __init__(self):
+        self._seek_buffer = ""
+        self._raw = ""          # Escaped narration text received so far
+        self._decoded_upto = 0  # Position in _raw already decoded and emitted
+        self.started = False
+        self.finished = False
+        self.narration = ""
+
+    def feed(self, text: str) -> str:
+        """Add streamed text; return narration text decoded from it (may be empty)"""
+        if self.finished or not text:
+            return ""
+
+        if not self.started:
+            self._seek_buffer += text
+            match = _NARRATION_KEY_RE.search(self._seek_buffer)
+            if not match:
+                return ""
+            self.started = True
+            text = self._seek_buffer[match.end():]
+            self._seek_buffer = ""
+
+        self._raw += text
+        end, closed = self._safe_end()
+        segment = self._raw[self._decoded_upto:end]
+        self._decoded_upto = end
+        if closed:
+            self.finished = True
+
+        if not segment:
+            return ""
+        try:
+            decoded = json.loads('"' + segment + '"')
+        except ValueError:
+            # Malformed escape from the model - show it verbatim rather than drop it
+            decoded = segment
+        self.narration += decoded
+        return decoded
+
+    def _safe_end(self):
+        """
+        Return (end, closed): the end of the decodable prefix of _raw and
+        whether the closing quote was reached. Escapes are kept whole and a
+        trailing high surrogate waits for its pair.
+        """
+        raw = self._raw
+        i = self._decoded_upto
+        length = len(raw)
+        while i < length:
+            char = raw[i]
+            if char == '"':
+                return i, True
+            if char != '\\':
+                i += 1
+                continue
+            if i + 1 >= length:
+                return i, False
+            if raw[i + 1] != 'u':
+                i += 2
+                continue
+            if i + 6 > length:
+                return i, False
+            if raw[i + 2:i + 4].lower() in ('d8', 'd9', 'da', 'db'):
+                # High surrogate: need the following \uXXXX as well
+                if i + 12 > length:
+                    return i, False
+                i += 12
+            else:
+                i += 6
+        return length, False
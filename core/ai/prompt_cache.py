@@ -0,0 +1,405 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# PROMPT_CACHE.PY - PROVIDER-SIDE CONTEXT CACHING
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Prompt Prefix Reuse
+#
+# The DM system prompt (~100 KB), combat prompt (~75 KB) and validation prompt
+# (~47 KB) are resent on every call. Gemini can hold a stable prefix as a
+# CachedContent object and bill it at the cached-token rate. This module
+# decides which leading system messages form the stable prefix, keeps one
+# cached context per prefix hash with a TTL, and counts hits and misses.
+#
+# PREFIX SELECTION:
+# - Only leading system messages are candidates (anything after the first
+#   user/assistant turn changes every call)
+# - The first system message is always included; further leading system
+#   messages (module data, character sheets) are added once they were
+#   identical on the previous call for the same model
+# - Prefixes below PROMPT_CACHE_MIN_TOKENS are sent normally
+# - A cache is created only once the same prefix has been seen
+#   MIN_SIGHTINGS times, so one-shot prompts that embed dynamic text
+#   (summaries, per-location prompts) never pay for a cache they won't reuse
+#
+# PROVIDERS:
+# - GeminiCacheProvider uses genai.caching.CachedContent
+# - FakeCacheProvider simulates cached-token billing and latency so the
+#   cache can be exercised offline: python -m core.ai.prompt_cache
+# ============================================================================
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Refresh a cache this many seconds before the provider expires it
+EXPIRY_MARGIN_SECONDS = 60
+# After a failed cache creation, send that model's prompts uncached for a while
+FAILURE_COOLDOWN_SECONDS = 600
+MAX_CACHED_PREFIXES = 8
+# Uses of a prefix before a cache is created for it
+MIN_SIGHTINGS = 2
+# Bound on remembered system runs and prefix sightings (hashes only)
+MAX_TRACKED_PREFIXES = 256
+
+
+def _config_value(name, default):
+    try:
+        import config
+        return getattr(config, name, default)
+    except ImportError:
+        return default
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap size estimate used only to decide whether a prefix is worth caching"""
+    return len(text) // 4
+
+
+@dataclass
+class CacheHandle:
+    """A provider-side cached context for one prefix"""
+    name: str
+    model: str
+    prefix_hash: str
+    token_count: int
+    expires_at: float
+    provider_object: Any = None
+    hits: int = 0
+
+
+@dataclass
+class PromptCacheStats:
+    hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    errors: int = 0
+    skipped_small: int = 0
+    skipped_first_sight: int = 0
+    cached_tokens_served: int = 0
+    last_event: str = ""
+    per_model: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+class GeminiCacheProvider:
+    """Creates Gemini CachedContent objects and models bound to them"""
+
+    def create_cache(self, model: str, system_instruction: str, ttl_seconds: int) -> CacheHandle:
+        import datetime
+        from google.generativeai import caching
+        cached = caching.CachedContent.create(
+            model=model if model.startswith("models/") else f"models/{model}",
+            system_instruction=system_instruction,
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+        token_count = getattr(getattr(cached, "usage_metadata", None), "total_token_count", 0) or estimate_tokens(system_instruction)
+        return CacheHandle(name=cached.name, model=model, prefix_hash="", token_count=token_count,
+                           expires_at=time.time() + ttl_seconds, provider_object=cached)
+
+    def delete_cache(self, handle: CacheHandle):
+        try:
+            handle.provider_object.delete()
+        except Exception:
+            pass
+
+    def cached_model(self, handle: CacheHandle, generation_config: Dict[str, Any]):
+        import google.generativeai as genai
+        return genai.GenerativeModel.from_cached_content(
+            cached_content=handle.provider_object,
+            generation_config=genai.types.GenerationConfig(**generation_config),
+        )
+
+
+class FakeCacheProvider:
+    """
+    Offline stand-in for the Gemini caching API.
+
+    Models bound to a cache answer instantly-ish, report cached tokens in
+    usage_metadata, and charge latency only for uncached input, so cache
+    behaviour and savings can be measured without network access.
+    """
+
+    def __init__(self, seconds_per_1k_tokens: float = 0.002, create_latency: float = 0.01,
+                 cached_price_ratio: float = 0.25):
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.create_latency = create_latency
+        self.cached_price_ratio = cached_price_ratio
+        self.created = 0
+        self.deleted = 0
+        self.billed_input_tokens = 0.0
+        self._counter = 0
+
+    def create_cache(self, model: str, system_instruction: str, ttl_seconds: int) -> CacheHandle:
+        time.sleep(self.create_latency)
+        self._counter += 1
+        self.created += 1
+        return CacheHandle(name=f"cachedContents/fake-{self._counter}", model=model, prefix_hash="",
+                           token_count=estimate_tokens(system_instruction),
+                           expires_at=time.time() + ttl_seconds)
+
+    def delete_cache(self, handle: CacheHandle):
+        self.deleted += 1
+
+    def cached_model(self, handle: Optional[CacheHandle], generation_config: Dict[str, Any]):
+        return _FakeModel(self, handle)
+
+    def uncached_model(self):
+        return _FakeModel(self, None)
+
+
+class _FakeModel:
+    def __init__(self, provider: FakeCacheProvider, handle: Optional[CacheHandle]):
+        self.provider = provider
+        self.handle = handle
+
+    def generate_content(self, prompt, **kwargs):
+        from types import SimpleNamespace
+        cached_tokens = self.handle.token_count if self.handle else 0
+        uncached_tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+        time.sleep((uncached_tokens / 1000.0) * self.provider.seconds_per_1k_tokens)
+        self.provider.billed_input_tokens += uncached_tokens + cached_tokens * self.provider.cached_price_ratio
+        usage = SimpleNamespace(prompt_token_count=uncached_tokens + cached_tokens, candidates_token_count=20,
+                                cached_content_token_count=cached_tokens,
+                                total_token_count=uncached_tokens + cached_tokens + 20)
+        return SimpleNamespace(text='{"narration": "ok", "actions": []}', usage_metadata=usage)
+
+
+class PromptCache:
+    """Keeps provider-side caches for stable prompt prefixes"""
+
+    def __init__(self, provider=None, ttl_seconds: Optional[int] = None, min_tokens: Optional[int] = None):
+        self.provider = provider or GeminiCacheProvider()
+        self.ttl_seconds = ttl_seconds or _config_value("PROMPT_CACHE_TTL_SECONDS", 3600)
+        self.min_tokens = min_tokens if min_tokens is not None else _config_value("PROMPT_CACHE_MIN_TOKENS", 4096)
+        self.stats = PromptCacheStats()
+        self._lock = threading.Lock()
+        self._handles: "OrderedDict[Tuple[str, str], CacheHandle]" = OrderedDict()
+        # (model, first message hash) -> hashes of that call's leading system messages
+        self._previous_system_run: "OrderedDict[Tuple[str, str], List[str]]" = OrderedDict()
+        # (model, prefix hash) -> times seen without a cache
+        self._sightings: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._creating = set()  # Keys whose cache is being created outside the lock
+        self._failed_until: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Prefix selection
+    # ------------------------------------------------------------------
+
+    def split_stable_prefix(self, model: str, messages: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Return (prefix_messages, remaining_messages) for this call"""
+        system_run = []
+        for message in messages:
+            if message.get("role") != "system":
+                break
+            system_run.append(_hash(message.get("content", "")))
+        if not system_run:
+            return [], messages
+
+        # Different callers share a model (DM, validator), so track runs per leading prompt
+        run_key = (model, system_run[0])
+        previous = self._previous_system_run.pop(run_key, [])
+        self._previous_system_run[run_key] = system_run
+        while len(self._previous_system_run) > MAX_TRACKED_PREFIXES:
+            self._previous_system_run.popitem(last=False)
+        prefix_length = 1
+        while (prefix_length < len(system_run) and prefix_length < len(previous)
+               and system_run[prefix_length] == previous[prefix_length]):
+            prefix_length += 1
+        # Something must remain to send as the request contents
+        prefix_length = min(prefix_length, len(messages) - 1)
+        if prefix_length == 0:
+            return [], messages
+        return messages[:prefix_length], messages[prefix_length:]
+
+    @staticmethod
+    def prefix_text(prefix_messages: List[Dict]) -> str:
+        return "\n\n".join(message.get("content", "") for message in prefix_messages)
+
+    # ------------------------------------------------------------------
+    # Cache lookup
+    # ------------------------------------------------------------------
+
+    def _record(self, model: str, event: str):
+        counters = self.stats.per_model.setdefault(model, {"hits": 0, "misses": 0, "refreshes": 0, "errors": 0})
+        if event in counters:
+            counters[event] += 1
+        self.stats.last_event = f"{event}:{model}"
+
+    def get_handle(self, model: str, prefix_text: str) -> Optional[CacheHandle]:
+        """Return a live cache for this prefix, creating or refreshing it as needed"""
+        if estimate_tokens(prefix_text) < self.min_tokens:
+            with self._lock:
+                self.stats.skipped_small += 1
+            return None
+
+        prefix_hash = _hash(prefix_text)
+        key = (model, prefix_hash)
+        now = time.time()
+        with self._lock:
+            if self._failed_until.get(model, 0) > now:
+                return None
+            handle = self._handles.get(key)
+            if handle and handle.expires_at - EXPIRY_MARGIN_SECONDS > now:
+                self._handles.move_to_end(key)
+                handle.hits += 1
+                self.stats.hits += 1
+                self.stats.cached_tokens_served += handle.token_count
+                self._record(model, "hits")
+                return handle
+            if key in self._creating:
+                return None  # Another thread is creating it; send this call uncached
+            refreshing = handle is not None
+            if not refreshing:
+                seen = self._sightings.pop(key, 0) + 1
+                if seen < MIN_SIGHTINGS:
+                    self._sightings[key] = seen
+                    while len(self._sightings) > MAX_TRACKED_PREFIXES:
+                        self._sightings.popitem(last=False)
+                    self.stats.skipped_first_sight += 1
+                    return None
+            self._creating.add(key)
+
+        # Network round-trip; other calls must not wait on it
+        try:
+            new_handle = self.provider.create_cache(model, prefix_text, self.ttl_seconds)
+        except Exception as e:
+            with self._lock:
+                self._creating.discard(key)
+                self.stats.errors += 1
+                self._record(model, "errors")
+                self._failed_until[model] = time.time() + FAILURE_COOLDOWN_SECONDS
+            print(f"[AI_WRAPPER] Prompt cache unavailable for {model}: {e}")
+            return None
+
+        new_handle.prefix_hash = prefix_hash
+        stale = []
+        with self._lock:
+            self._creating.discard(key)
+            if refreshing:
+                self.stats.refreshes += 1
+                self._record(model, "refreshes")
+            else:
+                self.stats.misses += 1
+                self._record(model, "misses")
+            replaced = self._handles.get(key)
+            if replaced is not None:
+                stale.append(replaced)
+            self._handles[key] = new_handle
+            self._handles.move_to_end(key)
+            while len(self._handles) > MAX_CACHED_PREFIXES:
+                _, evicted = self._handles.popitem(last=False)
+                stale.append(evicted)
+        for old in stale:
+            self.provider.delete_cache(old)
+        return new_handle
+
+    def prepare(self, model: str, messages: List[Dict], generation_config: Dict[str, Any]):
+        """
+        Resolve a cached model for this request.
+
+        Returns:
+            (gemini_model, remaining_messages) when the prefix is served from
+            a cache, or None when the request should be sent uncached
+        """
+        with self._lock:
+            prefix_messages, remaining = self.split_stable_prefix(model, messages)
+        if not prefix_messages:
+            return None
+        handle = self.get_handle(model, self.prefix_text(prefix_messages))
+        if handle is None:
+            return None
+        try:
+            cached_model = self.provider.cached_model(handle, generation_config)
+            event = "hit" if handle.hits else "created"
+            print(f"[AI_WRAPPER] Prompt cache {event}: {len(prefix_messages)} system message(s), "
+                  f"~{handle.token_count:,} tokens ({handle.name})")
+            return cached_model, remaining
+        except Exception as e:
+            with self._lock:
+                self.stats.errors += 1
+                self._record(model, "errors")
+            print(f"[AI_WRAPPER] Could not bind cached context {handle.name}: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats.hits + self.stats.misses + self.stats.refreshes
+            return {
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "refreshes": self.stats.refreshes,
+                "errors": self.stats.errors,
+                "skipped_small": self.stats.skipped_small,
+                "skipped_first_sight": self.stats.skipped_first_sight,
+                "hit_rate": self.stats.hits / lookups if lookups else 0.0,
+                "cached_tokens_served": self.stats.cached_tokens_served,
+                "live_caches": len(self._handles),
+                "per_model": {model: dict(counts) for model, counts in self.stats.per_model.items()},
+            }
+
+
+_prompt_cache = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """Return the process-wide prompt cache (Gemini provider)"""
+    global _prompt_cache
+    with _prompt_cache_lock:
+        if _prompt_cache is None:
+            _prompt_cache = PromptCache()
+        return _prompt_cache
+
+
+if __name__ == "__main__":
+    # Simulated session against the fake provider: a ~100 KB system prompt,
+    # a module block that changes once, and a growing conversation.
+    baseline = FakeCacheProvider()
+    provider = FakeCacheProvider()
+    cache = PromptCache(provider, ttl_seconds=3600, min_tokens=4096)
+    system_prompt = "You are the Dungeon Master. " * 3700
+    module_block = "Module data: " + "ancient ruins " * 800
+    history = []
+
+    def _flatten(messages):
+        return "\n\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+    uncached_time = cached_time = 0.0
+    for turn in range(20):
+        if turn == 10:
+            module_block = "Module data: " + "sunken keep " * 800
+        history.append({"role": "user", "content": f"Player action {turn}"})
+        messages = [{"role": "system", "content": system_prompt},
+                    {"role": "system", "content": module_block}] + history
+
+        start = time.perf_counter()
+        baseline.uncached_model().generate_content(_flatten(messages))
+        uncached_time += time.perf_counter() - start
+
+        billed_before = provider.billed_input_tokens
+        start = time.perf_counter()
+        prepared = cache.prepare("gemini-2.5-pro", messages, {"temperature": 0.8})
+        model, remaining = prepared if prepared else (provider.uncached_model(), messages)
+        response = model.generate_content(_flatten(remaining))
+        cached_time += time.perf_counter() - start
+        print(f"turn {turn:2d}: {cache.stats.last_event:<26} cached tokens "
+              f"{response.usage_metadata.cached_content_token_count:>7,}  "
+              f"billed {provider.billed_input_tokens - billed_before:>9,.0f}")
+        history.append({"role": "assistant", "content": "The story continues. " * 20})
+
+    stats = cache.get_stats()
+    print(f"\nHits {stats['hits']}, misses {stats['misses']}, refreshes {stats['refreshes']}, hit rate {stats['hit_rate']:.0%}")
+    print(f"Caches created {provider.created}, deleted {provider.deleted}")
+    print(f"Billed input tokens: uncached {baseline.billed_input_tokens:,.0f} vs cached {provider.billed_input_tokens:,.0f}")
+    print(f"Simulated time:      uncached {uncached_time:.2f}s vs cached {cached_time:.2f}s")
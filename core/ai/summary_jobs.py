@@ -0,0 +1,480 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# SUMMARY_JOBS.PY - BACKGROUND SUMMARIZATION AND COMPRESSION
+# ============================================================================
+#
+# ARCHITECTURE ROLE: AI Integration Layer - Deferred History Compression
+#
+# Leaving a location used to block the player while the adventure summary,
+# journal entry, location summary and (every few transitions) the chunked
+# chronicle were generated. This module runs that work on a background
+# worker and splices the results into the live conversation history from
+# the game loop, so the next DM turn proceeds on the uncompressed tail.
+#
+# JOB FLOW:
+# 1. submit_*() snapshots the history and queues the job (one worker, so
+#    jobs run in submission order). Location jobs are keyed by the identity
+#    of one transition message (its text plus the conversation leading up
+#    to it), so repeating a route is a new job, not a duplicate
+# 2. The worker makes the LLM calls and stores the result as a
+#    HistorySplice: the exact messages to replace, the message that follows
+#    them, and the replacement
+# 3. apply_ready() (game loop thread) locates the replaced messages in the
+#    current history and swaps them in one step. If the history no longer
+#    contains them the result is discarded as stale and the transition is
+#    picked up again on the next turn
+# 4. Applied, stale and finished-without-result records are dropped. Keys of
+#    transitions that produced nothing or exhausted their retries are kept in
+#    a bounded set so the game loop does not resubmit them every turn
+#
+# CRASH SAFETY:
+# Active jobs are persisted to JOBS_FILE. On startup resume_pending_jobs()
+# keeps finished-but-unapplied results, re-queues interrupted jobs, and
+# remembers whether the journal entry was already written so it is not
+# duplicated.
+#
+# STATUS:
+# Worker status updates go to status_manager's background channel (shown in
+# the web UI) rather than the main status, so input stays enabled.
+# ============================================================================
+
+import copy
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from core.managers.status_manager import status_manager
+from utils.encoding_utils import safe_json_dump
+from utils.file_operations import safe_read_json, safe_write_json
+from utils.enhanced_logger import debug, info, warning, error, set_script_name
+
+# Set script name for logging
+set_script_name("summary_jobs")
+
+JOBS_FILE = "modules/conversation_history/summary_jobs.json"
+MAX_ATTEMPTS = 3
+TRANSITION_CONTEXT = 8  # Preceding messages hashed into a transition's identity
+MAX_SETTLED = 256  # Remembered keys of transitions that will not be retried
+
+LOCATION_SUMMARY = "location_summary"
+CHUNK_COMPRESSION = "chunk_compression"
+
+# Jobs in these states are persisted and block duplicate submissions
+ACTIVE_STATES = ("pending", "running", "ready")
+
+# User messages that compression drops anyway; ignored when matching splices
+IGNORED_USER_PREFIXES = ("Summary of previous interactions:", "Adventure History Context:", "Error Note:")
+
+
+def _capitalized(text: str) -> str:
+    return text[:1].upper() + text[1:]
+
+
+def _message_key(message: Dict):
+    return message.get("role"), message.get("content", "")
+
+
+def _ignored(message: Dict) -> bool:
+    if message.get("role") == "system":
+        return True
+    return message.get("role") == "user" and message.get("content", "").startswith(IGNORED_USER_PREFIXES)
+
+
+def transition_key(history: List[Dict], index: int) -> str:
+    """Identity of the transition message at `index`: its text plus the messages leading up to it"""
+    context = []
+    i = index - 1
+    while i >= 0 and len(context) < TRANSITION_CONTEXT:
+        if not _ignored(history[i]):
+            context.append(history[i])
+        i -= 1
+    digest = hashlib.sha1()
+    for message in [history[index]] + context:
+        role, content = _message_key(message)
+        digest.update(f"{role}\0{content}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _last_transition_index(history: List[Dict], transition_content: str) -> Optional[int]:
+    for i in range(len(history) - 1, -1, -1):
+        if history[i].get("role") == "user" and history[i].get("content") == transition_content:
+            return i
+    return None
+
+
+class HistorySplice:
+    """A replacement of a run of messages, applicable to a history that has grown since"""
+
+    def __init__(self, replaced: List[Dict], after: Optional[Dict], replacement: List[Dict], hint: int = 0):
+        # Only non-ignored messages are matched; system messages inside the run are dropped with it
+        self.replaced = [dict(message) for message in replaced if not _ignored(message)]
+        self.after = dict(after) if after else None
+        self.replacement = replacement
+        self.hint = hint
+
+    def to_dict(self) -> Dict:
+        return {"replaced": self.replaced, "after": self.after, "replacement": self.replacement, "hint": self.hint}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HistorySplice":
+        return cls(data["replaced"], data.get("after"), data["replacement"], data.get("hint", 0))
+
+    def _start_before(self, history: List[Dict], end: int) -> Optional[int]:
+        """Index where the replaced run starts if it ends right before `end`"""
+        j = len(self.replaced) - 1
+        i = end - 1
+        while j >= 0 and i >= 0:
+            message = history[i]
+            if _ignored(message):
+                i -= 1
+                continue
+            if _message_key(message) != _message_key(self.replaced[j]):
+                return None
+            i -= 1
+            j -= 1
+        return i + 1 if j < 0 else None
+
+    def apply(self, history: List[Dict]) -> Optional[List[Dict]]:
+        """Return the spliced history, or None if the replaced run is no longer present"""
+        if self.after is None:
+            ends = [len(history)]
+        else:
+            after_key = _message_key(self.after)
+            expected = self.hint + len(self.replaced)
+            ends = sorted((i for i, message in enumerate(history) if _message_key(message) == after_key),
+                          key=lambda i: abs(i - expected))
+        for end in ends:
+            start = self._start_before(history, end)
+            if start is not None:
+                return history[:start] + copy.deepcopy(self.replacement) + history[end:]
+        return None
+
+
+class SummaryJobQueue:
+    """Background worker and persisted job records for history compression"""
+
+    def __init__(self, jobs_file: str = JOBS_FILE):
+        self.jobs_file = jobs_file
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, Dict] = {}
+        self._queued = set()  # Job ids submitted to the worker in this process
+        self._settled = OrderedDict()  # Transition key -> terminal status, bounded by MAX_SETTLED
+        self._executor = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence and status
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        data = safe_read_json(self.jobs_file) if os.path.exists(self.jobs_file) else None
+        for record in (data or {}).get("jobs", []):
+            if record.get("status") == "running":
+                record["status"] = "pending"
+            if record.get("status") in ACTIVE_STATES and (record["kind"] != LOCATION_SUMMARY or record.get("key")):
+                self._jobs[record["id"]] = record
+
+    def _save(self):
+        with self._lock:
+            records = [record for record in self._jobs.values() if record["status"] in ACTIVE_STATES]
+            # Write a snapshot taken under the lock; the worker keeps mutating records
+            payload = {"jobs": copy.deepcopy(records)}
+        safe_write_json(self.jobs_file, payload, create_backup=False)
+
+    def _set_status(self, record: Dict, status: str, detail: str = ""):
+        with self._lock:
+            record["status"] = status
+            record["updated"] = time.time()
+            if detail:
+                record["error"] = detail
+        self._save()
+        self._publish()
+
+    def _retire(self, record: Dict, settle: bool = False):
+        """Forget a finished record; settled transitions are not resubmitted"""
+        with self._lock:
+            self._jobs.pop(record["id"], None)
+            if settle and record.get("key"):
+                self._settled[record["key"]] = record["status"]
+                self._settled.move_to_end(record["key"])
+                while len(self._settled) > MAX_SETTLED:
+                    self._settled.popitem(last=False)
+
+    def _publish(self):
+        with self._lock:
+            running = [r for r in self._jobs.values() if r["status"] == "running"]
+            pending = sum(1 for r in self._jobs.values() if r["status"] == "pending")
+            ready = sum(1 for r in self._jobs.values() if r["status"] == "ready")
+        if not (running or pending or ready):
+            status_manager.set_background_status("Summaries", None)
+            return
+        parts = [f"{self._describe(r)} running" for r in running]
+        if pending:
+            parts.append(f"{pending} queued")
+        if ready:
+            parts.append(f"{ready} ready")
+        status_manager.set_background_status("Summaries", ", ".join(parts))
+
+    @staticmethod
+    def _describe(record: Dict) -> str:
+        if record["kind"] == LOCATION_SUMMARY:
+            return f"summary of {record.get('location', 'location')}"
+        return "chronicle compression"
+
+    def get_status(self) -> List[Dict]:
+        """Snapshot of active job records (for diagnostics and the UI)"""
+        with self._lock:
+            return [{k: v for k, v in record.items() if k != "splice"}
+                    for record in self._jobs.values() if record["status"] in ACTIVE_STATES]
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def _find(self, kind: str, key: str) -> Optional[Dict]:
+        for record in self._jobs.values():
+            if record["kind"] == kind and record.get("key") == key:
+                return record
+        return None
+
+    def _new_record(self, kind: str, **fields) -> Dict:
+        record = {"id": uuid.uuid4().hex[:12], "kind": kind, "status": "pending", "created": time.time(),
+                  "updated": time.time(), "attempts": 0, "journal_updated": False, "splice": None, "error": ""}
+        record.update(fields)
+        self._jobs[record["id"]] = record
+        return record
+
+    def _dispatch(self, record: Dict, runner, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-job")
+        self._queued.add(record["id"])
+        self._executor.submit(self._run, record, runner, *args)
+
+    def submit_location_summary(self, conversation_history: List[Dict], party_tracker_data: Dict,
+                                leaving_location_name: str, transition_content: str,
+                                transition_index: Optional[int] = None) -> Optional[Dict]:
+        """Queue the summary and compression for a location the party just left"""
+        if transition_index is None:
+            transition_index = _last_transition_index(conversation_history, transition_content)
+            if transition_index is None:
+                return None
+        key = transition_key(conversation_history, transition_index)
+        with self._lock:
+            if key in self._settled:
+                return None  # Produced nothing or ran out of attempts
+            record = self._find(LOCATION_SUMMARY, key)
+            if record is not None:
+                if record["id"] in self._queued and record["status"] in ACTIVE_STATES:
+                    return record  # Already queued, running or waiting to be applied
+                if record["status"] == "ready":
+                    return record  # Recovered result, applied on the next apply_ready()
+                record["status"] = "pending"
+            else:
+                record = self._new_record(LOCATION_SUMMARY, location=leaving_location_name,
+                                          transition=transition_content, key=key)
+            snapshot = [dict(message) for message in conversation_history]
+            party_snapshot = copy.deepcopy(party_tracker_data)
+            self._dispatch(record, self._run_location_summary, snapshot, party_snapshot)
+        info(f"SUMMARY_JOBS: Queued background summary for {leaving_location_name}", category="location_transitions")
+        self._save()
+        self._publish()
+        return record
+
+    def submit_chunk_compression_if_due(self, conversation_history: List[Dict]) -> Optional[Dict]:
+        """Queue a chronicle compression when enough location summaries have accumulated"""
+        from core.ai.chunked_compression import count_summaries_after_last_chronicle
+        from core.ai.chunked_compression_config import COMPRESSION_TRIGGER, ENABLE_AUTO_COMPRESSION
+
+        if not ENABLE_AUTO_COMPRESSION:
+            return None
+        count, _, _ = count_summaries_after_last_chronicle(conversation_history)
+        if count < COMPRESSION_TRIGGER:
+            debug(f"COMPRESSION_CHECK: No compression needed yet ({count} < {COMPRESSION_TRIGGER})", category="compression")
+            return None
+        with self._lock:
+            if any(r["kind"] == CHUNK_COMPRESSION and r["status"] in ACTIVE_STATES and r["id"] in self._queued
+                   for r in self._jobs.values()):
+                return None
+            record = self._new_record(CHUNK_COMPRESSION)
+            self._dispatch(record, self._run_chunk_compression, [dict(message) for message in conversation_history])
+        info(f"COMPRESSION_TRIGGER: Queued background chunked compression ({count} >= {COMPRESSION_TRIGGER})", category="compression")
+        self._save()
+        self._publish()
+        return record
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self, record: Dict, runner, *args):
+        with self._lock:
+            record["attempts"] += 1
+        self._set_status(record, "running")
+        try:
+            with status_manager.background_task(_capitalized(self._describe(record))):
+                outcome = runner(record, *args)
+            if outcome == "empty":
+                self._set_status(record, "empty")
+                self._retire(record, settle=True)
+            elif outcome is None:
+                self._fail(record, record.get("error") or "no result")
+            else:
+                with self._lock:
+                    record["splice"] = outcome.to_dict()
+                self._set_status(record, "ready")
+                info(f"SUMMARY_JOBS: {_capitalized(self._describe(record))} ready", category="conversation_management")
+        except Exception as e:
+            error(f"FAILURE: Background {self._describe(record)} failed", exception=e, category="conversation_management")
+            self._fail(record, str(e))
+        finally:
+            status_manager.set_background_status(_capitalized(self._describe(record)), None)
+            with self._lock:
+                self._queued.discard(record["id"])
+
+    def _fail(self, record: Dict, detail: str):
+        self._set_status(record, "failed", detail)
+        # Location jobs keep their record (and attempt count) until retries run out
+        if record["kind"] != LOCATION_SUMMARY or record["attempts"] >= MAX_ATTEMPTS:
+            self._retire(record, settle=True)
+
+    def _run_location_summary(self, record: Dict, snapshot: List[Dict], party_tracker_data: Dict):
+        from core.ai import cumulative_summary
+
+        location = record["location"]
+        adventure_summary = cumulative_summary.generate_enhanced_adventure_summary(snapshot, party_tracker_data, location)
+        if not adventure_summary:
+            record["error"] = "No adventure summary generated"
+            return None
+
+        if not record.get("journal_updated"):
+            cumulative_summary.update_journal_with_summary(adventure_summary, party_tracker_data, location)
+            with self._lock:
+                record["journal_updated"] = True
+            self._save()
+
+        history = cumulative_summary.clean_old_summaries_from_conversation(snapshot)
+        compression_range = cumulative_summary.find_location_compression_range(history)
+        if compression_range is None:
+            record["error"] = "Transition no longer in history"
+            return None
+        previous_marker_index, transition_index = compression_range
+        messages = cumulative_summary.select_messages_to_summarize(history, previous_marker_index, transition_index)
+        if not messages:
+            return "empty"
+
+        summary = cumulative_summary.generate_location_summary(location, messages)
+        if not summary:
+            record["error"] = "Location summary generation failed"
+            return None
+        return HistorySplice(
+            replaced=history[previous_marker_index + 1:transition_index],
+            after=history[transition_index],
+            replacement=[cumulative_summary.build_location_summary_message(location, summary)],
+            hint=previous_marker_index + 1,
+        )
+
+    def _run_chunk_compression(self, record: Dict, snapshot: List[Dict]):
+        from core.ai.chunked_compression import build_chunk_compression
+
+        plan = build_chunk_compression(snapshot)
+        if plan is None:
+            return "empty"
+        insert_position, last_msg_idx = plan["insert_position"], plan["last_msg_idx"]
+        after = snapshot[last_msg_idx + 1] if last_msg_idx + 1 < len(snapshot) else None
+        return HistorySplice(
+            replaced=snapshot[insert_position:last_msg_idx + 1],
+            after=after,
+            replacement=[plan["chronicle_message"]],
+            hint=insert_position,
+        )
+
+    # ------------------------------------------------------------------
+    # Applying results (game loop thread)
+    # ------------------------------------------------------------------
+
+    def apply_ready(self, conversation_history: List[Dict]) -> List[Dict]:
+        """Splice every finished job into the history; returns the (possibly new) history"""
+        with self._lock:
+            ready = sorted((r for r in self._jobs.values() if r["status"] == "ready"), key=lambda r: r["created"])
+        if not ready:
+            return conversation_history
+
+        applied_location = False
+        for record in ready:
+            spliced = HistorySplice.from_dict(record["splice"]).apply(conversation_history)
+            if spliced is None:
+                warning(f"SUMMARY_JOBS: Discarding stale {self._describe(record)} - history changed underneath it",
+                        category="conversation_management")
+                self._set_status(record, "stale")
+                self._retire(record)
+                continue
+            if record["kind"] == CHUNK_COMPRESSION:
+                self._backup_before_chunk(conversation_history)
+            else:
+                from core.ai.cumulative_summary import clean_old_summaries_from_conversation
+                spliced = clean_old_summaries_from_conversation(spliced)
+                applied_location = True
+            info(f"SUCCESS: Applied background {self._describe(record)} "
+                 f"({len(conversation_history)} -> {len(spliced)} messages)", category="conversation_management")
+            conversation_history = spliced
+            self._set_status(record, "applied")
+            self._retire(record)
+
+        if applied_location:
+            self.submit_chunk_compression_if_due(conversation_history)
+        return conversation_history
+
+    @staticmethod
+    def _backup_before_chunk(conversation_history: List[Dict]):
+        from core.ai.chunked_compression_config import CREATE_BACKUPS
+        if CREATE_BACKUPS:
+            backup_file = f"conversation_history_backup_{time.time()}.json"
+            safe_json_dump(conversation_history, backup_file)
+            info(f"BACKUP_CREATED: Created backup: {backup_file}", category="compression")
+
+    def resume_pending_jobs(self, conversation_history: List[Dict], party_tracker_data: Dict) -> int:
+        """Re-queue jobs interrupted by a restart; returns how many were resumed"""
+        with self._lock:
+            interrupted = [r for r in self._jobs.values() if r["status"] == "pending" and r["id"] not in self._queued]
+        resumed = 0
+        transitions = {}
+        for i, message in enumerate(conversation_history):
+            if message.get("role") == "user" and "Location transition:" in message.get("content", ""):
+                transitions[transition_key(conversation_history, i)] = i
+        for record in interrupted:
+            if record["kind"] == LOCATION_SUMMARY and record.get("key") in transitions:
+                self.submit_location_summary(conversation_history, party_tracker_data, record["location"],
+                                             record["transition"], transitions[record["key"]])
+                resumed += 1
+                continue
+            with self._lock:
+                self._jobs.pop(record["id"], None)
+        self._save()
+        if self.submit_chunk_compression_if_due(conversation_history):
+            resumed += 1
+        if resumed:
+            info(f"SUMMARY_JOBS: Resumed {resumed} background job(s) from {self.jobs_file}", category="startup")
+        self._publish()
+        return resumed
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_summary_job_queue() -> SummaryJobQueue:
+    """Return the process-wide summary job queue"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = SummaryJobQueue()
+        return _queue
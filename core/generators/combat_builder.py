@@ -17,6 +17,7 @@ import logging
 import shutil
 from utils.module_path_manager import ModulePathManager
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.file_operations import discard_journal
 
 # Set script name for logging
 set_script_name("combat_builder")
@@ -27,6 +28,7 @@ def clear_json_file(file_path):
     try:
         with open(file_path, "w") as f:
             json.dump([], f)
+        discard_journal(file_path)
         print(colored(f"Cleared contents of {file_path}", "green"))
     except Exception as e:
         print(colored(f"Error clearing {file_path}: {str(e)}", "red"))
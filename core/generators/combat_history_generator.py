@@ -24,6 +24,7 @@ import json
 import os
 from datetime import datetime
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.file_operations import safe_read_json
 
 # Set script name for logging
 set_script_name("combat_history_generator")
@@ -40,8 +41,7 @@ def generate_combat_chat_history():
     
     try:
         # Read the full conversation history
-        with open(input_file, "r", encoding="utf-8") as f:
-            full_history = json.load(f)
+        full_history = safe_read_json(input_file) or []
         
         # Filter out system messages and keep only user and assistant messages
         chat_history = [msg for msg in full_history if msg["role"] != "system"]
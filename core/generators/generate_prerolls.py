@@ -22,6 +22,14 @@
 # - Track combat rounds and provide unique preroll IDs
 # - Support round-based caching for dice consistency
 # 
+# ROLL ENGINE (one per encounter):
+# - Creature attack profiles are loaded from monster/NPC files once per
+#   encounter, not every round
+# - Each round's dice are drawn in one batch from a Random seeded with
+#   (encounter seed, round); the seed is stored in the encounter as
+#   'preroll_seed', so any round of a saved encounter can be replayed exactly
+# - The fixed instruction text is built once; rounds only fill in numbers
+# 
 # PROBLEM SOLVED:
 # Previously, AI would see multiple dice rolls and assume multiple attacks.
 # Now we explicitly state "X attacks available" with exact counts from
@@ -50,18 +58,16 @@
 import random
 import json
 import os
+import secrets
+import threading
+from collections import OrderedDict
 
-def generate_generic_dice_pool():
-    """Generate a pool of various dice types for flexible use"""
-    dice_pool = {
-        "d4": [random.randint(1, 4) for _ in range(8)],
-        "d6": [random.randint(1, 6) for _ in range(8)], 
-        "d8": [random.randint(1, 8) for _ in range(6)],
-        "d10": [random.randint(1, 10) for _ in range(6)],
-        "d12": [random.randint(1, 12) for _ in range(4)],
-        "d20": [random.randint(1, 20) for _ in range(10)]  # Extra d20s for various uses
-    }
-    return dice_pool
+GENERIC_DICE_COUNTS = (("d4", 4, 8), ("d6", 6, 8), ("d8", 8, 6), ("d10", 10, 6), ("d12", 12, 4), ("d20", 20, 10))
+SAVE_ABILITIES = ("STR", "DEX", "CON", "INT", "WIS", "CHA")
+MAX_ENCOUNTER_ENGINES = 4
+
+def _faces(sides):
+    return range(1, sides + 1)
 
 def get_monster_attacks(monster_type):
     """Load monster attack data from monster file"""
@@ -157,68 +163,46 @@ def get_npc_attacks(npc_name):
         print(f"Error loading NPC {npc_name}: {e}")
         return [{"name": "weapon attack"}], 1
 
-def generate_prerolls(encounter_data, round_num=None):
-    """Generate organized dice rolls with generic pool and creature-specific attacks.
-    
-    Args:
-        encounter_data: The encounter data dictionary
-        round_num: The current combat round number (defaults to 1 if not specified)
-    
-    Returns:
-        str: Formatted preroll text with round tracking
-    """
-    # Determine round number
-    if round_num is None:
-        round_num = encounter_data.get('current_round', 1)
-    
-    # Generate preroll ID for tracking
-    preroll_id = f"{round_num}-{random.randint(1000,9999)}"
-    
-    preroll_lines = []
-    preroll_lines.append(f"DM Note: COMBAT ROUND {round_num} - DICE AVAILABLE:")
-    preroll_lines.append(f"Preroll Set ID: {preroll_id} (Generated at round start)")
-    preroll_lines.append("")
-    
-    # Add critical dice usage instructions
-    preroll_lines.append("CRITICAL DICE USAGE:")
-    preroll_lines.append("- For NPC/Monster ATTACKS, you MUST use a die from the \"CREATURE ATTACKS\" list for that specific creature.")
-    preroll_lines.append("- For NPC/Monster SAVING THROWS, you MUST use a die from the \"SAVING THROWS\" list.")
-    preroll_lines.append("- The \"GENERIC DICE\" pool is ONLY for damage rolls, spell effects, or other non-attack/non-save rolls.")
-    preroll_lines.append("- FAILURE TO USE THE CORRECT POOL IS A CRITICAL ERROR.")
-    preroll_lines.append("")
-    
-    # Generate generic dice pool
-    dice_pool = generate_generic_dice_pool()
-    preroll_lines.append("=== GENERIC DICE (use for spells, abilities, improvisation) ===")
-    dice_line_parts = []
-    for die_type, rolls in dice_pool.items():
-        rolls_str = ",".join(map(str, rolls))
-        dice_line_parts.append(f"{die_type}: [{rolls_str}]")
-    preroll_lines.append(" | ".join(dice_line_parts))
-    preroll_lines.append("")
-    
-    # Find player name for context
-    player_name = "Unknown Player"
-    for creature in encounter_data.get("creatures", []):
-        if creature.get("type") == "player":
-            player_name = creature.get("name", "Unknown Player")
-            break
+PREROLL_HEADER = "\n".join([
+    "",
+    "CRITICAL DICE USAGE:",
+    "- For NPC/Monster ATTACKS, you MUST use a die from the \"CREATURE ATTACKS\" list for that specific creature.",
+    "- For NPC/Monster SAVING THROWS, you MUST use a die from the \"SAVING THROWS\" list.",
+    "- The \"GENERIC DICE\" pool is ONLY for damage rolls, spell effects, or other non-attack/non-save rolls.",
+    "- FAILURE TO USE THE CORRECT POOL IS A CRITICAL ERROR.",
+    "",
+    "=== GENERIC DICE (use for spells, abilities, improvisation) ===",
+])
+
+PREROLL_FOOTER = "\n".join([
+    "",
+    "IMPORTANT: Each creature can only make the number of attacks listed above.",
+    "Use generic dice pool for damage rolls, spells, and other abilities.",
+    "Apply all appropriate modifiers (ability scores, proficiency, weapon bonuses, etc.).",
+    "Note: {player_name} must make their own rolls.",
+    "",
+    "COMBAT TRACKING: You MUST include \"combat_round\" field in your JSON response.",
+    "Track combat rounds: increment ONLY when ALL alive creatures have completed their turns in initiative order.",
+    "These dice remain constant throughout the current round.",
+])
+
+class CombatRollEngine:
+    """Per-encounter attack profiles and reproducible per-round dice"""
     
-    # Generate creature-specific attack rolls
-    preroll_lines.append("=== CREATURE ATTACKS (exact number per creature) ===")
-    preroll_lines.append(f"[PLAYER: {player_name}] Must make own rolls")
+    def __init__(self, seed):
+        self.seed = seed
+        # creature key -> (creature name, available attacks text, number of attacks)
+        self._profiles = {}
+        self._lock = threading.Lock()
     
-    attack_creatures = []
-    saving_throw_creatures = []
+    @staticmethod
+    def _creature_key(creature):
+        return (creature.get("name"), creature.get("type"), creature.get("monsterType"),
+                creature.get("numAttacks"), json.dumps(creature.get("attacks", []), sort_keys=True, default=str))
     
-    for creature in encounter_data.get("creatures", []):
-        if creature.get("type") == "player":
-            continue
-            
+    def _load_profile(self, creature):
+        """Resolve attack names and count (from the encounter, else the creature file)"""
         creature_name = creature.get("name", "Unknown Creature")
-        creature_type = creature.get("type", "unknown").upper()
-        
-        # Get attack information from encounter data OR load from files
         num_attacks = creature.get("numAttacks")
         attacks_info = creature.get("attacks", [])
         
@@ -227,13 +211,11 @@ def generate_prerolls(encounter_data, round_num=None):
             try:
                 if creature.get("type") == "enemy":
                     # Load monster file to get actions
-                    monster_type = creature.get("monsterType", "")
-                    attacks_info, num_attacks = get_monster_attacks(monster_type)
+                    attacks_info, num_attacks = get_monster_attacks(creature.get("monsterType", ""))
                 elif creature.get("type") == "npc":
-                    # Load NPC file to get attacksAndSpellcasting  
+                    # Load NPC file to get attacksAndSpellcasting
                     from utils.module_path_manager import ModulePathManager
-                    path_manager = ModulePathManager()
-                    npc_name = path_manager.format_filename(creature_name)
+                    npc_name = ModulePathManager().format_filename(creature_name)
                     attacks_info, num_attacks = get_npc_attacks(npc_name)
             except Exception as e:
                 print(f"Warning: Could not load attack data for {creature_name}: {e}")
@@ -249,58 +231,120 @@ def generate_prerolls(encounter_data, round_num=None):
             creature_type_name = creature.get("monsterType", creature.get("type", "creature"))
             attacks_info = [{"name": f"{creature_type_name} attack"}]
         
-        # Generate exact number of attack rolls needed
-        attack_rolls = [random.randint(1, 20) for _ in range(num_attacks)]
-        
-        # Format attack information
         if num_attacks == 1:
-            attack_desc = f"Attack[{attack_rolls[0]}] (1 attack available"
-            if attacks_info:
-                attack_name = attacks_info[0].get("name", "attack")
-                attack_desc += f": {attack_name}"
-            attack_desc += ")"
+            available = f"1 attack available: {attacks_info[0].get('name', 'attack')}"
         else:
-            attack_rolls_str = "], Attack[".join(map(str, attack_rolls))
-            attack_desc = f"Attack[{attack_rolls_str}] ({num_attacks} attacks available"
-            if attacks_info:
-                attack_names = [attack.get("name", "attack") for attack in attacks_info[:num_attacks]]
-                attack_desc += f": {', '.join(attack_names)}"
-            attack_desc += ")"
+            attack_names = [attack.get("name", "attack") for attack in attacks_info[:num_attacks]]
+            available = f"{num_attacks} attacks available: {', '.join(attack_names)}"
+        return creature_name, available, num_attacks
+    
+    def profile(self, creature):
+        key = self._creature_key(creature)
+        with self._lock:
+            cached = self._profiles.get(key)
+        if cached is None:
+            cached = self._load_profile(creature)
+            with self._lock:
+                self._profiles[key] = cached
+        return cached
+    
+    def round_rng(self, round_num):
+        return random.Random(f"{self.seed}:{round_num}")
+    
+    def preroll_id(self, round_num):
+        """Preroll set ID for a round (the first draw of that round's RNG)"""
+        return f"{round_num}-{self.round_rng(round_num).randint(1000, 9999)}"
+    
+    def render(self, encounter_data, round_num):
+        """Draw one round's dice in a batch and render the preroll text"""
+        creatures = [creature for creature in encounter_data.get("creatures", []) if creature.get("type") != "player"]
+        profiles = [self.profile(creature) for creature in creatures]
+        
+        rng = self.round_rng(round_num)
+        preroll_id = f"{round_num}-{rng.randint(1000, 9999)}"
+        pool_parts = []
+        for die_type, sides, count in GENERIC_DICE_COUNTS:
+            rolls = rng.choices(_faces(sides), k=count)
+            pool_parts.append(f"{die_type}: [{','.join(map(str, rolls))}]")
+        # Attack and save d20s for every creature in one draw
+        d20s = rng.choices(_faces(20), k=sum(num_attacks + len(SAVE_ABILITIES) for _, _, num_attacks in profiles))
+        
+        player_name = "Unknown Player"
+        for creature in encounter_data.get("creatures", []):
+            if creature.get("type") == "player":
+                player_name = creature.get("name", "Unknown Player")
+                break
         
-        attack_creatures.append(f"{creature_name}: {attack_desc}")
+        attack_lines = []
+        save_lines = []
+        position = 0
+        for creature, (creature_name, available, num_attacks) in zip(creatures, profiles):
+            attack_rolls = d20s[position:position + num_attacks]
+            position += num_attacks
+            rolls = "Attack[" + "], Attack[".join(map(str, attack_rolls)) + "]"
+            attack_lines.append(f"{creature_name}: {rolls} ({available})")
+            save_rolls = d20s[position:position + len(SAVE_ABILITIES)]
+            position += len(SAVE_ABILITIES)
+            save_rolls_str = ", ".join(f"{ability}:{roll}" for ability, roll in zip(SAVE_ABILITIES, save_rolls))
+            save_lines.append(f"{creature.get('name', 'Unknown Creature')}: {save_rolls_str}")
         
-        # Generate saving throws for this creature
-        save_rolls = {
-            "STR": random.randint(1, 20),
-            "DEX": random.randint(1, 20), 
-            "CON": random.randint(1, 20),
-            "INT": random.randint(1, 20),
-            "WIS": random.randint(1, 20),
-            "CHA": random.randint(1, 20)
-        }
-        save_rolls_str = ", ".join([f"{ability}:{roll}" for ability, roll in save_rolls.items()])
-        saving_throw_creatures.append(f"{creature_name}: {save_rolls_str}")
+        preroll_lines = [
+            f"DM Note: COMBAT ROUND {round_num} - DICE AVAILABLE:",
+            f"Preroll Set ID: {preroll_id} (Generated at round start)",
+            PREROLL_HEADER,
+            " | ".join(pool_parts),
+            "",
+            "=== CREATURE ATTACKS (exact number per creature) ===",
+            f"[PLAYER: {player_name}] Must make own rolls",
+        ]
+        preroll_lines.extend(attack_lines)
+        preroll_lines.append("")
+        preroll_lines.append("=== SAVING THROWS ===")
+        preroll_lines.extend(save_lines)
+        preroll_lines.append(PREROLL_FOOTER.format(player_name=player_name))
+        return "\n".join(preroll_lines)
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+def get_roll_engine(encounter_data):
+    """
+    Return the roll engine for an encounter, creating it on first use.
     
-    # Add attack information
-    for attack_line in attack_creatures:
-        preroll_lines.append(attack_line)
+    A new encounter gets a random 'preroll_seed', stored in encounter_data
+    (callers save the encounter after generating prerolls).
+    """
+    seed = encounter_data.get("preroll_seed")
+    if seed is None:
+        seed = secrets.randbits(32)
+        encounter_data["preroll_seed"] = seed
+    key = (encounter_data.get("encounterId", ""), seed)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = CombatRollEngine(seed)
+            _engines[key] = engine
+            while len(_engines) > MAX_ENCOUNTER_ENGINES:
+                _engines.popitem(last=False)
+        _engines.move_to_end(key)
+        return engine
+
+def generate_prerolls(encounter_data, round_num=None):
+    """Generate organized dice rolls with generic pool and creature-specific attacks.
     
-    preroll_lines.append("")
-    preroll_lines.append("=== SAVING THROWS ===")
-    for save_line in saving_throw_creatures:
-        preroll_lines.append(save_line)
+    Args:
+        encounter_data: The encounter data dictionary
+        round_num: The current combat round number (defaults to 1 if not specified)
     
-    preroll_lines.append("")
-    preroll_lines.append("IMPORTANT: Each creature can only make the number of attacks listed above.")
-    preroll_lines.append("Use generic dice pool for damage rolls, spells, and other abilities.")
-    preroll_lines.append("Apply all appropriate modifiers (ability scores, proficiency, weapon bonuses, etc.).")
-    preroll_lines.append(f"Note: {player_name} must make their own rolls.")
-    preroll_lines.append("")
-    preroll_lines.append("COMBAT TRACKING: You MUST include \"combat_round\" field in your JSON response.")
-    preroll_lines.append("Track combat rounds: increment ONLY when ALL alive creatures have completed their turns in initiative order.")
-    preroll_lines.append(f"These dice remain constant throughout the current round.")
+    Returns:
+        str: Formatted preroll text with round tracking
+    """
+    # Determine round number
+    if round_num is None:
+        round_num = encounter_data.get('current_round', 1)
     
-    return "\n".join(preroll_lines)
+    return get_roll_engine(encounter_data).render(encounter_data, round_num)
 
 def test_generate_prerolls():
     """Test function for generate_prerolls"""
@@ -19,12 +19,14 @@ Master Module Builder
 Orchestrates the generation of a complete 5th edition module by calling generators in the proper sequence.
 """
 
+import copy
 import json
 import os
 import shutil
 import sys
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 
 # Add parent directories to Python path for imports when run directly
@@ -47,10 +49,18 @@ except ImportError:
 from utils.module_context import ModuleContext
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 from utils.npc_reconciler import NpcReconciler
+from utils.location_index import get_location_index
 
 # Set script name for logging
 set_script_name("module_builder")
 
+def _default_max_workers() -> int:
+    try:
+        import config
+        return getattr(config, "MODULE_BUILD_MAX_WORKERS", 4)
+    except ImportError:
+        return 4
+
 @dataclass
 class BuilderConfig:
     """Configuration for the module building process"""
@@ -59,6 +69,7 @@ class BuilderConfig:
     locations_per_area: int = 15
     output_directory: str = "./modules"
     verbose: bool = True
+    max_workers: int = field(default_factory=_default_max_workers)  # Areas generated concurrently
 
 class ModuleBuilder:
     """Orchestrates the complete module generation process"""
@@ -87,6 +98,70 @@ class ModuleBuilder:
             timestamp = datetime.now().strftime("%H:%M:%S")
             print(f"DEBUG: [Module Generator] [{timestamp}] {message}")
     
+    def report_progress(self, stage_index=None, message: str = "", sub_progress=None):
+        """Forward build progress to progress_callback (the web builder overrides this with its own stages)"""
+        if self.progress_callback:
+            progress_data = {'stage': 4, 'total_stages': 9, 'stage_name': 'Building module', 'percentage': 44, 'message': message}
+            if sub_progress is not None:
+                progress_data['sub_progress'] = sub_progress
+            self.progress_callback(progress_data)
+    
+    # ========================================================================
+    # PARALLEL AREA JOBS
+    # ========================================================================
+    # Areas only depend on the module overview, and an area's locations and
+    # plot only depend on that area, so each stage runs one job per area on a
+    # bounded pool. Jobs never touch builder state: they work on a private
+    # copy of the ModuleContext and return their results, which are merged
+    # into self.context / self.*_data afterwards in world-map order. Output is
+    # therefore the same whatever order the jobs finish in, and progress is
+    # reported from the calling thread as each job completes.
+    
+    def _run_area_jobs(self, stage: str, jobs: List[Tuple[str, Callable[[], Any]]]) -> Dict[str, Any]:
+        """
+        Run independent per-area jobs on the worker pool.
+        
+        Args:
+            stage: Label used in log and progress messages
+            jobs: [(area_id, job), ...] in world-map order
+        
+        Returns:
+            {area_id: result} in job order. The first failed job (in job
+            order) is re-raised once running jobs settle; jobs not yet
+            started are cancelled.
+        """
+        if not jobs:
+            return {}
+        workers = max(1, min(self.config.max_workers, len(jobs)))
+        self.log(f"{stage}: {len(jobs)} area(s) on {workers} worker(s)")
+        results = {}
+        errors = {}
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="module_builder") as executor:
+            futures = {executor.submit(job): area_id for area_id, job in jobs}
+            try:
+                for completed, future in enumerate(as_completed(futures), 1):
+                    area_id = futures[future]
+                    try:
+                        results[area_id] = future.result()
+                    except Exception as e:
+                        errors[area_id] = e
+                        self.log(f"ERROR: {stage} failed for {area_id}: {e}")
+                        for pending in futures:
+                            pending.cancel()
+                    self.report_progress(message=f"{stage}: {completed}/{len(jobs)} areas done ({area_id})",
+                                         sub_progress={'completed': completed, 'total': len(jobs), 'area_id': area_id})
+            except BaseException:
+                # Progress callbacks raise to cancel the build
+                for pending in futures:
+                    pending.cancel()
+                raise
+        
+        for area_id, _ in jobs:
+            if area_id in errors:
+                raise errors[area_id]
+        return {area_id: results[area_id] for area_id, _ in jobs if area_id in results}
+    
     def save_json(self, data: Dict[str, Any], filename: str):
         """Save JSON data to the output directory"""
         filepath = os.path.join(self.config.output_directory, filename)
@@ -143,17 +218,16 @@ MODULE INDEPENDENCE RULES:
         self.log("Step 1: Generating module overview...")
         contextualized_concept = self.context_header + initial_concept
         self.module_data = self.module_gen.generate_module(contextualized_concept, context=self.context)
+        self.log_field_timings()
         
         # Extract NPCs and factions from module data
         self._extract_module_entities()
         
-        # Step 2: Generate areas from the world map
+        # Steps 2-3: Generate areas from the world map, then each area's locations
+        # (an area's locations start as soon as that area is done)
         self.log("Step 2: Generating areas...")
-        self.generate_areas()
-        
-        # Step 3: Generate locations for each area
         self.log("Step 3: Generating locations for each area...")
-        self.generate_locations()
+        self.generate_areas(with_locations=True)
         
         # Step 3.5: Apply unique prefixes and create area connections
         self.log("Step 3.5: Finalizing location IDs and connections...")
@@ -197,6 +271,9 @@ MODULE INDEPENDENCE RULES:
         self.log("Step 8: Creating _BU.json backup files...")
         self.create_bu_backups()
         
+        # Register the new areas' location IDs for cross-module lookups
+        get_location_index().update_module(self.config.module_name)
+        
         self.log("Module generation complete!")
         self.log(f"Output saved to: {self.config.output_directory}")
     
@@ -274,54 +351,105 @@ MODULE INDEPENDENCE RULES:
         safe_write_json(area_data, area_file_path)
         self.log(f"  - SUCCESS: Mandated placement of '{antagonist_name}' in {climactic_area_id}:{climactic_location_id}.")
 
-    def generate_areas(self):
-        """Generate detailed area files from the module world map"""
-        world_map = self.module_data.get("worldMap", [])
+    def generate_areas(self, with_locations: bool = False):
+        """
+        Generate detailed area files from the module world map.
         
-        for i, region in enumerate(world_map[:self.config.num_areas]):
+        Areas are generated concurrently. With with_locations, each area's
+        locations are generated by the same job right after the area, so the
+        build waits for the slowest area rather than every area in turn.
+        """
+        world_map = self.module_data.get("worldMap", [])[:self.config.num_areas]
+        
+        # Register every region up front so each job sees the whole module layout
+        for region in world_map:
+            self.context.add_area(region["mapId"], region["regionName"], self.determine_area_type(region))
+        
+        existing_characters = []
+        if with_locations:
+            existing_characters = self.get_party_members()
+            self.log(f"Avoiding character name conflicts with: {', '.join(existing_characters)}")
+            self._allocate_module_npcs([region["mapId"] for region in world_map])
+        context_snapshot = copy.deepcopy(self.context)
+        
+        def area_job(index, region):
+            area_id, area_data = self._build_area(index, region)
+            location_data = None
+            if with_locations:
+                location_data = self._build_locations(area_id, area_data, existing_characters, context_snapshot)
+            return area_data, location_data
+        
+        jobs = [(region["mapId"], lambda i=i, region=region: area_job(i, region)) for i, region in enumerate(world_map)]
+        stage = "Generating areas and locations" if with_locations else "Generating areas"
+        results = self._run_area_jobs(stage, jobs)
+        
+        # Merge in world-map order
+        for region in world_map:
             area_id = region["mapId"]
-            
-            # Determine area type based on region description
-            area_type = self.determine_area_type(region)
-            
-            config = AreaConfig(
-                area_type=area_type,
-                size="medium" if i == 0 else ["small", "medium", "large"][i % 3],
-                complexity="moderate",
-                danger_level=region["dangerLevel"],
-                recommended_level=region["recommendedLevel"],
-                num_locations=self.config.locations_per_area
-            )
-            
-            # Add area to context
-            self.context.add_area(area_id, region["regionName"], area_type)
-            
-            # Determine the unique prefix for this area's locations
-            prefix = self.get_location_prefix(i)
-            
-            # Generate area using AreaGenerator
-            area_data = self.area_gen.generate_area(
-                region["regionName"],
-                area_id,
-                self.module_data,
-                config,
-                prefix=prefix
-            )
-            
-            # Validate area consistency after generation
-            self.validate_area_consistency(area_data, self.module_data)
-            
-            self.areas_data[area_id] = area_data
-            self.save_json(area_data, f"areas/{area_id}.json")
-            
-            # Save the map separately
-            if "map" in area_data:
-                self.save_json(area_data["map"], f"map_{area_id}.json")
-            
-            # Context will be updated when locations are generated
-            self.context.add_area(area_id, region['regionName'], area_data["areaType"])
-            
-            self.log(f"Generated area: {region['regionName']} ({area_id})")
+            area_data, _ = results[area_id]
+            self._merge_area(region, area_data)
+        if with_locations:
+            for region in world_map:
+                area_id = region["mapId"]
+                self._merge_locations(area_id, results[area_id][1])
+    
+    def _build_area(self, index: int, region: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Generate one area (worker thread - no shared state is modified)"""
+        area_id = region["mapId"]
+        
+        # Determine area type based on region description
+        area_type = self.determine_area_type(region)
+        
+        config = AreaConfig(
+            area_type=area_type,
+            size="medium" if index == 0 else ["small", "medium", "large"][index % 3],
+            complexity="moderate",
+            danger_level=region["dangerLevel"],
+            recommended_level=region["recommendedLevel"],
+            num_locations=self.config.locations_per_area
+        )
+        
+        # Determine the unique prefix for this area's locations
+        prefix = self.get_location_prefix(index)
+        
+        # Generate area using AreaGenerator
+        area_data = self.area_gen.generate_area(
+            region["regionName"],
+            area_id,
+            self.module_data,
+            config,
+            prefix=prefix
+        )
+        
+        # Validate area consistency after generation
+        self.validate_area_consistency(area_data, self.module_data)
+        return area_id, area_data
+    
+    def _merge_area(self, region: Dict[str, Any], area_data: Dict[str, Any]):
+        """Record a generated area in the builder state and save it"""
+        area_id = region["mapId"]
+        self.areas_data[area_id] = area_data
+        self.save_json(area_data, f"areas/{area_id}.json")
+        
+        # Save the map separately
+        if "map" in area_data:
+            self.save_json(area_data["map"], f"map_{area_id}.json")
+        
+        # Context will be updated when locations are generated
+        self.context.add_area(area_id, region['regionName'], area_data["areaType"])
+        
+        self.log(f"Generated area: {region['regionName']} ({area_id})")
+    
+    def log_field_timings(self):
+        """Log how long each module overview field took"""
+        timings = getattr(self.module_gen, "field_timings", [])
+        if not timings:
+            return
+        for field_path, seconds, cached in sorted(timings, key=lambda timing: -timing[1]):
+            self.log(f"  Field {field_path}: {'cached' if cached else f'{seconds:.1f}s'}")
+        generated = [seconds for _, seconds, cached in timings if not cached]
+        self.log(f"  {len(generated)} field(s) generated, {len(timings) - len(generated)} from cache, "
+                 f"{sum(generated):.1f}s of generation time")
     
     def determine_area_type(self, region: Dict[str, Any]) -> str:
         """Determine area type based on region description with better pattern matching"""
@@ -452,41 +580,131 @@ MODULE INDEPENDENCE RULES:
         existing_characters = self.get_party_members()
         self.log(f"Avoiding character name conflicts with: {', '.join(existing_characters)}")
         
-        for area_id, area_data in self.areas_data.items():
-            self.log(f"Generating locations for area {area_id}...")
-            
-            # Get the plot data for this area
-            plot_data = self.plots_data.get(area_id, {})
-            
-            # Generate locations using the LocationGenerator with context
-            location_data = self.location_gen.generate_locations(
-                area_data,
-                plot_data,
-                self.module_data,
-                context=self.context,
-                excluded_names=existing_characters,
-                context_header=self.context_header
-            )
-            
-            # Store locations data
-            self.locations_data[area_id] = location_data
-            
-            # Add locations to area data and save complete area file
-            area_data["locations"] = location_data["locations"]
-            self.save_json(area_data, f"areas/{area_id}.json")
-            
-            self.log(f"Generated {len(location_data['locations'])} locations for {area_id}")
+        self._allocate_module_npcs(list(self.areas_data))
+        context_snapshot = copy.deepcopy(self.context)
+        jobs = [(area_id, lambda area_id=area_id, area_data=area_data:
+                 self._build_locations(area_id, area_data, existing_characters, context_snapshot))
+                for area_id, area_data in self.areas_data.items()]
+        results = self._run_area_jobs("Generating locations", jobs)
+        
+        for area_id in self.areas_data:
+            self._merge_locations(area_id, results[area_id])
+    
+    def _build_locations(self, area_id: str, area_data: Dict[str, Any], existing_characters: List[str],
+                         context_snapshot: ModuleContext) -> Dict[str, Any]:
+        """Generate one area's locations (worker thread - uses a private context copy)"""
+        self.log(f"Generating locations for area {area_id}...")
+        
+        # Get the plot data for this area
+        plot_data = self.plots_data.get(area_id, {})
+        
+        # Only the module NPCs allocated to this area are required here
+        context = copy.deepcopy(context_snapshot)
+        context.generating_area = area_id
+        
+        # Generate locations using the LocationGenerator with context
+        return self.location_gen.generate_locations(
+            area_data,
+            plot_data,
+            self.module_data,
+            context=context,
+            excluded_names=existing_characters,
+            context_header=self.context_header
+        )
+    
+    def _allocate_module_npcs(self, area_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Assign each unplaced module NPC to one area before locations are generated
+        in parallel, so no two area jobs are asked to place the same NPC.
+        
+        Plot stage i goes to area min(i, last) in world-map order, the same
+        progression the unified plot uses; NPCs not named by any plot stage are
+        spread over the areas in turn.
+        """
+        allocation = {area_id: [] for area_id in area_ids}
+        if not area_ids:
+            return allocation
+        
+        stage_areas = {}
+        for i, stage in enumerate(self.module_data.get("mainPlot", {}).get("plotStages", [])):
+            for npc_name in stage.get("keyNPCs", []):
+                npc_key = self.context.find_npc_key(npc_name)
+                if npc_key:
+                    stage_areas.setdefault(npc_key, area_ids[min(i, len(area_ids) - 1)])
+        
+        unstaged = 0
+        for npc_key, npc_data in self.context.npcs.items():
+            if npc_data["appears_in"]:
+                continue
+            area_id = stage_areas.get(npc_key)
+            if area_id is None:
+                area_id = area_ids[unstaged % len(area_ids)]
+                unstaged += 1
+            self.context.assign_npc(npc_data["name"], area_id)
+            allocation[area_id].append(npc_data["name"])
+        
+        for area_id, npc_names in allocation.items():
+            if npc_names:
+                self.log(f"Module NPCs for {area_id}: {', '.join(npc_names)}")
+        return allocation
+    
+    def _merge_locations(self, area_id: str, location_data: Dict[str, Any]):
+        """Record an area's locations, register their NPCs in the shared context and save the area"""
+        area_data = self.areas_data[area_id]
+        
+        # Store locations data
+        self.locations_data[area_id] = location_data
+        
+        # Same NPC registration the LocationGenerator made on its private context copy
+        for location in location_data.get("locations", []):
+            location_id = location.get("locationId")
+            for npc in location.get("npcs", []):
+                npc_name = npc.get("name") if isinstance(npc, dict) else None
+                if npc_name and location_id:
+                    self.context.add_npc(
+                        npc_name=npc_name,
+                        area_id=area_id,
+                        location_id=location_id,
+                        description=npc.get("description", "")
+                    )
+        
+        # Add locations to area data and save complete area file
+        area_data["locations"] = location_data["locations"]
+        self.save_json(area_data, f"areas/{area_id}.json")
+        
+        self.log(f"Generated {len(location_data['locations'])} locations for {area_id}")
     
     def generate_plots(self):
         """Generate plot files for each area"""
+        context_snapshot = copy.deepcopy(self.context)
+        jobs = [(area_id, lambda area_id=area_id: self._build_plot(area_id, context_snapshot))
+                for area_id in self.areas_data]
+        results = self._run_area_jobs("Generating plots", jobs)
+        
         for area_id in self.areas_data:
-            self.log(f"Generating plot for area {area_id}...")
+            plot_data = results[area_id]
+            self.plots_data[area_id] = plot_data
+            # Individual plot files removed - using centralized module_plot.json instead
             
-            area_data = self.areas_data[area_id]
-            location_data = self.locations_data[area_id]
+            # Update context with plot points
+            for plot_point in plot_data.get("plotPoints", []):
+                self.context.add_plot_point(
+                    plot_point["id"],
+                    area_id,
+                    plot_point.get("location")
+                )
             
-            # Create area-specific context for plot generation
-            area_specific_context = f"""
+            self.log(f"Generated plot for {area_id}")
+    
+    def _build_plot(self, area_id: str, context_snapshot: ModuleContext) -> Dict[str, Any]:
+        """Generate one area's plot (worker thread - reads the context snapshot only)"""
+        self.log(f"Generating plot for area {area_id}...")
+        
+        area_data = self.areas_data[area_id]
+        location_data = self.locations_data[area_id]
+        
+        # Create area-specific context for plot generation
+        area_specific_context = f"""
 PLOT GENERATION FOR SPECIFIC AREA:
 ===================================
 AREA NAME: {area_data['areaName']}
@@ -499,28 +717,16 @@ The plot title should reference this specific area, not other locations.
 ===================================
 
 {self.context_header}"""
-            
-            plot_data = self.plot_gen.generate_plot(
-                self.module_data,
-                area_data,
-                location_data,
-                f"Create a plot specifically for {area_data['areaName']}, a {area_data.get('areaType', 'region')} area",
-                context=self.context,
-                context_header=area_specific_context
-            )
-            
-            self.plots_data[area_id] = plot_data
-            # Individual plot files removed - using centralized module_plot.json instead
-            
-            # Update context with plot points
-            for plot_point in plot_data.get("plotPoints", []):
-                self.context.add_plot_point(
-                    plot_point["id"],
-                    area_id,
-                    plot_point.get("location")
-                )
-            
-            self.log(f"Generated plot for {area_id}")
+        
+        plot_data = self.plot_gen.generate_plot(
+            self.module_data,
+            area_data,
+            location_data,
+            f"Create a plot specifically for {area_data['areaName']}, a {area_data.get('areaType', 'region')} area",
+            context=context_snapshot,
+            context_header=area_specific_context
+        )
+        return plot_data
     
     def unify_plots(self):
         """Unify individual area plots into a single module_plot.json using AI"""
@@ -726,9 +932,10 @@ IMPORTANT:
         
         client = OpenAI(api_key=GEMINI_API_KEY)
         
-        # Update each area's plot hooks
-        for area_id in self.areas_data:
-            self._update_single_area_plot_hooks(area_id, unified_plot, client)
+        # Each area's hooks live in its own file, so areas update concurrently
+        jobs = [(area_id, lambda area_id=area_id: self._update_single_area_plot_hooks(area_id, unified_plot, client))
+                for area_id in self.areas_data]
+        self._run_area_jobs("Updating plot hooks", jobs)
     
     def _update_single_area_plot_hooks(self, area_id, unified_plot, client):
         """Atomically update plot hooks for a single area with deep merge and safety guards"""
@@ -72,7 +72,10 @@ import os
 import re
 import glob
 import random
-from typing import Dict, List, Any, Optional
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from core.ai.gemini_wrapper import OpenAI
@@ -92,6 +95,29 @@ LOCATION_PREFIX_MAP = {
     # Special areas can have specific prefixes
 }
 
+# Module fields in output order, with the already-generated fields each one is
+# prompted with. Fields whose dependencies are complete generate concurrently,
+# so the build takes as long as the longest chain
+# (moduleName -> moduleDescription -> moduleConflicts -> mainObjective ->
+# antagonist -> plotStages -> worldMap), not the sum of all fields.
+FIELD_DEPENDENCIES = {
+    "moduleName": (),
+    "moduleDescription": ("moduleName",),
+    "moduleMetadata": ("moduleName", "moduleDescription"),
+    "moduleConflicts": ("moduleName", "moduleDescription"),
+    "mainPlot.mainObjective": ("moduleName", "moduleDescription", "moduleConflicts"),
+    "mainPlot.antagonist": ("moduleDescription", "moduleConflicts", "mainPlot.mainObjective"),
+    "mainPlot.plotStages": ("moduleDescription", "moduleMetadata", "mainPlot.mainObjective", "mainPlot.antagonist"),
+    "factions": ("moduleDescription", "moduleConflicts", "mainPlot.antagonist"),
+    "worldMap": ("moduleName", "moduleDescription", "moduleMetadata", "mainPlot.plotStages"),
+    "timelineEvents": ("moduleDescription", "moduleConflicts", "mainPlot.mainObjective", "mainPlot.plotStages"),
+}
+
+# Generated field values keyed by (concept, field, schema, dependency values).
+# A re-run with the same concept reuses every field whose inputs are unchanged,
+# which also resumes a build that stopped part way through.
+FIELD_CACHE_DIR = os.path.join("data", "module_field_cache")
+
 def get_location_prefix(area_index: int) -> str:
     """Get the appropriate prefix for location IDs based on area index"""
     # Use letters A-Z for first 26 areas, then AA-AZ, BA-BZ, etc.
@@ -457,6 +483,8 @@ class ModuleGenerator:
     def __init__(self):
         self.prompt_guide = ModulePromptGuide()
         self.schema = self.load_schema()
+        # (field_path, seconds, cached) for the last generate_module call, in completion order
+        self.field_timings: List[Tuple[str, float, bool]] = []
     
     def load_schema(self) -> Dict[str, Any]:
         """Load the module schema for validation"""
@@ -532,41 +560,11 @@ If the field expects an object, return just the object.
         if context:
             module_data["moduleName"] = context.module_name
         
-        # Generate fields in order of dependencies
-        field_order = [
-            "moduleName",
-            "moduleDescription", 
-            "moduleMetadata",
-            "moduleConflicts",
-            "mainPlot.mainObjective",
-            "mainPlot.antagonist",
-            "mainPlot.plotStages",
-            "factions",
-            "worldMap",
-            "timelineEvents"
-        ]
-        
-        # Build context with initial concept
-        context = {"initialConcept": initial_concept}
-        
-        for field_path in field_order:
-            # Skip if already provided in custom_values
-            if self.get_nested_value(module_data, field_path) is not None:
-                continue
-            
-            # Get schema info for this field
-            schema_info = self.get_field_schema(field_path)
-            
-            # Generate the field
-            value = self.generate_field(field_path, schema_info, context)
-            
-            # Set the value in module_data
-            self.set_nested_value(module_data, field_path, value)
-            
-            # Update context with the new field
-            self.set_nested_value(context, field_path, value)
-            
-            print(f"DEBUG: [Module Generator] Generated: {field_path}")
+        generated = self.generate_fields(initial_concept, module_data)
+        # Set in field order so the output is the same whichever field finished first
+        for field_path in FIELD_DEPENDENCIES:
+            if field_path in generated:
+                self.set_nested_value(module_data, field_path, generated[field_path])
         
         # Get module name for file operations
         module_name = module_data.get("moduleName", "")
@@ -599,6 +597,115 @@ If the field expects an object, return just the object.
         
         return module_data
     
+    def _field_cache_key(self, initial_concept: str, field_path: str, dependency_context: Dict[str, Any]) -> str:
+        """Cache key: concept, field, its schema and guide, and the values it depends on"""
+        guide_attr = field_path.replace(".", "_")
+        key_data = {
+            "concept": initial_concept,
+            "field": field_path,
+            "schema": self.get_field_schema(field_path),
+            "guide": getattr(self.prompt_guide, guide_attr, ""),
+            "context": dependency_context,
+            "model": DM_MAIN_MODEL,
+        }
+        canonical = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def _read_field_cache(self, cache_key: str):
+        """Return (hit, value) for a cached field"""
+        cache_path = os.path.join(FIELD_CACHE_DIR, f"{cache_key}.json")
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return True, json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            return False, None
+    
+    def _write_field_cache(self, cache_key: str, field_path: str, value: Any):
+        try:
+            os.makedirs(FIELD_CACHE_DIR, exist_ok=True)
+            cache_path = os.path.join(FIELD_CACHE_DIR, f"{cache_key}.json")
+            save_json_safely(cache_path, {"field": field_path, "value": value,
+                                          "created": datetime.now().isoformat()}, create_backup=False)
+        except Exception as e:
+            warning(f"MODULE_GENERATION: Could not cache {field_path}: {e}", category="module_creation")
+    
+    def _generate_cached_field(self, initial_concept: str, field_path: str, dependency_context: Dict[str, Any],
+                               use_cache: bool) -> Tuple[Any, float, bool]:
+        """Generate one field (worker thread). Returns (value, seconds, cached)."""
+        start = time.perf_counter()
+        cache_key = self._field_cache_key(initial_concept, field_path, dependency_context) if use_cache else None
+        if cache_key:
+            hit, value = self._read_field_cache(cache_key)
+            if hit:
+                return value, time.perf_counter() - start, True
+        
+        value = self.generate_field(field_path, self.get_field_schema(field_path), dependency_context)
+        if cache_key:
+            self._write_field_cache(cache_key, field_path, value)
+        return value, time.perf_counter() - start, False
+    
+    def generate_fields(self, initial_concept: str, provided: Dict[str, Any] = None,
+                        max_workers: Optional[int] = None, use_cache: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Generate every field in FIELD_DEPENDENCIES that is not already provided.
+        
+        Each field is prompted with the initial concept and the fields it
+        depends on, and starts as soon as those are available. Returns
+        {field_path: value} for the generated fields; per-field latency is
+        recorded in self.field_timings.
+        """
+        import config
+        provided = provided or {}
+        if max_workers is None:
+            max_workers = getattr(config, "MODULE_BUILD_MAX_WORKERS", 4)
+        if use_cache is None:
+            use_cache = getattr(config, "ENABLE_MODULE_FIELD_CACHE", True)
+        
+        values = {}
+        for field_path in FIELD_DEPENDENCIES:
+            value = self.get_nested_value(provided, field_path)
+            if value is not None:
+                values[field_path] = value
+        pending = [field_path for field_path in FIELD_DEPENDENCIES if field_path not in values]
+        generated = {}
+        self.field_timings = []
+        
+        def dependency_context(field_path):
+            context = {"initialConcept": initial_concept}
+            for dependency in FIELD_DEPENDENCIES[field_path]:
+                if dependency in values:
+                    self.set_nested_value(context, dependency, values[dependency])
+            return context
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="module_fields") as executor:
+            running = {}
+            try:
+                while pending or running:
+                    # Start every field whose dependencies are complete (in field order)
+                    for field_path in list(pending):
+                        if all(dependency in values for dependency in FIELD_DEPENDENCIES[field_path]):
+                            pending.remove(field_path)
+                            future = executor.submit(self._generate_cached_field, initial_concept, field_path,
+                                                     dependency_context(field_path), use_cache)
+                            running[future] = field_path
+                    
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        field_path = running.pop(future)
+                        value, seconds, cached = future.result()
+                        values[field_path] = value
+                        generated[field_path] = value
+                        self.field_timings.append((field_path, seconds, cached))
+                        source = "cache" if cached else f"{seconds:.1f}s"
+                        print(f"DEBUG: [Module Generator] Generated: {field_path} ({source})")
+            except BaseException:
+                # Fields already finished stay cached, so a re-run resumes from here
+                for future in running:
+                    future.cancel()
+                raise
+        
+        return generated
+    
     def get_field_schema(self, field_path: str) -> Dict[str, Any]:
         """Get schema information for a specific field"""
         parts = field_path.split(".")
@@ -108,6 +108,7 @@ from utils.enhanced_logger import debug, info, warning, error, set_script_name
 set_script_name("module_stitcher")
 from utils.encoding_utils import safe_json_load, safe_json_dump
 from utils.module_path_manager import ModulePathManager
+from utils.location_index import get_location_index
 
 class ModuleStitcher:
     """Manages automatic module integration and organic world building"""
@@ -560,6 +561,9 @@ Create atmospheric travel narration that leads into this adventure."""
             # Save registry
             safe_json_dump(self.world_registry, self.world_registry_file)
             
+            # Conflict resolution may have renamed location IDs - re-index them
+            get_location_index().update_module(module_name)
+            
             print(f"Successfully integrated module: {module_name}")
             print(f"  - Added {len(module_data.get('areas', {}))} areas")
             travel_text = module_data.get('travelNarration', {}).get('travelNarration', '')
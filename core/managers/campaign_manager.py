@@ -75,6 +75,7 @@ from core.ai.gemini_wrapper import OpenAI
 import config
 from utils.encoding_utils import safe_json_load, safe_json_dump
 from utils.module_path_manager import ModulePathManager
+from utils.location_index import get_location_index
 from utils.enhanced_logger import debug, info, warning, error, game_event, set_script_name
 
 # Set script name for logging
@@ -785,66 +786,9 @@ Focus on story outcomes, character development, and decisions that will matter i
         """Determine module name from location ID - FULLY AGNOSTIC"""
         if not location_id:
             return None
-            
-        # Use existing ModulePathManager to scan all modules
-        modules_dir = "modules"
-        if not os.path.exists(modules_dir):
-            return None
-            
-        for module_name in os.listdir(modules_dir):
-            module_path = os.path.join(modules_dir, module_name)
-            if os.path.isdir(module_path) and not module_name.startswith('.'):
-                try:
-                    path_manager = ModulePathManager(module_name)
-                    # Check if location exists in this module
-                    if self._location_exists_in_module(location_id, path_manager):
-                        return module_name
-                except:
-                    continue
-        
-        return None
-    
-    def _location_exists_in_module(self, location_id: str, path_manager: ModulePathManager) -> bool:
-        """Check if location ID exists in the given module"""
-        import glob
         
-        # Scan all area files in the module (both root and areas/ subdirectory)
-        module_dir = path_manager.module_dir
-        if not os.path.exists(module_dir):
-            return False
-            
-        # Check both root directory and areas/ subdirectory
-        search_patterns = [
-            f"{module_dir}/*.json",          # Legacy root directory
-            f"{module_dir}/areas/*.json"     # New areas/ subdirectory
-        ]
-        
-        for pattern in search_patterns:
-            for area_file in glob.glob(pattern):
-                # Skip module metadata and plot files
-                filename = os.path.basename(area_file)
-                if (filename.endswith("_module.json") or 
-                    filename.endswith("_plot.json") or 
-                    filename.startswith("module_") or
-                    filename.startswith("party_")):
-                    continue
-                    
-                try:
-                    area_data = safe_json_load(area_file)
-                    if area_data and "locations" in area_data:
-                        locations = area_data["locations"]
-                        
-                        # Handle both dict and list formats
-                        if isinstance(locations, dict):
-                            if location_id in locations:
-                                return True
-                        elif isinstance(locations, list):
-                            for location in locations:
-                                if isinstance(location, dict) and location.get("locationId") == location_id:
-                                    return True
-                except:
-                    continue
-        return False
+        # Reverse index over all modules' area files, refreshed on a miss
+        return get_location_index().get_module(location_id)
     
     def detect_module_transition(self, from_location: str, to_location: str) -> tuple:
         """Detect if transition crosses module boundaries"""
@@ -123,7 +123,7 @@ from core.ai.gemini_wrapper import OpenAI
 
 # Import OpenAI usage tracking (safe - won't break if fails)
 try:
-    from utils.gemini_usage_tracker import track_response, get_usage_stats
+    from utils.usage_tracker import track_response, get_usage_stats
     USAGE_TRACKING_AVAILABLE = True
     print("[COMBAT_MANAGER] OpenAI usage tracking enabled")
 except Exception as e:
@@ -144,12 +144,15 @@ from updates.update_character_info import update_character_info, normalize_chara
 import updates.update_encounter as update_encounter
 import updates.update_party_tracker as update_party_tracker
 # Import the preroll generator
-from core.generators.generate_prerolls import generate_prerolls
+from core.generators.generate_prerolls import generate_prerolls, get_roll_engine
+from core.managers.encounter_session import EncounterSession
 # Import safe JSON functions
 from utils.encoding_utils import safe_json_load
-from utils.file_operations import safe_write_json
+from utils.file_operations import safe_write_json, safe_write_json_list
+from utils.character_render_cache import character_render_cache
 import core.ai.cumulative_summary as cumulative_summary
 from utils.enhanced_logger import debug, info, warning, error, game_event, set_script_name
+from utils.event_bus import publish_narration
 
 # Set script name for logging
 set_script_name(__name__)
@@ -381,6 +384,11 @@ def save_json_file(file_path, data):
     except Exception as e:
         error(f"FILE_OP: Failed to save {file_path}: {str(e)}", category="file_operations")
 
+def save_conversation_history(conversation_history):
+    """Save the combat conversation, appending only new messages when possible"""
+    if not safe_write_json_list(conversation_history_file, conversation_history):
+        error(f"FILE_OP: Failed to save {conversation_history_file}", category="file_operations")
+
 def clean_combat_state_blocks(conversation_history):
     """
     Remove the instructional combat state blocks from all but the most recent user message.
@@ -986,7 +994,7 @@ def summarize_dialogue(conversation_history_param, location_data, party_tracker_
         conversation_history_param.append({"role": "user", "content": "The combat has concluded. What would you like to do next?"})
 
         debug(f"FILE_OP: Attempting to write to file: {conversation_history_file}", category="file_operations")
-        if not safe_write_json(conversation_history_file, conversation_history_param):
+        if not safe_write_json_list(conversation_history_file, conversation_history_param):
             error("FILE_OP: Failed to save conversation history", category="file_operations")
         else:
             debug("FILE_OP: Conversation history saved successfully", category="file_operations")
@@ -1140,6 +1148,7 @@ def sync_active_encounter():
                     player_data = safe_json_load(player_file)
                     if not player_data:
                         error(f"FAILURE: Failed to load player file: {player_file}", category="file_operations")
+                    else:
                         # Update combat-relevant fields
                         if creature.get("currentHitPoints") != player_data.get("hitPoints"):
                             creature["currentHitPoints"] = player_data.get("hitPoints")
@@ -1199,6 +1208,9 @@ def format_character_for_combat(char_data, char_type="player", role=None):
     Format character data (player or NPC) for combat system prompts using the same format as conversation_utils.
     This ensures consistency between main conversation and combat systems.
     
+    Served from the shared character render cache: the text is only rebuilt
+    when the character's content changes.
+    
     Args:
         char_data: The character's data dictionary
         char_type: "player" or "npc"
@@ -1207,6 +1219,10 @@ def format_character_for_combat(char_data, char_type="player", role=None):
     Returns:
         Formatted string matching conversation_utils format
     """
+    return character_render_cache.render_data(char_data, _render_character_for_combat, char_type, role)
+
+def _render_character_for_combat(char_data, char_type="player", role=None):
+    """Uncached body of format_character_for_combat"""
     # Get equipment string
     equipment_str = "None"
     if char_data.get('equipment'):
@@ -1336,6 +1352,8 @@ def format_npc_for_combat(npc_data, npc_role=None):
     Format NPC data for combat system prompts using the same format as conversation_utils.
     This ensures consistency between main conversation and combat systems.
     
+    Served from the shared character render cache (see format_character_for_combat).
+    
     Args:
         npc_data: The NPC's character data dictionary
         npc_role: Optional role description from party tracker
@@ -1343,6 +1361,10 @@ def format_npc_for_combat(npc_data, npc_role=None):
     Returns:
         Formatted string matching conversation_utils format
     """
+    return character_render_cache.render_data(npc_data, _render_npc_for_combat, npc_role)
+
+def _render_npc_for_combat(npc_data, npc_role=None):
+    """Uncached body of format_npc_for_combat"""
     # Get equipment string
     equipment_str = "None"
     if npc_data.get('equipment'):
@@ -1850,7 +1872,7 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
        conversation_history.append({"role": "system", "content": f"Encounter Details:\n{json.dumps(filter_encounter_for_system_prompt(encounter_data), indent=2)}"})
        
        log_conversation_structure(conversation_history)
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
    else:
        # Resuming combat - update player character and NPC templates to new format if needed
        print("[COMBAT_MANAGER] Updating player and NPC templates to new format during resume...")
@@ -1911,7 +1933,7 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
            print(f"[COMBAT_MANAGER] Added NPC {npc_data['name']} in new format at index {insert_index - 1}")
        
        # Save the updated conversation history
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
        print("[COMBAT_MANAGER] NPC templates updated to new format")
    
    # Prepare initial dynamic state info for all creatures
@@ -1968,10 +1990,14 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
    encounter_data['preroll_cache'] = {
        'round': round_num,
        'rolls': preroll_text,
-       'preroll_id': f"{round_num}-{random.randint(1000,9999)}"
+       'preroll_id': get_roll_engine(encounter_data).preroll_id(round_num)
    }
    save_json_file(json_file_path, encounter_data)
    debug(f"STATE_CHANGE: Saved prerolls for round {round_num}", category="combat_events")
+
+   # Encounter, player and NPC state is held in memory for the rest of the fight
+   session = EncounterSession(encounter_id, path_manager, encounter_data,
+                              load_npc_with_fuzzy_match, normalize_character_name)
    
    # --- START: RESUMPTION AND INITIAL SCENE LOGIC ---
    if is_resuming:
@@ -1982,7 +2008,7 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
        # Add the resume prompt to the history only if it's not already the last message.
        if not conversation_history or conversation_history[-1].get('content') != resume_prompt:
            conversation_history.append({"role": "user", "content": resume_prompt})
-           save_json_file(conversation_history_file, conversation_history)
+           save_conversation_history(conversation_history)
 
        # Get the AI's re-engagement response
        try:
@@ -2019,15 +2045,15 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
            resume_response_content = response.choices[0].message.content.strip()
            
            conversation_history.append({"role": "assistant", "content": resume_response_content})
-           save_json_file(conversation_history_file, conversation_history)
+           save_conversation_history(conversation_history)
 
            parsed_response = json.loads(resume_response_content)
            narration = parsed_response.get("narration", "The battle continues! What do you do?")
-           print(f"Dungeon Master: {narration}")
+           publish_narration(narration)
 
        except Exception as e:
            error("FAILURE: Could not get re-engagement narration.", exception=e, category="combat_events")
-           print("Dungeon Master: The battle continues! What will you do next?")
+           publish_narration("The battle continues! What will you do next?")
            import sys
            sys.stdout.flush()
    else:
@@ -2059,7 +2085,7 @@ Initiative Order: {initiative_order}
 Player: {initial_prompt_text}"""
 
        conversation_history.append({"role": "user", "content": initial_prompt})
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
 
        max_retries = 3
        initial_response = None
@@ -2111,24 +2137,28 @@ Player: {initial_prompt_text}"""
        conversation_history = conversation_history[:initial_conversation_length]
        if initial_response:
            conversation_history.append({"role": "assistant", "content": initial_response})
-           save_json_file(conversation_history_file, conversation_history)
+           save_conversation_history(conversation_history)
            try:
                parsed_response = json.loads(initial_response)
-               print(f"Dungeon Master: {parsed_response['narration']}")
+               publish_narration(parsed_response['narration'])
                import sys
                sys.stdout.flush()
            except (json.JSONDecodeError, KeyError):
-               print(f"Dungeon Master: {initial_response}") # Print raw if parsing fails
+               publish_narration(initial_response) # Print raw if parsing fails
                import sys
                sys.stdout.flush()
        else:
            error("FAILURE: Could not get a valid initial scene from AI.", category="combat_events")
+           session.close()
            return None, None # Exit if we can't start combat
    # --- END: RESUMPTION AND INITIAL SCENE LOGIC ---
    
    # Combat loop
    debug("[COMBAT_MANAGER] Entering main combat loop", category="combat_events")
    
+   game_event("combat_start", {"encounter_id": encounter_id, "enemies": ", ".join(
+       c.get("name", "Unknown") for c in session.encounter.get("creatures", []) if c.get("type") == "enemy")})
+
    # Update status to show combat is active
    try:
        from core.managers.status_manager import status_manager
@@ -2145,45 +2175,35 @@ Player: {initial_prompt_text}"""
            status_manager.update_status("", is_processing=False)
        except Exception as e:
            debug(f"Could not clear status: {e}", category="status")
-       sync_active_encounter()
+       session.sync_creatures()
+       encounter_data = session.encounter
        
        # REFRESH CONVERSATION HISTORY WITH LATEST DATA
        debug("STATE_CHANGE: Refreshing conversation history with latest character data...", category="combat_events")
        
-       # Reload player info FOR CONVERSATION HISTORY ONLY - use same pattern as NPCs
+       # Fresh player data FOR CONVERSATION HISTORY ONLY - use same pattern as NPCs
        # This prevents XP reset bug by not overwriting the in-memory player_info object
        player_name = normalize_character_name(player_info["name"])
        player_file = path_manager.get_character_path(player_name)
-       try:
-           # Load fresh data for conversation history without overwriting player_info
-           fresh_player_data = safe_json_load(player_file)
-           if not fresh_player_data:
-               error(f"FAILURE: Failed to load player file: {player_file}", category="file_operations")
-           else:
-               # Update conversation history with fresh data using compressed format
-               formatted_player = format_character_for_combat(fresh_player_data, char_type="player")
-               conversation_history[2]["content"] = f"Here's the player character data:\n\n{formatted_player}\n"
-       except Exception as e:
-           error(f"FAILURE: Failed to reload player file {player_file}", exception=e, category="file_operations")
+       fresh_player_data, _ = session.character(player_info["name"], "player")
+       if not fresh_player_data:
+           error(f"FAILURE: Failed to load player file: {player_file}", category="file_operations")
+       else:
+           # Update conversation history with fresh data using compressed format
+           formatted_player = format_character_for_combat(fresh_player_data, char_type="player")
+           conversation_history[2]["content"] = f"Here's the player character data:\n\n{formatted_player}\n"
        
-       # Reload encounter data
-       json_file_path = f"modules/encounters/encounter_{encounter_id}.json"
-       try:
-           encounter_data = safe_json_load(json_file_path)
-           if encounter_data:
-               # Find and update the encounter data in conversation history
-               for i, msg in enumerate(conversation_history):
-                   if msg["role"] == "system" and "Encounter Details:" in msg["content"]:
-                       conversation_history[i]["content"] = f"Encounter Details:\n{json.dumps(filter_encounter_for_system_prompt(encounter_data), indent=2)}"
-                       break
-       except Exception as e:
-           error(f"FAILURE: Failed to reload encounter file {json_file_path}", exception=e, category="file_operations")
+       # Update the encounter data in conversation history
+       json_file_path = session.encounter_file
+       for i, msg in enumerate(conversation_history):
+           if msg["role"] == "system" and "Encounter Details:" in msg["content"]:
+               conversation_history[i]["content"] = f"Encounter Details:\n{json.dumps(filter_encounter_for_system_prompt(encounter_data), indent=2)}"
+               break
        
-       # Reload NPC data
+       # Refresh NPC data
        for creature in encounter_data["creatures"]:
            if creature["type"] == "npc":
-               # Use fuzzy matching for NPC reloading
-               npc_data, matched_filename = load_npc_with_fuzzy_match(creature["name"], path_manager)
+               npc_data, matched_filename = session.character(creature["name"], "npc")
                if npc_data and matched_filename:
                    # Update the NPC in the templates dictionary
                    npc_templates[matched_filename] = npc_data
@@ -2197,7 +2217,7 @@ Player: {initial_prompt_text}"""
                break
        
        # Save updated conversation history
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
        
        # Display player stats and get input
        player_name_display = player_info["name"]
@@ -2213,6 +2233,7 @@ Player: {initial_prompt_text}"""
            user_input_text = input(f"{stats_display} {player_name_display}: ")
        except EOFError:
            error("FAILURE: EOF when reading a line in run_combat_simulation", category="combat_events")
+           session.close()
            break
        
        # Skip empty input to prevent infinite loop
@@ -2261,8 +2282,8 @@ Player: {initial_prompt_text}"""
                # Get the actual max HP from the correct source
                npc_data = None
                if creature["type"] == "npc":
-                   # For NPCs, look up their true max HP from their character file using fuzzy match
-                   npc_data, matched_filename = load_npc_with_fuzzy_match(creature_name, path_manager)
+                   # For NPCs, look up their true max HP from their character file
+                   npc_data, matched_filename = session.character(creature_name, "npc")
                    if npc_data:
                        creature_max_hp = npc_data["maxHitPoints"]
                    else:
@@ -2307,10 +2328,9 @@ Player: {initial_prompt_text}"""
            encounter_data['preroll_cache'] = {
                'round': current_round,
                'rolls': preroll_text,
-               'preroll_id': f"{current_round}-{random.randint(1000,9999)}"
+               'preroll_id': get_roll_engine(encounter_data).preroll_id(current_round)
            }
-           # Save the encounter data with preroll cache to disk
-           save_json_file(json_file_path, encounter_data)
+           session.mark_dirty()
            debug(f"STATE_CHANGE: Generated new prerolls for round {current_round}", category="combat_events")
        else:
            # Use cached prerolls for current round
@@ -2324,26 +2344,23 @@ Player: {initial_prompt_text}"""
                encounter_data['preroll_cache'] = {
                    'round': current_round,
                    'rolls': preroll_text,
-                   'preroll_id': f"{current_round}-{random.randint(1000,9999)}"
+                   'preroll_id': get_roll_engine(encounter_data).preroll_id(current_round)
                }
-               # Save the encounter data with preroll cache to disk
-               save_json_file(json_file_path, encounter_data)
+               session.mark_dirty()
                debug(f"STATE_CHANGE: Generated fallback prerolls for round {current_round}", category="combat_events")
        
        # Generate initiative order for validation context
-       # Try to use AI-powered live initiative tracker
+       # Live initiative tracker is built locally (AI tracker only as an opt-in verifier)
        live_tracker = None
        try:
-           from .initiative_tracker_ai import generate_live_initiative_tracker
-           # Get recent conversation for analysis (last 20 messages)
-           recent_conversation = conversation_history[-20:] if len(conversation_history) > 20 else conversation_history
-           live_tracker = generate_live_initiative_tracker(encounter_data, recent_conversation, current_round)
+           from .initiative_tracker import generate_initiative_tracker
+           live_tracker = generate_initiative_tracker(encounter_data, conversation_history, current_round)
            if live_tracker:
-               debug("AI_TRACKER: Successfully generated live initiative tracker", category="combat_events")
+               debug("AI_TRACKER: Generated local live initiative tracker", category="combat_events")
        except Exception as e:
            debug(f"AI_TRACKER: Failed to generate live tracker: {e}", category="combat_events")
        
-       # Use AI tracker if available, otherwise fall back to simple format
+       # Use live tracker if available, otherwise fall back to simple format
        if live_tracker:
            initiative_display = live_tracker
        else:
@@ -2386,7 +2403,7 @@ Do not narrate or process any actions from the next round in this response. The
        
        # Add user input to conversation history
        conversation_history.append({"role": "user", "content": user_input_with_note})
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
        
        # Get AI response with validation and retries
        max_retries = 5
@@ -2614,7 +2631,7 @@ Do not narrate or process any actions from the next round in this response. The
                warning(f"FAILURE: Failed to write validation log", category="file_operations")
        
        # Save the cleaned conversation history
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
        
        if not ai_response:
            error("FAILURE: Failed to get a valid AI response after multiple attempts", category="combat_events")
@@ -2654,8 +2671,9 @@ Do not narrate or process any actions from the next round in this response. The
                    encounter_data['combat_round'] = new_round
                    # Also update current_round for backwards compatibility
                    encounter_data['current_round'] = new_round
-                   # Save the updated encounter data
-                   save_json_file(f"modules/encounters/encounter_{encounter_id}.json", encounter_data)
+                   # Persist at the round boundary
+                   session.mark_dirty()
+                   session.flush()
                    
                    # Compress old combat rounds if we're at round 3 or higher
                    if new_round >= 3:
@@ -2671,7 +2689,7 @@ Do not narrate or process any actions from the next round in this response. The
                        if len(compressed_history) < len(conversation_history):
                            debug(f"COMPRESSION: History compressed from {len(conversation_history)} to {len(compressed_history)} messages", category="combat_events")
                            conversation_history = compressed_history
-                           save_json_file(conversation_history_file, conversation_history)
+                           save_conversation_history(conversation_history)
                            info(f"COMPRESSION: Combat history compressed and saved", category="combat_events")
                        else:
                            debug(f"COMPRESSION: No compression occurred (still {len(conversation_history)} messages)", category="combat_events")
@@ -2698,7 +2716,7 @@ Do not narrate or process any actions from the next round in this response. The
        is_combat_ending = any(a.get("action", "").lower() == "exit" for a in actions)
 
        # Display narration immediately, as it describes the events of the turn.
-       print(f"Dungeon Master: {narration}")
+       publish_narration(narration)
        import sys
        sys.stdout.flush()
 
@@ -2724,19 +2742,25 @@ Do not narrate or process any actions from the next round in this response. The
                changes = parameters.get("changes", "")
                info(f"STATE_UPDATE: Processing immediate encounter update: {changes}", category="encounter_management")
                try:
+                   # update_encounter works on the file, so write pending changes first
+                   session.flush(wait=True)
                    updated_encounter_data = update_encounter.update_encounter(encounter_id_for_update, changes)
                    if updated_encounter_data:
                        encounter_data = normalize_encounter_status(updated_encounter_data)
+                       if encounter_id_for_update == encounter_id:
+                           session.replace_encounter(encounter_data)
                except Exception as e:
                    error(f"FAILURE: Failed to update encounter", exception=e, category="encounter_management")
            
            elif action_type == "exit" and is_combat_ending:
                # If combat is ending, add the authoritative HP and XP to our dictionary.
                info("CONSOLIDATING: 'exit' action detected. Calculating final HP and XP.", category="combat_events")
+               # XP is calculated from the encounter file
+               session.flush(wait=True)
                xp_narrative, xp_awarded = calculate_xp()
                info(f"XP_AWARD: Calculated {xp_awarded} XP per participant.", category="xp_tracking")
                conversation_history.append({"role": "user", "content": f"XP Awarded: {xp_narrative}"})
-               save_json_file(conversation_history_file, conversation_history)
+               save_conversation_history(conversation_history)
 
                for creature in encounter_data.get("creatures", []):
                    if creature.get("type") in ["player", "npc"]:
@@ -2768,6 +2792,8 @@ Do not narrate or process any actions from the next round in this response. The
 
        # STEP 3: If combat ended, perform final cleanup and exit the simulation.
        if is_combat_ending:
+           session.close()
+           game_event("combat_end", {"encounter_id": encounter_id, "result": "Combat concluded"})
            if 'worldConditions' in party_tracker_data and 'activeCombatEncounter' in party_tracker_data['worldConditions']:
                last_encounter_id = party_tracker_data["worldConditions"]["activeCombatEncounter"]
                if last_encounter_id:
@@ -2790,7 +2816,9 @@ Do not narrate or process any actions from the next round in this response. The
            return dialogue_summary_result, player_info
 
        # Save updated conversation history after processing all actions
-       save_json_file(conversation_history_file, conversation_history)
+       save_conversation_history(conversation_history)
+       # Write-behind: persist this exchange's encounter changes
+       session.flush()
 
 def main():
     debug("INITIALIZATION: Starting main function in combat_manager", category="combat_events")
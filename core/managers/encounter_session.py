@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# ENCOUNTER_SESSION.PY - IN-MEMORY COMBAT WORKING SET
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Game Systems Layer - Combat State Persistence
+#
+# run_combat_simulation used to re-read the encounter, player and NPC files
+# (and the party tracker, through sync_active_encounter) several times per
+# exchange and rewrite the encounter file after every change. This session
+# keeps that working set in memory for the whole fight.
+#
+# READS:
+# - The encounter is loaded once and then only changed in place
+# - Character files are resolved once (NPC fuzzy matching included) and kept
+#   with their mtime/size; a file is re-read only when update_character_info
+#   (or anything else) has rewritten it
+#
+# WRITES (write-behind):
+# - Changes mark the encounter dirty; flush() hands a snapshot to a single
+#   background writer and returns. Snapshots queued faster than they are
+#   written are coalesced, only the newest one is written
+# - flush(wait=True) is used before code that reads the encounter file
+#   itself (update_encounter, XP calculation) and when combat ends
+# - The combat loop flushes once per exchange, so a crash loses at most the
+#   exchange in progress - the same window as the conversation history - and
+#   the existing resume path reloads the encounter file as before
+# ============================================================================
+
+import copy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.encoding_utils import safe_json_load
+from utils.file_operations import safe_write_json
+from utils.enhanced_logger import debug, error
+
+# Creature field -> character file field kept in sync during combat
+SYNC_FIELDS = [
+    ("currentHitPoints", "hitPoints"),
+    ("maxHitPoints", "maxHitPoints"),
+    ("status", "status"),
+    ("conditions", "condition_affected"),
+]
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _CharacterEntry:
+    __slots__ = ("path", "filename", "signature", "data")
+
+    def __init__(self, path: str, filename: str, data: Dict):
+        self.path = path
+        self.filename = filename
+        self.signature = _signature(path)
+        self.data = data
+
+
+class EncounterSession:
+    """Encounter, player and NPC state for one fight, persisted write-behind"""
+
+    def __init__(self, encounter_id: str, path_manager, encounter_data: Dict,
+                 npc_loader: Callable, name_normalizer: Callable[[str], str]):
+        self.encounter_id = encounter_id
+        self.encounter_file = f"modules/encounters/encounter_{encounter_id}.json"
+        self.path_manager = path_manager
+        self.encounter = encounter_data
+        self._npc_loader = npc_loader
+        self._normalize = name_normalizer
+        self._characters: Dict[str, _CharacterEntry] = {}
+        self._dirty = False
+        self._version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        self._pending = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encounter_writer")
+        self.reads = 0
+        self.writes = 0
+
+    # ------------------------------------------------------------------
+    # Characters
+    # ------------------------------------------------------------------
+
+    def _load_character(self, name: str, creature_type: str) -> Optional[_CharacterEntry]:
+        if creature_type == "player":
+            filename = self._normalize(name)
+            path = self.path_manager.get_character_path(filename)
+            data = safe_json_load(path)
+        else:
+            data, filename = self._npc_loader(name, self.path_manager)
+            path = self.path_manager.get_character_path(filename) if filename else None
+        if not data or not path:
+            return None
+        self.reads += 1
+        return _CharacterEntry(path, filename, data)
+
+    def character(self, name: str, creature_type: str = "npc") -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Current character data for a combatant, re-read only if its file changed.
+
+        Returns:
+            (data, filename) or (None, None) if the character file cannot be loaded.
+            The data is shared; treat it as read-only.
+        """
+        entry = self._characters.get(name)
+        if entry is not None and _signature(entry.path) != entry.signature:
+            data = safe_json_load(entry.path)
+            if data:
+                self.reads += 1
+                entry.signature = _signature(entry.path)
+                entry.data = data
+            else:
+                entry = None
+        if entry is None:
+            entry = self._load_character(name, creature_type)
+            if entry is None:
+                self._characters.pop(name, None)
+                return None, None
+            self._characters[name] = entry
+        return entry.data, entry.filename
+
+    def sync_creatures(self) -> bool:
+        """Copy player/NPC HP, status and conditions into the encounter; True if anything changed"""
+        changed = False
+        for creature in self.encounter.get("creatures", []):
+            if creature.get("type") not in ("player", "npc"):
+                continue
+            data, _ = self.character(creature["name"], creature["type"])
+            if not data:
+                error(f"FAILURE: Failed to load character file for: {creature['name']}", category="file_operations")
+                continue
+            for creature_field, character_field in SYNC_FIELDS:
+                value = data.get(character_field, [] if creature_field == "conditions" else None)
+                if creature.get(creature_field) != value:
+                    creature[creature_field] = value
+                    changed = True
+        if changed:
+            self.mark_dirty()
+            debug(f"SUCCESS: Active encounter {self.encounter_id} synced with latest character data", category="encounter_setup")
+        return changed
+
+    # ------------------------------------------------------------------
+    # Encounter
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def replace_encounter(self, encounter_data: Dict):
+        """Adopt encounter data that was already written to disk (e.g. by update_encounter)"""
+        self.encounter = encounter_data
+        self._dirty = False
+
+    def _write(self):
+        with self._write_lock:
+            version, snapshot = self._pending
+            if version <= self._written_version:
+                return
+            self._written_version = version
+        if safe_write_json(self.encounter_file, snapshot):
+            self.writes += 1
+        else:
+            error(f"FAILURE: Failed to save encounter file: {self.encounter_file}", category="file_operations")
+
+    def flush(self, wait: bool = False):
+        """Persist the encounter if it changed since the last flush"""
+        future = None
+        if self._dirty:
+            self._dirty = False
+            self._version += 1
+            snapshot = copy.deepcopy(self.encounter)
+            with self._write_lock:
+                self._pending = (self._version, snapshot)
+            future = self._writer.submit(self._write)
+        if wait:
+            # An empty job drains everything queued before it
+            (future or self._writer.submit(lambda: None)).result()
+
+    def close(self):
+        """Flush outstanding changes and stop the writer"""
+        self.flush(wait=True)
+        self._writer.shutdown(wait=True)
+        debug(f"STATE_CHANGE: Encounter session {self.encounter_id} closed "
+              f"({self.reads} character reads, {self.writes} encounter writes)", category="combat_events")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# INITIATIVE_TRACKER.PY - LOCAL LIVE INITIATIVE TRACKER
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Game Systems Layer - Combat Turn State
+#
+# Builds the "Live Initiative Tracker" block shown to the combat model each
+# turn from encounter data and the combat conversation, without a model call.
+# The output uses the same markers as initiative_tracker_ai:
+#   [X] Acted   [>] CURRENT TURN   [ ] Waiting   [D] Dead
+#   [U] Skipped (Unconscious)   [S] Stunned   [P] Paralyzed   [-] other condition
+#
+# TURN STATE MACHINE:
+# - Order: initiative descending, then name (as get_initiative_order)
+# - Down/skipped creatures come from encounter status, HP and conditions;
+#   a player at 0 HP is unconscious, any other creature at 0 HP is dead
+# - Start of a round (no DM response in this round yet): the first creature
+#   able to act has the turn
+# - The combat prompt makes the DM resolve NPC turns in order and stop at the
+#   player's turn, so once the DM has answered in this round the player has
+#   the turn. Player reactions and saving throws are answered inside that
+#   exchange and do not move the pointer
+# - The DM's "plan" may say whose turn it is ("Now it is X's turn",
+#   "WAITING for X"); when that plan is still about the current round and
+#   names a creature that can act, that creature has the turn instead
+#
+# The AI tracker is kept as an opt-in verifier (VERIFY_INITIATIVE_WITH_AI):
+# it runs on a background thread and only logs where it disagrees.
+# ============================================================================
+
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils.enhanced_logger import debug, warning
+
+TRACKER_HEADER = "**Live Initiative Tracker:**"
+
+SKIP_CONDITIONS = [
+    ("stunned", "S", "Skipped (Stunned)"),
+    ("paralyzed", "P", "Skipped (Paralyzed)"),
+    ("unconscious", "U", "Skipped (Unconscious)"),
+    ("petrified", "-", "Skipped (Petrified)"),
+    ("incapacitated", "-", "Skipped (Incapacitated)"),
+]
+
+# Phrases in the DM plan that name the creature whose turn it is
+TURN_CUES = re.compile(r"(?:'s turn|’s turn|now it is|it is now|waiting for|awaiting)", re.IGNORECASE)
+TURN_ENDED = re.compile(r"turn (?:concludes|is over|ends|ended|is complete|completes)|(?:after|once) \w", re.IGNORECASE)
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", (name or "").lower())
+
+
+def _conditions(creature: Dict) -> List[str]:
+    conditions = creature.get("conditions") or creature.get("condition_affected") or []
+    if isinstance(conditions, str):
+        conditions = [conditions]
+    condition = creature.get("condition")
+    if isinstance(condition, str) and condition.lower() not in ("", "none", "normal"):
+        conditions = list(conditions) + [condition]
+    return [str(c).lower() for c in conditions]
+
+
+def creature_state(creature: Dict) -> Optional[Tuple[str, str]]:
+    """(marker, label) for a creature that cannot act, or None"""
+    status = str(creature.get("status", "alive")).lower()
+    if status == "dead":
+        return "D", "Dead"
+    hit_points = creature.get("currentHitPoints", creature.get("hitPoints"))
+    if isinstance(hit_points, (int, float)) and hit_points <= 0:
+        # Only player characters make death saves; anyone else at 0 HP is dead
+        if creature.get("type") != "player":
+            return "D", "Dead"
+        return "U", "Skipped (Unconscious)"
+    if status == "unconscious":
+        return "U", "Skipped (Unconscious)"
+    conditions = _conditions(creature)
+    for condition, marker, label in SKIP_CONDITIONS:
+        if any(condition in entry for entry in conditions):
+            return marker, label
+    return None
+
+
+def initiative_order(creatures: List[Dict]) -> List[Dict]:
+    return sorted(creatures, key=lambda c: (-(c.get("initiative") or 0), c.get("name", "")))
+
+
+def _message_round(message: Dict) -> Optional[int]:
+    content = message.get("content", "") or ""
+    if message.get("role") == "assistant":
+        match = re.search(r'"combat_round"\s*:\s*(\d+)', content)
+    elif message.get("role") == "user":
+        match = re.search(r"Round:\s*(\d+)", content)
+    else:
+        return None
+    return int(match.group(1)) if match else None
+
+
+def _plan_text(content: str) -> str:
+    """The "plan" field of a DM response (tolerates code fences and bad JSON)"""
+    text = content.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return str(data.get("plan", ""))
+    except (ValueError, TypeError):
+        pass
+    match = re.search(r'"plan"\s*:\s*"((?:[^"\\]|\\.)*)"', content, re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _plan_round(plan: str) -> Optional[int]:
+    match = re.match(r"\s*Round\s+(\d+)", plan, re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def _named_current_turn(plan: str, candidates: List[Dict]) -> Optional[Dict]:
+    """The creature the plan says acts next, if a turn sentence names exactly one candidate first"""
+    for sentence in re.split(r"(?<=[.!?])\s+", plan):
+        if not TURN_CUES.search(sentence) or TURN_ENDED.search(sentence):
+            continue
+        normalized = _normalize_name(sentence)
+        best = None
+        for creature in candidates:
+            key = _normalize_name(creature.get("name", ""))
+            position = normalized.find(key) if key else -1
+            if position >= 0 and (best is None or position < best[0]):
+                best = (position, creature)
+        if best:
+            return best[1]
+    return None
+
+
+class LocalInitiativeTracker:
+    """Deterministic turn state for one encounter snapshot"""
+
+    def __init__(self, encounter_data: Dict, conversation_history: List[Dict], current_round: int):
+        self.creatures = initiative_order(encounter_data.get("creatures", []))
+        self.current_round = current_round
+        self.round_responses = [
+            message for message in conversation_history
+            if message.get("role") == "assistant" and _message_round(message) == current_round
+        ]
+
+    def current_creature(self) -> Optional[Dict]:
+        able = [creature for creature in self.creatures if creature_state(creature) is None]
+        if not able:
+            return None
+        if not self.round_responses:
+            return able[0]
+        plan = _plan_text(self.round_responses[-1].get("content", ""))
+        # A plan that starts in an earlier round describes turns this response already resolved
+        if _plan_round(plan) in (None, self.current_round):
+            named = _named_current_turn(plan, able)
+            if named is not None:
+                return named
+        for creature in able:
+            if creature.get("type") == "player":
+                return creature
+        return able[0]
+
+    def render(self) -> Optional[str]:
+        if not self.creatures:
+            return None
+        current = self.current_creature()
+        current_index = self.creatures.index(current) if current is not None else len(self.creatures)
+        lines = [TRACKER_HEADER]
+        for index, creature in enumerate(self.creatures):
+            name = creature.get("name", "Unknown")
+            init_value = creature.get("initiative", 0)
+            state = creature_state(creature)
+            if state:
+                marker, label = state
+                lines.append(f"- [{marker}] {name} ({init_value}) - {label}")
+            elif index < current_index:
+                lines.append(f"- [X] {name} ({init_value}) - Acted")
+            elif index == current_index:
+                lines.append(f"- [>] **{name} ({init_value}) - CURRENT TURN**")
+            else:
+                lines.append(f"- [ ] {name} ({init_value}) - Waiting")
+        return "\n".join(lines)
+
+
+def parse_tracker(tracker_text: str) -> Dict[str, str]:
+    """{normalized creature name: marker} from tracker text"""
+    markers = {}
+    for line in (tracker_text or "").splitlines():
+        match = re.match(r"\s*-\s*\[(.)\]\s*\**(.+?)\s*\(", line)
+        if match:
+            markers[_normalize_name(match.group(2))] = match.group(1)
+    return markers
+
+
+def _verify_with_ai(local_tracker: str, encounter_data: Dict, conversation_history: List[Dict], current_round: int):
+    try:
+        from .initiative_tracker_ai import generate_live_initiative_tracker
+        ai_tracker = generate_live_initiative_tracker(encounter_data, conversation_history, current_round)
+    except Exception as e:
+        debug(f"AI_TRACKER: Verification failed: {e}", category="combat_events")
+        return
+    if not ai_tracker:
+        debug("AI_TRACKER: Verifier returned no tracker", category="combat_events")
+        return
+    local_markers = parse_tracker(local_tracker)
+    ai_markers = parse_tracker(ai_tracker)
+    differences = [f"{name}: local [{local_markers.get(name, '?')}] vs AI [{ai_markers.get(name, '?')}]"
+                   for name in sorted(set(local_markers) | set(ai_markers))
+                   if local_markers.get(name) != ai_markers.get(name)]
+    if differences:
+        warning(f"AI_TRACKER: Round {current_round} local tracker disagrees with AI - " + "; ".join(differences),
+                category="combat_events")
+    else:
+        debug(f"AI_TRACKER: Round {current_round} local tracker matches AI", category="combat_events")
+
+
+def generate_initiative_tracker(encounter_data: Dict, conversation_history: List[Dict],
+                                current_round: Optional[int] = None) -> Optional[str]:
+    """
+    Build the live initiative tracker locally.
+
+    When VERIFY_INITIATIVE_WITH_AI is enabled the AI tracker is generated on a
+    background thread and compared; the local tracker is always returned.
+    """
+    if current_round is None:
+        current_round = encounter_data.get("combat_round", encounter_data.get("current_round", 1))
+    tracker = LocalInitiativeTracker(encounter_data, conversation_history, current_round).render()
+
+    try:
+        import config
+        verify = getattr(config, "VERIFY_INITIATIVE_WITH_AI", False)
+    except ImportError:
+        verify = False
+    if tracker and verify:
+        recent = conversation_history[-20:]
+        snapshot = json.loads(json.dumps(encounter_data, default=str))
+        threading.Thread(target=_verify_with_ai, args=(tracker, snapshot, recent, current_round),
+                         daemon=True, name="initiative_verifier").start()
+    return tracker
@@ -6,7 +6,8 @@
 
 """
 AI-powered initiative tracker that analyzes combat conversation to determine who has acted.
-Used to enhance the combat state display with live turn tracking.
+The combat state display uses the local tracker (initiative_tracker.py); this one only runs
+as its opt-in verifier (VERIFY_INITIATIVE_WITH_AI).
 """
 
 import json
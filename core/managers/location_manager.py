@@ -245,9 +245,8 @@ def handle_location_transition(current_location, new_location, current_area, cur
         new_area_id_for_conditions = None
 
         # Search all loaded areas to find the new location
-        from utils.location_path_finder import LocationGraph
-        graph = LocationGraph() # Use the graph to access all loaded data
-        graph.load_module_data()
+        from utils.location_path_finder import get_location_graph
+        graph = get_location_graph() # Shared graph, refreshed if any area file changed
 
         new_location_info = graph.get_location_info(new_location)
 
@@ -58,7 +58,8 @@ import threading
 # - Implements our user-centric design philosophy
 # 
 # DESIGN PATTERNS:
-# - Observer Pattern: Status change notifications
+# - Observer Pattern: Status change notifications (callbacks and "status"
+#   events on utils.event_bus)
 # - Singleton Pattern: Centralized status management
 # - Strategy Pattern: Different feedback for different operation types
 # 
@@ -67,7 +68,10 @@ import threading
 # ============================================================================
 
 import time
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import Optional, Callable, Dict
+
+from utils.event_bus import publish_status
 
 class StatusManager:
     """Manages status messages for the NeverEndingQuest system"""
@@ -77,6 +81,11 @@ class StatusManager:
         self._is_processing = False
         self._lock = threading.Lock()
         self._status_callback = None
+        # Background work (e.g. summarization jobs) reports here instead of
+        # the main status, so it never locks the input box
+        self._local = threading.local()
+        self._background = {}
+        self._background_callback = None
         
     def set_callback(self, callback: Callable[[str, bool], None]):
         """Set a callback function to be called when status changes
@@ -93,11 +102,16 @@ class StatusManager:
             message: The status message to display
             is_processing: Whether the system is currently processing (disables input)
         """
+        task = getattr(self._local, "task", None)
+        if task:
+            self.set_background_status(task, message)
+            return
         with self._lock:
             self._status = message
             self._is_processing = is_processing
             if self._status_callback:
                 self._status_callback(message, is_processing)
+            publish_status(message, is_processing)
                 
     def get_status(self) -> tuple[str, bool]:
         """Get the current status and processing state
@@ -117,6 +131,43 @@ class StatusManager:
         with self._lock:
             return self._is_processing
 
+    def set_background_callback(self, callback: Callable[[str], None]):
+        """Set a callback that receives the background job summary whenever it changes"""
+        self._background_callback = callback
+
+    @contextmanager
+    def background_task(self, task: str):
+        """Route status updates made by this thread to the background entry for task"""
+        self._local.task = task
+        try:
+            yield
+        finally:
+            self._local.task = None
+
+    def set_background_status(self, task: str, message: Optional[str]):
+        """Set (or clear, with None) the status line of one background task"""
+        with self._lock:
+            if message is None:
+                self._background.pop(task, None)
+            else:
+                self._background[task] = message
+            summary = self._background_summary()
+            if self._background_callback:
+                self._background_callback(summary)
+            publish_status(background_jobs=summary)
+
+    def _background_summary(self) -> str:
+        return " | ".join(f"{task}: {message}" for task, message in self._background.items())
+
+    def get_background_status(self) -> Dict[str, str]:
+        """Current background task status lines"""
+        with self._lock:
+            return dict(self._background)
+
+    def get_background_summary(self) -> str:
+        with self._lock:
+            return self._background_summary()
+
 # Global status manager instance
 status_manager = StatusManager()
 
@@ -204,4 +255,8 @@ def set_status_callback(callback: Callable[[str, bool], None]):
     Args:
         callback: Function that takes (status_message, is_processing) as arguments
     """
-    status_manager.set_callback(callback)
\ No newline at end of file
+    status_manager.set_callback(callback)
+
+def set_background_status_callback(callback: Callable[[str], None]):
+    """Set the callback for background job status (receives a one-line summary)"""
+    status_manager.set_background_callback(callback)
\ No newline at end of file
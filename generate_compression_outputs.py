@@ -13,11 +13,11 @@ Creates two output files:
 """
 
 import json
-import shutil
 from pathlib import Path
 from conversation_analyzer import ConversationAnalyzer
 from location_summarizer import LocationSummarizer
 from datetime import datetime
+from utils.file_operations import safe_read_json, safe_write_json
 
 def create_compression_outputs():
     """Generate both compressed conversation and standalone summary files"""
@@ -31,13 +31,20 @@ def create_compression_outputs():
     compressed_file = "conversation_history_compressed.json"
     summary_file = "generated_summary_only.md"
     
+    # Read through safe_read_json so journaled messages are included, then
+    # write compacted copies (a raw file copy would leave the journal behind)
+    history = safe_read_json(source_file)
+    if history is None:
+        print(f"Failed to read {source_file}!")
+        return False
+    
     # Create backup
     print(f"Creating backup: {backup_file}")
-    shutil.copy2(source_file, backup_file)
+    safe_write_json(backup_file, history, create_backup=False)
     
     # Create working copy for compression
     print(f"Creating working copy: {compressed_file}")
-    shutil.copy2(source_file, compressed_file)
+    safe_write_json(compressed_file, history, create_backup=False)
     
     # Step 2: Initialize analysis components
     analyzer = ConversationAnalyzer(compressed_file)
@@ -212,7 +219,7 @@ When reviewing these summaries, please check for:
     print(f"  - {summary_file} (standalone summaries for review)")
     
     # Calculate final stats
-    original_size = Path(source_file).stat().st_size
+    original_size = Path(backup_file).stat().st_size
     compressed_size = Path(compressed_file).stat().st_size
     size_reduction = (original_size - compressed_size) / original_size
     
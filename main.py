@@ -1,14 +1,4 @@
-# main.py - Entry point for Gunicorn on Render to ensure monkey_patch() is called first.
-import eventlet
-eventlet.monkey_patch()
-
-# Now that monkey_patch() has been called, we can import the Flask app.
-# Now that monkey_patch() has been called, we can import the Flask app and socketio instance.
-from web.web_interface import app as flask_app, socketio
-
-# Gunicorn will look for this 'app' object. For Flask-SocketIO, this must be the SocketIO instance.
-app = socketio
-
+# SPDX-FileCopyrightText: 2024 MoonlightByte
 # SPDX-License-Identifier: Fair-Source-1.0
 # License: See LICENSE file in the repository root
 # This software is subject to the terms of the Fair Source License.
@@ -85,8 +75,9 @@ import re
 import sys
 import codecs
 import glob
+import threading
 import time
-from core.ai.gemini_wrapper import OpenAI
+from core.ai.gemini_wrapper import OpenAI, client_registry
 from datetime import datetime, timedelta
 from termcolor import colored
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -103,7 +94,7 @@ from utils.encoding_utils import (
 
 # Import token tracking
 try:
-    from utils.gemini_usage_tracker import track_response
+    from utils.usage_tracker import track_response, get_global_tracker
     USAGE_TRACKING_AVAILABLE = True
 except:
     USAGE_TRACKING_AVAILABLE = False
@@ -114,13 +105,14 @@ from core.managers.combat_manager import run_combat_simulation
 from updates.plot_update import update_plot
 from utils.player_stats import get_player_stat
 from updates.update_world_time import update_world_time
+from updates.autosave_manager import get_autosave_service
 from core.ai.conversation_utils import update_conversation_history, update_character_data
 from updates.update_character_info import update_character_info
 from core.managers.level_up_manager import LevelUpSession # Add this line
 
 # Import new manager modules
 from core.managers import location_manager
-from utils.location_path_finder import LocationGraph
+from utils.location_path_finder import get_location_graph
 from core.ai import action_handler
 from core.ai.cumulative_summary import (
     generate_enhanced_adventure_summary,
@@ -136,13 +128,14 @@ from core.managers.status_manager import (
 )
 
 # Import atomic file operations
-from utils.file_operations import safe_write_json, safe_read_json
+from utils.file_operations import safe_write_json, safe_read_json, safe_write_json_list
 from utils.module_path_manager import ModulePathManager
 from core.managers.campaign_manager import CampaignManager
 
 # Import training data collection
 # from simple_training_collector import log_complete_interaction  # DISABLED
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.event_bus import event_bus, publish_narration, publish_narration_stream, NARRATION_STREAM
 
 # Set script name for logging
 set_script_name(__name__)
@@ -159,9 +152,7 @@ client = OpenAI(api_key=GEMINI_API_KEY)
 
 # Initialize location graph for path validation
 print("DEBUG: [LocationGraph] Initializing location graph at startup...")
-location_graph = LocationGraph()
-print("DEBUG: [LocationGraph] Loading module data...")
-location_graph.load_module_data()
+location_graph = get_location_graph()
 print(f"DEBUG: [LocationGraph] Initialization complete. Total nodes loaded: {len(location_graph.nodes)}")
 print(f"DEBUG: [LocationGraph] Total edges loaded: {sum(len(edges) for edges in location_graph.edges.values())}")
 print(f"DEBUG: [LocationGraph] First 5 location IDs: {list(location_graph.nodes.keys())[:5]}")
@@ -965,6 +956,19 @@ def check_and_process_location_transitions(conversation_history, party_tracker_d
     
     debug(f"STATE_CHANGE: Processing transition from {leaving_location_name}", category="location_transitions")
     
+    from config import ENABLE_BACKGROUND_SUMMARIES
+    if ENABLE_BACKGROUND_SUMMARIES:
+        # Summarize off the game loop; the result is spliced in by apply_ready() once finished
+        from core.ai.summary_jobs import get_summary_job_queue
+        get_summary_job_queue().submit_location_summary(
+            conversation_history,
+            party_tracker_data,
+            leaving_location_name,
+            last_transition_content,
+            last_transition_index
+        )
+        return conversation_history
+    
     try:
         # Generate enhanced adventure summary
         adventure_summary = generate_enhanced_adventure_summary(
@@ -1360,7 +1364,7 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
             full_narration = generate_seamless_transition_narration(departure_narration, arrival_narration)
             
             # Step 5: Display the final, polished narration
-            print(colored("Dungeon Master:", "blue"), colored(full_narration, "blue"))
+            publish_narration(full_narration, color="blue")
             # <--- END OF MODIFIED SECTION --->
 
             # Step 6: Add the final combined narration to history as a single, clean message.
@@ -1379,7 +1383,7 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
         # If not a transition or levelup, proceed with normal processing
         narration = parsed_response.get("narration", "")
         sanitized_narration = sanitize_text(narration)
-        print(colored("Dungeon Master:", "blue"), colored(sanitized_narration, "blue"))
+        publish_narration(sanitized_narration, color="blue")
 
         actions_processed = False
         
@@ -1614,7 +1618,7 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
         print(f"Error: Unable to parse AI response as JSON: {e}")
         print(f"Problematic response: {response}")
         sanitized_response = sanitize_text(response)
-        print(colored("Dungeon Master:", "blue"), colored(sanitized_response, "blue"))
+        publish_narration(sanitized_response, color="blue")
         # Even in error case, append to history
         assistant_message = {"role": "assistant", "content": response}
         conversation_history.append(assistant_message)
@@ -1623,18 +1627,204 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
 
 
 def save_conversation_history(history):
+    # Appends new messages to the history journal; rewrites the whole file only
+    # when earlier messages changed (e.g. after compression) or on compaction
     try:
-        safe_json_dump(history, json_file)
+        if not safe_write_json_list(json_file, history, transform=sanitize_dict):
+            error(f"FAILURE: Failed to save conversation history", category="file_operations")
     except Exception as e:
         error(f"FAILURE: Failed to save conversation history", exception=e, category="file_operations")
 
+# Shared pool for speculative DM calls. Not used as a context manager so the
+# losing speculative call can finish in the background without blocking the turn.
+# A turn needs SPECULATIVE_TURN_WORKERS workers (prediction and both DM calls);
+# the discarded call keeps its worker until the model answers, so the pool has
+# room for SPECULATIVE_MAX_DISCARDED of those. When that many are still running
+# the turn skips speculation rather than queue its chosen call behind them.
+SPECULATIVE_TURN_WORKERS = 3
+SPECULATIVE_MAX_DISCARDED = 3
+_speculative_executor = None
+_discarded_calls = set()
+_discarded_calls_lock = threading.Lock()
+
+def _get_speculative_executor():
+    global _speculative_executor
+    if _speculative_executor is None:
+        _speculative_executor = ThreadPoolExecutor(
+            max_workers=SPECULATIVE_TURN_WORKERS + SPECULATIVE_MAX_DISCARDED,
+            thread_name_prefix="dm_speculative"
+        )
+    return _speculative_executor
+
+def _speculation_has_capacity():
+    """True if a speculative turn would find a free worker for each of its calls"""
+    with _discarded_calls_lock:
+        return len(_discarded_calls) <= SPECULATIVE_MAX_DISCARDED
+
+def _discard_speculative_call(future):
+    """Cancel a losing DM call, or count its worker as busy until it finishes"""
+    if future.cancel():
+        return
+    with _discarded_calls_lock:
+        _discarded_calls.add(future)
+    
+    def _finished(done_future):
+        with _discarded_calls_lock:
+            _discarded_calls.discard(done_future)
+    future.add_done_callback(_finished)
+
+def report_turn_timing(stage, seconds, detail=""):
+    """Print per-stage turn timing when REPORT_TURN_TIMINGS is enabled"""
+    from config import REPORT_TURN_TIMINGS
+    if REPORT_TURN_TIMINGS:
+        suffix = f" ({detail})" if detail else ""
+        print(f"DEBUG: TURN TIMING - {stage}: {seconds:.2f}s{suffix}")
+
+def _timed(func, *args):
+    """Run func(*args) and return (result, elapsed_seconds)"""
+    start_time = time.time()
+    result = func(*args)
+    return result, time.time() - start_time
+
+# Narration is published as narration_stream events ("start", "delta" with
+# text, "end") while the DM response streams; the web interface subscribes.
+def _emit_narration_stream(event, text=""):
+    publish_narration_stream(event, text)
+
+def stream_dm_model(selected_model, conversation_history):
+    """
+    Stream a DM completion, pushing narration to the stream callback as it
+    arrives. Returns the full response text; actions are parsed from it by the
+    caller exactly as for a blocking call.
+    """
+    from core.ai.narration_stream import NarrationStreamExtractor
+    
+    print(f"DEBUG: [MAIN.PY] Streaming model: {selected_model}")
+    start_time = time.time()
+    stream = client.chat.completions.create(
+        model=selected_model,
+        temperature=TEMPERATURE,
+        messages=conversation_history,
+        stream=True
+    )
+    
+    extractor = NarrationStreamExtractor()
+    parts = []
+    first_token_time = None
+    _emit_narration_stream("start")
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            narration = extractor.feed(delta)
+            if narration:
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                    report_turn_timing("DM first narration token", first_token_time, selected_model)
+                _emit_narration_stream("delta", narration)
+    finally:
+        _emit_narration_stream("end")
+    
+    # The Gemini stream exposes the assembled (markdown-cleaned) response
+    response = getattr(stream, "response", None)
+    if response is None:
+        return "".join(parts).strip()
+    if USAGE_TRACKING_AVAILABLE:
+        try:
+            track_response(response)
+        except:
+            pass
+    return response.choices[0].message.content.strip()
+
+def call_dm_model(selected_model, conversation_history, stream_narration=False):
+    """Make a single DM completion call and return the stripped response text"""
+    from config import USE_GPT5_MODELS, ENABLE_RESPONSE_STREAMING
+    
+    if stream_narration and ENABLE_RESPONSE_STREAMING and not USE_GPT5_MODELS and event_bus.has_subscribers(NARRATION_STREAM):
+        return stream_dm_model(selected_model, conversation_history)
+    
+    if USE_GPT5_MODELS:
+        # GPT-5: no temperature/max_tokens
+        print(f"DEBUG: [MAIN.PY] Using GPT-5 model: {selected_model}")
+        response = client.chat.completions.create(
+            model=selected_model,
+            messages=conversation_history
+        )
+    else:
+        # GPT-4.1: Use existing logic with temperature
+        print(f"DEBUG: [MAIN.PY] Using GPT-4.1 model: {selected_model}")
+        response = client.chat.completions.create(
+            model=selected_model,
+            temperature=TEMPERATURE,
+            messages=conversation_history
+        )
+    
+    # Track token usage
+    if USAGE_TRACKING_AVAILABLE:
+        try:
+            track_response(response)
+        except:
+            pass
+    return response.choices[0].message.content.strip()
+
+def get_speculative_ai_response(conversation_history, user_input):
+    """
+    Run action prediction and both DM model calls concurrently, then keep the
+    response from the model the prediction selects. Saves the prediction
+    round-trip at the cost of one extra (discarded) DM call.
+    
+    Returns:
+        tuple: (content, prediction)
+    """
+    from utils.action_predictor import predict_actions_required
+    from config import DM_MINI_MODEL, DM_FULL_MODEL
+    
+    executor = _get_speculative_executor()
+    prediction_future = executor.submit(_timed, predict_actions_required, user_input)
+    model_futures = {
+        DM_MINI_MODEL: executor.submit(_timed, call_dm_model, DM_MINI_MODEL, conversation_history),
+        DM_FULL_MODEL: executor.submit(_timed, call_dm_model, DM_FULL_MODEL, conversation_history),
+    }
+    
+    prediction, prediction_time = prediction_future.result()
+    report_turn_timing("action prediction (speculative)", prediction_time)
+    
+    selected_model = DM_FULL_MODEL if prediction["requires_actions"] else DM_MINI_MODEL
+    routing_info = "FULL MODEL" if prediction["requires_actions"] else "MINI MODEL"
+    print(f"DEBUG: MODEL ROUTING - Selected: {routing_info} (Prediction: {prediction['requires_actions']}, Reason: {prediction['reason']}) [speculative]")
+    
+    # The other call keeps running in the pool; its result is simply discarded
+    for model, future in model_futures.items():
+        if model != selected_model:
+            _discard_speculative_call(future)
+    
+    content, dm_time = model_futures[selected_model].result()
+    report_turn_timing("DM response (speculative)", dm_time, selected_model)
+    return content, prediction
+
+def _last_dm_usage():
+    return get_global_tracker().last_entry("main_dm") if USAGE_TRACKING_AVAILABLE else None
+
+def _calibrate_context_budget(context_breakdown, dm_usage_before):
+    """Feed the measured DM prompt size back into the context estimator"""
+    if not context_breakdown:
+        return
+    entry = _last_dm_usage()
+    if entry is None or entry is dm_usage_before or entry.get("estimated"):
+        return
+    from core.ai.context_assembler import get_context_assembler
+    get_context_assembler().calibrate(context_breakdown["total"]["tokens"], entry["prompt_tokens"])
+
 def get_ai_response(conversation_history, validation_retry_count=0):
     status_processing_ai()
     
     # Import action predictor and config
-    from utils.action_predictor import predict_actions_required, extract_actual_actions, log_prediction_accuracy
+    from utils.action_predictor import predict_actions_required, predict_locally, extract_actual_actions, log_prediction_accuracy
     from config import ENABLE_INTELLIGENT_ROUTING, DM_MINI_MODEL, DM_FULL_MODEL, MAX_VALIDATION_RETRIES
-    from config import USE_GPT5_MODELS, GPT5_MINI_MODEL, GPT5_FULL_MODEL
+    from config import USE_GPT5_MODELS, GPT5_MINI_MODEL, GPT5_FULL_MODEL, ENABLE_SPECULATIVE_ROUTING
+    from config import ENABLE_LOCAL_ACTION_PREDICTOR, ENABLE_CONTEXT_BUDGET
     
     # Get the last user message for action prediction
     user_input = ""
@@ -1646,9 +1836,37 @@ def get_ai_response(conversation_history, validation_retry_count=0):
     # Check if module creation prompt is present in user input
     has_module_creation_prompt = "You are a master storyteller, cartographer of myth" in user_input
     
+    # Budget the request context; the saved conversation history is not changed
+    request_history = conversation_history
+    context_breakdown = None
+    if ENABLE_CONTEXT_BUDGET:
+        from core.ai.context_assembler import assemble_dm_context
+        request_history, context_breakdown = assemble_dm_context(conversation_history)
+    dm_usage_before = _last_dm_usage()
+    
+    # A confident local prediction is effectively free, so there is nothing to speculate on
+    local_prediction = None
+    if ENABLE_LOCAL_ACTION_PREDICTOR and validation_retry_count == 0 and not has_module_creation_prompt:
+        local_prediction = predict_locally(user_input)
+    
+    # Speculative mode: prediction and both model calls run concurrently
+    if (ENABLE_SPECULATIVE_ROUTING and ENABLE_INTELLIGENT_ROUTING and not USE_GPT5_MODELS
+            and validation_retry_count == 0 and not has_module_creation_prompt
+            and local_prediction is None and _speculation_has_capacity()):
+        turn_start = time.time()
+        content, prediction = get_speculative_ai_response(request_history, user_input)
+        report_turn_timing("get_ai_response total", time.time() - turn_start)
+        _calibrate_context_budget(context_breakdown, dm_usage_before)
+        log_prediction_accuracy(user_input, prediction, extract_actual_actions(content))
+        return content
+    
     # Predict if actions will be required (unless we're in a validation retry or module creation prompt)
-    if validation_retry_count == 0 and not has_module_creation_prompt:
-        prediction = predict_actions_required(user_input)
+    if local_prediction is not None:
+        prediction = local_prediction
+        report_turn_timing("action prediction", prediction["latency_ms"] / 1000, "local")
+    elif validation_retry_count == 0 and not has_module_creation_prompt:
+        prediction, prediction_time = _timed(predict_actions_required, user_input)
+        report_turn_timing("action prediction", prediction_time)
     elif has_module_creation_prompt:
         # Force full model when module creation prompt is present
         prediction = {"requires_actions": True, "reason": "Module creation prompt detected - using full model"}
@@ -1681,35 +1899,10 @@ def get_ai_response(conversation_history, validation_retry_count=0):
         if validation_retry_count >= 4:
             selected_model = GPT5_FULL_MODEL
             print(f"DEBUG: GPT-5 - Switching to full model after {validation_retry_count} retries")
-        
-        print(f"DEBUG: [MAIN.PY] Using GPT-5 model: {selected_model}")
-        response = client.chat.completions.create(
-            model=selected_model,
-            messages=conversation_history
-        )
-        
-        # Track token usage
-        if USAGE_TRACKING_AVAILABLE:
-            try:
-                track_response(response)
-            except:
-                pass
-    else:
-        # GPT-4.1: Use existing logic with temperature
-        print(f"DEBUG: [MAIN.PY] Using GPT-4.1 model: {selected_model}")
-        response = client.chat.completions.create(
-            model=selected_model,
-            temperature=TEMPERATURE,
-            messages=conversation_history
-        )
-        
-        # Track token usage
-        if USAGE_TRACKING_AVAILABLE:
-            try:
-                track_response(response)
-            except:
-                pass
-    content = response.choices[0].message.content.strip()
+    
+    content, dm_time = _timed(call_dm_model, selected_model, request_history, True)
+    report_turn_timing("DM response", dm_time, selected_model)
+    _calibrate_context_budget(context_breakdown, dm_usage_before)
     
     # Extract actual actions from the response for accuracy tracking (only on initial attempt)
     if validation_retry_count == 0:
@@ -2061,6 +2254,14 @@ def main_game_loop():
         party_tracker_data
     )
     
+    # Resume background summaries interrupted by the last shutdown and apply finished ones
+    from config import ENABLE_BACKGROUND_SUMMARIES
+    if ENABLE_BACKGROUND_SUMMARIES:
+        from core.ai.summary_jobs import get_summary_job_queue
+        summary_jobs = get_summary_job_queue()
+        summary_jobs.resume_pending_jobs(conversation_history, party_tracker_data)
+        conversation_history = summary_jobs.apply_ready(conversation_history)
+    
     save_conversation_history(conversation_history)
 
     initial_ai_response = get_ai_response(conversation_history)
@@ -2085,6 +2286,10 @@ def main_game_loop():
             save_conversation_history(conversation_history)
             needs_conversation_history_update = False
 
+        # Splice in any background summaries that finished since the last turn
+        if ENABLE_BACKGROUND_SUMMARIES:
+            conversation_history = summary_jobs.apply_ready(conversation_history)
+
         # Your essential cleanup script remains here, running every cycle.
         # Loop until all unprocessed location transitions are handled
         while True:
@@ -2573,11 +2778,14 @@ def main_game_loop():
         while retry_count < 5 and not valid_response_received:
             # Pass validation retry count for intelligent model escalation
             ai_response_content = get_ai_response(conversation_history, validation_retry_count=retry_count)
+            validation_start = time.time()
             validation_result = validate_ai_response(ai_response_content, user_input_text, validation_prompt_text, conversation_history, party_tracker_data)
+            report_turn_timing("validation", time.time() - validation_start)
             
             if validation_result is True:
                 valid_response_received = True
                 debug(f"SUCCESS: Valid response generated on attempt {retry_count + 1}", category="ai_validation")
+                report_turn_timing("client reuse", client_registry.stats()["setup_seconds_saved"], client_registry.format_stats())
                 
                 # SIMPLIFIED ARCHITECTURE: process_ai_response now handles ALL complexity internally.
                 # This includes:
@@ -2606,7 +2814,7 @@ def main_game_loop():
                     dm_response = level_up_session.start()
                     
                     # Display the first message and add to history
-                    print(colored("Dungeon Master:", "blue"), colored(dm_response, "blue"))
+                    publish_narration(dm_response, color="blue")
                     conversation_history.append({"role": "assistant", "content": dm_response})
                     save_conversation_history(conversation_history)
 
@@ -2627,11 +2835,11 @@ def main_game_loop():
                             # It's the final JSON response
                             parsed_data = json.loads(dm_response)
                             final_narration = parsed_data.get("narration", "Level up complete!")
-                            print(colored("Dungeon Master:", "blue"), colored(final_narration, "blue"))
+                            publish_narration(final_narration, color="blue")
                             # The session is now complete, loop will exit
                         except (json.JSONDecodeError, TypeError):
                             # It's a normal conversational response
-                            print(colored("Dungeon Master:", "blue"), colored(dm_response, "blue"))
+                            publish_narration(dm_response, color="blue")
 
                     # After the loop, the session is complete.
                     if level_up_session.success:
@@ -2642,7 +2850,7 @@ def main_game_loop():
                         save_conversation_history(conversation_history)
                     else:
                         # If the level up failed, inform the player and log it.
-                        print(colored("Dungeon Master:", "red"), colored(level_up_session.summary, "red"))
+                        publish_narration(level_up_session.summary, color="red")
                         conversation_history.append({"role": "system", "content": level_up_session.summary})
                         save_conversation_history(conversation_history)
 
@@ -2683,6 +2891,9 @@ def main_game_loop():
         
         status_ready()
 
+        # Turn boundary: snapshot for the autosave; the save itself is written in the background
+        get_autosave_service().on_turn_complete()
+
         # This block now only runs if a response was NOT held
         # CRITICAL: Reload party tracker to ensure we have the latest module information after any updates
         party_tracker_data = load_json_file("party_tracker.json")
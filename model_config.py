@@ -36,6 +36,55 @@ DM_FULL_MODEL = "gemini-2.5-pro"                   # Used for complex actions re
 ENABLE_INTELLIGENT_ROUTING = True                        # Enable/disable action-based model routing
 MAX_VALIDATION_RETRIES = 1                              # Retry with full model after this many validation failures
 
+# --- Local Action Predictor ---
+ENABLE_LOCAL_ACTION_PREDICTOR = True                    # Answer routing locally when a trained model (python -m utils.action_predictor) is confident; escalate to ACTION_PREDICTION_MODEL otherwise
+LOCAL_PREDICTOR_CONFIDENCE = 0.85                       # Minimum local confidence (max(p, 1-p)) to skip the LLM prediction call
+
+# --- Turn Latency Settings ---
+ENABLE_SPECULATIVE_ROUTING = False                      # Run action prediction concurrently with both mini and full DM calls (saves one round-trip, costs an extra DM call)
+REPORT_TURN_TIMINGS = True                              # Print per-stage timing (prediction, DM call, validation) for each turn
+ENABLE_RESPONSE_STREAMING = True                        # Stream DM narration to the web UI as it is generated (actions still parsed from the full response)
+
+# --- Prompt Caching ---
+ENABLE_PROMPT_CACHING = True                            # Serve large leading system prompts from Gemini context caches
+PROMPT_CACHE_TTL_SECONDS = 3600                         # Lifetime of each cached prefix (refreshed when it expires or changes)
+PROMPT_CACHE_MIN_TOKENS = 4096                          # Smaller prefixes are sent normally (provider minimum for gemini-2.5-pro)
+
+# --- Background Summarization ---
+ENABLE_BACKGROUND_SUMMARIES = True                      # Summarize/compress left locations on a worker thread; results are spliced in when ready
+
+# --- DM Context Budget ---
+ENABLE_CONTEXT_BUDGET = True                            # Trim the DM request to per-section token budgets (saved history is untouched)
+DM_CONTEXT_BUDGET = {                                   # Estimated tokens; unused section budget flows to recent_turns
+    "total": 120000,
+    "system": 40000,                                    # Primary system prompt (reported, never trimmed)
+    "world_state": 12000,                               # Location, world state, plot, module and map blocks
+    "characters": 16000,                                # Player and NPC character data
+    "summaries": 12000,                                 # Campaign chronicles, location and module summaries
+}
+
+# --- Web Output ---
+ENABLE_DEBUG_EVENTS = True                              # Send captured console lines to the web debug panel (narration/status are typed events either way)
+
+# --- Web Sessions ---
+ENABLE_MULTI_SESSION_WEB = False                        # Host one isolated game per browser session (own state root and worker process)
+WEB_SESSIONS_DIR = "sessions"                           # Session state roots live in WEB_SESSIONS_DIR/<session id>
+WEB_MAX_SESSIONS = 8                                    # Games running at once; further players are asked to try later
+WEB_SESSION_IDLE_TIMEOUT = 1800                         # Seconds without a connected browser before a session's game is stopped (state is kept)
+LLM_MAX_CONCURRENT_CALLS = 4                            # Model calls in flight at once, across all sessions of the server
+
+# --- Combat ---
+VERIFY_INITIATIVE_WITH_AI = False                       # Also ask the model for the live initiative tracker (background) and log disagreements with the local one
+
+# --- Autosave ---
+ENABLE_AUTOSAVE = True                                  # Snapshot the game at turn boundaries and write the save on a background worker
+AUTOSAVE_EVERY_TURNS = 1                                # Autosave after every N completed turns
+AUTOSAVE_RETENTION = 5                                  # Newest autosaves kept (manual saves are never removed)
+
+# --- Module Building ---
+MODULE_BUILD_MAX_WORKERS = 4                            # Areas / module fields generated concurrently by ModuleBuilder (1 = one at a time)
+ENABLE_MODULE_FIELD_CACHE = True                        # Reuse module fields generated from the same concept and inputs (data/module_field_cache)
+
 # --- GPT-5 Model Configuration ---
 GPT5_MINI_MODEL = "gpt-5-mini-2025-08-07"              # GPT-5 mini model for testing
 GPT5_FULL_MODEL = "gpt-5-2025-08-07"                   # GPT-5 full model (kept for compatibility, not used)
@@ -18,6 +18,7 @@ Straightforward approach:
 import json
 import shutil
 from core.generators.location_summarizer import LocationSummarizer
+from utils.file_operations import safe_read_json
 from datetime import datetime
 
 def find_location_summaries(conversation_data):
@@ -50,8 +51,7 @@ def simple_compression():
     print("=" * 40)
     
     # Load original conversation
-    with open("modules/conversation_history/conversation_history.json", 'r', encoding='utf-8') as f:
-        conversation_data = json.load(f)
+    conversation_data = safe_read_json("modules/conversation_history/conversation_history.json") or []
     
     print(f"Total messages: {len(conversation_data)}")
     
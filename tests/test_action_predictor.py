@@ -0,0 +1,14 @@
+from utils import action_predictor
+
+
+def test_untrained_predictor_defers_to_llm(monkeypatch):
+    monkeypatch.setattr(action_predictor, "_local_model", {"weights": dict(action_predictor.DEFAULT_LOCAL_WEIGHTS), "samples": 0})
+    assert action_predictor.predict_locally("I attack the goblin and pick up its sword") is None
+
+
+def test_trained_predictor_answers_when_confident(monkeypatch):
+    model = {"weights": dict(action_predictor.DEFAULT_LOCAL_WEIGHTS), "samples": action_predictor.MIN_TRAINING_SAMPLES}
+    monkeypatch.setattr(action_predictor, "_local_model", model)
+    prediction = action_predictor.predict_locally("I attack the goblin and pick up its sword")
+    assert prediction["requires_actions"] is True
+    assert prediction["source"] == "local"
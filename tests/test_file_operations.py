@@ -0,0 +1,80 @@
+import json
+import os
+
+from utils.file_operations import journal_path, safe_read_json, safe_write_json_list
+
+
+def _journal_lines(path):
+    with open(journal_path(path), encoding="utf-8") as f:
+        return [line for line in f.read().splitlines() if line]
+
+
+def test_appends_go_to_journal_and_replay(tmp_path):
+    path = str(tmp_path / "history.json")
+    assert safe_write_json_list(path, [{"n": 0}])
+    assert not os.path.exists(journal_path(path))
+
+    assert safe_write_json_list(path, [{"n": 0}, {"n": 1}, {"n": 2}])
+    lines = _journal_lines(path)
+    assert len(lines) == 3  # header + two entries
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == [{"n": 0}]
+    assert safe_read_json(path) == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_replay_stops_at_torn_last_line(tmp_path):
+    path = str(tmp_path / "history.json")
+    safe_write_json_list(path, ["a"])
+    safe_write_json_list(path, ["a", "b"])
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"i": 2, "item": "c')  # interrupted append
+
+    assert safe_read_json(path) == ["a", "b"]
+
+    # The journal no longer matches what was persisted, so the next save compacts
+    assert safe_write_json_list(path, ["a", "b", "c"])
+    assert not os.path.exists(journal_path(path))
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == ["a", "b", "c"]
+
+
+def test_compacts_after_threshold(tmp_path):
+    path = str(tmp_path / "history.json")
+    items = [0]
+    safe_write_json_list(path, items, compact_after=3)
+    for n in range(1, 4):
+        items.append(n)
+        safe_write_json_list(path, items, compact_after=3)
+    assert len(_journal_lines(path)) == 4  # header + three entries
+
+    items.append(4)
+    safe_write_json_list(path, items, compact_after=3)
+    assert not os.path.exists(journal_path(path))
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == [0, 1, 2, 3, 4]
+    assert safe_read_json(path) == [0, 1, 2, 3, 4]
+
+
+def test_edited_list_is_rewritten(tmp_path):
+    path = str(tmp_path / "history.json")
+    safe_write_json_list(path, ["a", "b"])
+    safe_write_json_list(path, ["a", "b", "c"])
+    assert safe_write_json_list(path, ["summary", "c"])
+    assert not os.path.exists(journal_path(path))
+    assert safe_read_json(path) == ["summary", "c"]
+
+
+def test_stale_journal_is_ignored(tmp_path):
+    path = str(tmp_path / "history.json")
+    safe_write_json_list(path, ["a"])
+    with open(journal_path(path), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"snapshot": [1, 1]}) + "\n")
+        f.write(json.dumps({"i": 1, "item": "old"}) + "\n")
+    assert safe_read_json(path) == ["a"]
+
+
+def test_transform_applies_to_journaled_entries(tmp_path):
+    path = str(tmp_path / "history.json")
+    safe_write_json_list(path, ["a"], transform=str.upper)
+    safe_write_json_list(path, ["a", "b"], transform=str.upper)
+    assert safe_read_json(path) == ["A", "B"]
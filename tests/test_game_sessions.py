@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pytest
+
+from web import game_sessions
+
+
+def _write(path, text="{}"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_seed_state_root_isolates_saves_and_restorable_data(tmp_path, monkeypatch):
+    install = tmp_path / "install"
+    _write(str(install / "data" / "spell_repository.json"))
+    _write(str(install / "prompts" / "dm.txt"), "prompt")
+    _write(str(install / "modules" / "Keep" / "areas" / "A01.json"))
+    _write(str(install / "modules" / "Keep" / "saved_games" / "objects" / "ab" / "abcd"), "blob")
+    _write(str(install / "modules" / "logs" / "game_debug.log"), "log")
+    monkeypatch.setattr(game_sessions, "ROOT_DIR", str(install))
+
+    root = tmp_path / "session"
+    game_sessions.seed_state_root(str(root))
+
+    assert (root / "modules" / "Keep" / "areas" / "A01.json").exists()
+    assert not (root / "modules" / "Keep" / "saved_games").exists()
+    assert not (root / "modules" / "logs" / "game_debug.log").exists()
+    assert os.path.islink(root / "prompts")
+    assert not os.path.islink(root / "data")
+    assert (root / "data" / "spell_repository.json").exists()
+
+
+def test_seed_state_root_replaces_linked_data(tmp_path, monkeypatch):
+    install = tmp_path / "install"
+    _write(str(install / "data" / "spell_repository.json"))
+    os.makedirs(install / "modules")
+    monkeypatch.setattr(game_sessions, "ROOT_DIR", str(install))
+
+    root = tmp_path / "session"
+    os.makedirs(root / "modules")
+    os.symlink(install / "data", root / "data", target_is_directory=True)
+    game_sessions.seed_state_root(str(root))
+
+    assert not os.path.islink(root / "data")
+    assert (root / "data" / "spell_repository.json").exists()
+
+
+class _FakeSession:
+    def __init__(self, session_id, started, release, fail=False):
+        self.id = session_id
+        self.running = False
+        self._started = started
+        self._release = release
+        self._fail = fail
+
+    def is_running(self):
+        return self.running
+
+    def start(self):
+        self._started.set()
+        self._release.wait(5)
+        if self._fail:
+            raise RuntimeError("spawn failed")
+        self.running = True
+
+
+def _manager(monkeypatch, limit):
+    monkeypatch.setattr(game_sessions, "_config_value",
+                        lambda name, default: limit if name == "WEB_MAX_SESSIONS" else default)
+    return game_sessions.SessionManager(emit=lambda *args, **kwargs: None)
+
+
+def test_concurrent_starts_respect_session_limit(monkeypatch):
+    manager = _manager(monkeypatch, 1)
+    started, release = threading.Event(), threading.Event()
+    first = _FakeSession("a" * 32, started, release)
+    second = _FakeSession("b" * 32, threading.Event(), threading.Event())
+    manager._sessions = {first.id: first, second.id: second}
+
+    worker = threading.Thread(target=manager.start, args=(first,))
+    worker.start()
+    assert started.wait(5)
+    # The first worker is still spawning, but its slot is already taken
+    with pytest.raises(game_sessions.SessionError):
+        manager.start(second)
+    release.set()
+    worker.join(5)
+    assert first.is_running() and not second.is_running()
+
+
+def test_failed_start_releases_its_slot(monkeypatch):
+    manager = _manager(monkeypatch, 1)
+    release = threading.Event()
+    release.set()
+    failing = _FakeSession("a" * 32, threading.Event(), release, fail=True)
+    other = _FakeSession("b" * 32, threading.Event(), release)
+    manager._sessions = {failing.id: failing, other.id: other}
+
+    with pytest.raises(RuntimeError):
+        manager.start(failing)
+    manager.start(other)
+    assert other.is_running()
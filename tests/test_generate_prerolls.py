@@ -0,0 +1,24 @@
+from core.generators.generate_prerolls import generate_prerolls
+
+
+def _encounter(name):
+    return {
+        "encounterId": "test_encounter",
+        "preroll_seed": 1234,
+        "creatures": [
+            {"type": "player", "name": "Norn"},
+            {"type": "enemy", "name": name, "monsterType": "goblin", "numAttacks": 2,
+             "attacks": [{"name": "Scimitar {+4}"}, {"name": "Shortbow"}]},
+        ],
+    }
+
+
+def test_names_with_braces_are_rendered_verbatim():
+    text = generate_prerolls(_encounter("Goblin {Boss}"), round_num=1)
+    assert "Goblin {Boss}: Attack[" in text
+    assert "(2 attacks available: Scimitar {+4}, Shortbow)" in text
+
+
+def test_rounds_replay_from_stored_seed():
+    assert generate_prerolls(_encounter("Goblin"), round_num=3) == generate_prerolls(_encounter("Goblin"), round_num=3)
+    assert generate_prerolls(_encounter("Goblin"), round_num=3) != generate_prerolls(_encounter("Goblin"), round_num=4)
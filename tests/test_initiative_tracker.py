@@ -0,0 +1,73 @@
+import json
+
+from core.managers.initiative_tracker import (
+    LocalInitiativeTracker,
+    creature_state,
+    generate_initiative_tracker,
+    parse_tracker,
+)
+
+CREATURES = [
+    {"name": "Norn", "type": "player", "initiative": 14, "status": "alive", "currentHitPoints": 20},
+    {"name": "Goblin Archer", "type": "enemy", "initiative": 18, "status": "alive", "currentHitPoints": 7},
+    {"name": "Kira", "type": "npc", "initiative": 10, "status": "alive", "currentHitPoints": 12},
+    {"name": "Goblin Boss", "type": "enemy", "initiative": 8, "status": "alive", "currentHitPoints": 21},
+]
+
+
+def _encounter(**overrides):
+    creatures = [dict(creature, **overrides.get(creature["name"], {})) for creature in CREATURES]
+    return {"creatures": creatures, "combat_round": 2}
+
+
+def _dm(plan, combat_round=2):
+    return {"role": "assistant", "content": json.dumps({"narration": "...", "combat_round": combat_round,
+                                                        "actions": [], "plan": plan})}
+
+
+def _current(encounter, history, current_round=2):
+    creature = LocalInitiativeTracker(encounter, history, current_round).current_creature()
+    return creature["name"] if creature else None
+
+
+def test_round_start_gives_first_able_creature_the_turn():
+    history = [_dm("Round 1: Norn attacks.", combat_round=1), {"role": "user", "content": "Round: 2 I attack"}]
+    assert _current(_encounter(), history) == "Goblin Archer"
+
+
+def test_player_has_turn_after_dm_response_in_round():
+    history = [{"role": "user", "content": "Round: 2 go"}, _dm("Goblin Archer shot at Norn.")]
+    markers = parse_tracker(generate_initiative_tracker(_encounter(), history))
+    assert markers["goblinarcher"] == "X"
+    assert markers["norn"] == ">"
+    assert markers["kira"] == " " and markers["goblinboss"] == " "
+
+
+def test_turn_named_in_plan():
+    history = [_dm("Round 2: Norn's turn is over. Now it is Kira's turn to act.")]
+    assert _current(_encounter(), history) == "Kira"
+
+
+def test_plan_about_earlier_round_is_ignored():
+    history = [_dm("Round 1: Now it is Kira's turn.")]
+    assert _current(_encounter(), history) == "Norn"
+
+
+def test_dead_creature_cannot_be_named_current():
+    history = [_dm("WAITING for Goblin Boss to act.")]
+    encounter = _encounter(**{"Goblin Boss": {"currentHitPoints": 0}})
+    assert _current(encounter, history) == "Norn"
+
+
+def test_enemy_at_zero_hp_is_dead_but_player_is_unconscious():
+    encounter = _encounter(**{"Goblin Archer": {"currentHitPoints": 0}, "Norn": {"currentHitPoints": 0},
+                              "Kira": {"currentHitPoints": -3}})
+    markers = parse_tracker(generate_initiative_tracker(encounter, []))
+    assert markers == {"goblinarcher": "D", "norn": "U", "kira": "D", "goblinboss": ">"}
+
+
+def test_explicit_status_and_conditions():
+    assert creature_state({"type": "enemy", "status": "dead", "currentHitPoints": 5}) == ("D", "Dead")
+    assert creature_state({"type": "player", "status": "unconscious", "currentHitPoints": 3}) == ("U", "Skipped (Unconscious)")
+    assert creature_state({"type": "enemy", "currentHitPoints": 5, "conditions": ["Stunned"]}) == ("S", "Skipped (Stunned)")
+    assert creature_state({"type": "enemy", "currentHitPoints": 5}) is None
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+from utils import location_path_finder
+from utils.file_operations import safe_write_json
+from utils.location_path_finder import LocationGraph
+
+
+def _area(area_id, locations):
+    return {"areaName": area_id, "locations": locations}
+
+
+@pytest.fixture
+def world(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    areas = tmp_path / "modules" / "Test_Module" / "areas"
+    areas.mkdir(parents=True)
+    (tmp_path / "modules" / "world_registry.json").write_text(json.dumps({"modules": {"Test_Module": {}}}))
+    (tmp_path / "party_tracker.json").write_text(json.dumps({"module": "Test_Module"}))
+    safe_write_json(str(areas / "AR01.json"), _area("AR01", [
+        {"locationId": "A01", "name": "Gate", "connectivity": ["A02"]},
+        {"locationId": "A02", "name": "Hall", "connectivity": ["A01"]},
+    ]))
+    graph = LocationGraph()
+    graph.refresh()
+    return graph, areas
+
+
+def test_lookup_without_writes_skips_area_files(world, monkeypatch):
+    graph, _ = world
+    assert "A01" in graph.nodes
+
+    def fail(*args, **kwargs):
+        raise AssertionError("area files re-discovered on a clean lookup")
+
+    monkeypatch.setattr(graph, "_discover_area_files", fail)
+    assert graph.refresh() is False
+
+
+def test_write_listener_triggers_rebuild(world):
+    graph, areas = world
+    area_file = str(areas / "AR01.json")
+    safe_write_json(area_file, _area("AR01", [
+        {"locationId": "A01", "name": "Gate", "connectivity": ["A03"]},
+        {"locationId": "A03", "name": "Tower", "connectivity": ["A01"]},
+    ]))
+    graph.note_write(os.path.abspath(area_file))
+    assert graph.refresh() is True
+    assert "A03" in graph.nodes and "A02" not in graph.nodes
+
+
+def test_new_area_file_changes_directory_signature(world):
+    graph, areas = world
+    (areas / "AR02.json").write_text(json.dumps(_area("AR02", [
+        {"locationId": "B01", "name": "Cave", "connectivity": []},
+    ])))
+    assert graph.refresh() is True
+    assert "B01" in graph.nodes
+
+
+def test_party_tracker_write_only_rebuilds_on_module_change(world, monkeypatch):
+    graph, _ = world
+    graph.note_write(os.path.abspath("party_tracker.json"))
+    monkeypatch.setattr(graph, "load_module_data", lambda: pytest.fail("rebuilt for same module"))
+    assert graph.refresh() is False
@@ -0,0 +1,44 @@
+from core.generators.module_builder import ModuleBuilder
+from utils.module_context import ModuleContext
+
+
+def _builder(stages):
+    builder = ModuleBuilder.__new__(ModuleBuilder)
+    builder.context = ModuleContext()
+    builder.module_data = {"mainPlot": {"plotStages": stages}}
+    builder.log = lambda message: None
+    for area_id in ("HV001", "WD001"):
+        builder.context.add_area(area_id, area_id.title())
+    for stage in stages:
+        for npc_name in stage["keyNPCs"]:
+            builder.context.add_npc(npc_name)
+    return builder
+
+
+def test_stage_npcs_follow_world_map_order():
+    builder = _builder([
+        {"keyNPCs": ["Maera Thistledown", "Garrick Ironbelly"]},
+        {"keyNPCs": ["Old Tobin", "Maera Thistledown"]},
+        {"keyNPCs": ["The Hollow King"]},
+    ])
+    allocation = builder._allocate_module_npcs(["HV001", "WD001"])
+    assert allocation == {
+        "HV001": ["Maera Thistledown", "Garrick Ironbelly"],
+        "WD001": ["Old Tobin", "The Hollow King"],
+    }
+
+
+def test_placed_npcs_are_not_reallocated():
+    builder = _builder([{"keyNPCs": ["Maera Thistledown", "Old Tobin"]}])
+    builder.context.add_npc("Maera Thistledown", area_id="WD001", location_id="B01")
+    allocation = builder._allocate_module_npcs(["HV001", "WD001"])
+    assert allocation == {"HV001": ["Old Tobin"], "WD001": []}
+
+
+def test_prompt_requires_only_this_areas_npcs():
+    builder = _builder([{"keyNPCs": ["Maera Thistledown"]}, {"keyNPCs": ["Old Tobin"]}])
+    builder._allocate_module_npcs(["HV001", "WD001"])
+    builder.context.generating_area = "HV001"
+    placements = builder.context._get_required_npc_placements()
+    assert "Maera Thistledown: MUST be placed" in placements
+    assert "Old Tobin: assigned to Wd001 (WD001) - do NOT place here" in placements
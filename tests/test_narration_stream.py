@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from core.ai.narration_stream import NarrationStreamExtractor
+
+NARRATION = 'She says "run!"\nThe door\\gate creaks. Café \U0001F409 \\u0041 done'
+RESPONSE = json.dumps({"narration": NARRATION, "actions": [{"action": "none", "parameters": {}}]})
+
+
+def _stream(chunks):
+    extractor = NarrationStreamExtractor()
+    pieces = [extractor.feed(chunk) for chunk in chunks]
+    return extractor, pieces
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_escapes_split_across_chunks(size):
+    chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+    extractor, pieces = _stream(chunks)
+    assert "".join(pieces) == NARRATION
+    assert extractor.narration == NARRATION
+    assert extractor.finished
+
+
+def test_surrogate_pair_waits_for_low_half():
+    raw = json.dumps({"narration": "\U0001F409"}, ensure_ascii=True)
+    split = raw.index("\\udc")
+    extractor, pieces = _stream([raw[:split], raw[split:]])
+    assert pieces == ["", "\U0001F409"]
+
+
+def test_key_split_across_chunks_and_preamble_ignored():
+    raw = '```json\n{"narr' + 'ation": "Hello' + ' world", "actions": []}'
+    extractor, pieces = _stream(['```json\n{"narr', 'ation": "Hello', ' world", "actions": []}'])
+    assert pieces == ["", "Hello", " world"]
+    assert extractor.narration == json.loads(raw[raw.index("{"):])["narration"]
+
+
+def test_text_after_closing_quote_is_ignored():
+    extractor, pieces = _stream(['{"narration": "Hi", ', '"narration": "again"}'])
+    assert pieces == ["Hi", ""]
+    assert extractor.finished and extractor.narration == "Hi"
+
+
+def test_malformed_escape_is_shown_verbatim():
+    extractor, _ = _stream(['{"narration": "bad \\q here"}'])
+    assert extractor.narration == "bad \\q here"
@@ -0,0 +1,41 @@
+from core.ai.prompt_cache import MAX_TRACKED_PREFIXES, FakeCacheProvider, PromptCache
+
+PROMPT = "You are the Dungeon Master. " * 1000
+
+
+def _messages(system_prompt):
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": "I look around."}]
+
+
+def test_cache_created_only_for_repeated_prefix():
+    provider = FakeCacheProvider(create_latency=0)
+    cache = PromptCache(provider, ttl_seconds=3600, min_tokens=100)
+    for i in range(5):
+        assert cache.prepare("model", _messages(PROMPT + f"one-shot {i}"), {}) is None
+    assert provider.created == 0
+
+    assert cache.prepare("model", _messages(PROMPT), {}) is None
+    assert cache.prepare("model", _messages(PROMPT), {}) is not None
+    assert cache.prepare("model", _messages(PROMPT), {}) is not None
+    assert provider.created == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_create_runs_outside_lock():
+    class CheckingProvider(FakeCacheProvider):
+        def create_cache(self, model, system_instruction, ttl_seconds):
+            assert not cache._lock.locked()
+            return super().create_cache(model, system_instruction, ttl_seconds)
+
+    cache = PromptCache(CheckingProvider(create_latency=0), ttl_seconds=3600, min_tokens=100)
+    cache.prepare("model", _messages(PROMPT), {})
+    assert cache.prepare("model", _messages(PROMPT), {}) is not None
+
+
+def test_tracking_is_bounded():
+    cache = PromptCache(FakeCacheProvider(create_latency=0), ttl_seconds=3600, min_tokens=100)
+    for i in range(MAX_TRACKED_PREFIXES + 50):
+        cache.prepare("model", _messages(PROMPT + str(i)), {})
+    assert len(cache._previous_system_run) == MAX_TRACKED_PREFIXES
+    assert len(cache._sightings) == MAX_TRACKED_PREFIXES
+    assert all(len(h) == 64 for run in cache._previous_system_run.values() for h in run)
@@ -0,0 +1,38 @@
+import json
+import os
+
+from updates.save_game_manager import SaveGameManager, SaveObjectStore
+
+
+def _write_save(save_dir, name, digests):
+    os.makedirs(os.path.join(save_dir, name))
+    manifest = {f"file_{i}.json": {"hash": digest, "size": 1} for i, digest in enumerate(digests)}
+    with open(os.path.join(save_dir, name, "save_metadata.json"), "w") as f:
+        json.dump({"manifest": manifest}, f)
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SaveGameManager()
+    save_dir = manager.get_save_directory()
+    store = SaveObjectStore(save_dir)
+    shared = store.store_content("shared.json", b"shared", (0, 6))["hash"]
+    only_a = store.store_content("a.json", b"only a", (0, 6))["hash"]
+    store.save_index()
+    _write_save(save_dir, "save_a", [shared, only_a])
+    return manager, save_dir, store, only_a
+
+
+def test_unreferenced_blobs_are_collected(tmp_path, monkeypatch):
+    manager, save_dir, store, only_a = _setup(tmp_path, monkeypatch)
+    os.remove(os.path.join(save_dir, "save_a", "save_metadata.json"))
+    assert manager.collect_unreferenced_objects() == 2
+    assert not os.path.exists(store.blob_path(only_a))
+
+
+def test_unreadable_metadata_blocks_collection(tmp_path, monkeypatch):
+    manager, save_dir, store, only_a = _setup(tmp_path, monkeypatch)
+    with open(os.path.join(save_dir, "save_a", "save_metadata.json"), "w") as f:
+        f.write("{not json")
+    assert manager.collect_unreferenced_objects() == 0
+    assert os.path.exists(store.blob_path(only_a))
@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+
+from core.ai import chunked_compression_config, cumulative_summary
+from core.ai.summary_jobs import HistorySplice, SummaryJobQueue
+
+ROUTE = "Location transition: Tavern (A01) to Road (A02)"
+BACK = "Location transition: Road (A02) to Tavern (A01)"
+
+
+def _drain(queue, timeout=5.0):
+    deadline = time.time() + timeout
+    while queue._queued and time.time() < deadline:
+        time.sleep(0.01)
+    assert not queue._queued
+
+
+@pytest.fixture
+def summarized(monkeypatch):
+    calls = []
+
+    def generate_location_summary(location, messages):
+        calls.append((location, [m["content"] for m in messages]))
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(cumulative_summary, "generate_enhanced_adventure_summary", lambda *args: "adventure")
+    monkeypatch.setattr(cumulative_summary, "update_journal_with_summary", lambda *args: None)
+    monkeypatch.setattr(cumulative_summary, "generate_location_summary", generate_location_summary)
+    monkeypatch.setattr(chunked_compression_config, "ENABLE_AUTO_COMPRESSION", False)
+    return calls
+
+
+def _travel(queue, history, location, transition):
+    history.append({"role": "user", "content": transition})
+    history.append({"role": "assistant", "content": f"You leave {location}."})
+    queue.submit_location_summary(history, {}, location, transition)
+    _drain(queue)
+    return queue.apply_ready(history)
+
+
+def test_repeated_route_is_summarized_each_time(tmp_path, summarized):
+    queue = SummaryJobQueue(jobs_file=str(tmp_path / "jobs.json"))
+    history = [
+        {"role": "system", "content": "You are the DM."},
+        {"role": "user", "content": "I order an ale."},
+        {"role": "assistant", "content": "The barkeep pours one."},
+    ]
+    history = _travel(queue, history, "Tavern", ROUTE)
+    history += [{"role": "user", "content": "I walk north."}, {"role": "assistant", "content": "Wolves howl."}]
+    history = _travel(queue, history, "Road", BACK)
+    history += [{"role": "user", "content": "I play cards."}, {"role": "assistant", "content": "You win."}]
+    history = _travel(queue, history, "Tavern", ROUTE)
+
+    assert [location for location, _ in summarized] == ["Tavern", "Road", "Tavern"]
+    assert summarized[2][1] == ["You leave Road.", "I play cards.", "You win."]
+    summaries = [m for m in history if "=== LOCATION SUMMARY ===" in m["content"]]
+    assert len(summaries) == 3
+    assert queue._jobs == {}
+
+
+def test_resubmitting_same_transition_does_not_duplicate(tmp_path, summarized):
+    queue = SummaryJobQueue(jobs_file=str(tmp_path / "jobs.json"))
+    history = [
+        {"role": "user", "content": "I order an ale."},
+        {"role": "user", "content": ROUTE},
+        {"role": "assistant", "content": "You leave."},
+    ]
+    first = queue.submit_location_summary(history, {}, "Tavern", ROUTE)
+    history.append({"role": "user", "content": "Keep walking."})
+    second = queue.submit_location_summary(history, {}, "Tavern", ROUTE)
+    _drain(queue)
+    assert first is second
+    assert len(summarized) == 1
+
+
+def test_empty_transition_is_not_resubmitted(tmp_path, summarized):
+    queue = SummaryJobQueue(jobs_file=str(tmp_path / "jobs.json"))
+    history = [{"role": "user", "content": ROUTE}, {"role": "assistant", "content": "You leave."}]
+    queue.submit_location_summary(history, {}, "Tavern", ROUTE)
+    _drain(queue)
+    assert queue._jobs == {}
+    assert queue.submit_location_summary(history, {}, "Tavern", ROUTE) is None
+
+
+class TestHistorySplice:
+    run = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}]
+    after = {"role": "user", "content": ROUTE}
+    replacement = [{"role": "assistant", "content": "=== LOCATION SUMMARY ===\n\nsummary"}]
+
+    def _splice(self):
+        return HistorySplice(self.run, self.after, self.replacement, hint=1)
+
+    def test_applies_after_history_grew(self):
+        history = [{"role": "system", "content": "s"}] + self.run + [self.after, {"role": "user", "content": "new"}]
+        assert self._splice().apply(history) == [history[0]] + self.replacement + history[3:]
+
+    def test_applies_when_history_shifted_and_ignored_messages_inserted(self):
+        history = ([{"role": "system", "content": "s"}, {"role": "user", "content": "Error Note: x"}]
+                   + [self.run[0], {"role": "system", "content": "inserted"}, self.run[1], self.after])
+        assert self._splice().apply(history) == history[:2] + self.replacement + [self.after]
+
+    def test_stale_when_replaced_run_changed(self):
+        history = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "edited"}, self.after]
+        assert self._splice().apply(history) is None
+
+    def test_stale_when_transition_removed(self):
+        assert self._splice().apply(list(self.run)) is None
+
+    def test_picks_occurrence_nearest_hint(self):
+        other = [{"role": "user", "content": "x"}, {"role": "assistant", "content": "y"}]
+        history = self.run + [self.after] + other + self.run + [self.after]
+        spliced = HistorySplice(self.run, self.after, self.replacement, hint=len(self.run) + 1 + len(other)).apply(history)
+        assert spliced == self.run + [self.after] + other + self.replacement + [self.after]
+
+    def test_applies_when_earlier_history_was_compressed(self):
+        compressed = [{"role": "assistant", "content": "=== LOCATION SUMMARY ===\n\nolder"}]
+        history = compressed + self.run + [self.after]
+        assert HistorySplice(self.run, self.after, self.replacement, hint=5).apply(history) == compressed + self.replacement + [self.after]
+
+    def test_without_transition_replaces_run_at_end(self):
+        history = [{"role": "system", "content": "s"}] + self.run
+        assert HistorySplice(self.run, None, self.replacement).apply(history) == [history[0]] + self.replacement
+        assert HistorySplice(self.run, None, self.replacement).apply(history + [self.after]) is None
+
+    def test_round_trips_through_job_record(self):
+        splice = HistorySplice.from_dict(json.loads(json.dumps(self._splice().to_dict())))
+        history = self.run + [self.after]
+        assert splice.apply(history) == self.replacement + [self.after]
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# AUTOSAVE_MANAGER.PY - BACKGROUND TURN AUTOSAVES
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Data Management Layer - Game State Persistence
+#
+# Saves used to be manual only. This service writes an essential-mode save
+# at turn boundaries (after process_ai_response) into the same
+# content-addressed store SaveGameManager uses, without making the game
+# thread wait on save I/O.
+#
+# SNAPSHOT (game thread, at the turn boundary):
+# - The save file list is collected as for a manual save
+# - Files whose mtime/size match the object store index are recorded by
+#   hash only; the few files changed this turn are read into memory
+# - Nothing is hashed or written here, so the snapshot is cheap and reflects
+#   one consistent turn even if the next turn starts changing files
+#
+# WORKER (one background thread):
+# - Hashes and stores the captured contents, then writes the manifest as
+#   save_<timestamp>_autosave. Snapshots taken while the worker is busy are
+#   coalesced; only the newest is written
+# - Keeps the newest AUTOSAVE_RETENTION autosaves and drops blobs no save
+#   references any more. Manual saves are never removed
+#
+# STATUS:
+# Progress is shown on status_manager's background channel, so input stays
+# enabled while an autosave is written.
+# ============================================================================
+
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.managers.status_manager import status_manager
+from updates.save_game_manager import SaveGameManager, SaveObjectStore, store_lock
+from utils.enhanced_logger import debug, info, warning, error, set_script_name
+
+# Set script name for logging
+set_script_name("autosave_manager")
+
+AUTOSAVE_SUFFIX = "_autosave"
+STATUS_TASK = "Autosave"
+
+
+def _config_value(name: str, default):
+    try:
+        import config
+        return getattr(config, name, default)
+    except ImportError:
+        return default
+
+
+class AutosaveSnapshot:
+    """Files captured at one turn boundary: path -> (signature, hash or None, content or None)"""
+
+    def __init__(self, manager: SaveGameManager, metadata: Dict):
+        self.manager = manager
+        self.metadata = metadata
+        self.folder = f"save_{datetime.now().strftime('%Y%m%d_%H%M%S')}{AUTOSAVE_SUFFIX}"
+        self.files: Dict[str, tuple] = {}
+        self.changed = 0
+
+
+class AutosaveService:
+    """Takes turn-boundary snapshots and writes them as saves on a background worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Optional[AutosaveSnapshot] = None
+        self._executor = None
+        self._turns = 0
+        self.saves_written = 0
+        self.snapshots_coalesced = 0
+
+    # ------------------------------------------------------------------
+    # Game thread
+    # ------------------------------------------------------------------
+
+    def take_snapshot(self) -> AutosaveSnapshot:
+        """Capture the current save state (hashes of unchanged files, contents of changed ones)"""
+        manager = SaveGameManager()
+        metadata = manager.generate_save_metadata("Autosave", "essential")
+        metadata["autosave"] = True
+        snapshot = AutosaveSnapshot(manager, metadata)
+        store = SaveObjectStore(manager.get_save_directory())
+        for file_path in manager.collect_save_files("essential"):
+            try:
+                stat = os.stat(file_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                digest = store.lookup(file_path, signature)
+                content = None
+                if digest is None:
+                    with open(file_path, "rb") as f:
+                        content = f.read()
+                    snapshot.changed += 1
+                snapshot.files[file_path] = (signature, digest, content)
+            except OSError as e:
+                warning(f"FILE_OP: Autosave skipped {file_path}: {e}", category="save_game")
+        return snapshot
+
+    def on_turn_complete(self):
+        """Queue an autosave for the turn that just finished (never blocks on save I/O)"""
+        if not _config_value("ENABLE_AUTOSAVE", True):
+            return
+        self._turns += 1
+        if self._turns % max(1, _config_value("AUTOSAVE_EVERY_TURNS", 1)):
+            return
+
+        start = time.time()
+        try:
+            snapshot = self.take_snapshot()
+        except Exception as e:
+            error("FAILURE: Autosave snapshot failed", exception=e, category="save_game")
+            return
+        debug(f"STATE_CHANGE: Autosave snapshot of {len(snapshot.files)} files "
+              f"({snapshot.changed} changed) in {time.time() - start:.3f}s", category="save_game")
+
+        with self._lock:
+            if self._pending is not None:
+                self.snapshots_coalesced += 1
+                self._pending = snapshot
+                return
+            self._pending = snapshot
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+            self._executor.submit(self._run)
+        status_manager.set_background_status(STATUS_TASK, "queued")
+
+    def wait(self):
+        """Block until queued autosaves are written (shutdown and diagnostics only)"""
+        with self._lock:
+            executor = self._executor
+        if executor is not None:
+            executor.submit(lambda: None).result()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        with self._lock:
+            snapshot, self._pending = self._pending, None
+        if snapshot is None:
+            return
+        try:
+            status_manager.set_background_status(STATUS_TASK, f"saving {snapshot.changed} changed files")
+            self._write(snapshot)
+        except Exception as e:
+            error("FAILURE: Autosave failed", exception=e, category="save_game")
+        finally:
+            with self._lock:
+                queued = self._pending is not None
+            if not queued:
+                status_manager.set_background_status(STATUS_TASK, None)
+
+    def _write(self, snapshot: AutosaveSnapshot):
+        manager = snapshot.manager
+        save_dir = manager.get_save_directory()
+        manifest = {}
+        skipped: List[str] = []
+        with store_lock:
+            store = SaveObjectStore(save_dir)
+            for file_path, (signature, digest, content) in snapshot.files.items():
+                if content is None and not os.path.exists(store.blob_path(digest)):
+                    # Blob collected since the snapshot; usable only if the file is still the same
+                    try:
+                        stat = os.stat(file_path)
+                        if (stat.st_mtime_ns, stat.st_size) != signature:
+                            skipped.append(file_path)
+                            continue
+                        with open(file_path, "rb") as f:
+                            content = f.read()
+                    except OSError:
+                        skipped.append(file_path)
+                        continue
+                if content is None:
+                    manifest[file_path] = {"hash": digest, "size": signature[1]}
+                else:
+                    manifest[file_path] = store.store_content(file_path, content, signature)
+            if skipped:
+                warning(f"FILE_OP: Autosave left out {len(skipped)} files changed since the snapshot", category="save_game")
+            if not manager.write_save(f"{save_dir}/{snapshot.folder}", snapshot.metadata, manifest, store, skipped):
+                error(f"FAILURE: Failed to write autosave {snapshot.folder}", category="save_game")
+                return
+            self.saves_written += 1
+            self._apply_retention(manager, save_dir)
+        info(f"SUCCESS: Autosaved {len(manifest)} files as {snapshot.folder} "
+             f"({store.objects_written} new objects, {store.bytes_written} bytes)", category="save_game")
+
+    def _apply_retention(self, manager: SaveGameManager, save_dir: str):
+        retention = max(1, _config_value("AUTOSAVE_RETENTION", 5))
+        autosaves = sorted(item for item in os.listdir(save_dir)
+                           if item.startswith("save_") and item.endswith(AUTOSAVE_SUFFIX))
+        expired = autosaves[:-retention]
+        for folder in expired:
+            shutil.rmtree(os.path.join(save_dir, folder), ignore_errors=True)
+            debug(f"FILE_OP: Removed expired autosave {folder}", category="save_game")
+        if expired:
+            manager.collect_unreferenced_objects()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_autosave_service() -> AutosaveService:
+    """Return the process-wide autosave service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AutosaveService()
+        return _service
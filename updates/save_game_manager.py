@@ -34,6 +34,18 @@ Handles save and restore functionality for game state preservation.
 # - Essential vs. optional file categorization
 # - Atomic save operations using existing file_operations.py
 # - ZIP compression for storage efficiency (optional)
+#
+# CONTENT-ADDRESSED STORAGE (save format 2.0):
+# - File contents are stored once as SHA-256 named blobs in
+#   [save dir]/objects/ab/abcdef..., shared by every save
+# - Each save folder holds only save_metadata.json, whose "manifest" maps
+#   game file paths to blob hashes
+# - objects/index.json remembers (mtime, size, hash) per game file, so an
+#   unchanged file is neither read nor hashed and a save costs time in
+#   proportion to what changed
+# - Only the configured save roots are scanned, never the whole tree
+# - Deleting a save removes blobs no remaining manifest references
+# - Format 1.0 saves (full file copies) can still be restored
 # 
 # RESTORE SYSTEM DESIGN:
 # - Save game discovery and metadata parsing
@@ -59,9 +71,12 @@ Handles save and restore functionality for game state preservation.
 # the module-centric architecture and data integrity principles.
 # ============================================================================
 
+import glob
+import hashlib
 import json
 import os
 import shutil
+import threading
 import zipfile
 import time
 from datetime import datetime
@@ -76,6 +91,103 @@ from utils.enhanced_logger import debug, info, warning, error, set_script_name
 # Set script name for logging
 set_script_name(__name__)
 
+SAVE_FORMAT_VERSION = "2.0"
+OBJECTS_DIR = "objects"
+
+# Serializes object store changes (saves, autosaves, garbage collection)
+store_lock = threading.RLock()
+
+
+class SaveObjectStore:
+    """Hash-named file blobs shared by all saves in one save directory"""
+    
+    def __init__(self, save_dir: str):
+        self.root = os.path.join(save_dir, OBJECTS_DIR)
+        self.index_path = os.path.join(self.root, "index.json")
+        self._index = None
+        self.objects_written = 0
+        self.bytes_written = 0
+        self.files_hashed = 0
+    
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+    
+    def _load_index(self) -> Dict[str, List]:
+        if self._index is None:
+            self._index = safe_read_json(self.index_path) if os.path.exists(self.index_path) else None
+            self._index = self._index or {}
+        return self._index
+    
+    def save_index(self):
+        if self._index is not None:
+            safe_write_json(self.index_path, self._index, create_backup=False)
+    
+    def lookup(self, file_path: str, signature: Tuple[int, int]) -> Optional[str]:
+        """Blob hash of file_path if it is unchanged since it was last stored"""
+        known = self._load_index().get(file_path)
+        if known and tuple(known[:2]) == tuple(signature) and os.path.exists(self.blob_path(known[2])):
+            return known[2]
+        return None
+    
+    def store_file(self, file_path: str) -> Dict[str, Any]:
+        """Store one game file, returning its manifest entry"""
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        digest = self.lookup(file_path, signature)
+        if digest:
+            return {"hash": digest, "size": stat.st_size}
+        with open(file_path, "rb") as f:
+            content = f.read()
+        return self.store_content(file_path, content, signature)
+    
+    def store_content(self, file_path: str, content: bytes, signature: Tuple[int, int]) -> Dict[str, Any]:
+        """Store already-read content of file_path (as of signature), returning its manifest entry"""
+        digest = hashlib.sha256(content).hexdigest()
+        self.files_hashed += 1
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            temp_path = f"{blob}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, blob)
+            self.objects_written += 1
+            self.bytes_written += len(content)
+        self._load_index()[file_path] = [signature[0], signature[1], digest]
+        return {"hash": digest, "size": len(content)}
+    
+    def materialize(self, digest: str, dest_path: str):
+        """Write a blob's content to dest_path"""
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        shutil.copyfile(self.blob_path(digest), dest_path)
+    
+    def record(self, file_path: str, digest: str):
+        """Remember that file_path currently holds the blob digest"""
+        stat = os.stat(file_path)
+        self._load_index()[file_path] = [stat.st_mtime_ns, stat.st_size, digest]
+    
+    def collect_garbage(self, referenced: set) -> int:
+        """Delete blobs not in referenced; returns the number removed"""
+        if not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    removed += 1
+        index = self._load_index()
+        for path in [path for path, entry in index.items() if entry[2] not in referenced]:
+            del index[path]
+        self.save_index()
+        return removed
+
+
 class SaveGameManager:
     """Manages save and restore operations for the Dungeon Master system"""
     
@@ -110,9 +222,11 @@ class SaveGameManager:
             "data/spell_repository.json",
             "training_data.json",
             "modules/conversation_history/combat_conversation_history.json",
+            "modules/conversation_history/combat_conversation_history.json.journal.jsonl",
             
             # Conversation and chat history (critical for game continuity)
             "modules/conversation_history/conversation_history.json",
+            "modules/conversation_history/conversation_history.json.journal.jsonl",
             "modules/conversation_history/chat_history.json",
             
             # Character data
@@ -223,7 +337,8 @@ class SaveGameManager:
             "icons/",
         ]
     
-    def should_include_file(self, filepath: str, save_mode: str = "essential") -> bool:
+    def should_include_file(self, filepath: str, save_mode: str = "essential",
+                            essential_files: Optional[List[str]] = None) -> bool:
         """Determine if a file should be included in the save"""
         # Convert to forward slashes for consistent pattern matching
         filepath = filepath.replace("\\", "/")
@@ -247,7 +362,8 @@ class SaveGameManager:
                     return False
         
         # Check if it's an essential file
-        essential_files = self.get_essential_files()
+        if essential_files is None:
+            essential_files = self.get_essential_files()
         for essential in essential_files:
             if essential.endswith("/"):
                 # Directory pattern
@@ -282,6 +398,30 @@ class SaveGameManager:
         
         return False
     
+    def collect_save_files(self, save_mode: str = "essential") -> List[str]:
+        """Enumerate the files a save contains, scanning only the save roots"""
+        essential_files = self.get_essential_files()
+        entries = list(essential_files)
+        if save_mode == "full":
+            entries += self.get_optional_files()
+        # Portraits are saved for every module, not only the current one
+        entries += glob.glob("modules/*/portraits/")
+        
+        candidates = set()
+        for entry in entries:
+            entry = entry.replace("\\", "/")
+            if entry.endswith("/"):
+                for root, dirs, files in os.walk(entry):
+                    for file in files:
+                        candidates.add(os.path.join(root, file).replace("\\", "/"))
+            elif "*" in entry:
+                candidates.update(match.replace("\\", "/") for match in glob.glob(entry))
+            elif os.path.isfile(entry):
+                candidates.add(entry)
+        
+        return sorted(path for path in candidates
+                      if os.path.isfile(path) and self.should_include_file(path, save_mode, essential_files))
+    
     def get_save_directory(self) -> str:
         """Get the save directory for the current module"""
         if not self.current_module:
@@ -332,7 +472,7 @@ class SaveGameManager:
                 **location_info,
             },
             "system_info": {
-                "save_format_version": "1.0",
+                "save_format_version": SAVE_FORMAT_VERSION,
                 "created_by": "NeverEndingQuest Save System",
             }
         }
@@ -360,68 +500,25 @@ class SaveGameManager:
             os.makedirs(save_path, exist_ok=True)
             info(f"FILE_OP: Created save directory: {save_path}", category="save_game")
             
-            # Generate and save metadata
             metadata = self.generate_save_metadata(description, save_mode)
-            metadata_path = f"{save_path}/save_metadata.json"
-            if not safe_write_json(metadata_path, metadata):
-                return False, "Failed to write save metadata"
-            
-            # Copy files based on save mode
-            copied_files = []
-            skipped_files = []
-            
-            # Walk through all files in the current directory
-            for root, dirs, files in os.walk("."):
-                # Skip the save directory itself
-                if save_path in root:
-                    continue
-                
-                # Skip directories that should be excluded
-                dirs[:] = [d for d in dirs if not any(
-                    d.startswith(pattern[:-1]) if pattern.endswith("*") else d == pattern 
-                    for pattern in self.get_excluded_patterns() 
-                    if "/" not in pattern
-                )]
-                
-                # Process files
-                for file in files:
-                    file_path = os.path.join(root, file).replace("\\", "/")
-                    # Remove leading ./
-                    if file_path.startswith("./"):
-                        file_path = file_path[2:]
-                    
-                    if self.should_include_file(file_path, save_mode):
-                        # Copy this file
-                        source_path = file_path
-                        dest_path = f"{save_path}/{file_path}"
-                        
-                        # Ensure destination directory exists
-                        dest_dir = os.path.dirname(dest_path)
-                        if dest_dir:
-                            os.makedirs(dest_dir, exist_ok=True)
-                        
-                        try:
-                            shutil.copy2(source_path, dest_path)
-                            copied_files.append(file_path)
-                            debug(f"FILE_OP: Copied: {file_path}", category="save_game")
-                        except Exception as e:
-                            error(f"FAILURE: Failed to copy {file_path}", exception=e, category="save_game")
-                            skipped_files.append(file_path)
-                    else:
-                        skipped_files.append(file_path)
             
-            # Update metadata with file statistics
-            metadata["file_statistics"] = {
-                "files_copied": len(copied_files),
-                "files_skipped": len(skipped_files),
-                "total_files_processed": len(copied_files) + len(skipped_files),
-            }
-            
-            # Save updated metadata
-            safe_write_json(metadata_path, metadata)
+            # Store file contents in the shared object store
+            with store_lock:
+                store = SaveObjectStore(save_dir)
+                manifest = {}
+                skipped_files = []
+                for file_path in self.collect_save_files(save_mode):
+                    try:
+                        manifest[file_path] = store.store_file(file_path)
+                        debug(f"FILE_OP: Stored: {file_path}", category="save_game")
+                    except Exception as e:
+                        error(f"FAILURE: Failed to store {file_path}", exception=e, category="save_game")
+                        skipped_files.append(file_path)
+                if not self.write_save(save_path, metadata, manifest, store, skipped_files):
+                    return False, "Failed to write save metadata"
             
             success_msg = f"Save game created successfully: {save_path}"
-            success_msg += f"\nCopied {len(copied_files)} files"
+            success_msg += f"\nSaved {len(manifest)} files ({store.objects_written} changed)"
             if save_mode == "essential":
                 success_msg += " (essential files only)"
             else:
@@ -435,6 +532,46 @@ class SaveGameManager:
             error(f"FAILURE: {error_msg}", category="save_game")
             return False, error_msg
     
+    def write_save(self, save_path: str, metadata: Dict[str, Any], manifest: Dict[str, Dict],
+                   store: SaveObjectStore, skipped_files: List[str]) -> bool:
+        """Write a save folder's metadata and manifest once its blobs are stored"""
+        store.save_index()
+        os.makedirs(save_path, exist_ok=True)
+        metadata["storage"] = "content_addressed"
+        metadata["file_statistics"] = {
+            "files_copied": len(manifest),
+            "files_skipped": len(skipped_files),
+            "files_hashed": store.files_hashed,
+            "objects_written": store.objects_written,
+            "bytes_written": store.bytes_written,
+            "total_bytes": sum(entry["size"] for entry in manifest.values()),
+        }
+        metadata["manifest"] = manifest
+        # The manifest is written last, so a save is listed only once complete
+        return safe_write_json(f"{save_path}/save_metadata.json", metadata, create_backup=False)
+    
+    def collect_unreferenced_objects(self) -> int:
+        """Drop blobs that no remaining save references"""
+        save_dir = self.get_save_directory()
+        if not os.path.exists(save_dir):
+            return 0
+        with store_lock:
+            referenced = set()
+            for item in os.listdir(save_dir):
+                metadata_path = os.path.join(save_dir, item, "save_metadata.json")
+                if item.startswith("save_") and os.path.exists(metadata_path):
+                    metadata = safe_read_json(metadata_path)
+                    if not isinstance(metadata, dict):
+                        # Its references are unknown; deleting now could orphan that save for good
+                        warning(f"VALIDATION: Skipping save object cleanup - unreadable metadata in {item}",
+                                category="save_game")
+                        return 0
+                    referenced.update(entry["hash"] for entry in metadata.get("manifest", {}).values())
+            removed = SaveObjectStore(save_dir).collect_garbage(referenced)
+        if removed:
+            debug(f"FILE_OP: Removed {removed} unreferenced save objects", category="save_game")
+        return removed
+    
     def list_save_games(self) -> List[Dict[str, Any]]:
         """List all available save games with metadata"""
         save_dir = self.get_save_directory()
@@ -451,6 +588,7 @@ class SaveGameManager:
                     if os.path.exists(metadata_path):
                         metadata = safe_read_json(metadata_path)
                         if metadata:
+                            metadata.pop("manifest", None)
                             metadata["save_folder"] = item
                             metadata["save_path"] = item_path
                             save_games.append(metadata)
@@ -484,6 +622,14 @@ class SaveGameManager:
             if not metadata:
                 return False, "Could not read save game metadata"
             
+            manifest = metadata.get("manifest")
+            store = SaveObjectStore(save_dir)
+            if manifest is not None:
+                missing = [path for path, entry in manifest.items()
+                           if not os.path.exists(store.blob_path(entry["hash"]))]
+                if missing:
+                    return False, f"Save game is incomplete: {len(missing)} stored files are missing"
+            
             # Create backup of current state before restoring
             backup_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_dir = f"modules/backups/restore_backup_{backup_timestamp}"
@@ -558,8 +704,20 @@ class SaveGameManager:
             restored_files = []
             failed_files = []
             
-            # Walk through save directory and copy files back
-            for root, dirs, files in os.walk(save_path):
+            if manifest is not None:
+                for dest_file, entry in manifest.items():
+                    try:
+                        store.materialize(entry["hash"], dest_file)
+                        store.record(dest_file, entry["hash"])
+                        restored_files.append(dest_file)
+                        debug(f"FILE_OP: Restored: {dest_file}", category="save_game")
+                    except Exception as e:
+                        error(f"FAILURE: Failed to restore {dest_file}", exception=e, category="save_game")
+                        failed_files.append(dest_file)
+                store.save_index()
+            
+            # Format 1.0 saves: walk through save directory and copy files back
+            for root, dirs, files in (os.walk(save_path) if manifest is None else []):
                 # Skip metadata file
                 if "save_metadata.json" in files:
                     files.remove("save_metadata.json")
@@ -607,7 +765,9 @@ class SaveGameManager:
             if not os.path.exists(save_path):
                 return False, f"Save game not found: {save_path}"
             
-            shutil.rmtree(save_path)
+            with store_lock:
+                shutil.rmtree(save_path)
+                self.collect_unreferenced_objects()
             info(f"SUCCESS: Deleted save game: {save_path}", category="save_game")
             return True, f"Save game deleted: {save_folder}"
             
@@ -15,7 +15,7 @@ from config import GEMINI_API_KEY, ENCOUNTER_UPDATE_MODEL
 
 # Import OpenAI usage tracking (safe - won't break if fails)
 try:
-    from utils.gemini_usage_tracker import track_response
+    from utils.usage_tracker import track_response
     USAGE_TRACKING_AVAILABLE = True
 except:
     USAGE_TRACKING_AVAILABLE = False
@@ -31,6 +31,12 @@
 # - Savings: Route to mini model when no actions needed
 # - Net Result: Major cost reduction for conversation-heavy gameplay
 #
+# LOCAL PREDICTION:
+# - Keyword/regex features scored by a small logistic model answer first
+# - Only low-confidence inputs escalate to the LLM prediction call
+# - The model is re-fitted from the accuracy log (python -m utils.action_predictor --train)
+# - --evaluate replays the log and reports accuracy and latency saved
+#
 # ARCHITECTURAL INTEGRATION:
 # - Called by main.py before get_ai_response()
 # - Uses condensed prompt based on system_prompt.txt analysis
@@ -39,8 +45,15 @@
 # ============================================================================
 
 import json
+import math
+import os
+import re
+import sys
+import time
+from datetime import datetime
 from core.ai.gemini_wrapper import OpenAI
 from config import GEMINI_API_KEY, ACTION_PREDICTION_MODEL
+import config
 
 # Initialize OpenAI client
 client = OpenAI(api_key=GEMINI_API_KEY)
@@ -127,10 +140,117 @@ Examples:
 - "Are all quests complete?" → TRUE (quest/plot status always needs full model)
 - "What plots remain?" → TRUE (plot queries require full model for proper updatePlot handling)"""
 
+# Accuracy log (one JSON object per line) and fitted local model
+PREDICTION_LOG_FILE = "modules/logs/action_prediction_log.jsonl"
+LOCAL_MODEL_FILE = "modules/action_predictor_model.json"
+MIN_TRAINING_SAMPLES = 50
+
+# Binary features for the local predictor, matched against the player's text
+LOCAL_FEATURES = {
+    "inventory": r"\b(pick(s|ed)? up|take|grab|loot|buy|sell|purchase|equip|unequip|drop)\b",
+    "movement": r"\b(go|head|travel|walk|enter|leave|return|move|proceed|climb|descend)\b.{0,20}\b(to|into|toward|towards|back|inside|outside|through|down|up)\b",
+    "rest": r"\b(rest|sleep|camp|short rest|long rest)\b",
+    "use_item": r"\b(cast|use|drink|quaff|consume|apply|read the scroll)\b",
+    "combat": r"\b(attack|fight|strike|shoot|charge|ambush|kill|stab|slash)\b",
+    "storage": r"\b(store|stash|retrieve|deposit|withdraw)\b",
+    "transfer": r"\b(give|trade|exchange|hand over|pay)\b",
+    "dice": r"\b(roll(ed|s)?|natural \d+|nat \d+|d20)\b",
+    "investigate": r"\b(search|look for|examine|investigate|inspect|track|check for)\b",
+    "error_note": r"error note|failed validation",
+    "plot_query": r"\b(quests?|plots?|objectives?|missions?)\b",
+    "commitment": r"^\W*(aye|yes|ok(ay)?|let'?s (do it|go)|agreed|sure|do it)\b",
+    "call_out": r"\b(anyone (home|there)|hello|call out)\b",
+    "level_up": r"\blevel(\s|-)?up\b",
+    "exit": r"\b(quit|exit|save and quit|end (the )?session)\b",
+    "party_change": r"\b(join (us|the party)|recruit|dismiss|part ways)\b",
+    "question": r"\?\s*$",
+    "dialogue": r"\b(i (say|ask|tell)|tell me|what do you|how (is|are)|describe|what'?s)\b",
+}
+_COMPILED_FEATURES = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in LOCAL_FEATURES.items()}
+
+# Hand-set starting weights, mirroring the TRUE/FALSE indicators in the LLM prompt
+DEFAULT_LOCAL_WEIGHTS = {
+    "bias": -0.5,
+    "inventory": 3.0, "movement": 3.0, "rest": 3.0, "use_item": 2.5, "combat": 3.0,
+    "storage": 3.0, "transfer": 2.5, "dice": 3.0, "investigate": 2.0, "error_note": 4.0,
+    "plot_query": 2.5, "commitment": 2.0, "call_out": 2.0, "level_up": 3.5, "exit": 3.5,
+    "party_change": 2.5, "question": -1.0, "dialogue": -1.5,
+}
+
+_local_model = None
+
+def extract_player_text(user_input):
+    """Return the player's own words, dropping the Dungeon Master Note prefix"""
+    if not user_input:
+        return ""
+    marker = user_input.rfind("Player:")
+    if marker != -1 and user_input.startswith("Dungeon Master Note"):
+        return user_input[marker + len("Player:"):].strip()
+    return user_input.strip()
+
+def extract_features(user_input):
+    """Return the names of local features that fire for this input"""
+    text = extract_player_text(user_input)
+    # Error notes arrive without the player prefix
+    features = [name for name, pattern in _COMPILED_FEATURES.items() if pattern.search(text)]
+    if "error_note" not in features and _COMPILED_FEATURES["error_note"].search(user_input or ""):
+        features.append("error_note")
+    return features
+
+def load_local_model():
+    """Load fitted weights if enough samples were used, else the defaults"""
+    global _local_model
+    if _local_model is None:
+        _local_model = {"weights": dict(DEFAULT_LOCAL_WEIGHTS), "samples": 0}
+        try:
+            if os.path.exists(LOCAL_MODEL_FILE):
+                with open(LOCAL_MODEL_FILE, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored.get("samples", 0) >= MIN_TRAINING_SAMPLES:
+                    _local_model = stored
+        except (OSError, json.JSONDecodeError):
+            pass
+    return _local_model
+
+def local_probability(user_input, weights=None):
+    """Probability that the response will need actions, from the local model"""
+    weights = weights or load_local_model()["weights"]
+    score = weights.get("bias", 0.0) + sum(weights.get(name, 0.0) for name in extract_features(user_input))
+    return 1.0 / (1.0 + math.exp(-score))
+
+def predict_locally(user_input):
+    """
+    Predict with the local model only.
+    
+    Returns:
+        dict: prediction in the same shape as predict_actions_required, or
+        None if no trained model exists or it is not confident enough to answer
+    """
+    start_time = time.perf_counter()
+    model = load_local_model()
+    if model.get("samples", 0) < MIN_TRAINING_SAMPLES:
+        # The hand-set defaults only seed training; they never skip the LLM
+        return None
+    probability = local_probability(user_input, model["weights"])
+    confidence = max(probability, 1.0 - probability)
+    if confidence < getattr(config, "LOCAL_PREDICTOR_CONFIDENCE", 0.85):
+        return None
+    features = extract_features(user_input)
+    return {
+        "requires_actions": probability >= 0.5,
+        "reason": f"Local predictor p={probability:.2f} (features: {', '.join(features) or 'none'})",
+        "confidence": "high",
+        "source": "local",
+        "latency_ms": (time.perf_counter() - start_time) * 1000,
+    }
+
 def predict_actions_required(user_input):
     """
     Predict whether user input will require JSON actions in the AI response.
     
+    The local predictor answers when it is confident; otherwise the LLM
+    prediction model is called.
+    
     Args:
         user_input (str): The user's input message
         
@@ -138,9 +258,20 @@ def predict_actions_required(user_input):
         dict: {
             "requires_actions": bool,
             "reason": str,
-            "confidence": str
+            "confidence": str,
+            "source": "local" or "llm",
+            "latency_ms": float
         }
     """
+    if getattr(config, "ENABLE_LOCAL_ACTION_PREDICTOR", True):
+        local_prediction = predict_locally(user_input)
+        if local_prediction is not None:
+            return local_prediction
+    return predict_with_llm(user_input)
+
+def predict_with_llm(user_input):
+    """Predict using the LLM prediction model (always a network round-trip)"""
+    start_time = time.perf_counter()
     try:
         # Call action prediction model
         response = client.chat.completions.create(
@@ -168,7 +299,9 @@ def predict_actions_required(user_input):
         return {
             "requires_actions": requires_actions,
             "reason": reason,
-            "confidence": "high" if len(reason) > 10 else "low"
+            "confidence": "high" if len(reason) > 10 else "low",
+            "source": "llm",
+            "latency_ms": (time.perf_counter() - start_time) * 1000,
         }
         
     except Exception as e:
@@ -176,7 +309,9 @@ def predict_actions_required(user_input):
         return {
             "requires_actions": True,
             "reason": f"Error in prediction: {str(e)}",
-            "confidence": "error"
+            "confidence": "error",
+            "source": "llm",
+            "latency_ms": (time.perf_counter() - start_time) * 1000,
         }
 
 def extract_actual_actions(ai_response):
@@ -241,9 +376,140 @@ def log_prediction_accuracy(user_input, prediction, actual_actions):
         print("DEBUG: ACTION PREDICTION - MISS: Would need model escalation")
     else:  # predicted_actions and not actual_has_actions
         print("DEBUG: ACTION PREDICTION - OVERCAUTION: Could have used mini model")
+    
+    # Persist for local model training and offline evaluation
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "input": extract_player_text(user_input)[:1000],
+        "error_note": "error_note" in extract_features(user_input),
+        "predicted": predicted_actions,
+        "actual": actual_has_actions,
+        "actions": actual_actions,
+        "source": prediction.get("source", "llm"),
+        "latency_ms": prediction.get("latency_ms"),
+    }
+    try:
+        os.makedirs(os.path.dirname(PREDICTION_LOG_FILE), exist_ok=True)
+        with open(PREDICTION_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"DEBUG: ACTION PREDICTION - Could not write accuracy log: {e}")
+
+def load_prediction_log(log_file=PREDICTION_LOG_FILE):
+    """Read accuracy log records, skipping malformed lines"""
+    records = []
+    if not os.path.exists(log_file):
+        return records
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+def _record_input(record):
+    # Re-attach the error note marker dropped when the player text was extracted
+    return ("Error Note: " if record.get("error_note") else "") + record.get("input", "")
+
+def train_local_model(records, epochs=300, learning_rate=0.1, l2=0.01):
+    """
+    Fit logistic weights on logged (input, actual) pairs by gradient descent,
+    starting from DEFAULT_LOCAL_WEIGHTS.
+    
+    Returns:
+        dict: {"weights": {...}, "samples": int, "trained": iso timestamp}
+    """
+    samples = [(extract_features(_record_input(r)), 1.0 if r.get("actual") else 0.0) for r in records]
+    weights = dict(DEFAULT_LOCAL_WEIGHTS)
+    if not samples:
+        return {"weights": weights, "samples": 0, "trained": datetime.now().isoformat()}
+    
+    for _ in range(epochs):
+        gradients = {name: 0.0 for name in weights}
+        for features, label in samples:
+            score = weights["bias"] + sum(weights[name] for name in features)
+            error_term = 1.0 / (1.0 + math.exp(-score)) - label
+            gradients["bias"] += error_term
+            for name in features:
+                gradients[name] += error_term
+        for name in weights:
+            penalty = l2 * weights[name] if name != "bias" else 0.0
+            weights[name] -= learning_rate * (gradients[name] / len(samples) + penalty)
+    
+    return {"weights": weights, "samples": len(samples), "trained": datetime.now().isoformat()}
+
+def evaluate_local_model(records, weights=None, threshold=None):
+    """
+    Replay logged predictions through the hybrid local/LLM predictor.
+    
+    Returns:
+        dict: accuracy and latency statistics
+    """
+    threshold = threshold if threshold is not None else getattr(config, "LOCAL_PREDICTOR_CONFIDENCE", 0.85)
+    llm_latencies = [r["latency_ms"] for r in records if r.get("source") == "llm" and r.get("latency_ms")]
+    average_llm_latency = sum(llm_latencies) / len(llm_latencies) if llm_latencies else 0.0
+    
+    answered_locally = local_correct = hybrid_correct = logged_correct = 0
+    local_time = 0.0
+    for record in records:
+        start_time = time.perf_counter()
+        probability = local_probability(_record_input(record), weights)
+        local_time += time.perf_counter() - start_time
+        
+        actual = bool(record.get("actual"))
+        logged_ok = bool(record.get("predicted")) == actual
+        logged_correct += logged_ok
+        if max(probability, 1.0 - probability) >= threshold:
+            answered_locally += 1
+            correct = (probability >= 0.5) == actual
+            local_correct += correct
+            hybrid_correct += correct
+        else:
+            # Escalated: the logged prediction stands in for the LLM answer
+            hybrid_correct += logged_ok
+    
+    total = len(records)
+    return {
+        "records": total,
+        "answered_locally": answered_locally,
+        "local_coverage": answered_locally / total if total else 0.0,
+        "local_accuracy": local_correct / answered_locally if answered_locally else 0.0,
+        "hybrid_accuracy": hybrid_correct / total if total else 0.0,
+        "logged_accuracy": logged_correct / total if total else 0.0,
+        "average_llm_latency_ms": average_llm_latency,
+        "average_local_latency_ms": (local_time / total) * 1000 if total else 0.0,
+        "latency_saved_ms": answered_locally * average_llm_latency,
+    }
 
 # Example usage and testing
 if __name__ == "__main__":
+    if "--train" in sys.argv:
+        records = load_prediction_log()
+        model = train_local_model(records)
+        with open(LOCAL_MODEL_FILE, "w", encoding="utf-8") as f:
+            json.dump(model, f, indent=2)
+        print(f"Trained local predictor on {model['samples']} samples -> {LOCAL_MODEL_FILE}")
+        if model["samples"] < MIN_TRAINING_SAMPLES:
+            print(f"Note: fewer than {MIN_TRAINING_SAMPLES} samples, routing keeps using the LLM predictor")
+        sys.exit(0)
+    
+    if "--evaluate" in sys.argv:
+        records = load_prediction_log()
+        if not records:
+            print(f"No records in {PREDICTION_LOG_FILE}")
+            sys.exit(1)
+        stats = evaluate_local_model(records)
+        print(f"Records replayed:        {stats['records']}")
+        print(f"Answered locally:        {stats['answered_locally']} ({stats['local_coverage']:.1%})")
+        print(f"Local accuracy:          {stats['local_accuracy']:.1%} (on locally answered inputs)")
+        print(f"Hybrid accuracy:         {stats['hybrid_accuracy']:.1%}")
+        print(f"Logged accuracy:         {stats['logged_accuracy']:.1%} (predictions as originally made)")
+        print(f"Avg LLM prediction:      {stats['average_llm_latency_ms']:.0f} ms")
+        print(f"Avg local prediction:    {stats['average_local_latency_ms']:.3f} ms")
+        print(f"Latency saved:           {stats['latency_saved_ms'] / 1000:.1f} s total")
+        sys.exit(0)
+    
     # Test cases for validation
     test_cases = [
         # Should predict TRUE (require actions)
@@ -266,4 +532,4 @@ if __name__ == "__main__":
     for test_input in test_cases:
         prediction = predict_actions_required(test_input)
         print(f"\nInput: '{test_input}'")
-        print(f"Prediction: {prediction}")
\ No newline at end of file
+        print(f"Prediction: {prediction}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# CHARACTER_RENDER_CACHE.PY - CACHED CHARACTER SHEET TEXT
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Utility Layer - Prompt Formatting Cache
+#
+# Character and NPC sheets are formatted into compact prompt text every turn
+# (conversation_utils.update_character_data) and at the start and end of each
+# combat round (combat_manager.format_character_for_combat /
+# format_npc_for_combat). Sheets change rarely, so the formatted text is
+# cached here and only re-rendered when the character's content changes.
+#
+# CACHE KEYS:
+# - (renderer, renderer arguments, SHA-256 of the character content)
+# - Files: content is the raw file bytes. The file's mtime/size is checked
+#   first, so an unchanged file is neither read nor hashed
+# - Dicts: content is the canonical JSON of the data (sorted keys)
+#
+# Renderers are plain functions of (data, *args) returning text. A renderer
+# may return None to reject the data (e.g. not a dict); None is not cached.
+# ============================================================================
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MAX_RENDERED_ENTRIES = 256
+
+
+def _renderer_name(renderer: Callable) -> str:
+    return f"{renderer.__module__}.{renderer.__qualname__}"
+
+
+def content_digest(data: Any) -> str:
+    """Content hash of already-parsed character data"""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CharacterRenderCache:
+    """Formatted character text keyed by content hash, shared by all prompt builders"""
+
+    def __init__(self, max_entries: int = MAX_RENDERED_ENTRIES):
+        self.max_entries = max_entries
+        self._rendered: "OrderedDict[Tuple, str]" = OrderedDict()
+        # path -> (mtime_ns, size, digest) of the last read
+        self._file_digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.renders = 0
+        self.file_reads = 0
+
+    def _lookup(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            text = self._rendered.get(key)
+            if text is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+            return text
+
+    def _store(self, key: Tuple, text: Optional[str]):
+        if text is None:
+            return
+        with self._lock:
+            self.renders += 1
+            self._rendered[key] = text
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+
+    def render_data(self, data: Any, renderer: Callable, *args) -> Optional[str]:
+        """Render already-loaded character data, reusing text for identical content"""
+        key = (_renderer_name(renderer), args, content_digest(data))
+        text = self._lookup(key)
+        if text is None:
+            text = renderer(data, *args)
+            self._store(key, text)
+        return text
+
+    def render_file(self, filepath: str, renderer: Callable, *args) -> Optional[str]:
+        """
+        Render a character JSON file.
+
+        Raises FileNotFoundError / json.JSONDecodeError like open() + json.load();
+        renderer exceptions propagate and nothing is cached.
+        """
+        path = os.path.abspath(str(filepath))
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        name = _renderer_name(renderer)
+
+        with self._lock:
+            known = self._file_digests.get(path)
+        if known is not None and known[:2] == signature:
+            text = self._lookup((name, args, known[2]))
+            if text is not None:
+                return text
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            self.file_reads += 1
+            self._file_digests[path] = signature + (digest,)
+
+        # Touched but identical files still hit
+        key = (name, args, digest)
+        text = self._lookup(key)
+        if text is None:
+            text = renderer(json.loads(raw.decode("utf-8")), *args)
+            self._store(key, text)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._rendered.clear()
+            self._file_digests.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "renders": self.renders, "file_reads": self.file_reads,
+                    "entries": len(self._rendered)}
+
+
+character_render_cache = CharacterRenderCache()
@@ -23,8 +23,10 @@ CREDENTIALS_FILE = 'credentials.json'
 TOKEN_PICKLE_FILE = 'token.pickle'
 
 class DriveManager:
-    def __init__(self):
+    def __init__(self, credentials_file=CREDENTIALS_FILE, token_file=TOKEN_PICKLE_FILE):
         """Initializes the DriveManager and authenticates the user."""
+        self.credentials_file = credentials_file
+        self.token_file = token_file
         self.service = self._get_drive_service()
 
     def _get_drive_service(self):
@@ -50,8 +52,8 @@ class DriveManager:
 
         # --- Development Environment: Use local files ---
         else:
-            if os.path.exists(TOKEN_PICKLE_FILE):
-                with open(TOKEN_PICKLE_FILE, 'rb') as token:
+            if os.path.exists(self.token_file):
+                with open(self.token_file, 'rb') as token:
                     creds = pickle.load(token)
         
         # If credentials are not valid, refresh or run the local auth flow
@@ -62,7 +64,7 @@ class DriveManager:
                     creds.refresh(Request())
                     # If in dev, save the refreshed token
                     if 'GOOGLE_CREDENTIALS_JSON' not in os.environ:
-                        with open(TOKEN_PICKLE_FILE, 'wb') as token:
+                        with open(self.token_file, 'wb') as token:
                             pickle.dump(creds, token)
                 except Exception as e:
                     print(f"[WARNING] Could not refresh token: {e}. Re-authentication will be required.")
@@ -70,16 +72,16 @@ class DriveManager:
             
             # If no valid creds after trying to refresh, run the one-time setup flow (local only)
             if not creds:
-                if not os.path.exists(CREDENTIALS_FILE):
-                    print(f"[ERROR] Credentials file '{CREDENTIALS_FILE}' not found.")
+                if not os.path.exists(self.credentials_file):
+                    print(f"[ERROR] Credentials file '{self.credentials_file}' not found.")
                     print("Please download it from Google Cloud Console and place it in the root directory.")
                     return None
                 
-                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, SCOPES)
                 creds = flow.run_local_server(port=0)
             
                 # Save the fresh token for the next run in development
-                with open(TOKEN_PICKLE_FILE, 'wb') as token:
+                with open(self.token_file, 'wb') as token:
                     pickle.dump(creds, token)
 
         if not creds:
@@ -27,11 +27,16 @@ Encoding utilities for handling character encoding issues throughout the system.
 Provides consistent text sanitization and encoding/decoding functions.
 """
 
+import os
+import re
 import unicodedata
 import json
 import codecs
+import threading
 from typing import Any, Dict, Optional
 
+from utils.file_operations import game_state_cache, discard_journal
+
 
 # Comprehensive character mapping for problematic Unicode characters
 CHARACTER_REPLACEMENTS = {
@@ -80,6 +85,34 @@ CHARACTER_REPLACEMENTS = {
 }
 
 
+# Single-character replacements matched by one precompiled character class.
+# (A str.translate table was measured slower here: CPython falls back to a
+# per-character dict lookup as soon as the text is non-ASCII.)
+_SINGLE_CHAR_REPLACEMENTS = {
+    old: new for old, new in CHARACTER_REPLACEMENTS.items() if len(old) == 1
+}
+_SINGLE_CHAR_RE = re.compile('[' + ''.join(re.escape(old) for old in _SINGLE_CHAR_REPLACEMENTS) + ']')
+
+# Multi-character corrupted sequences still need a regex alternation (kept in
+# table order so earlier entries win, as with sequential str.replace calls)
+_MULTI_CHAR_REPLACEMENTS = {
+    old: new for old, new in CHARACTER_REPLACEMENTS.items() if len(old) > 1
+}
+_MULTI_CHAR_RE = re.compile('|'.join(re.escape(old) for old in _MULTI_CHAR_REPLACEMENTS))
+
+# Control characters removed by sanitize_text (everything below 32 except
+# newline, carriage return and tab, plus 127-159)
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+# JSON escapes that can decode to characters sanitize_text would change
+_SUSPICIOUS_ESCAPES = ('\\u', '\\b', '\\f')
+
+# Files written by safe_json_dump in this process, keyed by absolute path
+# with the (mtime_ns, size) signature observed right after the write
+_trusted_files: Dict[str, tuple] = {}
+_trusted_lock = threading.Lock()
+
+
 def sanitize_text(text: str) -> str:
     """
     Sanitize text by replacing problematic Unicode characters with ASCII equivalents.
@@ -88,24 +121,22 @@ def sanitize_text(text: str) -> str:
     if not isinstance(text, str):
         return text
     
+    # Pure ASCII is unaffected by normalization and the replacement table,
+    # so only control characters can need removing
+    if text.isascii():
+        if _CONTROL_CHARS_RE.search(text) is None:
+            return text
+        return _CONTROL_CHARS_RE.sub('', text)
+    
     # First, normalize Unicode to decomposed form
     text = unicodedata.normalize('NFKD', text)
     
     # Replace known problematic characters
-    for old_char, new_char in CHARACTER_REPLACEMENTS.items():
-        text = text.replace(old_char, new_char)
+    text = _MULTI_CHAR_RE.sub(lambda m: _MULTI_CHAR_REPLACEMENTS[m.group(0)], text)
+    text = _SINGLE_CHAR_RE.sub(lambda m: _SINGLE_CHAR_REPLACEMENTS[m.group(0)], text)
     
     # Remove any remaining control characters except newlines and tabs
-    cleaned = []
-    for char in text:
-        if ord(char) < 32 and char not in '\n\r\t':
-            continue  # Skip control characters
-        elif ord(char) > 126 and ord(char) < 160:
-            continue  # Skip more control characters
-        else:
-            cleaned.append(char)
-    
-    text = ''.join(cleaned)
+    text = _CONTROL_CHARS_RE.sub('', text)
     
     # Final normalization to composed form
     text = unicodedata.normalize('NFC', text)
@@ -127,23 +158,69 @@ def sanitize_dict(data: Dict[str, Any]) -> Dict[str, Any]:
         return data
 
 
+def _file_signature(filepath: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _mark_trusted(filepath: str) -> None:
+    """Record that filepath currently holds sanitized output from safe_json_dump"""
+    signature = _file_signature(filepath)
+    if signature is not None:
+        with _trusted_lock:
+            _trusted_files[os.path.abspath(filepath)] = signature
+
+
+def _json_text_is_clean(text: str) -> bool:
+    """
+    True if no string decoded from this JSON text can be changed by
+    sanitize_text. The parser rejects raw control characters inside strings,
+    so ASCII text without \\u, \\b or \\f escapes is already clean.
+    """
+    return text.isascii() and not any(esc in text for esc in _SUSPICIOUS_ESCAPES)
+
+
+def _is_trusted(filepath: str) -> bool:
+    with _trusted_lock:
+        signature = _trusted_files.get(os.path.abspath(filepath))
+    return signature is not None and signature == _file_signature(filepath)
+
+
+def _load_and_sanitize(filepath: str) -> Any:
+    trusted = _is_trusted(filepath)
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except UnicodeDecodeError:
+        # Try with different encoding if UTF-8 fails
+        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        trusted = False
+    data = json.loads(text)
+    
+    # Skip the recursive pass for files we sanitized ourselves or whose raw
+    # text cannot contain anything sanitize_text would change
+    if trusted or _json_text_is_clean(text):
+        return data
+    return sanitize_dict(data)
+
+
 def safe_json_load(filepath: str) -> Any:
     """
     Load JSON file with proper encoding and error handling.
     Returns None if file doesn't exist.
+    
+    Sanitized results are served from the shared game state cache until the
+    file changes on disk or is rewritten through this process.
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Sanitize the loaded data
-            return sanitize_dict(data)
+        return game_state_cache.load(filepath, _load_and_sanitize, variant="sanitized",
+                                     journal_transform=sanitize_dict)
     except FileNotFoundError:
         return None
-    except UnicodeDecodeError:
-        # Try with different encoding if UTF-8 fails
-        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-            data = json.load(f)
-            return sanitize_dict(data)
     except Exception as e:
         print(f"Error loading JSON from {filepath}: {e}")
         raise
@@ -166,6 +243,10 @@ def safe_json_dump(data: Any, filepath: str, **kwargs) -> None:
     
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(clean_data, f, **default_kwargs)
+    discard_journal(filepath)
+    game_state_cache.invalidate(filepath)
+    if isinstance(data, (dict, list)):
+        _mark_trusted(filepath)
 
 
 def fix_corrupted_location_name(name: str) -> str:
@@ -202,4 +283,72 @@ def setup_utf8_console():
                 sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
         except AttributeError:
             # Already wrapped or in a different environment
-            pass
\ No newline at end of file
+            pass
+
+if __name__ == "__main__":
+    # Microbenchmark: load a large synthetic area-style file through the old
+    # per-character sanitize loop versus the current fast paths.
+    import tempfile
+    import timeit
+
+    def _legacy_sanitize_text(text):
+        text = unicodedata.normalize('NFKD', text)
+        for old_char, new_char in CHARACTER_REPLACEMENTS.items():
+            text = text.replace(old_char, new_char)
+        cleaned = []
+        for char in text:
+            if ord(char) < 32 and char not in '\n\r\t':
+                continue
+            elif ord(char) > 126 and ord(char) < 160:
+                continue
+            else:
+                cleaned.append(char)
+        return unicodedata.normalize('NFC', ''.join(cleaned))
+
+    def _legacy_sanitize_dict(data):
+        if isinstance(data, dict):
+            return {k: _legacy_sanitize_dict(v) for k, v in data.items()}
+        elif isinstance(data, list):
+            return [_legacy_sanitize_dict(item) for item in data]
+        elif isinstance(data, str):
+            return _legacy_sanitize_text(data)
+        return data
+
+    def _legacy_load(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return _legacy_sanitize_dict(json.load(f))
+
+    def _fresh_load(path):
+        # Bypass the game state cache so only parsing and sanitizing are timed
+        return _load_and_sanitize(path)
+
+    description = ("The ranger's lantern flickers across moss-covered stones as the "
+                   "party descends into the ruined watchtower. ") * 6
+    area = {"areaId": "BM001", "locations": [
+        {"locationId": f"A{i:02d}", "name": f"Location {i}", "description": description,
+         "npcs": [{"name": f"NPC {j}", "description": description} for j in range(5)],
+         "connectivity": [f"A{(i + 1) % 40:02d}"]}
+        for i in range(40)
+    ]}
+    unicode_area = json.loads(json.dumps(area).replace("ranger's", "ranger’s"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ascii_path = os.path.join(tmp, "area_ascii.json")
+        unicode_path = os.path.join(tmp, "area_unicode.json")
+        dumped_path = os.path.join(tmp, "area_dumped.json")
+        with open(ascii_path, 'w', encoding='utf-8') as f:
+            json.dump(area, f, indent=2)
+        with open(unicode_path, 'w', encoding='utf-8') as f:
+            json.dump(unicode_area, f, indent=2, ensure_ascii=False)
+        safe_json_dump(unicode_area, dumped_path)
+
+        size_kb = os.path.getsize(unicode_path) / 1024
+        print(f"Synthetic area file: {size_kb:.0f} KB")
+        for label, path in [("ASCII file", ascii_path),
+                            ("Unicode file", unicode_path),
+                            ("safe_json_dump output", dumped_path)]:
+            assert _fresh_load(path) == _legacy_load(path)
+            legacy = min(timeit.repeat(lambda: _legacy_load(path), number=5, repeat=3)) / 5
+            current = min(timeit.repeat(lambda: _fresh_load(path), number=5, repeat=3)) / 5
+            print(f"{label:24s} legacy {legacy * 1000:8.2f} ms   "
+                  f"current {current * 1000:8.2f} ms   speedup {legacy / current:6.1f}x")
@@ -15,6 +15,7 @@ import re
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from debug_config import *
+from utils.event_bus import publish_state_change
 
 class CategoryFilter(logging.Filter):
     """Filter logs based on debug categories"""
@@ -266,6 +267,8 @@ class GameLogger:
             self.info(f"LOAD: {details.get('save_name', 'Game loaded')}", category="file_operations")
         else:
             self.info(f"{event_type.upper()}: {details}")
+        # Front-ends refresh their state panels on these
+        publish_state_change(event_type, details if isinstance(details, dict) else {"details": details})
 
 # Global logger instance
 game_logger = GameLogger()
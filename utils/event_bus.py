@@ -0,0 +1,188 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# EVENT_BUS.PY - TYPED GAME OUTPUT EVENTS
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Utility Layer - Engine to Front-End Messaging
+#
+# The engine used to print everything and the web front-end scraped stdout
+# line by line to work out what was DM narration and what was debug noise.
+# The engine now publishes typed events here; front-ends subscribe to the
+# types they show.
+#
+# EVENT TYPES:
+# - narration:        text the Dungeon Master says to the player
+# - narration_stream: streamed narration preview (event start / delta / end)
+# - status:           main status line and background job summary
+# - debug:            diagnostic text for the debug panel
+# - state_change:     game state changed (combat, location, plot, saves...)
+#
+# FRONT-ENDS:
+# - The console front-end is subscribed by default and prints narration the
+#   way the game always has ("Dungeon Master: ..." in colour)
+# - The web interface replaces it with its own subscriber
+#
+# Handlers run synchronously on the publishing thread and must be quick;
+# an exception in one handler never reaches the engine or other handlers.
+# publish_debug() returns immediately when nothing subscribes to debug, and
+# with ENABLE_DEBUG_EVENTS = False it is a no-op.
+# ============================================================================
+
+import itertools
+import sys
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+NARRATION = "narration"
+NARRATION_STREAM = "narration_stream"
+STATUS = "status"
+DEBUG = "debug"
+STATE_CHANGE = "state_change"
+
+EVENT_TYPES = (NARRATION, NARRATION_STREAM, STATUS, DEBUG, STATE_CHANGE)
+
+
+class GameEvent:
+    """One published event: type, content and optional extra fields"""
+
+    __slots__ = ("type", "content", "fields", "timestamp")
+
+    def __init__(self, event_type: str, content=None, **fields):
+        self.type = event_type
+        self.content = content
+        self.fields = fields
+        self.timestamp = datetime.now().isoformat()
+
+    def get(self, name: str, default=None):
+        return self.fields.get(name, default)
+
+    def to_dict(self) -> Dict:
+        data = {"type": self.type, "content": self.content, "timestamp": self.timestamp}
+        data.update(self.fields)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GameEvent":
+        """Rebuild an event from to_dict() output (e.g. received from a session worker)"""
+        fields = {k: v for k, v in data.items() if k not in ("type", "content", "timestamp")}
+        event = cls(data.get("type"), data.get("content"), **fields)
+        event.timestamp = data.get("timestamp", event.timestamp)
+        return event
+
+
+class EventBus:
+    """In-process publish/subscribe for typed game events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # event type -> {subscription id: handler}; replaced (never mutated) on change
+        self._handlers: Dict[str, Dict[int, Callable[[GameEvent], None]]] = {t: {} for t in EVENT_TYPES}
+
+    def subscribe(self, handler: Callable[[GameEvent], None], event_types: Optional[Iterable[str]] = None) -> int:
+        """Register handler for event_types (all types if None); returns a subscription id"""
+        subscription = next(self._ids)
+        with self._lock:
+            for event_type in (event_types or EVENT_TYPES):
+                handlers = dict(self._handlers.get(event_type, {}))
+                handlers[subscription] = handler
+                self._handlers[event_type] = handlers
+        return subscription
+
+    def unsubscribe(self, subscription: Optional[int]):
+        if subscription is None:
+            return
+        with self._lock:
+            for event_type, handlers in list(self._handlers.items()):
+                if subscription in handlers:
+                    handlers = dict(handlers)
+                    del handlers[subscription]
+                    self._handlers[event_type] = handlers
+
+    def has_subscribers(self, event_type: str) -> bool:
+        return bool(self._handlers.get(event_type))
+
+    def publish(self, event_type: str, content=None, **fields):
+        handlers = self._handlers.get(event_type)
+        if not handlers:
+            return
+        event = GameEvent(event_type, content, **fields)
+        for handler in handlers.values():
+            try:
+                handler(event)
+            except Exception as e:
+                try:
+                    sys.__stderr__.write(f"Event handler failed for {event_type}: {e}\n")
+                except Exception:
+                    pass
+
+
+event_bus = EventBus()
+
+
+def _debug_events_enabled() -> bool:
+    try:
+        import config
+        return getattr(config, "ENABLE_DEBUG_EVENTS", True)
+    except ImportError:
+        return True
+
+
+# ----------------------------------------------------------------------
+# Publishing helpers
+# ----------------------------------------------------------------------
+
+def publish_narration(text: str, color: Optional[str] = None):
+    """DM narration for the player (color is a console hint, e.g. "blue")"""
+    event_bus.publish(NARRATION, text, color=color)
+
+
+def publish_narration_stream(event: str, text: str = ""):
+    event_bus.publish(NARRATION_STREAM, text, event=event)
+
+
+def publish_status(message: Optional[str] = None, is_processing: bool = False, background_jobs: Optional[str] = None):
+    if background_jobs is not None:
+        event_bus.publish(STATUS, None, background_jobs=background_jobs)
+    else:
+        event_bus.publish(STATUS, message, is_processing=is_processing)
+
+
+def publish_debug(text: str, is_error: bool = False):
+    if event_bus.has_subscribers(DEBUG) and _debug_events_enabled():
+        event_bus.publish(DEBUG, text, is_error=is_error)
+
+
+def publish_state_change(kind: str, details: Optional[Dict] = None):
+    event_bus.publish(STATE_CHANGE, details or {}, kind=kind)
+
+
+# ----------------------------------------------------------------------
+# Console front-end
+# ----------------------------------------------------------------------
+
+def _console_narration(event: GameEvent):
+    color = event.get("color")
+    if color:
+        try:
+            from termcolor import colored
+            print(colored("Dungeon Master:", color), colored(event.content, color))
+            return
+        except ImportError:
+            pass
+    print(f"Dungeon Master: {event.content}")
+
+
+console_subscription = event_bus.subscribe(_console_narration, [NARRATION])
+
+
+def detach_console_frontend():
+    """Stop printing narration to stdout (a different front-end shows it)"""
+    global console_subscription
+    event_bus.unsubscribe(console_subscription)
+    console_subscription = None
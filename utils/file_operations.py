@@ -60,7 +60,9 @@ import os
 import shutil
 import time
 import logging
-from typing import Any, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 
 # Set up logging
@@ -71,6 +73,198 @@ class FileLockError(Exception):
     """Raised when unable to acquire file lock"""
     pass
 
+def clone_json_data(data: Any) -> Any:
+    """Deep copy a JSON-compatible structure (dicts, lists and scalars only).
+
+    Considerably faster than copy.deepcopy because it skips the memo table and
+    type dispatch that arbitrary objects need.
+    """
+    if isinstance(data, dict):
+        return {k: clone_json_data(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [clone_json_data(v) for v in data]
+    return data
+
+# ----------------------------------------------------------------------------
+# APPEND JOURNAL FOR GROWING JSON LISTS
+# ----------------------------------------------------------------------------
+# Conversation histories only ever grow between compression passes, so
+# rewriting the whole file each turn is wasted I/O. A list file may carry a
+# sidecar "<file>.journal.jsonl": a header line naming the snapshot it
+# extends, followed by one {"i": index, "item": ...} line per appended entry.
+# Readers going through this module replay the journal transparently. Any
+# full write of the snapshot is a compaction: it changes the snapshot's
+# signature (so a leftover journal is ignored) and removes the journal.
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+JOURNAL_COMPACT_ENTRIES = 200  # Compact into the snapshot after this many appends
+
+def journal_path(filepath: str) -> str:
+    """Return the append journal path for a JSON list file"""
+    return f"{filepath}{JOURNAL_SUFFIX}"
+
+def _stat_signature(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _file_signature(filepath: str) -> Optional[tuple]:
+    """Signature of a file plus its journal; None if the file is missing"""
+    base = _stat_signature(filepath)
+    if base is None:
+        return None
+    return base + (_stat_signature(journal_path(filepath)),)
+
+def _read_journal(filepath: str) -> list:
+    """Return journal entries that validly extend the current snapshot"""
+    path = journal_path(filepath)
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return []
+    
+    entries = []
+    with f:
+        try:
+            header = json.loads(f.readline())
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring journal with unreadable header: {path}")
+            return []
+        if tuple(header.get("snapshot", ())) != _stat_signature(filepath):
+            # Left over from before the last compaction
+            logger.warning(f"Ignoring stale journal: {path}")
+            return []
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn final line from an interrupted append
+                logger.warning(f"Ignoring incomplete journal entry in {path}")
+                break
+    return entries
+
+def _replay_journal(filepath: str, data: Any,
+                    transform: Optional[Callable[[Any], Any]] = None) -> Any:
+    if not isinstance(data, list) or not os.path.exists(journal_path(filepath)):
+        return data
+    for entry in _read_journal(filepath):
+        if entry.get("i") != len(data):
+            break
+        item = entry.get("item")
+        data.append(transform(item) if transform else item)
+    return data
+
+def discard_journal(filepath: str):
+    """Remove the append journal for filepath, if any (after a full rewrite)"""
+    path = journal_path(str(filepath))
+    if os.path.exists(path):
+        try:
+            os.unlink(path)
+        except OSError as e:
+            logger.error(f"Error removing journal {path}: {e}")
+    with _journal_lock:
+        _journal_states.pop(os.path.abspath(str(filepath)), None)
+
+# Per-file record of what safe_write_json_list last persisted
+_journal_states: Dict[str, Dict[str, Any]] = {}
+_journal_lock = threading.RLock()
+
+class GameStateCache:
+    """
+    In-process cache of parsed JSON game files.
+
+    Entries are keyed by absolute path plus a variant name (e.g. raw vs
+    sanitized) and validated against the file's mtime and size on every
+    lookup, so edits made outside this process are picked up. Writes made
+    through this module invalidate the entry directly. Callers always receive
+    a private copy, so mutating the result never corrupts the cache.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def _key(filepath: str, variant: str):
+        return (os.path.abspath(str(filepath)), variant)
+    
+    def load(self, filepath: str, loader: Callable[[str], Any], variant: str = "raw",
+             journal_transform: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Return parsed data for filepath, calling loader(filepath) on a miss.
+        
+        Raises FileNotFoundError if the file does not exist; loader exceptions
+        propagate unchanged and nothing is cached for that file. If the file
+        has an append journal (see safe_write_json_list), the journaled
+        entries are replayed onto the loaded list.
+        """
+        filepath = str(filepath)
+        signature = _file_signature(filepath)
+        if signature is None:
+            raise FileNotFoundError(filepath)
+        if not self.enabled:
+            return _replay_journal(filepath, loader(filepath), journal_transform)
+        
+        key = self._key(filepath, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return clone_json_data(entry[1])
+        
+        data = _replay_journal(filepath, loader(filepath), journal_transform)
+        with self._lock:
+            self.misses += 1
+            # Only cache dict/list documents; None means the loader gave up
+            if isinstance(data, (dict, list)):
+                self._entries[key] = (signature, clone_json_data(data))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return data
+    
+    def invalidate(self, filepath: Optional[str] = None):
+        """Drop cached entries for filepath (all variants), or everything if None"""
+        path = os.path.abspath(str(filepath)) if filepath is not None else None
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == path]:
+                    del self._entries[key]
+        # Every write through this module ends here, so derived indexes hear about it too
+        for listener in list(_write_listeners):
+            try:
+                listener(path)
+            except Exception as e:
+                logger.error(f"Write listener failed for {path}: {e}")
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current entry count"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+# Global cache shared by safe_read_json and encoding_utils.safe_json_load
+game_state_cache = GameStateCache()
+
+# Callbacks told the absolute path of every JSON file written through this
+# module (None when everything was invalidated)
+_write_listeners: List[Callable[[Optional[str]], None]] = []
+
+def add_write_listener(listener: Callable[[Optional[str]], None]):
+    """Register a callback for writes made through this module"""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
 class AtomicFileWriter:
     """Handles atomic file writing with automatic backups and locking"""
     
@@ -194,6 +388,8 @@ class AtomicFileWriter:
             if os.name == 'nt' and os.path.exists(filepath):
                 os.unlink(filepath)
             os.rename(temp_path, filepath)
+            discard_journal(filepath)
+            game_state_cache.invalidate(filepath)
             logger.info(f"Successfully wrote {filepath}")
             
             return True
@@ -243,15 +439,13 @@ class AtomicFileWriter:
                 self.acquire_lock(filepath)
                 lock_acquired = True
             
-            if not os.path.exists(filepath):
-                logger.warning(f"File not found: {filepath}")
-                return None
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.debug(f"Successfully read {filepath}")
-                return data
+            data = game_state_cache.load(filepath, _parse_json_file)
+            logger.debug(f"Successfully read {filepath}")
+            return data
                 
+        except FileNotFoundError:
+            logger.warning(f"File not found: {filepath}")
+            return None
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in {filepath}: {e}")
             return None
@@ -267,6 +461,10 @@ class AtomicFileWriter:
         for filepath in list(self.lock_files.keys()):
             self.release_lock(filepath)
 
+def _parse_json_file(filepath: str) -> Any:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 # Global instance for convenience
 atomic_writer = AtomicFileWriter()
 
@@ -280,6 +478,85 @@ def safe_read_json(filepath: str, acquire_lock: bool = False) -> Optional[Dict[s
     """Safely read JSON file"""
     return atomic_writer.read_json(filepath, acquire_lock)
 
+def safe_write_json_list(filepath: str, items: list,
+                         transform: Optional[Callable[[Any], Any]] = None,
+                         compact_after: int = JOURNAL_COMPACT_ENTRIES) -> bool:
+    """
+    Persist a growing JSON list, appending only new entries when possible.
+    
+    If items extends exactly what this function last persisted for filepath
+    (and nothing else has rewritten the file since), the new entries are
+    appended to the file's journal. Otherwise - first save in this process,
+    an edited or truncated list, an outside rewrite, or a journal longer than
+    compact_after - the whole list is written atomically as a new snapshot.
+    
+    Args:
+        filepath: Path to the JSON list file
+        items: The complete list as it should now be stored
+        transform: Optional function applied to each entry before writing
+        compact_after: Journal length that triggers a compaction
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    filepath = str(filepath)
+    key = os.path.abspath(filepath)
+    transform = transform or (lambda item: item)
+    
+    with _journal_lock:
+        state = _journal_states.get(key)
+        persisted_count = len(state["items"]) if state else 0
+        can_append = (
+            state is not None
+            and state["signature"] == _file_signature(filepath)
+            and len(items) >= persisted_count
+            and state["entries"] + len(items) - persisted_count <= compact_after
+            and items[:persisted_count] == state["items"]
+        )
+        
+        if can_append:
+            new_items = items[persisted_count:]
+            if not new_items:
+                return True
+            try:
+                path = journal_path(filepath)
+                lines = []
+                if not os.path.exists(path):
+                    header = {"snapshot": list(_stat_signature(filepath))}
+                    lines.append(json.dumps(header))
+                for offset, item in enumerate(new_items):
+                    entry = {"i": persisted_count + offset, "item": transform(item)}
+                    lines.append(json.dumps(entry, ensure_ascii=False))
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                    f.flush()
+                    try:
+                        os.fsync(f.fileno())
+                    except:
+                        pass
+            except Exception as e:
+                logger.error(f"Error appending to journal for {filepath}: {e}")
+                return False
+            state["items"].extend(clone_json_data(new_items))
+            state["entries"] += len(new_items)
+            state["signature"] = _file_signature(filepath)
+            game_state_cache.invalidate(filepath)
+            return True
+        
+        # Compaction: full atomic rewrite (this also removes the journal)
+        if not atomic_writer.write_json(filepath, [transform(item) for item in items]):
+            return False
+        _journal_states[key] = {
+            "items": clone_json_data(items),
+            "entries": 0,
+            "signature": _file_signature(filepath),
+        }
+        return True
+
+def invalidate_cached_json(filepath: Optional[str] = None):
+    """Forget cached parses of filepath (or all files) after an out-of-band write"""
+    game_state_cache.invalidate(filepath)
+
 def cleanup_locks():
     """Clean up any remaining lock files"""
     atomic_writer.cleanup_lock_files()
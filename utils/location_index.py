@@ -0,0 +1,317 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# LOCATION_INDEX.PY - LOCATION TO MODULE REVERSE INDEX
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Data Management Layer - World Lookup Index
+#
+# Maps every locationId in every module to the (module, areaId) that owns it,
+# so cross-module transition detection is a dictionary lookup instead of a
+# scan that parses every area file in the world.
+#
+# KEY RESPONSIBILITIES:
+# - Build the index once and persist it next to world_registry.json
+# - Re-parse only area files whose mtime/size changed since the last build
+# - Accept explicit updates from ModuleStitcher and ModuleBuilder
+# - Share a single instance per process
+#
+# CONSISTENCY MODEL:
+# Entries record the signature of the area file they came from. A lookup that
+# misses triggers a cheap directory/stat refresh before answering, so files
+# changed outside the stitcher/builder are still picked up.
+# ============================================================================
+
+"""
+Location ID -> (module, area ID) reverse index used by CampaignManager.
+
+Usage:
+    python -m utils.location_index            # benchmark on a synthetic world
+"""
+
+import glob
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils.encoding_utils import safe_json_load
+from utils.file_operations import safe_write_json
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name(__name__)
+
+LOCATION_INDEX_VERSION = 1
+
+# Directories under modules/ that never contain area files
+NON_MODULE_DIRS = {"campaign_archives", "campaign_summaries", "conversation_history",
+                   "encounters", "logs", "backups"}
+
+
+def _file_signature(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _is_area_candidate(filename: str) -> bool:
+    """Skip module metadata and plot files, as the old per-lookup scan did"""
+    return not (filename.endswith("_module.json") or
+                filename.endswith("_plot.json") or
+                filename.startswith("module_") or
+                filename.startswith("party_"))
+
+
+def _extract_location_ids(area_data) -> List[str]:
+    """Return location IDs from an area document (list or dict locations)"""
+    if not isinstance(area_data, dict) or "locations" not in area_data:
+        return []
+    locations = area_data["locations"]
+    if isinstance(locations, dict):
+        return list(locations.keys())
+    if isinstance(locations, list):
+        return [location["locationId"] for location in locations
+                if isinstance(location, dict) and location.get("locationId")]
+    return []
+
+
+class LocationIndex:
+    """Persistent locationId -> (module, areaId) index for all modules"""
+
+    def __init__(self, modules_dir: str = "modules", index_file: Optional[str] = None):
+        self.modules_dir = modules_dir
+        self.index_file = index_file or os.path.join(modules_dir, "location_index.json")
+        self._lock = threading.RLock()
+        # area file path -> {"module", "areaId", "signature", "locations"}
+        self._files: Dict[str, Dict] = {}
+        self._locations: Dict[str, Tuple[str, str]] = {}
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Discovery and (re)building
+    # ------------------------------------------------------------------
+
+    def _module_names(self) -> List[str]:
+        if not os.path.isdir(self.modules_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.modules_dir)
+            if not name.startswith('.') and name not in NON_MODULE_DIRS
+            and os.path.isdir(os.path.join(self.modules_dir, name))
+        )
+
+    def _area_files(self, module_name: str) -> List[str]:
+        module_dir = os.path.join(self.modules_dir, module_name)
+        files = []
+        # Check both legacy root directory and areas/ subdirectory
+        for pattern in (os.path.join(module_dir, "*.json"), os.path.join(module_dir, "areas", "*.json")):
+            for area_file in sorted(glob.glob(pattern)):
+                if _is_area_candidate(os.path.basename(area_file)):
+                    files.append(area_file)
+        return files
+
+    def _index_file_entry(self, module_name: str, area_file: str, signature: List[int]) -> Dict:
+        try:
+            area_data = safe_json_load(area_file)
+        except Exception as e:
+            warning(f"FILE_OP: Location index could not read {area_file}: {e}", category="module_loading")
+            area_data = None
+        area_id = area_data.get("areaId") if isinstance(area_data, dict) else None
+        if not area_id:
+            area_id = os.path.splitext(os.path.basename(area_file))[0]
+        return {
+            "module": module_name,
+            "areaId": area_id,
+            "signature": signature,
+            "locations": _extract_location_ids(area_data),
+        }
+
+    def _sync_module(self, module_name: str) -> bool:
+        """Bring entries for one module up to date. Returns True if anything changed."""
+        changed = False
+        seen = set()
+        for area_file in self._area_files(module_name):
+            signature = _file_signature(area_file)
+            if signature is None:
+                continue
+            seen.add(area_file)
+            entry = self._files.get(area_file)
+            if entry is None or entry["signature"] != signature or entry["module"] != module_name:
+                self._files[area_file] = self._index_file_entry(module_name, area_file, signature)
+                changed = True
+
+        stale = [path for path, entry in self._files.items()
+                 if entry["module"] == module_name and path not in seen]
+        for path in stale:
+            del self._files[path]
+            changed = True
+        return changed
+
+    def _rebuild_lookup(self):
+        """Recompute the locationId map; first module (sorted) wins on collisions"""
+        locations = {}
+        # Within a module, prefer real area files over their _BU copies
+        ordered = sorted(self._files.items(),
+                         key=lambda item: (item[1]["module"], item[0].endswith("_BU.json"), item[0]))
+        for _, entry in ordered:
+            for location_id in entry["locations"]:
+                locations.setdefault(location_id, (entry["module"], entry["areaId"]))
+        self._locations = locations
+
+    def _load_persisted(self):
+        data = safe_json_load(self.index_file) if os.path.exists(self.index_file) else None
+        if isinstance(data, dict) and data.get("version") == LOCATION_INDEX_VERSION:
+            self._files = data.get("files", {})
+        else:
+            self._files = {}
+
+    def _persist(self):
+        data = {"version": LOCATION_INDEX_VERSION, "files": self._files}
+        if not safe_write_json(self.index_file, data, create_backup=False):
+            warning(f"FILE_OP: Could not save location index to {self.index_file}", category="module_loading")
+
+    def refresh(self) -> bool:
+        """
+        Re-check every module's area files and update changed entries.
+        Returns True if the index changed.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_persisted()
+            modules = set(self._module_names())
+            changed = False
+            for module_name in modules:
+                changed |= self._sync_module(module_name)
+            removed = [path for path, entry in self._files.items() if entry["module"] not in modules]
+            for path in removed:
+                del self._files[path]
+                changed = True
+            if changed or not self._loaded:
+                self._rebuild_lookup()
+            if changed:
+                self._persist()
+                debug(f"STATE_CHANGE: Location index rebuilt with {len(self._locations)} locations", category="module_loading")
+            self._loaded = True
+            return changed
+
+    def update_module(self, module_name: str):
+        """Re-index a single module after its area files were written"""
+        with self._lock:
+            if not self._loaded:
+                self.refresh()
+                return
+            if self._sync_module(module_name):
+                self._rebuild_lookup()
+                self._persist()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def lookup(self, location_id: str) -> Optional[Tuple[str, str]]:
+        """Return (module_name, area_id) for location_id, or None if unknown"""
+        if not location_id:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self.refresh()
+            result = self._locations.get(location_id)
+            if result is None and self.refresh():
+                # Area files changed since the last build - retry once
+                result = self._locations.get(location_id)
+            return result
+
+    def get_module(self, location_id: str) -> Optional[str]:
+        """Return the module that owns location_id, or None"""
+        result = self.lookup(location_id)
+        return result[0] if result else None
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_location_index() -> LocationIndex:
+    """Return the process-wide location index"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = LocationIndex()
+        return _shared_index
+
+
+if __name__ == "__main__":
+    # Benchmark: legacy per-lookup scan vs the index on a synthetic world of
+    # 50 modules x 5 areas x 12 locations.
+    import json
+    import random
+    import tempfile
+    import time
+    from utils.file_operations import game_state_cache
+
+    # Measure real parsing cost rather than the in-process JSON cache
+    game_state_cache.enabled = False
+
+    def _legacy_get_module(modules_dir, location_id):
+        for module_name in os.listdir(modules_dir):
+            module_path = os.path.join(modules_dir, module_name)
+            if not os.path.isdir(module_path) or module_name.startswith('.'):
+                continue
+            for pattern in (f"{module_path}/*.json", f"{module_path}/areas/*.json"):
+                for area_file in glob.glob(pattern):
+                    if not _is_area_candidate(os.path.basename(area_file)):
+                        continue
+                    if location_id in _extract_location_ids(safe_json_load(area_file)):
+                        return module_name
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modules_dir = os.path.join(tmp, "modules")
+        all_ids = []
+        description = "A windswept ruin overlooking the valley. " * 20
+        for m in range(50):
+            areas_dir = os.path.join(modules_dir, f"Module_{m:02d}", "areas")
+            os.makedirs(areas_dir)
+            for a in range(5):
+                area_id = f"M{m:02d}A{a}"
+                locations = []
+                for l in range(12):
+                    location_id = f"M{m:02d}A{a}L{l:02d}"
+                    all_ids.append(location_id)
+                    locations.append({"locationId": location_id, "name": location_id,
+                                      "description": description, "connectivity": []})
+                with open(os.path.join(areas_dir, f"{area_id}.json"), "w", encoding="utf-8") as f:
+                    json.dump({"areaId": area_id, "areaName": area_id, "locations": locations}, f)
+
+        random.seed(7)
+        queries = [random.choice(all_ids) for _ in range(20)]
+
+        start = time.perf_counter()
+        legacy = [_legacy_get_module(modules_dir, q) for q in queries]
+        legacy_time = (time.perf_counter() - start) / len(queries)
+
+        index = LocationIndex(modules_dir)
+        start = time.perf_counter()
+        index.refresh()
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [index.get_module(q) for q in queries * 100]
+        lookup_time = (time.perf_counter() - start) / (len(queries) * 100)
+        assert indexed[:len(queries)] == legacy
+
+        reloaded = LocationIndex(modules_dir)
+        start = time.perf_counter()
+        reloaded.refresh()
+        warm_time = time.perf_counter() - start
+
+        print(f"Synthetic world: 50 modules, {len(all_ids)} locations")
+        print(f"Legacy scan per lookup:     {legacy_time * 1000:10.3f} ms")
+        print(f"Index cold build:           {build_time * 1000:10.3f} ms")
+        print(f"Index warm load (persisted):{warm_time * 1000:10.3f} ms")
+        print(f"Index lookup:               {lookup_time * 1000:10.5f} ms")
@@ -67,10 +67,11 @@ Examples:
 import json
 import os
 import sys
+import threading
 from collections import deque, defaultdict
 from typing import Dict, List, Tuple, Optional
 from utils.module_path_manager import ModulePathManager
-from utils.file_operations import safe_read_json
+from utils.file_operations import safe_read_json, safe_write_json, add_write_listener
 
 def write_debug(message: str):
     """Write debug message to debug.txt file"""
@@ -83,115 +84,226 @@ def write_debug(message: str):
         pass  # Silently fail if debug file can't be written
 
 
+# Persisted graph index: per-area location summaries keyed by area file
+# signature, so only areas whose files changed are re-parsed on rebuild
+LOCATION_GRAPH_INDEX_PATH = "modules/location_graph_index.json"
+WORLD_REGISTRY_PATH = "modules/world_registry.json"
+LOCATION_GRAPH_INDEX_VERSION = 1
+
+# Location fields the graph needs; everything else stays in the area files
+LOCATION_INDEX_FIELDS = ("locationId", "name", "connectivity", "areaConnectivity", "areaConnectivityId")
+
+
+def _file_signature(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def summarize_area(area_data: Dict) -> Dict:
+    """Reduce area data to the fields the location graph uses"""
+    return {
+        "areaName": area_data.get("areaName", "Unknown"),
+        "locations": [
+            {field: location[field] for field in LOCATION_INDEX_FIELDS if field in location}
+            for location in area_data.get("locations", [])
+        ],
+    }
+
+
 class LocationGraph:
     """Graph representation of all locations and their connections"""
     
-    def __init__(self):
+    def __init__(self, index_path: str = LOCATION_GRAPH_INDEX_PATH):
         self.nodes = {}  # location_id -> {area_id, location_name, data}
         self.edges = defaultdict(list)  # location_id -> [connected_location_ids]
-        self.area_data = {}  # area_id -> area_data
+        self.area_data = {}  # area_id -> {areaName, locations} summary (see summarize_area)
         self.id_to_name = {}  # location_id -> location_name
         self.name_to_id = {}  # location_name -> location_id
+        self.index_path = index_path
+        self._source_signatures = None  # Area file signatures the graph was built from
+        # Cheap validation between rebuilds (see refresh)
+        self._dirty = True
+        self._module_check = False
+        self._current_module = None
+        self._area_files = set()  # Absolute paths of the area files in the graph
+        self._directory_signatures = None  # Area directories and world registry, by mtime
+    
+    def _discover_area_files(self) -> List[Tuple[str, str, str]]:
+        """
+        List (module_name, area_id, area_file) for every area in load order:
+        the current module first, then the remaining registry modules sorted.
+        Later entries win when location IDs collide, as before.
+        """
+        # Get current module from party tracker for consistent path resolution
+        try:
+            party_tracker = safe_read_json("party_tracker.json")
+            current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
+            current_path_manager = ModulePathManager(current_module)
+            if not current_module:
+                current_module = current_path_manager.module_name
+        except:
+            current_path_manager = ModulePathManager()  # Fallback to reading from file
+            current_module = current_path_manager.module_name
+        self._current_module = current_module
         
-    def load_module_data(self):
-        """Load all area data and build the graph"""
-        print("DEBUG: [LocationGraph.load_module_data] Starting to load module data...")
-        # Load world registry to get all available modules
-        world_registry_path = "modules/world_registry.json"
-        world_registry = safe_read_json(world_registry_path)
-        
+        world_registry = safe_read_json(WORLD_REGISTRY_PATH)
         if not world_registry or 'modules' not in world_registry:
             write_debug("  [ERROR] Could not load world registry")
             # Fallback to current module only
-            # Get current module from party tracker for consistent path resolution
-            try:
-                party_tracker = safe_read_json("party_tracker.json")
-                current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-                path_manager = ModulePathManager(current_module)
-            except:
-                path_manager = ModulePathManager()  # Fallback to reading from file
-            area_ids = path_manager.get_area_ids()
+            area_ids = current_path_manager.get_area_ids()
             if not area_ids:
                 write_debug("  [WARNING] No area files found in module")
-                return
-            write_debug(f"Loading module areas... (discovered: {', '.join(area_ids)})")
-            for area_id in area_ids:
-                area_file = path_manager.get_area_path(area_id)
-                if os.path.exists(area_file):
-                    area_data = safe_read_json(area_file)
-                    if area_data:
-                        self.area_data[area_id] = area_data
-                        self._process_area_locations(area_id, area_data)
-                        write_debug(f"  [OK] Loaded {area_id}: {area_data.get('areaName', 'Unknown')}")
-        else:
-            # Load areas from ALL modules in the world registry
-            all_areas_by_module = {}
-            
-            # Get current module for priority loading
-            try:
-                party_tracker = safe_read_json("party_tracker.json")
-                current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-                current_path_manager = ModulePathManager(current_module)
-                if not current_module:
-                    current_module = current_path_manager.module_name
-            except:
-                current_path_manager = ModulePathManager()  # Fallback to reading from file
-                current_module = current_path_manager.module_name
-            
-            # Process all modules in world registry
-            for module_name in world_registry['modules']:
-                module_path_manager = ModulePathManager(module_name)
-                module_area_ids = module_path_manager.get_area_ids()
-                
-                if module_area_ids:
-                    all_areas_by_module[module_name] = module_area_ids
-            
-            # Create discovery string with module attribution
-            discovery_parts = []
-            for module_name, area_ids in sorted(all_areas_by_module.items()):
-                discovery_parts.append(f"{module_name}({','.join(sorted(area_ids))})")
-            
-            write_debug(f"Loading all module areas... (discovered: {'; '.join(discovery_parts)})")
-            
-            # Load current module areas first (for priority)
-            if current_module in all_areas_by_module:
-                for area_id in all_areas_by_module[current_module]:
-                    module_path_manager = ModulePathManager(current_module)
-                    area_file = module_path_manager.get_area_path(area_id)
-                    if os.path.exists(area_file):
-                        area_data = safe_read_json(area_file)
-                        if area_data:
-                            self.area_data[area_id] = area_data
-                            self._process_area_locations(area_id, area_data)
-                            write_debug(f"  [OK] Loaded {area_id}: {area_data.get('areaName', 'Unknown')} [{current_module}]")
-                        else:
-                            write_debug(f"  [ERROR] Failed to load {area_file}")
-                    else:
-                        write_debug(f"  [ERROR] File not found: {area_file}")
-            
-            # Load other module areas
-            for module_name, area_ids in sorted(all_areas_by_module.items()):
-                if module_name != current_module:
-                    for area_id in area_ids:
-                        module_path_manager = ModulePathManager(module_name)
-                        area_file = module_path_manager.get_area_path(area_id)
-                        if os.path.exists(area_file):
-                            area_data = safe_read_json(area_file)
-                            if area_data:
-                                self.area_data[area_id] = area_data
-                                self._process_area_locations(area_id, area_data)
-                                write_debug(f"  [OK] Loaded {area_id}: {area_data.get('areaName', 'Unknown')} [{module_name}]")
-                            else:
-                                write_debug(f"  [ERROR] Failed to load {area_file}")
-                        else:
-                            write_debug(f"  [ERROR] File not found: {area_file}")
+            return [(current_module, area_id, current_path_manager.get_area_path(area_id))
+                    for area_id in area_ids]
+        
+        # Load areas from ALL modules in the world registry
+        all_areas_by_module = {}
+        for module_name in world_registry['modules']:
+            module_area_ids = ModulePathManager(module_name).get_area_ids()
+            if module_area_ids:
+                all_areas_by_module[module_name] = module_area_ids
+        
+        ordered_modules = []
+        if current_module in all_areas_by_module:
+            ordered_modules.append(current_module)
+        ordered_modules.extend(name for name in sorted(all_areas_by_module) if name != current_module)
+        
+        discovered = []
+        for module_name in ordered_modules:
+            module_path_manager = ModulePathManager(module_name)
+            for area_id in all_areas_by_module[module_name]:
+                discovered.append((module_name, area_id, module_path_manager.get_area_path(area_id)))
+        return discovered
+    
+    def _load_index(self) -> Dict:
+        index = safe_read_json(self.index_path) if os.path.exists(self.index_path) else None
+        if not index or index.get("version") != LOCATION_GRAPH_INDEX_VERSION:
+            return {}
+        return index.get("areas", {})
+    
+    def _save_index(self, areas: Dict):
+        index = {"version": LOCATION_GRAPH_INDEX_VERSION, "areas": areas}
+        if not safe_write_json(self.index_path, index, create_backup=False):
+            write_debug(f"  [WARNING] Could not save location graph index to {self.index_path}")
+    
+    def load_module_data(self):
+        """
+        Build the graph from all module areas.
         
-        # Process external connections after all locations are loaded
-        self._process_external_connections()
+        Area summaries come from the on-disk index when the area file's
+        mtime/size still match; only new or changed area files are parsed,
+        and the index is rewritten when anything changed.
+        """
+        print("DEBUG: [LocationGraph.load_module_data] Starting to load module data...")
+        discovered = self._discover_area_files()
+        write_debug(f"Loading all module areas... (discovered: {', '.join(f'{m}/{a}' for m, a, _ in discovered)})")
+        
+        indexed_areas = self._load_index()
+        areas = {}
+        ordered = []
+        signatures = []
+        for module_name, area_id, area_file in discovered:
+            key = f"{module_name}/{area_id}"
+            signature = _file_signature(area_file)
+            if signature is None:
+                write_debug(f"  [ERROR] File not found: {area_file}")
+                continue
+            signatures.append((key, tuple(signature)))
+            
+            entry = indexed_areas.get(key)
+            if entry is None or entry.get("signature") != signature:
+                area_data = safe_read_json(area_file)
+                if not area_data:
+                    write_debug(f"  [ERROR] Failed to load {area_file}")
+                    continue
+                entry = {"signature": signature, "area": summarize_area(area_data)}
+                write_debug(f"  [OK] Indexed {area_id}: {entry['area']['areaName']} [{module_name}]")
+            areas[key] = entry
+            ordered.append((area_id, entry["area"]))
+        
+        if areas != indexed_areas:
+            self._save_index(areas)
+        
+        self._build(ordered)
+        self._source_signatures = signatures
+        self._area_files = {os.path.abspath(area_file) for _, _, area_file in discovered}
+        self._directory_signatures = self._directory_signature()
         
         write_debug(f"Graph built: {len(self.nodes)} locations, {sum(len(v) for v in self.edges.values())} connections")
         print(f"DEBUG: [LocationGraph.load_module_data] Load complete. Total nodes: {len(self.nodes)}, Total edges: {sum(len(v) for v in self.edges.values())}")
     
+    def _directory_signature(self) -> List:
+        """mtimes of the world registry and every area directory in the graph"""
+        paths = sorted({os.path.dirname(path) for path in self._area_files})
+        paths.append(os.path.abspath(WORLD_REGISTRY_PATH))
+        return [(path, _file_signature(path)) for path in paths]
+    
+    def note_write(self, path: Optional[str]):
+        """Write listener (utils.file_operations): flag writes that can change the graph"""
+        if path is None or path in self._area_files or path == os.path.abspath(WORLD_REGISTRY_PATH):
+            self._dirty = True
+        elif path == os.path.abspath("party_tracker.json"):
+            # Only a module change matters; checked on the next refresh
+            self._module_check = True
+        elif path.endswith(".json") and os.path.basename(os.path.dirname(path)) == "areas":
+            self._dirty = True  # A new area file
+    
+    def _needs_rebuild_check(self) -> bool:
+        """
+        Whether refresh() must compare area file signatures.
+        
+        Writes through utils.file_operations are reported by note_write, so
+        between them a lookup only stats the area directories and the world
+        registry: adding, removing or atomically replacing an area file
+        changes its directory's mtime.
+        """
+        if self._dirty or self._source_signatures is None:
+            return True
+        if self._module_check:
+            self._module_check = False
+            party_tracker = safe_read_json("party_tracker.json") or {}
+            module = party_tracker.get("module", "").replace(" ", "_")
+            if module and module != self._current_module:
+                return True
+        return self._directory_signature() != self._directory_signatures
+    
+    def refresh(self) -> bool:
+        """
+        Rebuild the graph only if area files were added, removed or changed
+        since it was last built. Returns True if a rebuild happened.
+        """
+        if not self._needs_rebuild_check():
+            return False
+        self._dirty = False
+        if self._source_signatures is not None:
+            current = []
+            for module_name, area_id, area_file in self._discover_area_files():
+                signature = _file_signature(area_file)
+                if signature is not None:
+                    current.append((f"{module_name}/{area_id}", tuple(signature)))
+            if current == self._source_signatures:
+                self._directory_signatures = self._directory_signature()
+                return False
+        self.load_module_data()
+        return True
+    
+    def _build(self, ordered_areas: List[Tuple[str, Dict]]):
+        """Rebuild nodes, edges and name maps from area summaries in load order"""
+        self.nodes = {}
+        self.edges = defaultdict(list)
+        self.area_data = {}
+        self.id_to_name = {}
+        self.name_to_id = {}
+        for area_id, area_summary in ordered_areas:
+            self.area_data[area_id] = area_summary
+            self._process_area_locations(area_id, area_summary)
+        
+        # Process external connections after all locations are loaded
+        self._process_external_connections()
+    
     def _process_area_locations(self, area_id: str, area_data: Dict):
         """Process all locations in an area and add them to the graph"""
         locations = area_data.get('locations', [])
@@ -417,6 +529,24 @@ class LocationGraph:
         return locations[0].get('locationId')
 
 
+_shared_graph = None
+_shared_graph_lock = threading.Lock()
+
+
+def get_location_graph() -> LocationGraph:
+    """
+    Return the process-wide LocationGraph, refreshed if any area file changed.
+    Use this instead of constructing LocationGraph() for validation lookups.
+    """
+    global _shared_graph
+    with _shared_graph_lock:
+        if _shared_graph is None:
+            _shared_graph = LocationGraph()
+            add_write_listener(_shared_graph.note_write)
+        _shared_graph.refresh()
+        return _shared_graph
+
+
 def format_path_result(success: bool, path: List[str], message: str, graph: LocationGraph) -> str:
     """Format the path finding result for display"""
     result = []
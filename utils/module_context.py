@@ -21,7 +21,7 @@ Maintains consistency across all module generation by tracking references and re
 
 import json
 import re
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -51,6 +51,9 @@ class ModuleContext:
     # Validation issues
     validation_issues: List[str] = field(default_factory=list)
     
+    # Area whose locations are being generated with this context (see assign_npc)
+    generating_area: str = ""
+    
     def add_area(self, area_id: str, area_name: str, area_type: str = ""):
         """Register a new area"""
         self.areas[area_id] = {
@@ -73,21 +76,8 @@ class ModuleContext:
         # 1. Get the "base name" by removing parenthetical descriptions (e.g., "Elder Myra")
         base_name = re.sub(r'\s*\([^)]*\)\s*', '', npc_name).strip()
         
-        # 2. Search for an existing NPC with the same base name
-        canonical_key = None
-        for key, data in self.npcs.items():
-            existing_base_name = re.sub(r'\s*\([^)]*\)\s*', '', data['name']).strip()
-            if base_name.lower() == existing_base_name.lower():
-                canonical_key = key
-                break
-        
-        # 3. Handle special cases like "Specter of Abbot Liran" vs "Spirit of Abbot Liran"
-        if not canonical_key:
-            if "abbot liran" in base_name.lower():
-                for key, data in self.npcs.items():
-                    if "abbot liran" in data['name'].lower():
-                        canonical_key = key
-                        break
+        # 2-3. Search for an existing NPC with the same base name (or a known alias)
+        canonical_key = self.find_npc_key(npc_name)
 
         # 4. If no match is found, create a NEW canonical entry
         if not canonical_key:
@@ -123,6 +113,27 @@ class ModuleContext:
             if canonical_name not in self.areas[area_id]["npcs"]:
                 self.areas[area_id]["npcs"].append(canonical_name)
     
+    def find_npc_key(self, npc_name: str) -> Optional[str]:
+        """Return the canonical key of an already registered NPC matching npc_name, if any"""
+        base_name = re.sub(r'\s*\([^)]*\)\s*', '', npc_name).strip()
+        for key, data in self.npcs.items():
+            existing_base_name = re.sub(r'\s*\([^)]*\)\s*', '', data['name']).strip()
+            if base_name.lower() == existing_base_name.lower():
+                return key
+        
+        # Handle special cases like "Specter of Abbot Liran" vs "Spirit of Abbot Liran"
+        if "abbot liran" in base_name.lower():
+            for key, data in self.npcs.items():
+                if "abbot liran" in data['name'].lower():
+                    return key
+        return None
+    
+    def assign_npc(self, npc_name: str, area_id: str):
+        """Assign a not yet placed NPC to the area whose locations must place it"""
+        npc_key = self.find_npc_key(npc_name)
+        if npc_key and not self.npcs[npc_key]["appears_in"]:
+            self.npcs[npc_key]["assigned_area"] = area_id
+    
     def add_location(self, location_id: str, location_name: str, area_id: str):
         """Register a location"""
         self.locations[location_id] = {
@@ -261,7 +272,13 @@ VALIDATION REQUIREMENTS - MUST FOLLOW:
         """Generate specific NPC placement requirements"""
         requirements = []
         for npc_key, npc_data in self.npcs.items():
-            if not npc_data["appears_in"]:
+            if npc_data["appears_in"]:
+                continue
+            assigned_area = npc_data.get("assigned_area")
+            if assigned_area and self.generating_area and assigned_area != self.generating_area:
+                area_name = self.areas.get(assigned_area, {}).get("name", assigned_area)
+                requirements.append(f"   - {npc_data['name']}: assigned to {area_name} ({assigned_area}) - do NOT place here")
+            else:
                 requirements.append(f"   - {npc_data['name']}: MUST be placed in a specific location")
         return "\n".join(requirements) if requirements else "   - All NPCs are properly placed"
     
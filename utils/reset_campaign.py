@@ -225,7 +225,9 @@ def clear_all_files():
     # Conversation files
     conversation_files = [
         "modules/conversation_history/conversation_history.json", "modules/conversation_history/chat_history.json",
-        "modules/conversation_history/combat_conversation_history.json", "player_conversation_history.json"
+        "modules/conversation_history/combat_conversation_history.json", "player_conversation_history.json",
+        "modules/conversation_history/conversation_history.json.journal.jsonl",
+        "modules/conversation_history/combat_conversation_history.json.journal.jsonl"
     ]
     
     for file in conversation_files:
@@ -27,6 +27,7 @@ import config
 from utils.encoding_utils import safe_json_load, safe_json_dump
 from utils.module_path_manager import ModulePathManager
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.event_bus import publish_narration
 from core.managers.status_manager import (
     status_manager, status_processing_ai, status_validating,
     status_loading, status_ready, status_saving
@@ -123,8 +124,9 @@ def initialize_game_files_from_bu():
 
 def run_startup_sequence():
     """Main entry point for startup wizard"""
-    print("\nDungeon Master: Welcome to your 5th Edition Adventure!")
-    print("Dungeon Master: Let's set up your character and choose your adventure...\n")
+    print()
+    publish_narration("Welcome to your 5th Edition Adventure!")
+    publish_narration("Let's set up your character and choose your adventure...\n")
     
     # Initialize game files from BU templates first
     initialize_game_files_from_bu()
@@ -139,7 +141,8 @@ def run_startup_sequence():
             print("Setup cancelled. Exiting...")
             return False
         
-        print(f"\nDungeon Master: Great choice! You've selected: {selected_module['display_name']}")
+        print()
+        publish_narration(f"Great choice! You've selected: {selected_module['display_name']}")
         
         # Step 2: Character selection/creation
         character_name = select_or_create_character(conversation, selected_module)
@@ -153,8 +156,9 @@ def run_startup_sequence():
         # Cleanup
         cleanup_startup_conversation()
         
-        print(f"\nDungeon Master: Setup complete! Welcome, {character_name}!")
-        print(f"Dungeon Master: Your adventure in {selected_module['display_name']} is about to begin...\n")
+        print()
+        publish_narration(f"Setup complete! Welcome, {character_name}!")
+        publish_narration(f"Your adventure in {selected_module['display_name']} is about to begin...\n")
         
         return True
         
@@ -301,7 +305,7 @@ Ask the player which module they'd like to play, and explain that they can just
     
     # Get AI response
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     return modules
 
@@ -314,8 +318,8 @@ def select_module(conversation):
         return None
     
     if len(modules) == 1:
-        print(f"Dungeon Master: Only one module available: {modules[0]['display_name']}")
-        print(f"Dungeon Master: {modules[0]['description']}")
+        publish_narration(f"Only one module available: {modules[0]['display_name']}")
+        publish_narration(modules[0]['description'])
         return modules[0]
     
     # For fresh installations, auto-select lowest level module
@@ -325,9 +329,9 @@ def select_module(conversation):
         # Find matching module in scanned modules
         for module in modules:
             if module['name'] == module_name:
-                print(f"Dungeon Master: Auto-selected starting module: {module['display_name']}")
-                print(f"Dungeon Master: {module['description']}")
-                print(f"Dungeon Master: Level Range: {lowest_level_module.get('levelRange', {})}")
+                publish_narration(f"Auto-selected starting module: {module['display_name']}")
+                publish_narration(module['description'])
+                publish_narration(f"Level Range: {lowest_level_module.get('levelRange', {})}")
                 return module
     
     # Present options to player
@@ -352,7 +356,7 @@ def select_module(conversation):
                 if 1 <= choice_num <= len(modules):
                     return modules[choice_num - 1]
                 else:
-                    print(f"Dungeon Master: Please choose a number between 1 and {len(modules)}")
+                    publish_narration(f"Please choose a number between 1 and {len(modules)}")
                     continue
             except ValueError:
                 pass
@@ -364,7 +368,7 @@ def select_module(conversation):
                     user_lower in module['name'].lower()):
                     return module
             
-            print("Dungeon Master: I didn't understand that. Please enter the number (1, 2, etc.) or name of the module.")
+            publish_narration("I didn't understand that. Please enter the number (1, 2, etc.) or name of the module.")
             
         except KeyboardInterrupt:
             return None
@@ -407,7 +411,7 @@ def present_character_options(conversation, characters, module_name):
         
         conversation.append({"role": "system", "content": ai_prompt})
         response = get_ai_response(conversation)
-        print(f"Dungeon Master: {response}")
+        publish_narration(response)
         return "create_new"
     
     # Build character list
@@ -432,7 +436,7 @@ Be helpful and explain that they can type the character number, character name,
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     return characters
 
@@ -468,10 +472,10 @@ def select_or_create_character(conversation, module):
                 choice_num = int(user_input)
                 if 1 <= choice_num <= len(characters):
                     selected_char = characters[choice_num - 1]
-                    print(f"Dungeon Master: Excellent! You've selected {selected_char['name']}!")
+                    publish_narration(f"Excellent! You've selected {selected_char['name']}!")
                     return selected_char['filename']
                 else:
-                    print(f"Dungeon Master: Please choose a number between 1 and {len(characters)}, or 'new' to create a character")
+                    publish_narration(f"Please choose a number between 1 and {len(characters)}, or 'new' to create a character")
                     continue
             except ValueError:
                 pass
@@ -480,10 +484,10 @@ def select_or_create_character(conversation, module):
             user_lower = user_input.lower()
             for char in characters:
                 if user_lower in char['name'].lower():
-                    print(f"Dungeon Master: Excellent! You've selected {char['name']}!")
+                    publish_narration(f"Excellent! You've selected {char['name']}!")
                     return char['filename']
             
-            print("Dungeon Master: I didn't understand that. Please enter the character number, character name, or 'new' to create a new character.")
+            publish_narration("I didn't understand that. Please enter the character number, character name, or 'new' to create a new character.")
             
         except KeyboardInterrupt:
             return None
@@ -492,7 +496,8 @@ def select_or_create_character(conversation, module):
 
 def create_new_character(conversation, module):
     """Main character creation flow using AI interview with error recovery"""
-    print("\nDungeon Master: Let's create your character!")
+    print()
+    publish_narration("Let's create your character!")
     
     max_retries = 3
     retry_count = 0
@@ -518,7 +523,7 @@ def create_new_character(conversation, module):
             success = save_character_to_module(character_data, module['name'])
             
             if success:
-                print(f"Dungeon Master: Character {character_name} created successfully!")
+                publish_narration(f"Character {character_name} created successfully!")
                 from updates.update_character_info import normalize_character_name
                 return normalize_character_name(character_name)
             else:
@@ -537,14 +542,14 @@ def create_new_character(conversation, module):
                 continue
             else:
                 print(f"Error: Character validation failed after {max_retries} attempts: {error}")
-                print("Dungeon Master: Let me try creating a simple backup character for you...")
+                publish_narration("Let me try creating a simple backup character for you...")
                 # Try fallback character creation
                 fallback_character = create_fallback_character(module)
                 if fallback_character:
                     character_name = fallback_character['name']
                     success = save_character_to_module(fallback_character, module['name'])
                     if success:
-                        print(f"Dungeon Master: I've created a basic {fallback_character['class']} character named {character_name} for you!")
+                        publish_narration(f"I've created a basic {fallback_character['class']} character named {character_name} for you!")
                         print("You can always create a new character later when the system is working better.")
                         from updates.update_character_info import normalize_character_name
                         return normalize_character_name(character_name)
@@ -799,7 +804,8 @@ CHARACTER SCHEMA:
             {"role": "user", "content": f"You are helping a new player create their first level 1 character for the {module['display_name']} adventure. Welcome them to the adventure, set an immersive tone that brings them into the game world, and begin the character creation process. Start by finding out what kind of hero they want to become. Use phrases like 'Let's get you started by finding out a little bit about you' to engage them in the process."}
         ]
         
-        print("\nDungeon Master: Starting character creation with AI assistant...")
+        print()
+        publish_narration("Starting character creation with AI assistant...")
         print("=" * 50)
         
         # Interactive conversation loop
@@ -807,7 +813,8 @@ CHARACTER SCHEMA:
             try:
                 # Get AI response
                 response = get_ai_response(creation_conversation)
-                print(f"\nDungeon Master: {response}")
+                print()
+                publish_narration(response)
                 
                 # Check if response looks like JSON (character finalization)
                 if response.strip().startswith('{') and response.strip().endswith('}'):
@@ -824,7 +831,8 @@ CHARACTER SCHEMA:
                         # Further sanitize the loaded character data
                         character_data = sanitize_character_data(character_data)
                         
-                        print("\nDungeon Master: Character data received! Finalizing your hero...")
+                        print()
+                        publish_narration("Character data received! Finalizing your hero...")
                         return character_data
                     except json.JSONDecodeError as e:
                         print(f"\nError: Invalid JSON received: {e}")
@@ -950,7 +958,7 @@ def get_character_name(conversation):
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     while True:
         try:
@@ -965,7 +973,7 @@ def get_character_name(conversation):
             if len(name) >= 2 and name.replace(" ", "").isalpha():
                 return name.title()
             else:
-                print("Dungeon Master: Please enter a valid name (letters only, at least 2 characters)")
+                publish_narration("Please enter a valid name (letters only, at least 2 characters)")
                 
         except KeyboardInterrupt:
             return None
@@ -995,7 +1003,7 @@ Ask them to choose by number (1-9) or race name. Be enthusiastic about whichever
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     while True:
         try:
@@ -1012,10 +1020,10 @@ Ask them to choose by number (1-9) or race name. Be enthusiastic about whichever
                 num = int(choice)
                 if num in races:
                     race_name = races[num][0]
-                    print(f"Dungeon Master: Great choice! You've chosen {race_name}.")
+                    publish_narration(f"Great choice! You've chosen {race_name}.")
                     return race_name
                 else:
-                    print(f"Dungeon Master: Please choose a number between 1 and {len(races)}")
+                    publish_narration(f"Please choose a number between 1 and {len(races)}")
                     continue
             except ValueError:
                 pass
@@ -1024,10 +1032,10 @@ Ask them to choose by number (1-9) or race name. Be enthusiastic about whichever
             choice_lower = choice.lower()
             for num, (race, desc) in races.items():
                 if choice_lower in race.lower():
-                    print(f"Dungeon Master: Great choice! You've chosen {race}.")
+                    publish_narration(f"Great choice! You've chosen {race}.")
                     return race
             
-            print("Dungeon Master: I didn't recognize that race. Please choose a number (1-9) or race name from the list.")
+            publish_narration("I didn't recognize that race. Please choose a number (1-9) or race name from the list.")
             
         except KeyboardInterrupt:
             return None
@@ -1061,7 +1069,7 @@ Ask them to choose by number (1-10) or class name. Mention that they can't go wr
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     while True:
         try:
@@ -1078,10 +1086,10 @@ Ask them to choose by number (1-10) or class name. Mention that they can't go wr
                 num = int(choice)
                 if num in classes:
                     class_name = classes[num][0]
-                    print(f"Dungeon Master: Excellent! You've chosen {class_name}.")
+                    publish_narration(f"Excellent! You've chosen {class_name}.")
                     return class_name
                 else:
-                    print(f"Dungeon Master: Please choose a number between 1 and {len(classes)}")
+                    publish_narration(f"Please choose a number between 1 and {len(classes)}")
                     continue
             except ValueError:
                 pass
@@ -1090,10 +1098,10 @@ Ask them to choose by number (1-10) or class name. Mention that they can't go wr
             choice_lower = choice.lower()
             for num, (cls, desc) in classes.items():
                 if choice_lower in cls.lower():
-                    print(f"Dungeon Master: Excellent! You've chosen {cls}.")
+                    publish_narration(f"Excellent! You've chosen {cls}.")
                     return cls
             
-            print("Dungeon Master: I didn't recognize that class. Please choose a number (1-10) or class name from the list.")
+            publish_narration("I didn't recognize that class. Please choose a number (1-10) or class name from the list.")
             
         except KeyboardInterrupt:
             return None
@@ -1124,7 +1132,7 @@ Ask them to choose by number (1-10) or background name. Emphasize that this help
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     while True:
         try:
@@ -1141,10 +1149,10 @@ Ask them to choose by number (1-10) or background name. Emphasize that this help
                 num = int(choice)
                 if num in backgrounds:
                     bg_name = backgrounds[num][0]
-                    print(f"Dungeon Master: Perfect! You've chosen {bg_name}.")
+                    publish_narration(f"Perfect! You've chosen {bg_name}.")
                     return bg_name
                 else:
-                    print(f"Dungeon Master: Please choose a number between 1 and {len(backgrounds)}")
+                    publish_narration(f"Please choose a number between 1 and {len(backgrounds)}")
                     continue
             except ValueError:
                 pass
@@ -1153,10 +1161,10 @@ Ask them to choose by number (1-10) or background name. Emphasize that this help
             choice_lower = choice.lower()
             for num, (bg, desc) in backgrounds.items():
                 if choice_lower in bg.lower() or choice_lower in bg.replace(" ", "").lower():
-                    print(f"Dungeon Master: Perfect! You've chosen {bg}.")
+                    publish_narration(f"Perfect! You've chosen {bg}.")
                     return bg
             
-            print("Dungeon Master: I didn't recognize that background. Please choose a number (1-10) or background name from the list.")
+            publish_narration("I didn't recognize that background. Please choose a number (1-10) or background name from the list.")
             
         except KeyboardInterrupt:
             return None
@@ -1187,7 +1195,7 @@ We'll go through each ability and you can tell me which score (from the remainin
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     remaining_scores = standard_array.copy()
     assigned_abilities = {}
@@ -1195,7 +1203,8 @@ We'll go through each ability and you can tell me which score (from the remainin
     for ability in abilities:
         while True:
             try:
-                print(f"\nRemaining scores: {', '.join(map(str, remaining_scores))}")
+                print()
+                publish_narration(f"Remaining scores: {', '.join(map(str, remaining_scores))}")
                 score_input = input(f"Assign score to {ability}: ").strip()
                 
                 # Skip empty inputs
@@ -1209,12 +1218,12 @@ We'll go through each ability and you can tell me which score (from the remainin
                     if score in remaining_scores:
                         assigned_abilities[ability.lower()] = score
                         remaining_scores.remove(score)
-                        print(f"Dungeon Master: {ability}: {score}")
+                        publish_narration(f"{ability}: {score}")
                         break
                     else:
-                        print(f"Dungeon Master: Score {score} not available. Choose from: {', '.join(map(str, remaining_scores))}")
+                        publish_narration(f"Score {score} not available. Choose from: {', '.join(map(str, remaining_scores))}")
                 except ValueError:
-                    print(f"Dungeon Master: Please enter a number from: {', '.join(map(str, remaining_scores))}")
+                    publish_narration(f"Please enter a number from: {', '.join(map(str, remaining_scores))}")
                     
             except KeyboardInterrupt:
                 return None
@@ -1235,7 +1244,7 @@ Ask for each one separately, and suggest they can keep it short and simple - jus
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     # Get each personality aspect
     aspects = [
@@ -1398,7 +1407,7 @@ Background: {character_data['background']}
   * Initiative: +{character_data['initiative']}
 """
     
-    print(char_summary)
+    publish_narration(char_summary)
     
     ai_prompt = f"""The player has finished creating their character. Show them this summary and ask if they're happy with their character or if they'd like to make any changes. Be encouraging about their choices!
 
@@ -1409,7 +1418,7 @@ Ask if they want to confirm this character and start their adventure, or if they
     
     conversation.append({"role": "system", "content": ai_prompt})
     response = get_ai_response(conversation)
-    print(f"Dungeon Master: {response}")
+    publish_narration(response)
     
     while True:
         try:
@@ -1422,13 +1431,13 @@ Ask if they want to confirm this character and start their adventure, or if they
             conversation.append({"role": "user", "content": user_input})
             
             if any(word in user_input for word in ['yes', 'confirm', 'looks good', 'perfect', 'great', 'ready']):
-                print("Dungeon Master: Excellent! Your character is ready for adventure!")
+                publish_narration("Excellent! Your character is ready for adventure!")
                 return True
             elif any(word in user_input for word in ['no', 'change', 'different', 'redo']):
-                print("Dungeon Master: Character creation would restart here - for now, let's proceed with this character.")
+                publish_narration("Character creation would restart here - for now, let's proceed with this character.")
                 return True  # For now, just proceed
             else:
-                print("Dungeon Master: Please say 'yes' to confirm your character or 'no' if you'd like to make changes.")
+                publish_narration("Please say 'yes' to confirm your character or 'no' if you'd like to make changes.")
                 
         except KeyboardInterrupt:
             return False
@@ -1790,8 +1799,8 @@ if __name__ == "__main__":
     if startup_required():
         success = run_startup_sequence()
         if success:
-            print("Dungeon Master: Startup wizard completed successfully!")
+            publish_narration("Startup wizard completed successfully!")
         else:
             print("Error: Startup wizard failed or was cancelled.")
     else:
-        print("Dungeon Master: Character and module already configured. No setup needed.")
\ No newline at end of file
+        publish_narration("Character and module already configured. No setup needed.")
\ No newline at end of file
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# USAGE_TRACKER.PY - UNIFIED TOKEN ACCOUNTING
+# ============================================================================
+#
+# ARCHITECTURE ROLE: Infrastructure Layer - API Usage Metrics
+#
+# Single tracker for every model call in the process. Replaces the former
+# overlapping token_tracker, gemini_usage_tracker and openai_usage_tracker
+# modules; their callers import track_response() from here.
+#
+# KEY RESPONSIBILITIES:
+# - Record real prompt / completion / cached token counts reported by Gemini
+#   (usage_metadata), flagging the rare responses that had to be estimated
+# - Attribute each call to a call site (main DM, validator, predictor, combat,
+#   summarizer, ...) - explicitly via call_site= or inferred from the caller
+# - Keep TPM/RPM sliding windows for the web UI
+# - Append one JSON line per call to a rolling metrics file
+#
+# ARCHITECTURAL INTEGRATION:
+# - gemini_wrapper records every completed response (blocking and streamed)
+# - Legacy track_response() calls are accepted and never double count
+# - python -m utils.usage_tracker prints a per-call-site report from the file
+# ============================================================================
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+# Rolling metrics file: rotated to <file>.1 once it exceeds the size limit
+USAGE_METRICS_FILE = "modules/logs/token_usage.jsonl"
+USAGE_METRICS_MAX_BYTES = 5 * 1024 * 1024
+
+# (module prefix, function names or None, call site) - first match wins
+CALL_SITE_RULES = [
+    ("main", {"call_dm_model", "stream_dm_model", "get_ai_response"}, "main_dm"),
+    ("main", {"validate_ai_response"}, "validator"),
+    ("main", {"generate_module_summary"}, "summarizer"),
+    ("main", {"generate_arrival_narration", "generate_seamless_transition_narration"}, "transition_narration"),
+    ("core.validation", None, "validator"),
+    ("utils.action_predictor", None, "predictor"),
+    ("core.managers.combat_manager", None, "combat"),
+    ("core.managers.initiative_tracker_ai", None, "combat"),
+    ("core.ai.cumulative_summary", None, "summarizer"),
+    ("core.ai.adv_summary", None, "summarizer"),
+    ("core.ai.chunked_compression", None, "summarizer"),
+    ("core.generators.location_summarizer", None, "summarizer"),
+    ("core.generators", None, "generator"),
+    ("updates", None, "updater"),
+    ("core.ai.action_handler", None, "action_handler"),
+]
+
+# Frames from these modules are skipped when inferring the caller
+_INTERNAL_MODULES = ("core.ai.gemini_wrapper", "utils.usage_tracker", "threading", "concurrent.futures")
+
+
+def _classify(module_name, function_name):
+    for prefix, functions, site in CALL_SITE_RULES:
+        if module_name == prefix or module_name.startswith(prefix + "."):
+            if functions is None or function_name in functions:
+                return site
+    return None
+
+
+def infer_call_site():
+    """Name the call site from the nearest calling frame outside the tracking code"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if not module_name.startswith(_INTERNAL_MODULES):
+            if module_name == "__main__":
+                module_name = "main"
+            return _classify(module_name, frame.f_code.co_name) or module_name.rsplit(".", 1)[-1] or "unknown"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _usage_counts(usage):
+    """Read token counts from a GeminiUsage, OpenAI usage or Gemini usage_metadata object"""
+    if usage is None:
+        return None
+    if hasattr(usage, "prompt_token_count"):
+        prompt = getattr(usage, "prompt_token_count", 0) or 0
+        completion = getattr(usage, "candidates_token_count", 0) or 0
+        cached = getattr(usage, "cached_content_token_count", 0) or 0
+        total = getattr(usage, "total_token_count", 0) or (prompt + completion)
+        return prompt, completion, cached, total, False
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    cached = getattr(usage, "cached_tokens", 0) or 0
+    total = getattr(usage, "total_tokens", 0) or (prompt + completion)
+    return prompt, completion, cached, total, bool(getattr(usage, "estimated", False))
+
+
+class UsageTracker:
+    """Process-wide token accounting with per-call-site totals"""
+
+    WINDOW_SECONDS = 60
+
+    def __init__(self, metrics_file=USAGE_METRICS_FILE, max_bytes=USAGE_METRICS_MAX_BYTES):
+        self.metrics_file = metrics_file
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.session_start = datetime.now()
+
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.total_cached_tokens = 0
+        self.total_tokens = 0
+        self.total_requests = 0
+        self.estimated_requests = 0
+        self.by_call_site = {}
+        self.last_by_call_site = {}
+
+        # Sliding window for TPM/RPM: (timestamp, total_tokens)
+        self.usage_history = deque()
+
+    def record(self, response, call_site=None, model=None, latency_ms=None):
+        """
+        Record usage from a model response. Safe to call twice for the same
+        response - only the first call counts.
+
+        Returns:
+            dict: the recorded entry, or None if the response had no usage
+        """
+        if response is None or getattr(response, "usage_tracked", False):
+            return None
+        if hasattr(response, "usage_metadata") and getattr(response, "usage_metadata", None) is not None:
+            counts = _usage_counts(response.usage_metadata)
+        else:
+            counts = _usage_counts(getattr(response, "usage", None))
+        if counts is None:
+            return None
+        prompt, completion, cached, total, estimated = counts
+
+        try:
+            response.usage_tracked = True
+        except AttributeError:
+            pass
+
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "call_site": call_site or infer_call_site(),
+            "model": model or getattr(response, "model", ""),
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "cached_tokens": cached,
+            "total_tokens": total,
+            "estimated": estimated,
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+        }
+
+        with self.lock:
+            self.total_prompt_tokens += prompt
+            self.total_completion_tokens += completion
+            self.total_cached_tokens += cached
+            self.total_tokens += total
+            self.total_requests += 1
+            self.estimated_requests += estimated
+
+            site = self.by_call_site.setdefault(entry["call_site"], _empty_site_totals())
+            _add_to_site(site, entry)
+            self.last_by_call_site[entry["call_site"]] = entry
+
+            now = datetime.now()
+            self.usage_history.append((now, total))
+            self._clean_history(now)
+
+            self._append_metrics(entry)
+        return entry
+
+    def _clean_history(self, now):
+        cutoff = now - timedelta(seconds=self.WINDOW_SECONDS)
+        while self.usage_history and self.usage_history[0][0] < cutoff:
+            self.usage_history.popleft()
+
+    def _append_metrics(self, entry):
+        # Caller holds the lock
+        if not self.metrics_file:
+            return
+        try:
+            directory = os.path.dirname(self.metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.metrics_file) and os.path.getsize(self.metrics_file) > self.max_bytes:
+                os.replace(self.metrics_file, self.metrics_file + ".1")
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            # Metrics must never interrupt gameplay
+            pass
+
+    def get_current_stats(self):
+        """Current totals plus TPM/RPM over the last minute"""
+        with self.lock:
+            self._clean_history(datetime.now())
+            return {
+                "tpm": sum(tokens for _, tokens in self.usage_history),
+                "rpm": len(self.usage_history),
+                "total_tokens": self.total_tokens,
+                "total_prompt_tokens": self.total_prompt_tokens,
+                "total_completion_tokens": self.total_completion_tokens,
+                "total_cached_tokens": self.total_cached_tokens,
+                "total_requests": self.total_requests,
+                "estimated_requests": self.estimated_requests,
+                "session_minutes": int((datetime.now() - self.session_start).total_seconds() / 60),
+            }
+
+    def get_call_site_stats(self):
+        """Per-call-site totals for this process"""
+        with self.lock:
+            return {site: dict(totals) for site, totals in self.by_call_site.items()}
+
+    def last_entry(self, call_site):
+        """Most recent entry recorded for a call site, or None"""
+        with self.lock:
+            return self.last_by_call_site.get(call_site)
+
+    def get_display_string(self):
+        stats = self.get_current_stats()
+        return f"TPM: {stats['tpm']:,} | RPM: {stats['rpm']} | Total: {stats['total_tokens']:,} tokens"
+
+
+def _empty_site_totals():
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "total_tokens": 0, "estimated_requests": 0, "latency_ms": 0.0}
+
+
+def _add_to_site(site, entry):
+    site["requests"] += 1
+    site["prompt_tokens"] += entry["prompt_tokens"]
+    site["completion_tokens"] += entry["completion_tokens"]
+    site["cached_tokens"] += entry["cached_tokens"]
+    site["total_tokens"] += entry["total_tokens"]
+    site["estimated_requests"] += bool(entry.get("estimated"))
+    site["latency_ms"] += entry.get("latency_ms") or 0.0
+
+
+# Global tracker instance
+_global_tracker = None
+_global_tracker_lock = threading.Lock()
+
+
+def get_global_tracker():
+    """Get or create the global usage tracker"""
+    global _global_tracker
+    with _global_tracker_lock:
+        if _global_tracker is None:
+            _global_tracker = UsageTracker()
+        return _global_tracker
+
+
+def record_usage(response, call_site=None, model=None, latency_ms=None):
+    """Record a response's usage (safe - never throws)"""
+    try:
+        return get_global_tracker().record(response, call_site, model, latency_ms)
+    except Exception:
+        return None
+
+
+def track_response(response, call_site=None):
+    """Legacy entry point used throughout the codebase (safe - never throws)"""
+    return record_usage(response, call_site) is not None or getattr(response, "usage_tracked", False)
+
+
+def get_usage_stats():
+    """Get current usage statistics (safe - always returns valid data)"""
+    try:
+        return get_global_tracker().get_current_stats()
+    except Exception:
+        return {
+            "tpm": 0,
+            "rpm": 0,
+            "total_tokens": 0,
+            "total_prompt_tokens": 0,
+            "total_completion_tokens": 0,
+            "total_cached_tokens": 0,
+            "total_requests": 0,
+            "estimated_requests": 0,
+            "session_minutes": 0,
+        }
+
+
+def summarize_metrics_file(metrics_file=USAGE_METRICS_FILE, since=None):
+    """Aggregate the rolling metrics file (and its rotated copy) per call site"""
+    totals = {}
+    for path in (metrics_file + ".1", metrics_file):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since and entry.get("timestamp", "") < since:
+                    continue
+                site = totals.setdefault(entry.get("call_site", "unknown"), _empty_site_totals())
+                _add_to_site(site, entry)
+    return totals
+
+
+if __name__ == "__main__":
+    since = sys.argv[1] if len(sys.argv) > 1 else None
+    totals = summarize_metrics_file(since=since)
+    if not totals:
+        print(f"No usage recorded in {USAGE_METRICS_FILE}")
+        sys.exit(0)
+    grand_total = sum(site["total_tokens"] for site in totals.values()) or 1
+    print(f"{'call site':<22}{'calls':>7}{'prompt':>12}{'completion':>12}{'cached':>10}{'share':>8}{'avg ms':>9}")
+    for name, site in sorted(totals.items(), key=lambda item: -item[1]["total_tokens"]):
+        average_latency = site["latency_ms"] / site["requests"] if site["requests"] else 0
+        print(f"{name:<22}{site['requests']:>7}{site['prompt_tokens']:>12,}{site['completion_tokens']:>12,}"
+              f"{site['cached_tokens']:>10,}{site['total_tokens'] / grand_total:>8.1%}{average_latency:>9.0f}")
@@ -0,0 +1,438 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# GAME_SESSIONS.PY - MULTI-SESSION WEB HOSTING
+# ============================================================================
+#
+# ARCHITECTURE ROLE: User Interface Layer - Session-Scoped Game Instances
+#
+# With ENABLE_MULTI_SESSION_WEB one server process hosts many tables. Each
+# browser session (an id the page keeps in localStorage) gets a GameSession:
+# - STATE ROOT: WEB_SESSIONS_DIR/<session id>, seeded from the installed
+#   modules (without their saves); read-only data (prompts/, schemas/,
+#   SRD/, icons/) is linked, not copied. data/ is copied because save games
+#   include and restore it. Saves, characters, portraits and logs stay
+#   inside the root
+# - ENGINE: a web/session_worker.py process with the state root as working
+#   directory. The engine resolves all game state relative to the working
+#   directory and keeps process-wide singletons (stdin/stdout, caches,
+#   main.py's conversation state), so a process per table is what isolates
+#   them - including each table's ModulePathManager
+# - QUEUES: its own OutputDispatcher and WebFrontend, emitting only to the
+#   session's Socket.IO room
+#
+# LLM SCHEDULER:
+# Workers ask the server for a slot before every model call; all sessions
+# share core.ai.llm_scheduler's LLM_MAX_CONCURRENT_CALLS slots. Slots held
+# by a worker that dies are returned.
+#
+# LIFECYCLE:
+# - start_game starts the worker (at most WEB_MAX_SESSIONS at once)
+# - a session without connected clients for WEB_SESSION_IDLE_TIMEOUT seconds
+#   is stopped; its state root stays, so the player resumes where they left
+# - the state root is kept between server restarts
+#
+# Under eventlet the reader threads and pipes are green, so a session costs
+# the server no OS thread.
+# ============================================================================
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set
+
+from core.ai.llm_scheduler import get_llm_scheduler
+from utils.event_bus import GameEvent, DEBUG
+from utils.enhanced_logger import debug, info, warning, error
+from web.output_dispatcher import OutputDispatcher, WebFrontend
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+# Read-only game data, shared by every session
+SHARED_ENTRIES = ("prompts", "schemas", "SRD", "icons")
+# Game data that save games restore; each session writes its own copy
+COPIED_ENTRIES = ("data",)
+# Runtime folders under modules/ that a new session must not inherit
+RUNTIME_MODULE_DIRS = ("logs", "conversation_history", "campaign_archives", "campaign_summaries",
+                       "backups", "encounters", "__pycache__")
+# Runtime folders inside each modules/<module>/ (the server's own saves and object store)
+RUNTIME_MODULE_SUBDIRS = ("saved_games",)
+STATE_DIRS = ("modules/conversation_history", "modules/campaign_archives", "modules/campaign_summaries",
+              "modules/backups", "modules/logs", "modules/encounters", "save_games", "characters",
+              "combat_logs", "debug", "portraits")
+
+COMMAND_TIMEOUT = 30
+STOP_TIMEOUT = 10
+REAP_INTERVAL = 60
+
+
+def _config_value(name: str, default):
+    try:
+        import config
+        return getattr(config, name, default)
+    except ImportError:
+        return default
+
+
+def multi_session_enabled() -> bool:
+    return bool(_config_value("ENABLE_MULTI_SESSION_WEB", False))
+
+
+def valid_session_id(session_id) -> bool:
+    return isinstance(session_id, str) and bool(SESSION_ID_PATTERN.match(session_id))
+
+
+def _copy_entries(root: str):
+    for entry in COPIED_ENTRIES:
+        source = os.path.join(ROOT_DIR, entry)
+        target = os.path.join(root, entry)
+        if os.path.islink(target):
+            # Linked by an earlier version; a restore would write into the install
+            os.unlink(target)
+        if os.path.exists(source) and not os.path.exists(target):
+            shutil.copytree(source, target)
+
+
+def seed_state_root(root: str):
+    """Create a session's state root from the installed modules (no-op if already seeded)"""
+    if os.path.isdir(os.path.join(root, "modules")):
+        _copy_entries(root)
+        return
+    os.makedirs(root, exist_ok=True)
+    _copy_entries(root)
+    for entry in SHARED_ENTRIES:
+        source = os.path.join(ROOT_DIR, entry)
+        target = os.path.join(root, entry)
+        if not os.path.exists(source) or os.path.lexists(target):
+            continue
+        try:
+            os.symlink(source, target, target_is_directory=True)
+        except OSError:
+            # No symlink permission (e.g. Windows without developer mode)
+            shutil.copytree(source, target)
+    modules_source = os.path.join(ROOT_DIR, "modules")
+    staging = os.path.join(root, "modules.seeding")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    def skip_runtime(directory, names):
+        directory = os.path.abspath(directory)
+        if directory == os.path.abspath(modules_source):
+            return [name for name in names if name in RUNTIME_MODULE_DIRS]
+        if os.path.dirname(directory) == os.path.abspath(modules_source):
+            return [name for name in names if name in RUNTIME_MODULE_SUBDIRS or name == "__pycache__"]
+        return [name for name in names if name == "__pycache__"]
+
+    shutil.copytree(modules_source, staging, ignore=skip_runtime)
+    os.replace(staging, os.path.join(root, "modules"))
+    for directory in STATE_DIRS:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+    info(f"FILE_OP: Seeded session state root {root}", category="web_interface")
+
+
+class SessionError(Exception):
+    """A session request could not be served (worker not running, limit reached, timeout)"""
+
+
+class GameSession:
+    """One table: state root, worker process, output queues and Socket.IO room"""
+
+    def __init__(self, session_id: str, root: str, emit: Callable, scheduler):
+        self.id = session_id
+        self.root = root
+        self.room = f"session:{session_id}"
+        room_emit = lambda event, payload: emit(event, payload, to=self.room)
+        self.dispatcher = OutputDispatcher(room_emit)
+        self.frontend = WebFrontend(room_emit, self.dispatcher)
+        self.game_output_queue = self.dispatcher.game
+        self._scheduler = scheduler
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._replies: Dict[int, list] = {}
+        self._next_id = 0
+        self._slots_held = 0
+        self.clients: Set[str] = set()
+        self.last_seen = time.time()
+
+    # ------------------------------------------------------------------
+    # Worker process
+    # ------------------------------------------------------------------
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                raise SessionError("Game is already running")
+        seed_state_root(self.root)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT_DIR, env.get("PYTHONPATH")) if p)
+        env["PYTHONUNBUFFERED"] = "1"
+        env["PYTHONIOENCODING"] = "utf-8"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "web.session_worker"], cwd=self.root, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        with self._lock:
+            self._process = process
+        self.dispatcher.start()
+        threading.Thread(target=self._read_frames, args=(process,), daemon=True,
+                         name=f"session_{self.id[:8]}_frames").start()
+        threading.Thread(target=self._read_errors, args=(process,), daemon=True,
+                         name=f"session_{self.id[:8]}_stderr").start()
+        info(f"STATE_CHANGE: Started game session {self.id} (pid {process.pid})", category="web_interface")
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """Ask the worker to finish (pending autosaves included) and exit; kill it if it does not"""
+        with self._lock:
+            process = self._process
+        if process is None or process.poll() is not None:
+            return
+        self._send({"type": "shutdown"})
+        deadline = time.time() + timeout
+        while process.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+        if process.poll() is None:
+            warning(f"Session {self.id} worker did not exit, killing it", category="web_interface")
+            process.kill()
+        info(f"STATE_CHANGE: Stopped game session {self.id}", category="web_interface")
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def reset(self):
+        """Stop the game and delete the session's state (next start begins a new campaign)"""
+        self.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Server -> worker
+    # ------------------------------------------------------------------
+
+    def _send(self, frame: Dict) -> bool:
+        with self._lock:
+            process = self._process
+        if process is None or process.poll() is not None:
+            return False
+        data = (json.dumps(frame) + "\n").encode("utf-8")
+        with self._write_lock:
+            try:
+                process.stdin.write(data)
+                process.stdin.flush()
+                return True
+            except (BrokenPipeError, OSError, ValueError):
+                return False
+
+    def send_input(self, text: str) -> bool:
+        self.last_seen = time.time()
+        return self._send({"type": "input", "text": text})
+
+    def command(self, name: str, args: Dict, timeout: float = COMMAND_TIMEOUT):
+        """Run a worker command and wait for its result"""
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            waiter = self._replies[request_id] = [threading.Event(), None, None]
+        try:
+            if not self._send({"type": "command", "id": request_id, "name": name, "args": args}):
+                raise SessionError("Game is not running")
+            if not waiter[0].wait(timeout):
+                raise SessionError(f"Session did not answer {name} in {timeout}s")
+        finally:
+            with self._lock:
+                self._replies.pop(request_id, None)
+        if waiter[2] is not None:
+            raise SessionError(waiter[2])
+        return waiter[1]
+
+    def query(self, name: str, data: Optional[Dict] = None):
+        """(event, payload) reply to a panel query, answered inside the session"""
+        event, payload = self.command("query", {"query": name, "data": data or {}})
+        return event, payload
+
+    def save_action(self, action: str, parameters: Dict, cloud: bool = False):
+        """Run a save/load action inside the session (through Google Drive when cloud is set)"""
+        result = self.command("save_action", {"action": action, "parameters": parameters or {}, "cloud": cloud})
+        return [tuple(reply) for reply in result["replies"]], result["restart"]
+
+    def set_model(self, use_gpt5: bool) -> bool:
+        """Switch this session's engine between model families; returns the new setting"""
+        return self.command("set_model", {"use_gpt5": use_gpt5})
+
+    # ------------------------------------------------------------------
+    # Worker -> server
+    # ------------------------------------------------------------------
+
+    def _read_frames(self, process: subprocess.Popen):
+        for raw in iter(process.stdout.readline, b""):
+            try:
+                frame = json.loads(raw.decode("utf-8", errors="replace"))
+            except ValueError:
+                continue
+            try:
+                self._handle_frame(frame, process)
+            except Exception as e:
+                error(f"Session {self.id} frame handling failed", exception=e, category="web_interface")
+        process.wait()
+        self._worker_ended(process)
+
+    def _read_errors(self, process: subprocess.Popen):
+        # Output the worker could not route through its event bus (start-up failures, crashes)
+        for raw in iter(process.stderr.readline, b""):
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            if line.strip():
+                self.frontend.handle(GameEvent(DEBUG, line, is_error=True))
+
+    def _handle_frame(self, frame: Dict, process: subprocess.Popen):
+        kind = frame.get("type")
+        if kind == "event":
+            self.frontend.handle(GameEvent.from_dict(frame.get("event", {})))
+        elif kind == "slot_acquire":
+            threading.Thread(target=self._grant_slot, args=(frame.get("id"), process), daemon=True).start()
+        elif kind == "slot_release":
+            with self._lock:
+                if self._slots_held <= 0:
+                    return
+                self._slots_held -= 1
+            self._scheduler.release()
+        elif kind == "reply":
+            with self._lock:
+                waiter = self._replies.get(frame.get("id"))
+            if waiter is not None:
+                waiter[1], waiter[2] = frame.get("result"), frame.get("error")
+                waiter[0].set()
+        elif kind == "exit" and frame.get("error"):
+            self.game_output_queue.put({
+                'type': 'error',
+                'content': frame["error"],
+                'timestamp': datetime.now().isoformat()
+            })
+
+    def _grant_slot(self, request_id, process: subprocess.Popen):
+        self._scheduler.acquire()
+        with self._lock:
+            current = self._process is process and process.poll() is None
+            if current:
+                self._slots_held += 1
+        if not current or not self._send({"type": "slot_granted", "id": request_id}):
+            if current:
+                with self._lock:
+                    self._slots_held -= 1
+            self._scheduler.release()
+
+    def _worker_ended(self, process: subprocess.Popen):
+        with self._lock:
+            if self._process is not process:
+                return
+            held, self._slots_held = self._slots_held, 0
+            waiters = list(self._replies.values())
+        for _ in range(held):
+            self._scheduler.release()
+        for waiter in waiters:
+            waiter[2] = "Game session ended"
+            waiter[0].set()
+        debug(f"STATE_CHANGE: Session {self.id} worker exited with {process.returncode} "
+              f"(returned {held} LLM slots)", category="web_interface")
+
+
+class SessionManager:
+    """All game sessions of this server, keyed by browser session id"""
+
+    def __init__(self, emit: Callable):
+        self._emit = emit
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, GameSession] = {}
+        self._clients: Dict[str, GameSession] = {}
+        self._starting = set()  # Ids of sessions holding a slot while their worker starts
+        self._reaper = None
+        self.base_dir = os.path.join(ROOT_DIR, _config_value("WEB_SESSIONS_DIR", "sessions"))
+
+    def attach(self, client_id: str, session_id: str) -> GameSession:
+        """Bind a Socket.IO client to its game session (created on first use)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = GameSession(session_id, os.path.join(self.base_dir, session_id),
+                                      self._emit, get_llm_scheduler())
+                self._sessions[session_id] = session
+            session.clients.add(client_id)
+            session.last_seen = time.time()
+            self._clients[client_id] = session
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_idle, daemon=True, name="session_reaper")
+                self._reaper.start()
+        return session
+
+    def detach(self, client_id: str):
+        with self._lock:
+            session = self._clients.pop(client_id, None)
+            if session is not None:
+                session.clients.discard(client_id)
+                session.last_seen = time.time()
+
+    def root_for(self, session_id) -> Optional[str]:
+        """State root of a session id sent by the page (None if the id is not valid)"""
+        if not valid_session_id(session_id):
+            return None
+        return os.path.join(self.base_dir, session_id)
+
+    def for_client(self, client_id: str) -> Optional[GameSession]:
+        with self._lock:
+            return self._clients.get(client_id)
+
+    def start(self, session: GameSession):
+        """Start a session's game, within WEB_MAX_SESSIONS running sessions"""
+        limit = _config_value("WEB_MAX_SESSIONS", 8)
+        with self._lock:
+            if session.id in self._starting:
+                raise SessionError("Game is already starting")
+            running = sum(1 for s in self._sessions.values()
+                          if s is not session and (s.id in self._starting or s.is_running()))
+            if running >= limit:
+                raise SessionError(f"The server is full ({limit} games running). Please try again later.")
+            # Reserve the slot: the worker is spawned outside the lock
+            self._starting.add(session.id)
+        try:
+            session.start()
+        finally:
+            # A started session is counted by is_running() from here on
+            with self._lock:
+                self._starting.discard(session.id)
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(REAP_INTERVAL)
+            timeout = _config_value("WEB_SESSION_IDLE_TIMEOUT", 1800)
+            with self._lock:
+                idle = [s for s in self._sessions.values()
+                        if not s.clients and time.time() - s.last_seen > timeout]
+            for session in idle:
+                if session.is_running():
+                    info(f"STATE_CHANGE: Stopping idle session {session.id}", category="web_interface")
+                    session.stop()
+                with self._lock:
+                    if not session.clients:
+                        self._sessions.pop(session.id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "running": sum(1 for s in sessions if s.is_running()),
+            "llm": get_llm_scheduler().stats(),
+        }
@@ -0,0 +1,280 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# OUTPUT_DISPATCHER.PY - EVENT-DRIVEN WEB OUTPUT
+# ============================================================================
+#
+# ARCHITECTURE ROLE: User Interface Layer - Socket.IO Output Delivery
+#
+# Game and debug output used to be drained by a thread that woke every
+# 100 ms, checked the queues with empty()/get() and re-imported the usage
+# tracker every two seconds. The dispatcher here sleeps on a condition
+# variable and wakes as soon as something is queued.
+#
+# CHANNELS:
+# - game:  narration, info and errors. Never dropped; one 'game_output'
+#          frame per message, in order
+# - debug: console lines. Bounded - when the browser cannot keep up the
+#          oldest lines are dropped and a single notice says how many.
+#          Lines queued together go out as one 'debug_output_batch' frame
+#
+# TOKEN USAGE:
+# 'token_update' is checked every TOKEN_UPDATE_INTERVAL seconds while the
+# dispatcher is otherwise idle and only emitted when the numbers change.
+#
+# FRONT-END:
+# WebFrontend turns game events (utils.event_bus) into queued output and
+# Socket.IO frames. The single-game server subscribes one to the event bus;
+# a multi-session server feeds one per session from its worker process, with
+# emit bound to that session's room.
+#
+# Under eventlet (web_interface monkey-patches threading) the condition and
+# the dispatcher thread are green, so an idle dispatcher costs nothing.
+# ============================================================================
+
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from utils.event_bus import publish_debug
+
+DEBUG_QUEUE_LIMIT = 2000
+DEBUG_BATCH_SIZE = 200
+TOKEN_UPDATE_INTERVAL = 2.0
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+class OutputChannel:
+    """Queue of output messages that wakes the dispatcher on put()"""
+
+    def __init__(self, condition: threading.Condition, limit: Optional[int] = None):
+        self._condition = condition
+        self._messages = deque()
+        self.limit = limit
+        self.dropped = 0
+
+    def put(self, message: Dict):
+        with self._condition:
+            if self.limit is not None and len(self._messages) >= self.limit:
+                self._messages.popleft()
+                self.dropped += 1
+            self._messages.append(message)
+            self._condition.notify()
+
+    def empty(self) -> bool:
+        with self._condition:
+            return not self._messages
+
+    def drain(self, limit: Optional[int] = None) -> List[Dict]:
+        """Remove and return queued messages (oldest first)"""
+        with self._condition:
+            count = len(self._messages) if limit is None else min(limit, len(self._messages))
+            return [self._messages.popleft() for _ in range(count)]
+
+    def take_dropped(self) -> int:
+        with self._condition:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+
+class OutputDispatcher:
+    """Pushes queued game/debug output to Socket.IO clients as soon as it arrives"""
+
+    def __init__(self, emit: Callable[[str, object], None], debug_limit: int = DEBUG_QUEUE_LIMIT):
+        self._emit = emit
+        self._condition = threading.Condition()
+        self.game = OutputChannel(self._condition)
+        self.debug = OutputChannel(self._condition, limit=debug_limit)
+        self._thread = None
+        self._last_tokens = None
+        self._next_token_check = 0.0
+        self.frames_sent = 0
+
+    def start(self):
+        """Start the dispatcher thread (once)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="output_dispatcher")
+            self._thread.start()
+
+    def _send(self, event: str, payload):
+        try:
+            self._emit(event, payload)
+            self.frames_sent += 1
+        except Exception:
+            # A failed emit must never stop output delivery
+            pass
+
+    def _send_debug(self, messages: List[Dict]):
+        if len(messages) == 1:
+            self._send('debug_output', messages[0])
+        elif messages:
+            self._send('debug_output_batch', messages)
+
+    def _send_token_update(self):
+        try:
+            from utils.usage_tracker import get_usage_stats
+            stats = get_usage_stats()
+            tokens = {
+                'tpm': stats.get('tpm', 0),
+                'rpm': stats.get('rpm', 0),
+                'total_tokens': stats.get('total_tokens', 0)
+            }
+        except Exception:
+            tokens = {'tpm': 0, 'rpm': 0, 'total_tokens': 0}
+        if tokens != self._last_tokens:
+            self._last_tokens = tokens
+            self._send('token_update', tokens)
+
+    def dispatch_pending(self):
+        """Emit everything queued right now"""
+        for message in self.game.drain():
+            self._send('game_output', message)
+        dropped = self.debug.take_dropped()
+        if dropped:
+            self._send('debug_output', {
+                'type': 'debug',
+                'content': f"[OUTPUT] {dropped} debug lines dropped (browser not keeping up)",
+                'timestamp': datetime.now().isoformat(),
+                'is_error': True
+            })
+        while True:
+            batch = self.debug.drain(DEBUG_BATCH_SIZE)
+            if not batch:
+                break
+            self._send_debug(batch)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self.game.empty() and self.debug.empty():
+                    remaining = self._next_token_check - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(timeout=remaining)
+            self.dispatch_pending()
+            if time.time() >= self._next_token_check:
+                self._next_token_check = time.time() + TOKEN_UPDATE_INTERVAL
+                self._send_token_update()
+
+
+class WebFrontend:
+    """Shows game events in the browser: narration and debug via the dispatcher, the rest as frames"""
+
+    def __init__(self, emit: Callable[[str, object], None], dispatcher: OutputDispatcher, echo=None):
+        self._emit = emit
+        self.dispatcher = dispatcher
+        self.echo = echo
+
+    def handle(self, event):
+        handler = getattr(self, f"_on_{event.type}", None)
+        if handler is not None:
+            handler(event)
+
+    def _on_narration(self, event):
+        """Show DM narration in the game panel (and echo it to the console)"""
+        if self.echo is not None:
+            try:
+                self.echo.write(f"Dungeon Master: {event.content}\n")
+                self.echo.flush()
+            except Exception:
+                pass
+        self.dispatcher.game.put({
+            'type': 'narration',
+            'content': event.content
+        })
+
+    def _on_narration_stream(self, event):
+        """Push streamed DM narration to the frontend (start / delta / end)"""
+        self._emit('narration_stream', {
+            'event': event.get('event'),
+            'content': event.content
+        })
+
+    def _on_status(self, event):
+        """Emit status updates (main status or background jobs) to the frontend"""
+        if event.get('background_jobs') is not None:
+            self._emit('status_update', {'background_jobs': event.get('background_jobs')})
+        else:
+            self._emit('status_update', {
+                'message': event.content,
+                'is_processing': event.get('is_processing', False)
+            })
+
+    def _on_debug(self, event):
+        self.dispatcher.debug.put({
+            'type': 'debug',
+            'content': event.content,
+            'timestamp': event.timestamp,
+            'is_error': event.get('is_error', False)
+        })
+
+    def _on_state_change(self, event):
+        """Tell the frontend to refresh its state panels"""
+        if event.get('kind') == 'module_creation_progress':
+            self._emit('module_creation_progress', event.content)
+            return
+        self._emit('state_change', {'kind': event.get('kind'), 'details': event.content})
+
+
+class WebOutputCapture:
+    """Forwards captured stdout/stderr to the console and, line by line, to the debug panel.
+
+    Narration, status and state changes arrive as typed events on the event
+    bus, so captured text needs no classification - all of it is debug output.
+    original_stream may be None (session workers have no console).
+    """
+    def __init__(self, original_stream, is_error=False):
+        self.original_stream = original_stream
+        self.is_error = is_error
+        self.buffer = ""
+
+    def write(self, text):
+        # Ensure text is a string and handle encoding issues
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='replace')
+        elif not isinstance(text, str):
+            text = str(text)
+
+        # Write to original stream for console visibility (with error handling)
+        if self.original_stream is not None:
+            try:
+                self.original_stream.write(text)
+                self.original_stream.flush()
+            except Exception:
+                # Broken pipes, encoding errors etc. must not stop the game
+                pass
+        
+        # Buffer text until we have a complete line
+        self.buffer += text
+        if '\n' in self.buffer:
+            lines = self.buffer.split('\n')
+            for line in lines[:-1]:
+                if line.strip():
+                    clean_line = self.strip_ansi_codes(line) if '\x1b' in line else line
+                    publish_debug(clean_line, is_error=self.is_error or 'ERROR:' in clean_line)
+            # Keep the incomplete line in buffer
+            self.buffer = lines[-1]
+        return len(text)
+    
+    def strip_ansi_codes(self, text):
+        """Remove ANSI escape codes from text"""
+        return ANSI_ESCAPE.sub('', text)
+    
+    def flush(self):
+        if self.buffer:
+            # Don't recursively call write() - just add newline to buffer
+            self.buffer += '\n'
+        if self.original_stream is not None:
+            try:
+                self.original_stream.flush()
+            except Exception:
+                pass
@@ -0,0 +1,218 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# SESSION_WORKER.PY - ONE TABLE'S GAME ENGINE
+# ============================================================================
+#
+# ARCHITECTURE ROLE: User Interface Layer - Multi-Session Game Host
+#
+# Started by web/game_sessions.py as
+#     python -m web.session_worker
+# with the session's state root as working directory. Every relative path
+# the engine uses (party_tracker.json, modules/, characters/, save_games/)
+# and every process-wide singleton (stdin/stdout, status manager, caches,
+# main.py's conversation state) therefore belongs to this one session.
+#
+# PROTOCOL (one JSON object per line):
+# - worker -> server on the original stdout:
+#     event          a utils.event_bus event (narration, status, debug...)
+#     slot_acquire   ask for an LLM call slot (id), slot_release frees one
+#     reply          result of a command (id)
+#     exit           the game loop ended (error text if it crashed)
+# - server -> worker on stdin:
+#     input          a line of player input
+#     slot_granted   answer to slot_acquire (id)
+#     command        panel query, save action or model switch (id, name, args)
+#     shutdown       finish pending autosaves and exit
+#
+# Anything the engine prints becomes debug events; file descriptor 1 is
+# pointed at stderr so stray low-level writes cannot corrupt the protocol.
+# ============================================================================
+
+import json
+import os
+import queue
+import sys
+import threading
+import traceback
+
+from utils import event_bus as events
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_drive_manager = None
+
+
+class WorkerChannel:
+    """Line-delimited JSON frames to the server"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def send(self, frame):
+        line = json.dumps(frame, default=str)
+        with self._lock:
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except (BrokenPipeError, OSError, ValueError):
+                # Server went away; the reader notices stdin closing and exits
+                pass
+
+
+class RemoteSlots:
+    """LLM call slots granted by the server's scheduler (shared by all sessions)"""
+
+    def __init__(self, channel: WorkerChannel):
+        self._channel = channel
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._waiting = {}
+
+    def acquire(self):
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            granted = self._waiting[request_id] = threading.Event()
+        self._channel.send({"type": "slot_acquire", "id": request_id})
+        granted.wait()
+
+    def release(self):
+        self._channel.send({"type": "slot_release"})
+
+    def granted(self, request_id):
+        with self._lock:
+            granted = self._waiting.pop(request_id, None)
+        if granted is not None:
+            granted.set()
+
+
+class WorkerInput:
+    """stdin for the game loop, fed with player input from the server"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def readline(self):
+        try:
+            from core.managers.status_manager import status_ready
+            status_ready()
+        except Exception:
+            pass
+        line = self.queue.get()
+        if line is None:
+            # Shutting down: end input() with EOF
+            return ''
+        return line + '\n'
+
+
+def run_command(name, args):
+    from web import state_queries
+    if name == "query":
+        return list(state_queries.run_query(args["query"], args.get("data")))
+    if name == "save_action":
+        replies, restart = state_queries.save_action(save_manager(args.get("cloud")), args["action"],
+                                                     args.get("parameters", {}))
+        return {"replies": [list(reply) for reply in replies], "restart": restart}
+    if name == "set_model":
+        import config
+        config.USE_GPT5_MODELS = bool(args.get("use_gpt5"))
+        print(f"DEBUG: Model toggled to: {'GPT-5' if config.USE_GPT5_MODELS else 'GPT-4.1'}")
+        return config.USE_GPT5_MODELS
+    raise ValueError(f"Unknown command: {name}")
+
+
+def save_manager(cloud):
+    """Save manager for this session; Google Drive backed when the server has cloud storage"""
+    global _drive_manager
+    from updates.save_game_manager import SaveGameManager
+    if not cloud:
+        return SaveGameManager()
+    if _drive_manager is None:
+        from utils.cloud_storage import DriveManager, CREDENTIALS_FILE, TOKEN_PICKLE_FILE
+        # The server's credentials live in the install, not in the state root
+        _drive_manager = DriveManager(os.path.join(ROOT_DIR, CREDENTIALS_FILE),
+                                      os.path.join(ROOT_DIR, TOKEN_PICKLE_FILE))
+    if not _drive_manager.service:
+        raise RuntimeError("Cloud storage is not available")
+    from updates.cloud_save_game_manager import CloudSaveGameManager
+    return CloudSaveGameManager(_drive_manager)
+
+
+def shutdown(code=0):
+    try:
+        from updates.autosave_manager import get_autosave_service
+        get_autosave_service().wait()
+    except Exception:
+        pass
+    os._exit(code)
+
+
+def read_server(channel, slots, game_input):
+    for line in sys.__stdin__:
+        try:
+            frame = json.loads(line)
+        except ValueError:
+            continue
+        kind = frame.get("type")
+        if kind == "input":
+            game_input.queue.put(frame.get("text", ""))
+        elif kind == "slot_granted":
+            slots.granted(frame.get("id"))
+        elif kind == "command":
+            threading.Thread(target=answer, args=(channel, frame), daemon=True).start()
+        elif kind == "shutdown":
+            break
+    # Server closed the pipe or asked us to stop
+    game_input.queue.put(None)
+    shutdown()
+
+
+def answer(channel, frame):
+    try:
+        result = run_command(frame.get("name"), frame.get("args", {}))
+        channel.send({"type": "reply", "id": frame.get("id"), "result": result})
+    except Exception as e:
+        channel.send({"type": "reply", "id": frame.get("id"), "error": str(e)})
+
+
+def main():
+    # Protocol frames use the original stdout; fd 1 now points at stderr
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    channel = WorkerChannel(protocol)
+
+    events.detach_console_frontend()
+    events.event_bus.subscribe(lambda event: channel.send({"type": "event", "event": event.to_dict()}))
+
+    from core.ai.llm_scheduler import set_slot_provider
+    from web.output_dispatcher import WebOutputCapture
+    slots = RemoteSlots(channel)
+    set_slot_provider(slots)
+
+    game_input = WorkerInput()
+    sys.stdout = WebOutputCapture(None)
+    sys.stderr = WebOutputCapture(None, is_error=True)
+    sys.stdin = game_input
+    threading.Thread(target=read_server, args=(channel, slots, game_input), daemon=True,
+                     name="session_reader").start()
+
+    error_text = None
+    try:
+        import main as dm_main
+        dm_main.main_game_loop()
+    except (EOFError, SystemExit):
+        pass
+    except Exception as e:
+        error_text = f"Game error: {str(e)}"
+        print(f"Game loop error: {error_text}")
+        print(f"Traceback: {traceback.format_exc()}")
+    channel.send({"type": "exit", "error": error_text})
+    shutdown()
+
+
+if __name__ == "__main__":
+    main()
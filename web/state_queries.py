@@ -0,0 +1,468 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# ============================================================================
+# STATE_QUERIES.PY - WEB PANEL DATA AND SAVE ACTIONS
+# ============================================================================
+#
+# ARCHITECTURE ROLE: User Interface Layer - Game State Read Model
+#
+# The character, party, NPC, initiative, plot and storage panels and the
+# save/load actions read game files relative to the working directory.
+# They live here, free of Flask, so they can run in two places:
+# - the web server process, for the single-game server
+# - a session worker process (cwd = the session's state root), for a
+#   multi-session server; the server forwards the request and emits the reply
+#
+# Each query returns (event_name, payload) for the Socket.IO reply.
+# ============================================================================
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from utils.enhanced_logger import debug, error
+
+Reply = Tuple[str, Dict]
+
+
+def _module_path_manager(party_tracker: Optional[Dict]):
+    from utils.module_path_manager import ModulePathManager
+    current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
+    return ModulePathManager(current_module)
+
+
+def player_data(data: Dict) -> Reply:
+    """Player stats / inventory / spells, or party NPC data"""
+    try:
+        dataType = data.get('dataType', 'stats')
+        response_data = None
+
+        # Load party tracker to get player name and NPCs
+        party_tracker_path = 'party_tracker.json'
+        if os.path.exists(party_tracker_path):
+            with open(party_tracker_path, 'r', encoding='utf-8') as f:
+                party_tracker = json.load(f)
+        else:
+            return 'player_data_response', {'dataType': dataType, 'data': None, 'error': 'Party tracker not found'}
+
+        if dataType == 'stats' or dataType == 'inventory' or dataType == 'spells':
+            # Get player name from party tracker
+            if party_tracker.get('partyMembers') and len(party_tracker['partyMembers']) > 0:
+                from updates.update_character_info import normalize_character_name
+                player_name = normalize_character_name(party_tracker['partyMembers'][0])
+                path_manager = _module_path_manager(party_tracker)
+
+                player_file = path_manager.get_character_path(player_name)
+                if os.path.exists(player_file):
+                    with open(player_file, 'r', encoding='utf-8') as f:
+                        response_data = json.load(f)
+
+        elif dataType == 'npcs':
+            # Get NPC data from party tracker
+            npcs = []
+            path_manager = _module_path_manager(party_tracker)
+
+            for npc_info in party_tracker.get('partyNPCs', []):
+                npc_name = npc_info['name']
+
+                try:
+                    # Use fuzzy matching to find the correct NPC file
+                    from updates.update_character_info import find_character_file_fuzzy
+                    matched_name = find_character_file_fuzzy(npc_name)
+
+                    if matched_name:
+                        npc_file = path_manager.get_character_path(matched_name)
+                        if os.path.exists(npc_file):
+                            with open(npc_file, 'r', encoding='utf-8') as f:
+                                npc_data = json.load(f)
+                                npcs.append(npc_data)
+                except:
+                    pass
+
+            response_data = npcs
+
+        return 'player_data_response', {'dataType': dataType, 'data': response_data}
+
+    except Exception as e:
+        return 'player_data_response', {'dataType': data.get('dataType', 'stats'), 'data': None, 'error': str(e)}
+
+
+def location_data(data: Dict = None) -> Reply:
+    """Current location information"""
+    try:
+        # Load party tracker to get current location
+        party_tracker_path = 'party_tracker.json'
+        if os.path.exists(party_tracker_path):
+            with open(party_tracker_path, 'r', encoding='utf-8') as f:
+                party_tracker = json.load(f)
+
+            world_conditions = party_tracker.get('worldConditions', {})
+            location_info = {
+                'currentLocation': world_conditions.get('currentLocation', 'Unknown'),
+                'currentArea': world_conditions.get('currentArea', 'Unknown'),
+                'currentLocationId': world_conditions.get('currentLocationId', ''),
+                'currentAreaId': world_conditions.get('currentAreaId', ''),
+                'time': world_conditions.get('time', ''),
+                'day': world_conditions.get('day', ''),
+                'month': world_conditions.get('month', ''),
+                'year': world_conditions.get('year', '')
+            }
+
+            return 'location_data_response', {'data': location_info}
+        return 'location_data_response', {'data': None, 'error': 'Party tracker not found'}
+
+    except Exception as e:
+        return 'location_data_response', {'data': None, 'error': str(e)}
+
+
+def _load_npc(npc_name: str) -> Optional[Dict]:
+    """NPC character data by (fuzzy) name, or None if the file is missing"""
+    from utils.module_path_manager import ModulePathManager
+    from utils.encoding_utils import safe_json_load
+    # Get current module from party tracker for consistent path resolution
+    try:
+        path_manager = _module_path_manager(safe_json_load("party_tracker.json"))
+    except:
+        path_manager = ModulePathManager()  # Fallback to reading from file
+
+    from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
+
+    # Use fuzzy matching to find the correct NPC file
+    matched_name = find_character_file_fuzzy(npc_name)
+    if matched_name:
+        npc_file = path_manager.get_character_path(matched_name)
+    else:
+        # Fallback to normalized name if no match found
+        npc_file = path_manager.get_character_path(normalize_character_name(npc_name))
+    if not os.path.exists(npc_file):
+        return None
+    with open(npc_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def npc_details(data: Dict) -> Reply:
+    """NPC saving throws, skills or spellcasting (data['modalType'])"""
+    npc_name = data.get('npcName', '')
+    modal_type = data.get('modalType', 'saves')
+    try:
+        npc_data = _load_npc(npc_name)
+        if npc_data is not None:
+            return 'npc_details_response', {'npcName': npc_name, 'data': npc_data, 'modalType': modal_type}
+        return 'npc_details_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'}
+    except Exception as e:
+        return 'npc_details_response', {'npcName': npc_name, 'data': None, 'error': str(e)}
+
+
+def npc_inventory(data: Dict) -> Reply:
+    """NPC equipment for the inventory display"""
+    npc_name = data.get('npcName', '')
+    try:
+        npc_data = _load_npc(npc_name)
+        if npc_data is not None:
+            # Extract equipment for inventory display
+            equipment = npc_data.get('equipment', [])
+            return 'npc_inventory_response', {'npcName': npc_name, 'data': equipment}
+        return 'npc_inventory_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'}
+    except Exception as e:
+        return 'npc_inventory_response', {'npcName': npc_name, 'data': None, 'error': str(e)}
+
+
+def party_data(data: Dict = None) -> Reply:
+    """Party member display (non-combat)"""
+    try:
+        from utils.file_operations import safe_read_json
+        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
+
+        # Load party tracker
+        party_tracker = safe_read_json("party_tracker.json")
+        if not party_tracker:
+            return 'party_data_response', {'members': []}
+
+        # Get module info for path resolution
+        path_manager = _module_path_manager(party_tracker)
+
+        party_members = []
+
+        # Add player first
+        if party_tracker.get('partyMembers') and len(party_tracker['partyMembers']) > 0:
+            player_name = normalize_character_name(party_tracker['partyMembers'][0])
+
+            # Try to load player data for HP info
+            try:
+                player_file = path_manager.get_character_path(player_name)
+                if os.path.exists(player_file):
+                    player_data = safe_read_json(player_file)
+                    if player_data:
+                        party_members.append({
+                            'name': player_data.get('name', player_name),
+                            'type': 'player',
+                            'currentHp': player_data.get('currentHp', 0),
+                            'maxHp': player_data.get('maxHp', 0)
+                        })
+            except:
+                # Fallback if can't load player data
+                party_members.append({
+                    'name': player_name,
+                    'type': 'player'
+                })
+
+        # Add NPCs in order
+        for npc_info in party_tracker.get('partyNPCs', []):
+            npc_name = npc_info['name']
+
+            try:
+                # Use fuzzy matching to find NPC file
+                matched_name = find_character_file_fuzzy(npc_name)
+                if matched_name:
+                    npc_file = path_manager.get_character_path(matched_name)
+                    if os.path.exists(npc_file):
+                        npc_data = safe_read_json(npc_file)
+                        if npc_data:
+                            party_members.append({
+                                'name': npc_data.get('name', npc_name),
+                                'type': 'npc',
+                                'currentHp': npc_data.get('currentHp', 0),
+                                'maxHp': npc_data.get('maxHp', 0)
+                            })
+                            continue
+            except:
+                pass
+
+            # Fallback if can't load NPC data
+            party_members.append({
+                'name': npc_name,
+                'type': 'npc'
+            })
+
+        return 'party_data_response', {'members': party_members}
+
+    except Exception as e:
+        error(f"Failed to get party data: {str(e)}", exception=e, category="web_interface")
+        return 'party_data_response', {'members': []}
+
+
+def initiative_data(data: Dict = None) -> Reply:
+    """Current combat initiative order"""
+    inactive = ('initiative_data_response', {'active': False, 'combatants': []})
+    try:
+        from utils.file_operations import safe_read_json
+
+        # Check if combat is active via party_tracker.json
+        party_tracker = safe_read_json("party_tracker.json")
+        if not party_tracker:
+            return inactive
+
+        # Get the active combat encounter ID
+        active_encounter_id = party_tracker.get("worldConditions", {}).get("activeCombatEncounter")
+        if not active_encounter_id:
+            # No combat is active
+            return inactive
+
+        # Load the specific encounter file
+        encounter_file = f"modules/encounters/encounter_{active_encounter_id}.json"
+        encounter_data = safe_read_json(encounter_file)
+        if not encounter_data or "creatures" not in encounter_data:
+            return inactive
+
+        # Filter for living combatants only
+        living_combatants = [
+            c for c in encounter_data["creatures"]
+            if c.get("status", "unknown").lower() == "alive"
+        ]
+
+        if not living_combatants:
+            # Combat is over if no one is alive
+            return inactive
+
+        # Sort by initiative (highest first)
+        sorted_combatants = sorted(
+            living_combatants,
+            key=lambda x: x.get("initiative", 0),
+            reverse=True
+        )
+
+        # Prepare clean data for frontend
+        combatant_list = [
+            {
+                "name": c.get("name"),
+                "type": c.get("type"),  # 'player', 'npc', or 'enemy'
+                "initiative": c.get("initiative"),
+                "currentHp": c.get("currentHitPoints"),
+                "maxHp": c.get("maxHitPoints"),
+                "monsterType": c.get("monsterType"),  # For enemy type lookup
+                "class": c.get("class")  # For NPC class lookup
+            }
+            for c in sorted_combatants
+        ]
+
+        return 'initiative_data_response', {
+            'active': True,
+            'combatants': combatant_list,
+            'round': encounter_data.get('combat_round', 1)
+        }
+
+    except Exception as e:
+        error(f"Error handling initiative data request: {e}", exception=e, category="web_interface")
+        return inactive
+
+
+def plot_data(data: Dict = None) -> Reply:
+    """The current module's plot (player-friendly quests when available)"""
+    try:
+        # Step 1: Find out which module is currently active by checking the party tracker.
+        party_tracker_path = 'party_tracker.json'
+        if not os.path.exists(party_tracker_path):
+            return 'plot_data_response', {'data': None, 'error': 'Party tracker not found'}
+
+        with open(party_tracker_path, 'r', encoding='utf-8') as f:
+            party_tracker = json.load(f)
+
+        current_module = party_tracker.get("module", "").replace(" ", "_")
+        if not current_module:
+            return 'plot_data_response', {'data': None, 'error': 'Current module not set in party tracker'}
+
+        # Step 2: Use the ModulePathManager to get the correct path to the plot file for that module.
+        # This makes sure we always load the plot for the adventure the player is actually on.
+        from utils.module_path_manager import ModulePathManager
+        path_manager = ModulePathManager(current_module)
+
+        # Step 2.5: Check for player-friendly quest file first
+        player_quests_path = os.path.join(path_manager.module_dir, f"player_quests_{current_module}.json")
+
+        if os.path.exists(player_quests_path):
+            # Use player-friendly quest descriptions
+            with open(player_quests_path, 'r', encoding='utf-8') as f:
+                player_quests_data = json.load(f)
+
+            # Convert player quest format back to module_plot format for compatibility
+            plot_data = {
+                "plotPoints": []
+            }
+
+            for quest_id, quest_data in player_quests_data.get("quests", {}).items():
+                plot_point = {
+                    "id": quest_data.get("id"),
+                    "title": quest_data.get("title"),
+                    "description": quest_data.get("playerDescription", quest_data.get("originalDescription", "")),
+                    "status": quest_data.get("status"),
+                    "sideQuests": []
+                }
+
+                # Add side quests
+                for sq_id, sq_data in quest_data.get("sideQuests", {}).items():
+                    plot_point["sideQuests"].append({
+                        "id": sq_data.get("id"),
+                        "title": sq_data.get("title"),
+                        "description": sq_data.get("playerDescription", ""),
+                        "status": sq_data.get("status")
+                    })
+
+                plot_data["plotPoints"].append(plot_point)
+
+            debug(f"WEB_INTERFACE: Using player-friendly quests for {current_module}", category="web_interface")
+        else:
+            # Fallback to original module_plot.json
+            plot_file_path = path_manager.get_plot_path()
+
+            if not os.path.exists(plot_file_path):
+                return 'plot_data_response', {'data': None, 'error': f'Plot file not found for module: {current_module}'}
+
+            # Step 3: Read the plot file and send its data back to the browser.
+            with open(plot_file_path, 'r', encoding='utf-8') as f:
+                plot_data = json.load(f)
+
+            debug(f"WEB_INTERFACE: Using original plot data for {current_module} (no player quests file)", category="web_interface")
+
+        return 'plot_data_response', {'data': plot_data}
+
+    except Exception as e:
+        # If anything goes wrong, send an error message so we can debug it.
+        return 'plot_data_response', {'data': None, 'error': str(e)}
+
+
+def storage_data(data: Dict = None) -> Reply:
+    """All player storage containers"""
+    try:
+        from core.managers.storage_manager import get_storage_manager
+        manager = get_storage_manager()
+        # Calling view_storage() with no location_id gets ALL storage containers.
+        storage_data = manager.view_storage()
+
+        if storage_data.get("success"):
+            return 'storage_data_response', {'data': storage_data}
+        return 'error', {'message': 'Failed to retrieve storage data.'}
+
+    except Exception as e:
+        print(f"ERROR handling storage request: {e}")
+        return 'error', {'message': 'An internal error occurred while fetching storage data.'}
+
+
+QUERIES = {
+    'player_data': player_data,
+    'location_data': location_data,
+    'npc_details': npc_details,
+    'npc_inventory': npc_inventory,
+    'party_data': party_data,
+    'initiative_data': initiative_data,
+    'plot_data': plot_data,
+    'storage_data': storage_data,
+}
+
+
+def run_query(name: str, data: Optional[Dict] = None) -> Reply:
+    return QUERIES[name](data or {})
+
+
+# ----------------------------------------------------------------------
+# Save games
+# ----------------------------------------------------------------------
+
+def save_action(manager, action_type: str, parameters: Dict) -> Tuple[List[Reply], bool]:
+    """
+    Run a save-game action from the frontend with the given save manager.
+
+    Returns:
+        (replies to emit in order, True if the game must restart on the restored state)
+    """
+    if action_type == 'listSaves':
+        try:
+            return [('save_list_response', manager.list_save_games())], False
+        except Exception as e:
+            print(f"Error listing saves: {e}")
+            return [('save_list_response', [])], False
+
+    if action_type == 'saveGame':
+        try:
+            description = parameters.get("description", "")
+            save_mode = parameters.get("saveMode", "essential")
+            success, message = manager.create_save_game(description, save_mode)
+            if success:
+                return [('action_response', {'status': 'success', 'message': f'Game saved successfully: {os.path.basename(message)}'})], False
+            return [('action_response', {'status': 'error', 'message': message})], False
+        except Exception as e:
+            return [('action_response', {'status': 'error', 'message': str(e)})], False
+
+    if action_type == 'restoreGame':
+        try:
+            success, message = manager.restore_save_game(parameters.get("saveFolder"))
+            if success:
+                return [('action_response', {'status': 'success', 'message': 'Game restored. Restarting session...'})], True
+            return [('action_response', {'status': 'error', 'message': message})], False
+        except Exception as e:
+            return [('action_response', {'status': 'error', 'message': str(e)})], False
+
+    if action_type == 'deleteSave':
+        try:
+            success, message = manager.delete_save_game(parameters.get("saveFolder"))
+            if success:
+                # Refresh the save list
+                replies, _ = save_action(manager, 'listSaves', {})
+                return [('action_response', {'status': 'success', 'message': message})] + replies, False
+            return [('action_response', {'status': 'error', 'message': message})], False
+        except Exception as e:
+            return [('action_response', {'status': 'error', 'message': str(e)})], False
+
+    return [], False
@@ -30,7 +30,11 @@ See LICENSE file for full terms.
 # - Real-time game state synchronization across multiple browser sessions
 # - Cross-platform browser-based interface compatibility
 # - Status broadcasting integration with console and web interfaces
+# - Streaming DM narration to the browser while the response is generated
 # - Session state management linking web sessions to game state
+# - Optional multi-session hosting (ENABLE_MULTI_SESSION_WEB): every browser
+#   session plays its own game in its own state root (web/game_sessions.py);
+#   panel queries and save actions then run inside that session
 #
 
 """
@@ -48,8 +52,9 @@ import logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
 from flask import Flask, render_template, request, jsonify, Response
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import os
+import re
 import sys
 import json
 import threading
@@ -74,11 +79,14 @@ install_debug_interceptor()
 # Import the main game module and reset logic
 import main as dm_main
 import utils.reset_campaign as reset_campaign
-from core.managers.status_manager import set_status_callback
+from utils import event_bus as events
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 from utils.cloud_storage import DriveManager
 from updates.save_game_manager import SaveGameManager
 from updates.cloud_save_game_manager import CloudSaveGameManager
+from web.output_dispatcher import OutputDispatcher, WebFrontend, WebOutputCapture
+from web.game_sessions import SessionManager, SessionError, multi_session_enabled, valid_session_id
+from web import state_queries
 
 # Set script name for logging
 set_script_name("web_interface")
@@ -88,8 +96,10 @@ app.config['SECRET_KEY'] = 'dungeon-master-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Global variables for managing output
-game_output_queue = queue.Queue()
-debug_output_queue = queue.Queue()
+# Output channels wake the dispatcher on put(); nothing polls them
+output_dispatcher = OutputDispatcher(socketio.emit)
+game_output_queue = output_dispatcher.game
+debug_output_queue = output_dispatcher.debug
 user_input_queue = queue.Queue()
 game_thread = None
 original_stdout = sys.stdout
@@ -99,247 +109,50 @@ original_stdin = sys.stdin
 # Cloud Storage Manager
 drive_manager = None
 
-# Status callback function
-def emit_status_update(status_message, is_processing):
-    """Emit status updates to the frontend"""
-    socketio.emit('status_update', {
-        'message': status_message,
-        'is_processing': is_processing
-    })
-
-# Set the status callback
-set_status_callback(emit_status_update)
-
-class WebOutputCapture:
-    """Captures output and routes it to appropriate queues"""
-    def __init__(self, queue, original_stream, is_error=False):
-        self.queue = queue
-        self.original_stream = original_stream
-        self.is_error = is_error
-        self.buffer = ""
-        self.in_dm_section = False
-        self.dm_buffer = []
-    
-    def write(self, text):
-        # Write to original stream for console visibility (with error handling)
-        try:
-            # Ensure text is a string and handle encoding issues
-            if isinstance(text, bytes):
-                text = text.decode('utf-8', errors='replace')
-            elif not isinstance(text, str):
-                text = str(text)
-            
-            self.original_stream.write(text)
-            self.original_stream.flush()
-        except (BrokenPipeError, OSError, UnicodeEncodeError, AttributeError):
-            # Ignore broken pipe errors, encoding errors, and attribute errors during output capture
-            pass
-        except Exception:
-            # Catch any other unexpected errors and continue
-            pass
-        
-        # Buffer text until we have a complete line
-        self.buffer += text
-        if '\n' in self.buffer:
-            lines = self.buffer.split('\n')
-            # Process all complete lines
-            for line in lines[:-1]:
-                # Clean the line of ANSI codes for checking content
-                clean_line = self.strip_ansi_codes(line)
-                
-                # Check if this is a player status/prompt line
-                if clean_line.startswith('[') and ('HP:' in clean_line or 'XP:' in clean_line):
-                    # This is a player prompt - send to debug
-                    debug_output_queue.put({
-                        'type': 'debug',
-                        'content': clean_line,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                # Check if this starts a Dungeon Master section
-                elif "Dungeon Master:" in clean_line:
-                    try:
-                        # Start capturing DM content
-                        self.in_dm_section = True
-                        self.dm_buffer = [clean_line]
-                        # Debug trace for combat output
-                        debug_output_queue.put({
-                            'type': 'debug',
-                            'content': f"[OUTPUT_TRACE] Started DM section: {clean_line[:100]}...",
-                            'timestamp': datetime.now().isoformat()
-                        })
-                    except Exception:
-                        # If DM section initialization fails, send to debug instead
-                        debug_output_queue.put({
-                            'type': 'debug',
-                            'content': f"[OUTPUT_ERROR] DM section init failed: {clean_line}",
-                            'timestamp': datetime.now().isoformat()
-                        })
-                elif self.in_dm_section:
-                    # Check if we're still in DM section
-                    if line.strip() == "":
-                        try:
-                            # Empty line - still part of DM section, add to buffer
-                            self.dm_buffer.append("")
-                        except Exception:
-                            # If buffer append fails, reset DM section
-                            self.in_dm_section = False
-                            self.dm_buffer = []
-                    elif any(marker in clean_line for marker in ['DEBUG:', 'ERROR:', 'WARNING:']) or \
-                         clean_line.startswith('[') and ('HP:' in clean_line or 'XP:' in clean_line) or \
-                         clean_line.startswith('>'):
-                        # This ends the DM section - send accumulated DM content as single message
-                        if self.dm_buffer:
-                            try:
-                                combined_content = '\n'.join(self.dm_buffer)
-                                # Remove "Dungeon Master:" prefix from the beginning if present
-                                combined_content = combined_content.replace('Dungeon Master:', '', 1).strip()
-                                if combined_content.strip():  # Only send if there's actual content
-                                    game_output_queue.put({
-                                        'type': 'narration',
-                                        'content': combined_content
-                                    })
-                                    # Debug trace for successful DM output
-                                    debug_output_queue.put({
-                                        'type': 'debug',
-                                        'content': f"[OUTPUT_TRACE] Sent DM content to game_output: {len(combined_content)} chars",
-                                        'timestamp': datetime.now().isoformat()
-                                    })
-                            except Exception as e:
-                                # If DM content processing fails, send raw content to debug
-                                try:
-                                    debug_output_queue.put({
-                                        'type': 'debug',
-                                        'content': f"[OUTPUT_ERROR] DM content processing failed: {str(e)} - Buffer: {str(self.dm_buffer)}",
-                                        'timestamp': datetime.now().isoformat()
-                                    })
-                                except Exception:
-                                    # If even debug fails, just continue
-                                    pass
-                        self.in_dm_section = False
-                        self.dm_buffer = []
-                        # Send this line to debug
-                        try:
-                            debug_output_queue.put({
-                                'type': 'debug',
-                                'content': clean_line,
-                                'timestamp': datetime.now().isoformat(),
-                                'is_error': self.is_error or 'ERROR:' in clean_line
-                            })
-                        except Exception:
-                            # If debug queue fails, just continue
-                            pass
-                    else:
-                        # Still in DM section - check if it's a debug message
-                        if any(marker in clean_line for marker in [
-                            'Lightweight chat history updated',
-                            'System messages removed:',
-                            'User messages:',
-                            'Assistant messages:',
-                            'not found. Skipping',
-                            'not found. Returning None',
-                            'has an invalid JSON format',
-                            'Current Time:',
-                            'Time Advanced:',
-                            'New Time:',
-                            'Days Passed:',
-                            'Loading module areas',
-                            'Graph built:',
-                            '[OK] Loaded'
-                        ]):
-                            # This is a debug message - send to debug output instead
-                            debug_output_queue.put({
-                                'type': 'debug',
-                                'content': clean_line,
-                                'timestamp': datetime.now().isoformat()
-                            })
-                            # End the DM section and send what we have so far
-                            if self.dm_buffer:
-                                try:
-                                    combined_content = '\n'.join(self.dm_buffer)
-                                    combined_content = combined_content.replace('Dungeon Master:', '', 1).strip()
-                                    if combined_content.strip():
-                                        game_output_queue.put({
-                                            'type': 'narration',
-                                            'content': combined_content
-                                        })
-                                except Exception:
-                                    # If DM content processing fails, just continue
-                                    pass
-                            self.in_dm_section = False
-                            self.dm_buffer = []
-                        else:
-                            try:
-                                # Not a debug message - add to buffer
-                                self.dm_buffer.append(clean_line)
-                            except Exception:
-                                # If buffer append fails, reset DM section
-                                self.in_dm_section = False
-                                self.dm_buffer = []
-                else:
-                    # Not in DM section - check if it's a debug message that should be filtered
-                    if any(marker in clean_line for marker in [
-                        'Lightweight chat history updated',
-                        'System messages removed:',
-                        'User messages:',
-                        'Assistant messages:',
-                        'not found. Skipping',
-                        'not found. Returning None',
-                        'has an invalid JSON format',
-                        'Current Time:',
-                        'Time Advanced:',
-                        'New Time:',
-                        'Days Passed:',
-                        'Loading module areas',
-                        'Graph built:',
-                        '[OK] Loaded'
-                    ]):
-                        # These are debug messages - send to debug output
-                        debug_output_queue.put({
-                            'type': 'debug',
-                            'content': clean_line,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                    elif line.strip():  # Only send non-empty lines
-                        debug_output_queue.put({
-                            'type': 'debug',
-                            'content': clean_line,
-                            'timestamp': datetime.now().isoformat(),
-                            'is_error': self.is_error or 'ERROR:' in clean_line
-                        })
-            # Keep the incomplete line in buffer
-            self.buffer = lines[-1]
-    
-    def strip_ansi_codes(self, text):
-        """Remove ANSI escape codes from text"""
-        import re
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        return ansi_escape.sub('', text)
-    
-    def flush(self):
-        # If we're in a DM section, flush it as single message
-        if self.in_dm_section and self.dm_buffer:
-            combined_content = '\n'.join(self.dm_buffer)
-            # Remove "Dungeon Master:" prefix from the beginning if present
-            combined_content = combined_content.replace('Dungeon Master:', '', 1).strip()
-            if combined_content.strip():  # Only send if there's actual content
-                game_output_queue.put({
-                    'type': 'narration',
-                    'content': combined_content
-                })
-            self.in_dm_section = False
-            self.dm_buffer = []
-        
-        if self.buffer:
-            # Don't recursively call write() - just add newline to buffer
-            self.buffer += '\n'
+# Game events go to the browser (the web replaces the console front-end)
+web_frontend = WebFrontend(socketio.emit, output_dispatcher, echo=original_stdout)
+events.detach_console_frontend()
+events.event_bus.subscribe(web_frontend.handle)
+
+# Multi-session hosting: one isolated game per browser session (web/game_sessions.py)
+sessions = SessionManager(socketio.emit) if multi_session_enabled() else None
+
+def client_session():
+    """The calling client's game session (None for the single-game server)"""
+    return sessions.for_client(request.sid) if sessions else None
+
+PORTRAITS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'portraits')
+# Character names become file names: no path separators or dot segments
+CHARACTER_NAME_PATTERN = re.compile(r"^[\w' -]{1,64}$")
+
+def safe_character_name(name):
+    """Return name if it is safe to use as a file name, else None"""
+    if isinstance(name, str) and name.strip() and CHARACTER_NAME_PATTERN.match(name):
+        return name
+    return None
+
+def request_state_root():
+    """Game state directory of an HTTP request ('' for the single-game server, None if the session id is invalid)"""
+    if not sessions:
+        return ''
+    return sessions.root_for(request.headers.get('X-Game-Session') or request.args.get('session'))
+
+def portraits_dir(state_root):
+    """Where portraits of a game are stored and served from"""
+    return os.path.join(state_root, 'portraits') if sessions else PORTRAITS_DIR
+
+def answer_query(name, data=None):
+    """Answer a panel data request from the caller's game state"""
+    session = client_session()
+    if session is None:
+        event, payload = state_queries.run_query(name, data)
+    else:
         try:
-            self.original_stream.flush()
-        except (BrokenPipeError, OSError, UnicodeEncodeError, AttributeError):
-            # Ignore broken pipe errors, encoding errors, and attribute errors during flush
-            pass
-        except Exception:
-            # Catch any other unexpected errors and continue
-            pass
+            event, payload = session.query(name, data)
+        except SessionError as e:
+            debug(f"WEB_INTERFACE: {name} not answered: {e}", category="web_interface")
+            return
+    emit(event, payload)
 
 class WebInput:
     """Handles input from the web interface"""
@@ -426,7 +239,11 @@ def serve_portrait(filename):
     # Ensure the filename ends with .png for security
     if not filename.endswith('.png'):
         return "Not found", 404
-    portrait_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'portraits', filename)
+    state_root = request_state_root()
+    character_name = safe_character_name(filename[:-len('.png')])
+    if state_root is None or character_name is None:
+        return "Not found", 404
+    portrait_path = os.path.join(portraits_dir(state_root), f"{character_name}.png")
     if os.path.exists(portrait_path):
         return send_file(portrait_path, mimetype='image/png')
     return "Not found", 404
@@ -440,10 +257,15 @@ def get_character_data():
         character_name = request.args.get('character_name')
         if not character_name:
             return jsonify({'error': 'No character name provided'}), 400
+        if not safe_character_name(character_name):
+            return jsonify({'error': 'Invalid character name'}), 400
+        state_root = request_state_root()
+        if state_root is None:
+            return jsonify({'error': 'Invalid game session'}), 400
         
-        # Look for character file in characters folder
-        character_path = f'characters/{character_name}.json'
-        character_data = safe_read_json(character_path)
+        # Look for character file in the game's characters folder
+        character_path = os.path.join(state_root, 'characters', f'{character_name}.json')
+        character_data = safe_read_json(character_path) if os.path.exists(character_path) else None
         
         if character_data:
             # Return relevant character data
@@ -472,11 +294,16 @@ def upload_portrait():
 
         if file.filename == '' or not character_name:
             return jsonify({'success': False, 'message': 'No selected file or character name'})
+        if not safe_character_name(character_name):
+            return jsonify({'success': False, 'message': 'Invalid character name'})
+        state_root = request_state_root()
+        if state_root is None:
+            return jsonify({'success': False, 'message': 'Invalid game session'})
 
         if file:
-            # Create the portraits directory if it doesn't exist
-            portraits_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'portraits')
-            os.makedirs(portraits_dir, exist_ok=True)
+            # Create the portraits directory if it doesn't exist (the session's own, when hosting many)
+            portrait_folder = portraits_dir(state_root)
+            os.makedirs(portrait_folder, exist_ok=True)
 
             # Open the image with Pillow
             img = Image.open(file.stream)
@@ -496,15 +323,15 @@ def upload_portrait():
             # Resize to a standard size (e.g., 256x256) for consistency
             img = img.resize((256, 256), Image.Resampling.LANCZOS)
 
-            # Save the processed image as PNG in web static folder
+            # Save the processed image as PNG in the portraits folder
             save_filename = f"{character_name}.png"
-            save_path = os.path.join(portraits_dir, save_filename)
+            save_path = os.path.join(portrait_folder, save_filename)
             img.save(save_path, 'PNG')
             
             # Also save to the character's module folder for persistence
             try:
-                # Get current module from party tracker
-                party_tracker_path = 'party_tracker.json'
+                # Get current module from party tracker (the uploading session's, when hosting many)
+                party_tracker_path = os.path.join(state_root, 'party_tracker.json')
                 if os.path.exists(party_tracker_path):
                     with open(party_tracker_path, 'r', encoding='utf-8') as f:
                         party_tracker = json.load(f)
@@ -513,7 +340,7 @@ def upload_portrait():
                         if current_module:
                             from utils.module_path_manager import ModulePathManager
                             manager = ModulePathManager(current_module)
-                            module_portraits_dir = os.path.join(manager.get_module_dir(), 'portraits')
+                            module_portraits_dir = os.path.join(state_root, manager.get_module_dir(), 'portraits')
                             os.makedirs(module_portraits_dir, exist_ok=True)
                             module_save_path = os.path.join(module_portraits_dir, save_filename)
                             img.save(module_save_path, 'PNG')
@@ -539,24 +366,35 @@ def get_spell_data():
         return jsonify({})
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     """Handle client connection"""
     emit('connected', {'data': 'Connected to NeverEndingQuest'})
     
-    # Send any queued messages
-    while not game_output_queue.empty():
-        msg = game_output_queue.get()
-        emit('game_output', msg)
+    if sessions:
+        # The page keeps its session id in localStorage, so reloads find the same game
+        session_id = (auth or {}).get('session')
+        session = sessions.attach(request.sid, session_id if valid_session_id(session_id) else request.sid)
+        join_room(session.room)
+        session.dispatcher.dispatch_pending()
+        return
     
-    while not debug_output_queue.empty():
-        msg = debug_output_queue.get()
-        emit('debug_output', msg)
+    # Send any queued messages
+    output_dispatcher.dispatch_pending()
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    if sessions:
+        sessions.detach(request.sid)
 
 @socketio.on('user_input')
 def handle_user_input(data):
     """Handle input from the user"""
     user_input = data.get('input', '')
-    user_input_queue.put(user_input)
+    session = client_session()
+    if session is not None:
+        session.send_input(user_input)
+    else:
+        user_input_queue.put(user_input)
     
     # Echo the input back to the game output
     emit('game_output', {
@@ -570,73 +408,14 @@ def handle_action(data):
     action_type = data.get("action")
     parameters = data.get("parameters", {})
     global game_thread
+    session = client_session()
 
-    if action_type == 'listSaves':
-        try:
-            if drive_manager:
-                manager = CloudSaveGameManager(drive_manager)
-            else:
-                manager = SaveGameManager()
-            saves = manager.list_save_games()
-            emit('save_list_response', saves)
-        except Exception as e:
-            print(f"Error listing saves: {e}")
-            emit('save_list_response', [])
-
-    elif action_type == 'saveGame':
-        try:
-            if drive_manager:
-                manager = CloudSaveGameManager(drive_manager)
-            else:
-                manager = SaveGameManager()
-            description = parameters.get("description", "")
-            save_mode = parameters.get("saveMode", "essential")
-            success, message = manager.create_save_game(description, save_mode)
-            if success:
-                emit('action_response', {'status': 'success', 'message': f'Game saved successfully: {os.path.basename(message)}'})
-            else:
-                emit('action_response', {'status': 'error', 'message': message})
-        except Exception as e:
-            emit('action_response', {'status': 'error', 'message': str(e)})
-
-    elif action_type == 'restoreGame':
-        try:
-            if drive_manager:
-                manager = CloudSaveGameManager(drive_manager)
-            else:
-                manager = SaveGameManager()
-            save_folder = parameters.get("saveFolder")
-            success, message = manager.restore_save_game(save_folder)
-            if success:
-                emit('action_response', {'status': 'success', 'message': 'Game restored. Restarting session...'})
-                # Restart the game thread to apply the restored state
-                if game_thread and game_thread.is_alive():
-                    user_input_queue.put("exit") # Gracefully stop the old thread
-                    game_thread.join()
-                start_game_thread()
-            else:
-                emit('action_response', {'status': 'error', 'message': message})
-        except Exception as e:
-            emit('action_response', {'status': 'error', 'message': str(e)})
-    
-    elif action_type == 'deleteSave':
-        try:
-            if drive_manager:
-                manager = CloudSaveGameManager(drive_manager)
-            else:
-                manager = SaveGameManager()
-            save_folder = parameters.get("saveFolder")
-            success, message = manager.delete_save_game(save_folder)
-            if success:
-                emit('action_response', {'status': 'success', 'message': message})
-                # Refresh the save list
-                handle_action({'action': 'listSaves'})
-            else:
-                emit('action_response', {'status': 'error', 'message': message})
-        except Exception as e:
-            emit('action_response', {'status': 'error', 'message': str(e)})
-
-    elif action_type == 'nuclearReset':
+    if action_type == 'nuclearReset':
+        if session is not None:
+            # Only this table's campaign is reset; other sessions keep playing
+            session.reset()
+            emit('reset_complete', {'message': 'Campaign has been reset. Reloading...'})
+            return
         try:
             reset_campaign.perform_reset_logic()
             emit('reset_complete', {'message': 'Campaign has been reset. Reloading...'})
@@ -645,524 +424,123 @@ def handle_action(data):
             os._exit(0)
         except Exception as e:
             emit('error', {'message': f'Campaign reset failed: {str(e)}'})
+        return
+
+    if session is not None:
+        try:
+            # The session worker drives Google Drive itself when the server has cloud storage
+            replies, restart = session.save_action(action_type, parameters, cloud=drive_manager is not None)
+        except SessionError as e:
+            replies, restart = [('action_response', {'status': 'error', 'message': str(e)})], False
+    else:
+        if drive_manager:
+            manager = CloudSaveGameManager(drive_manager)
+        else:
+            manager = SaveGameManager()
+        replies, restart = state_queries.save_action(manager, action_type, parameters)
+
+    for event, payload in replies:
+        emit(event, payload)
+
+    if restart:
+        # Restart the game to apply the restored state
+        if session is not None:
+            session.restart()
+        else:
+            if game_thread and game_thread.is_alive():
+                user_input_queue.put("exit") # Gracefully stop the old thread
+                game_thread.join()
+            start_game_thread()
 
 @socketio.on('start_game')
 def handle_start_game():
     """Start the game in a separate thread"""
     global game_thread
     
+    session = client_session()
+    if session is not None:
+        try:
+            sessions.start(session)
+        except SessionError as e:
+            emit('error', {'message': str(e)})
+            return
+        emit('game_started', {'message': 'Game started successfully'})
+        return
+    
     if game_thread and game_thread.is_alive():
         emit('error', {'message': 'Game is already running'})
         return
     
+    start_game_thread()
+    
+    emit('game_started', {'message': 'Game started successfully'})
+
+def start_game_thread():
+    """Capture the standard streams and run the game loop in a background thread"""
+    global game_thread
+    
     # Uninstall debug interceptor to prevent competing stdout redirections
     uninstall_debug_interceptor()
     
-    # Set up output capture - both go to debug by default, filtering happens in write()
-    sys.stdout = WebOutputCapture(debug_output_queue, original_stdout)
-    sys.stderr = WebOutputCapture(debug_output_queue, original_stderr, is_error=True)
+    # Set up output capture - captured text is debug output; narration arrives as events
+    sys.stdout = WebOutputCapture(original_stdout)
+    sys.stderr = WebOutputCapture(original_stderr, is_error=True)
     sys.stdin = WebInput(user_input_queue)
     
     # Start the game in a separate thread
     game_thread = threading.Thread(target=run_game_loop, daemon=True)
     game_thread.start()
-    
-    emit('game_started', {'message': 'Game started successfully'})
 
 @socketio.on('request_player_data')
 def handle_player_data_request(data):
     """Handle requests for player data (inventory, stats, NPCs)"""
-    try:
-        dataType = data.get('dataType', 'stats')
-        response_data = None
-        
-        # Load party tracker to get player name and NPCs
-        party_tracker_path = 'party_tracker.json'
-        if os.path.exists(party_tracker_path):
-            with open(party_tracker_path, 'r', encoding='utf-8') as f:
-                party_tracker = json.load(f)
-        else:
-            emit('player_data_response', {'dataType': dataType, 'data': None, 'error': 'Party tracker not found'})
-            return
-        
-        if dataType == 'stats' or dataType == 'inventory' or dataType == 'spells':
-            # Get player name from party tracker
-            if party_tracker.get('partyMembers') and len(party_tracker['partyMembers']) > 0:
-                from updates.update_character_info import normalize_character_name
-                player_name = normalize_character_name(party_tracker['partyMembers'][0])
-                
-                # Try module-specific path first
-                from utils.module_path_manager import ModulePathManager
-                current_module = party_tracker.get("module", "").replace(" ", "_")
-                path_manager = ModulePathManager(current_module)
-                
-                try:
-                    player_file = path_manager.get_character_path(player_name)
-                    if os.path.exists(player_file):
-                        with open(player_file, 'r', encoding='utf-8') as f:
-                            response_data = json.load(f)
-                except:
-                    # Fallback to characters directory
-                    player_file = path_manager.get_character_path(player_name)
-                    if os.path.exists(player_file):
-                        with open(player_file, 'r', encoding='utf-8') as f:
-                            response_data = json.load(f)
-        
-        elif dataType == 'npcs':
-            # Get NPC data from party tracker
-            npcs = []
-            from utils.module_path_manager import ModulePathManager
-            current_module = party_tracker.get("module", "").replace(" ", "_")
-            path_manager = ModulePathManager(current_module)
-            
-            for npc_info in party_tracker.get('partyNPCs', []):
-                npc_name = npc_info['name']
-                
-                try:
-                    # Use fuzzy matching to find the correct NPC file
-                    from updates.update_character_info import find_character_file_fuzzy
-                    matched_name = find_character_file_fuzzy(npc_name)
-                    
-                    if matched_name:
-                        npc_file = path_manager.get_character_path(matched_name)
-                        if os.path.exists(npc_file):
-                            with open(npc_file, 'r', encoding='utf-8') as f:
-                                npc_data = json.load(f)
-                                npcs.append(npc_data)
-                except:
-                    pass
-            
-            response_data = npcs
-        
-        emit('player_data_response', {'dataType': dataType, 'data': response_data})
-    
-    except Exception as e:
-        emit('player_data_response', {'dataType': dataType, 'data': None, 'error': str(e)})
+    answer_query('player_data', data)
 
 @socketio.on('request_location_data')
 def handle_location_data_request():
     """Handle requests for current location information"""
-    try:
-        # Load party tracker to get current location
-        party_tracker_path = 'party_tracker.json'
-        if os.path.exists(party_tracker_path):
-            with open(party_tracker_path, 'r', encoding='utf-8') as f:
-                party_tracker = json.load(f)
-            
-            world_conditions = party_tracker.get('worldConditions', {})
-            location_info = {
-                'currentLocation': world_conditions.get('currentLocation', 'Unknown'),
-                'currentArea': world_conditions.get('currentArea', 'Unknown'),
-                'currentLocationId': world_conditions.get('currentLocationId', ''),
-                'currentAreaId': world_conditions.get('currentAreaId', ''),
-                'time': world_conditions.get('time', ''),
-                'day': world_conditions.get('day', ''),
-                'month': world_conditions.get('month', ''),
-                'year': world_conditions.get('year', '')
-            }
-            
-            emit('location_data_response', {'data': location_info})
-        else:
-            emit('location_data_response', {'data': None, 'error': 'Party tracker not found'})
-    
-    except Exception as e:
-        emit('location_data_response', {'data': None, 'error': str(e)})
+    answer_query('location_data')
 
 @socketio.on('request_npc_saves')
 def handle_npc_saves_request(data):
     """Handle requests for NPC saving throws"""
-    try:
-        npc_name = data.get('npcName', '')
-        
-        # Load the NPC file
-        from utils.module_path_manager import ModulePathManager
-        from utils.encoding_utils import safe_json_load
-        # Get current module from party tracker for consistent path resolution
-        try:
-            party_tracker = safe_json_load("party_tracker.json")
-            current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-            path_manager = ModulePathManager(current_module)
-        except:
-            path_manager = ModulePathManager()  # Fallback to reading from file
-        
-        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
-        
-        # Use fuzzy matching to find the correct NPC file
-        matched_name = find_character_file_fuzzy(npc_name)
-        if matched_name:
-            npc_file = path_manager.get_character_path(matched_name)
-        else:
-            # Fallback to normalized name if no match found
-            npc_file = path_manager.get_character_path(normalize_character_name(npc_name))
-        if os.path.exists(npc_file):
-            with open(npc_file, 'r', encoding='utf-8') as f:
-                npc_data = json.load(f)
-            
-            emit('npc_details_response', {'npcName': npc_name, 'data': npc_data, 'modalType': 'saves'})
-        else:
-            emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'})
-            
-    except Exception as e:
-        emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': str(e)})
+    answer_query('npc_details', {'npcName': data.get('npcName', ''), 'modalType': 'saves'})
 
 @socketio.on('request_npc_skills')
 def handle_npc_skills_request(data):
     """Handle requests for NPC skills"""
-    try:
-        npc_name = data.get('npcName', '')
-        
-        # Load the NPC file
-        from utils.module_path_manager import ModulePathManager
-        from utils.encoding_utils import safe_json_load
-        # Get current module from party tracker for consistent path resolution
-        try:
-            party_tracker = safe_json_load("party_tracker.json")
-            current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-            path_manager = ModulePathManager(current_module)
-        except:
-            path_manager = ModulePathManager()  # Fallback to reading from file
-        
-        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
-        
-        # Use fuzzy matching to find the correct NPC file
-        matched_name = find_character_file_fuzzy(npc_name)
-        if matched_name:
-            npc_file = path_manager.get_character_path(matched_name)
-        else:
-            # Fallback to normalized name if no match found
-            npc_file = path_manager.get_character_path(normalize_character_name(npc_name))
-        if os.path.exists(npc_file):
-            with open(npc_file, 'r', encoding='utf-8') as f:
-                npc_data = json.load(f)
-            
-            emit('npc_details_response', {'npcName': npc_name, 'data': npc_data, 'modalType': 'skills'})
-        else:
-            emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'})
-            
-    except Exception as e:
-        emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': str(e)})
+    answer_query('npc_details', {'npcName': data.get('npcName', ''), 'modalType': 'skills'})
 
 @socketio.on('request_npc_spells')
 def handle_npc_spells_request(data):
     """Handle requests for NPC spellcasting"""
-    try:
-        npc_name = data.get('npcName', '')
-        
-        # Load the NPC file
-        from utils.module_path_manager import ModulePathManager
-        from utils.encoding_utils import safe_json_load
-        # Get current module from party tracker for consistent path resolution
-        try:
-            party_tracker = safe_json_load("party_tracker.json")
-            current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-            path_manager = ModulePathManager(current_module)
-        except:
-            path_manager = ModulePathManager()  # Fallback to reading from file
-        
-        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
-        
-        # Use fuzzy matching to find the correct NPC file
-        matched_name = find_character_file_fuzzy(npc_name)
-        if matched_name:
-            npc_file = path_manager.get_character_path(matched_name)
-        else:
-            # Fallback to normalized name if no match found
-            npc_file = path_manager.get_character_path(normalize_character_name(npc_name))
-        if os.path.exists(npc_file):
-            with open(npc_file, 'r', encoding='utf-8') as f:
-                npc_data = json.load(f)
-            
-            emit('npc_details_response', {'npcName': npc_name, 'data': npc_data, 'modalType': 'spells'})
-        else:
-            emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'})
-            
-    except Exception as e:
-        emit('npc_details_response', {'npcName': npc_name, 'data': None, 'error': str(e)})
+    answer_query('npc_details', {'npcName': data.get('npcName', ''), 'modalType': 'spells'})
 
 @socketio.on('request_npc_inventory')
 def handle_npc_inventory_request(data):
     """Handle requests for NPC inventory"""
-    try:
-        npc_name = data.get('npcName', '')
-        
-        # Load the NPC file
-        from utils.module_path_manager import ModulePathManager
-        from utils.encoding_utils import safe_json_load
-        # Get current module from party tracker for consistent path resolution
-        try:
-            party_tracker = safe_json_load("party_tracker.json")
-            current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-            path_manager = ModulePathManager(current_module)
-        except:
-            path_manager = ModulePathManager()  # Fallback to reading from file
-        
-        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
-        
-        # Use fuzzy matching to find the correct NPC file
-        matched_name = find_character_file_fuzzy(npc_name)
-        if matched_name:
-            npc_file = path_manager.get_character_path(matched_name)
-        else:
-            # Fallback to normalized name if no match found
-            npc_file = path_manager.get_character_path(normalize_character_name(npc_name))
-        if os.path.exists(npc_file):
-            with open(npc_file, 'r', encoding='utf-8') as f:
-                npc_data = json.load(f)
-            
-            # Extract equipment for inventory display
-            equipment = npc_data.get('equipment', [])
-            emit('npc_inventory_response', {'npcName': npc_name, 'data': equipment})
-        else:
-            emit('npc_inventory_response', {'npcName': npc_name, 'data': None, 'error': 'NPC file not found'})
-            
-    except Exception as e:
-        emit('npc_inventory_response', {'npcName': npc_name, 'data': None, 'error': str(e)})
+    answer_query('npc_inventory', data)
 
 @socketio.on('request_party_data')
 def handle_party_data_request():
     """Handle requests for party member display (non-combat)."""
-    try:
-        from utils.file_operations import safe_read_json
-        from utils.module_path_manager import ModulePathManager
-        from updates.update_character_info import normalize_character_name, find_character_file_fuzzy
-        
-        # Load party tracker
-        party_tracker = safe_read_json("party_tracker.json")
-        if not party_tracker:
-            emit('party_data_response', {'members': []})
-            return
-        
-        # Get module info for path resolution
-        current_module = party_tracker.get("module", "").replace(" ", "_")
-        path_manager = ModulePathManager(current_module)
-        
-        party_members = []
-        
-        # Add player first
-        if party_tracker.get('partyMembers') and len(party_tracker['partyMembers']) > 0:
-            player_name = normalize_character_name(party_tracker['partyMembers'][0])
-            
-            # Try to load player data for HP info
-            try:
-                player_file = path_manager.get_character_path(player_name)
-                if os.path.exists(player_file):
-                    player_data = safe_read_json(player_file)
-                    if player_data:
-                        party_members.append({
-                            'name': player_data.get('name', player_name),
-                            'type': 'player',
-                            'currentHp': player_data.get('currentHp', 0),
-                            'maxHp': player_data.get('maxHp', 0)
-                        })
-            except:
-                # Fallback if can't load player data
-                party_members.append({
-                    'name': player_name,
-                    'type': 'player'
-                })
-        
-        # Add NPCs in order
-        for npc_info in party_tracker.get('partyNPCs', []):
-            npc_name = npc_info['name']
-            
-            try:
-                # Use fuzzy matching to find NPC file
-                matched_name = find_character_file_fuzzy(npc_name)
-                if matched_name:
-                    npc_file = path_manager.get_character_path(matched_name)
-                    if os.path.exists(npc_file):
-                        npc_data = safe_read_json(npc_file)
-                        if npc_data:
-                            party_members.append({
-                                'name': npc_data.get('name', npc_name),
-                                'type': 'npc',
-                                'currentHp': npc_data.get('currentHp', 0),
-                                'maxHp': npc_data.get('maxHp', 0)
-                            })
-                            continue
-            except:
-                pass
-            
-            # Fallback if can't load NPC data
-            party_members.append({
-                'name': npc_name,
-                'type': 'npc'
-            })
-        
-        emit('party_data_response', {'members': party_members})
-        
-    except Exception as e:
-        error(f"Failed to get party data: {str(e)}", exception=e, category="web_interface")
-        emit('party_data_response', {'members': []})
+    answer_query('party_data')
 
 @socketio.on('request_initiative_data')
 def handle_initiative_data_request():
     """Handles requests for the current combat initiative order."""
-    try:
-        from utils.file_operations import safe_read_json
-        
-        # Check if combat is active via party_tracker.json
-        party_tracker = safe_read_json("party_tracker.json")
-        if not party_tracker:
-            emit('initiative_data_response', {'active': False, 'combatants': []})
-            return
-
-        # Get the active combat encounter ID
-        active_encounter_id = party_tracker.get("worldConditions", {}).get("activeCombatEncounter")
-        if not active_encounter_id:
-            # No combat is active
-            emit('initiative_data_response', {'active': False, 'combatants': []})
-            return
-
-        # Load the specific encounter file
-        encounter_file = f"modules/encounters/encounter_{active_encounter_id}.json"
-        encounter_data = safe_read_json(encounter_file)
-        if not encounter_data or "creatures" not in encounter_data:
-            emit('initiative_data_response', {'active': False, 'combatants': []})
-            return
-
-        # Filter for living combatants only
-        living_combatants = [
-            c for c in encounter_data["creatures"] 
-            if c.get("status", "unknown").lower() == "alive"
-        ]
-        
-        if not living_combatants:
-            # Combat is over if no one is alive
-            emit('initiative_data_response', {'active': False, 'combatants': []})
-            return
-
-        # Sort by initiative (highest first)
-        sorted_combatants = sorted(
-            living_combatants, 
-            key=lambda x: x.get("initiative", 0), 
-            reverse=True
-        )
-
-        # Prepare clean data for frontend
-        combatant_list = [
-            {
-                "name": c.get("name"),
-                "type": c.get("type"),  # 'player', 'npc', or 'enemy'
-                "initiative": c.get("initiative"),
-                "currentHp": c.get("currentHitPoints"),
-                "maxHp": c.get("maxHitPoints"),
-                "monsterType": c.get("monsterType"),  # For enemy type lookup
-                "class": c.get("class")  # For NPC class lookup
-            }
-            for c in sorted_combatants
-        ]
-
-        # Send the data to the browser
-        emit('initiative_data_response', {
-            'active': True, 
-            'combatants': combatant_list,
-            'round': encounter_data.get('combat_round', 1)
-        })
-
-    except Exception as e:
-        error(f"Error handling initiative data request: {e}", exception=e, category="web_interface")
-        emit('initiative_data_response', {'active': False, 'combatants': []})
-
-# Add this entire function to web_interface.py
+    answer_query('initiative_data')
 
 @socketio.on('request_plot_data')
 def handle_plot_data_request():
     """Handle requests for the current module's plot data."""
-    try:
-        # Step 1: Find out which module is currently active by checking the party tracker.
-        party_tracker_path = 'party_tracker.json'
-        if not os.path.exists(party_tracker_path):
-            emit('plot_data_response', {'data': None, 'error': 'Party tracker not found'})
-            return
-
-        with open(party_tracker_path, 'r', encoding='utf-8') as f:
-            party_tracker = json.load(f)
-        
-        current_module = party_tracker.get("module", "").replace(" ", "_")
-        if not current_module:
-            emit('plot_data_response', {'data': None, 'error': 'Current module not set in party tracker'})
-            return
-
-        # Step 2: Use the ModulePathManager to get the correct path to the plot file for that module.
-        # This makes sure we always load the plot for the adventure the player is actually on.
-        from utils.module_path_manager import ModulePathManager
-        path_manager = ModulePathManager(current_module)
-        
-        # Step 2.5: Check for player-friendly quest file first
-        player_quests_path = os.path.join(path_manager.module_dir, f"player_quests_{current_module}.json")
-        
-        if os.path.exists(player_quests_path):
-            # Use player-friendly quest descriptions
-            with open(player_quests_path, 'r', encoding='utf-8') as f:
-                player_quests_data = json.load(f)
-            
-            # Convert player quest format back to module_plot format for compatibility
-            plot_data = {
-                "plotPoints": []
-            }
-            
-            for quest_id, quest_data in player_quests_data.get("quests", {}).items():
-                plot_point = {
-                    "id": quest_data.get("id"),
-                    "title": quest_data.get("title"),
-                    "description": quest_data.get("playerDescription", quest_data.get("originalDescription", "")),
-                    "status": quest_data.get("status"),
-                    "sideQuests": []
-                }
-                
-                # Add side quests
-                for sq_id, sq_data in quest_data.get("sideQuests", {}).items():
-                    plot_point["sideQuests"].append({
-                        "id": sq_data.get("id"),
-                        "title": sq_data.get("title"),
-                        "description": sq_data.get("playerDescription", ""),
-                        "status": sq_data.get("status")
-                    })
-                
-                plot_data["plotPoints"].append(plot_point)
-            
-            debug(f"WEB_INTERFACE: Using player-friendly quests for {current_module}", category="web_interface")
-        else:
-            # Fallback to original module_plot.json
-            plot_file_path = path_manager.get_plot_path()
-
-            if not os.path.exists(plot_file_path):
-                emit('plot_data_response', {'data': None, 'error': f'Plot file not found for module: {current_module}'})
-                return
-                
-            # Step 3: Read the plot file and send its data back to the browser.
-            with open(plot_file_path, 'r', encoding='utf-8') as f:
-                plot_data = json.load(f)
-            
-            debug(f"WEB_INTERFACE: Using original plot data for {current_module} (no player quests file)", category="web_interface")
-        
-        # The 'emit' function sends the data over the web socket connection to the player's browser.
-        emit('plot_data_response', {'data': plot_data})
-
-    except Exception as e:
-        # If anything goes wrong, send an error message so we can debug it.
-        emit('plot_data_response', {'data': None, 'error': str(e)})
+    answer_query('plot_data')
 
-# CORRECTLY PLACED STORAGE HANDLER
 @socketio.on('request_storage_data')
 def handle_request_storage_data():
     """Handles a request from the client to view all player storage."""
     debug("WEB_REQUEST: Received request for storage data from client", category="web_interface")
-    try:
-        from core.managers.storage_manager import get_storage_manager
-        manager = get_storage_manager()
-        # Calling view_storage() with no location_id gets ALL storage containers.
-        storage_data = manager.view_storage()
-        
-        if storage_data.get("success"):
-            emit('storage_data_response', {'data': storage_data})
-        else:
-            emit('error', {'message': 'Failed to retrieve storage data.'})
-            
-    except Exception as e:
-        print(f"ERROR handling storage request: {e}")
-        emit('error', {'message': 'An internal error occurred while fetching storage data.'})
+    answer_query('storage_data')
 
 @socketio.on('user_exit')
 def handle_user_exit():
@@ -1182,6 +560,15 @@ def handle_model_toggle(data):
     try:
         import config
         use_gpt5 = data.get('use_gpt5', False)
+        
+        session = client_session()
+        if session is not None:
+            # The session's engine reads the setting; only that table hears about it
+            use_gpt5 = session.set_model(use_gpt5)
+            debug(f"Session {session.id} model toggled to: {'GPT-5' if use_gpt5 else 'GPT-4.1'}", category="web_interface")
+            emit('model_toggled', {'use_gpt5': use_gpt5}, to=session.room)
+            return
+        
         config.USE_GPT5_MODELS = use_gpt5
         
         # Log the change
@@ -1277,7 +664,9 @@ def handle_generate_image(data):
         # Save the image locally with metadata
         try:
             # Get current module and game state
-            party_data = safe_read_json("party_tracker.json")
+            session = client_session()
+            state_root = session.root if session else ''
+            party_data = safe_read_json(os.path.join(state_root, "party_tracker.json"))
             current_module = party_data.get("module", "unknown_module")
             world_conditions = party_data.get("worldConditions", {})
             
@@ -1290,7 +679,7 @@ def handle_generate_image(data):
             location_name = world_conditions.get("currentLocation", "Unknown Location")
             
             # Create images directory for the module
-            images_dir = os.path.join("modules", current_module, "images")
+            images_dir = os.path.join(state_root, "modules", current_module, "images")
             os.makedirs(images_dir, exist_ok=True)
             
             # Generate filename with both timestamps
@@ -1351,9 +740,8 @@ def handle_generate_image(data):
 def run_game_loop():
     """Run the main game loop with enhanced error handling"""
     try:
-        # Start the output sender thread
-        output_thread = threading.Thread(target=send_output_to_clients, daemon=True)
-        output_thread.start()
+        # Start the output dispatcher (no-op if already running)
+        output_dispatcher.start()
         
         # Run the main game
         dm_main.main_game_loop()
@@ -1366,8 +754,8 @@ def run_game_loop():
         
         try:
             # Attempt to reset streams
-            sys.stdout = WebOutputCapture(debug_output_queue, original_stdout)
-            sys.stderr = WebOutputCapture(debug_output_queue, original_stderr, is_error=True)
+            sys.stdout = WebOutputCapture(original_stdout)
+            sys.stderr = WebOutputCapture(original_stderr, is_error=True)
             sys.stdin = WebInput(user_input_queue)
             try:
                 print("Stream recovery attempted")
@@ -1419,118 +807,6 @@ def run_game_loop():
             except Exception:
                 pass
 
-def send_output_to_clients():
-    """Send queued output to all connected clients"""
-    last_token_update = time.time()
-    
-    while True:
-        try:
-            # Send game output
-            while not game_output_queue.empty():
-                try:
-                    msg = game_output_queue.get()
-                    socketio.emit('game_output', msg)
-                except Exception:
-                    # If queue operation or emit fails, just continue
-                    break
-            
-            # Send debug output
-            while not debug_output_queue.empty():
-                try:
-                    msg = debug_output_queue.get()
-                    socketio.emit('debug_output', msg)
-                except Exception:
-                    # If queue operation or emit fails, just continue
-                    break
-            
-            # Try to send token updates every 2 seconds (completely isolated)
-            current_time = time.time()
-            if current_time - last_token_update > 2:
-                last_token_update = current_time  # Update time FIRST to prevent retry loops
-                try:
-                    # Try to import and get stats
-                    from utils.gemini_usage_tracker import get_usage_stats
-                    stats = get_usage_stats()
-                    # Send to UI silently
-                    socketio.emit('token_update', {
-                        'tpm': stats.get('tpm', 0),
-                        'rpm': stats.get('rpm', 0),
-                        'total_tokens': stats.get('total_tokens', 0)
-                    })
-                except:
-                    # If anything fails, just send zeros (but don't spam)
-                    try:
-                        socketio.emit('token_update', {
-                            'tpm': 0,
-                            'rpm': 0,
-                            'total_tokens': 0
-                        })
-                    except:
-                        pass  # Even sending zeros failed, just skip
-                        
-        except Exception:
-            # If any other error occurs, just continue
-            pass
-        
-        time.sleep(0.1)  # Small delay to prevent CPU spinning
-
-def send_output_to_clients_original():
-    """Send queued output to all connected clients"""
-    last_token_update = time.time()
-    
-    while True:
-        try:
-            # Send game output
-            while not game_output_queue.empty():
-                try:
-                    msg = game_output_queue.get()
-                    socketio.emit('game_output', msg)
-                except Exception:
-                    # If queue operation or emit fails, just continue
-                    break
-            
-            # Send debug output
-            while not debug_output_queue.empty():
-                try:
-                    msg = debug_output_queue.get()
-                    socketio.emit('debug_output', msg)
-                except Exception:
-                    # If queue operation or emit fails, just continue
-                    break
-            
-            # Send token updates every 2 seconds
-            current_time = time.time()
-            if current_time - last_token_update > 2:
-                try:
-                    from utils.token_tracker import get_tracker
-                    tracker = get_tracker()
-                    stats = tracker.get_stats()
-                    socketio.emit('token_update', {
-                        'tpm': stats['tpm'],
-                        'rpm': stats['rpm'],
-                        'total_tokens': stats['total_tokens']
-                    })
-                except (ImportError, AttributeError, Exception):
-                    # If token tracking fails for any reason, send zeros to UI
-                    # Don't let token errors block the main output processing
-                    try:
-                        socketio.emit('token_update', {
-                            'tpm': 0,
-                            'rpm': 0,
-                            'total_tokens': 0
-                        })
-                    except Exception:
-                        # If even sending zeros fails, just skip token updates
-                        pass
-                finally:
-                    # Always update the timestamp to prevent infinite retries
-                    last_token_update = current_time
-        except Exception:
-            # If any other error occurs, just continue
-            pass
-        
-        time.sleep(0.1)  # Small delay to prevent CPU spinning
-
 def open_browser():
     """Open the web browser after a short delay"""
     time.sleep(1.5)  # Wait for server to start
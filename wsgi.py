@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+# wsgi.py - Entry point for Gunicorn on Render to ensure monkey_patch() is called first.
+# (It used to sit at the top of main.py, which made every import of the game
+# engine - console game, session workers - start the web server stack too.)
+import eventlet
+eventlet.monkey_patch()
+
+# Now that monkey_patch() has been called, we can import the Flask app and socketio instance.
+from web.web_interface import app as flask_app, socketio
+
+# Gunicorn will look for this 'app' object. For Flask-SocketIO, this must be the SocketIO instance.
+app = socketio